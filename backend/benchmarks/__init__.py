@@ -0,0 +1,8 @@
+"""
+benchmarks - Замеры производительности анализатора (не входят в тесты).
+
+Запуск из папки backend:
+    python -m benchmarks.bench_profiler
+    python -m benchmarks.bench_analyzer --scenario small medium
+    python -m benchmarks.generator out.csv --rows 100000 --columns 20
+"""
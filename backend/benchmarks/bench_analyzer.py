@@ -0,0 +1,336 @@
+#!/usr/bin/env python
+"""
+bench_analyzer.py - Бенчмарки анализатора CSV и API на синтетических данных
+
+Для каждого сценария (размер таблицы, типы столбцов, пропуски, дубликаты, кодировка)
+генерируется детерминированный CSV (см. generator.py) и измеряются время и пик памяти:
+- CSVAnalyzer._load_csv (из CSV и из Parquet-sidecar);
+- каждая проверка: _check_missing_values, _check_duplicates, _calculate_statistics;
+- _save_results;
+- полный analyze() в режимах full и streaming;
+- эндпоинты /api/upload/, /api/datasets/, /api/datasets/{id}/, /api/datasets/{id}/analyze/.
+
+Всё выполняется в отдельной тестовой базе и во временной MEDIA_ROOT -
+рабочая база и загруженные файлы не затрагиваются.
+
+Время - лучшее из --repeat запусков; пик памяти - отдельный запуск под tracemalloc
+(учитываются выделения Python и NumPy/pandas).
+Результаты сохраняются в JSON; --baseline сравнивает их с прошлым прогоном.
+
+Запуск из папки backend:
+    python -m benchmarks.bench_analyzer --scenario small medium
+    python -m benchmarks.bench_analyzer --baseline benchmarks/results/old.json
+    python -m benchmarks.bench_analyzer --compare old.json new.json
+"""
+
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+from django.core.files import File  # noqa: E402
+from django.core.files.uploadedfile import SimpleUploadedFile  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.runner import DiscoverRunner  # noqa: E402
+from django.test.utils import override_settings, setup_test_environment  # noqa: E402
+
+from benchmarks.generator import generate_csv  # noqa: E402
+from data_quality.analyzer import ANALYZER_VERSION, CSVAnalyzer  # noqa: E402
+from data_quality.models import Dataset  # noqa: E402
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+# Готовые сценарии: параметры generate_csv
+SCENARIOS = {
+    'small': {'rows': 10_000, 'columns': 10},
+    'medium': {'rows': 200_000, 'columns': 20},
+    'wide': {'rows': 20_000, 'columns': 200},
+    'text': {'rows': 100_000, 'columns': 20, 'mix': {'text': 0.8, 'float': 0.2}},
+    'cp1251': {'rows': 100_000, 'columns': 20, 'encoding': 'cp1251', 'delimiter': ';'},
+    'dirty': {'rows': 100_000, 'columns': 20, 'missing_rate': 0.3, 'duplicate_rate': 0.2},
+}
+
+# Сколько датасетов в списке при замере GET /api/datasets/
+LIST_DATASETS = 50
+
+# Печать анализатора (print на каждом шаге) во время замеров скрываем
+VERBOSE = False
+
+
+def quiet():
+    """Глушит stdout анализатора, если не указан --verbose."""
+    if VERBOSE:
+        return contextlib.nullcontext()
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+# ============================================================================
+# 1. ИЗМЕРЕНИЯ
+# ============================================================================
+def measure(func, repeat=3, setup=None):
+    """
+    Меряет функцию: лучшее время из repeat запусков и пик памяти (tracemalloc).
+
+    Args:
+        func: Измеряемая функция без аргументов
+        repeat: Количество запусков для времени
+        setup: Функция, которая вызывается перед каждым запуском (не измеряется)
+
+    Returns:
+        dict: seconds, peak_mb
+    """
+    best = float('inf')
+    with quiet():
+        for _ in range(repeat):
+            if setup:
+                setup()
+            start = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - start)
+
+        # Пик памяти - отдельным запуском: tracemalloc сильно замедляет код
+        if setup:
+            setup()
+        tracemalloc.start()
+        try:
+            func()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    return {'seconds': round(best, 6), 'peak_mb': round(peak / 1024 / 1024, 3)}
+
+
+def create_dataset(path, name):
+    """Датасет с копией CSV файла во временной MEDIA_ROOT."""
+    with open(path, 'rb') as f:
+        return Dataset.objects.create(name=name, csv_file=File(f, name=os.path.basename(path)))
+
+
+# ============================================================================
+# 2. СЦЕНАРИЙ
+# ============================================================================
+def run_scenario(name, params, workdir, repeat):
+    """
+    Генерирует CSV и прогоняет все замеры.
+
+    Returns:
+        dict: {фаза: {"seconds": ..., "peak_mb": ...}}
+    """
+    csv_path = os.path.join(workdir, f'{name}.csv')
+    generate_csv(csv_path, **params)
+    size_mb = os.path.getsize(csv_path) / 1024 / 1024
+    print(f"\n📦 Сценарий {name}: {params} ({size_mb:.1f} МБ)")
+
+    results = {}
+    dataset = create_dataset(csv_path, f'bench-{name}')
+    analyzer = CSVAnalyzer(dataset, mode='full')
+
+    # --- Загрузка ---
+    with override_settings(DATA_QUALITY_SIDECAR_ENABLED=False):
+        results['load_csv'] = measure(analyzer._load_csv, repeat)
+    with override_settings(DATA_QUALITY_SIDECAR_ENABLED=True), quiet():
+        analyzer._load_csv()  # пишет sidecar
+        results['load_csv_sidecar'] = measure(analyzer._load_csv, repeat)
+
+    # --- Проверки (каждая "с нуля", без готового профиля) ---
+    def reset_profile():
+        analyzer._profile = None
+
+    results['check_missing_values'] = measure(analyzer._check_missing_values, repeat, reset_profile)
+    results['check_duplicates'] = measure(analyzer._check_duplicates, repeat)
+    results['calculate_statistics'] = measure(analyzer._calculate_statistics, repeat, reset_profile)
+
+    # --- Сохранение в базу ---
+    with quiet():
+        checks = (
+            analyzer._check_missing_values(),
+            analyzer._check_duplicates(),
+            analyzer._calculate_statistics(),
+        )
+    results['save_results'] = measure(lambda: analyzer._save_results(*checks), repeat)
+
+    # --- Полный анализ (без кэша результатов) ---
+    with override_settings(DATA_QUALITY_RESULT_CACHE_MAX_ENTRIES=0):
+        for mode in ('full', 'streaming'):
+            results[f'analyze_{mode}'] = measure(CSVAnalyzer(dataset, mode=mode).analyze, repeat)
+
+        results.update(run_api(csv_path, dataset, repeat))
+
+    for phase, values in results.items():
+        print(f"   {phase:<28} {values['seconds']:>10.4f} с {values['peak_mb']:>10.1f} МБ")
+    return results
+
+
+def run_api(csv_path, dataset, repeat):
+    """Замеры эндпоинтов через тестовый клиент Django (весь стек DRF, без сети)."""
+    client = Client()
+    results = {}
+
+    with open(csv_path, 'rb') as f:
+        content = f.read()
+
+    def upload():
+        response = client.post('/api/upload/', {'file': SimpleUploadedFile('upload.csv', content)})
+        assert response.status_code == 201, response.content
+    results['api_upload'] = measure(upload, repeat)
+
+    # Список: не меньше LIST_DATASETS датасетов с проверками и отчётами
+    with quiet():
+        for i in range(max(0, LIST_DATASETS - Dataset.objects.count())):
+            clone = Dataset.objects.create(name=f'bench-list-{i}', csv_file=dataset.csv_file.name)
+            CSVAnalyzer(clone, mode='full').analyze()
+
+    def get(url):
+        def request():
+            response = client.get(url)
+            assert response.status_code == 200, response.content
+        return request
+
+    results['api_datasets_list'] = measure(get('/api/datasets/'), repeat)
+    results['api_dataset_detail'] = measure(get(f'/api/datasets/{dataset.id}/'), repeat)
+
+    def analyze():
+        response = client.post(f'/api/datasets/{dataset.id}/analyze/?mode=full')
+        assert response.status_code == 202, response.content
+    with override_settings(DATA_QUALITY_JOBS_EAGER=True):
+        results['api_analyze_eager'] = measure(analyze, repeat)
+
+    return results
+
+
+# ============================================================================
+# 3. СОХРАНЕНИЕ И СРАВНЕНИЕ
+# ============================================================================
+def environment_info():
+    """Версии и окружение - чтобы понимать, что именно сравниваем."""
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        'created_at': datetime.datetime.now().isoformat(timespec='seconds'),
+        'git_commit': commit,
+        'analyzer_version': ANALYZER_VERSION,
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def compare(baseline, current, threshold):
+    """
+    Печатает сравнение двух прогонов.
+
+    Returns:
+        list: Регрессии [(сценарий, фаза, метрика, было, стало)]
+    """
+    regressions = []
+    print(f"\n{'сценарий':<10} {'фаза':<26} {'было, с':>10} {'стало, с':>10} {'Δ':>8} {'было, МБ':>10} {'стало, МБ':>10}")
+    for scenario, phases in current['scenarios'].items():
+        old_phases = baseline['scenarios'].get(scenario, {})
+        for phase, values in phases.items():
+            old = old_phases.get(phase)
+            if old is None:
+                continue
+            change = values['seconds'] / old['seconds'] - 1 if old['seconds'] else 0
+            mark = ''
+            for metric in ('seconds', 'peak_mb'):
+                if old[metric] and values[metric] > old[metric] * (1 + threshold):
+                    regressions.append((scenario, phase, metric, old[metric], values[metric]))
+                    mark = ' ⚠️'
+            print(
+                f"{scenario:<10} {phase:<26} {old['seconds']:>10.4f} {values['seconds']:>10.4f} "
+                f"{change:>+7.0%} {old['peak_mb']:>10.1f} {values['peak_mb']:>10.1f}{mark}"
+            )
+
+    if regressions:
+        print(f"\n❌ Регрессий (хуже более чем на {threshold:.0%}): {len(regressions)}")
+    else:
+        print(f"\n✅ Регрессий нет (порог {threshold:.0%})")
+    return regressions
+
+
+def load_json(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+# ============================================================================
+# 4. ЗАПУСК
+# ============================================================================
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenario', nargs='+', default=['small', 'medium'], choices=sorted(SCENARIOS))
+    parser.add_argument('--repeat', type=int, default=3, help='Запусков на замер (берётся лучшее время)')
+    parser.add_argument('--output', help='Куда сохранить JSON (по умолчанию benchmarks/results/)')
+    parser.add_argument('--baseline', help='JSON прошлого прогона для сравнения')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='Только сравнить два JSON')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Допустимое ухудшение (0.2 = 20%%)')
+    parser.add_argument('--verbose', action='store_true', help='Не скрывать вывод анализатора')
+    args = parser.parse_args()
+
+    global VERBOSE
+    VERBOSE = args.verbose
+
+    if args.compare:
+        regressions = compare(load_json(args.compare[0]), load_json(args.compare[1]), args.threshold)
+        sys.exit(1 if regressions else 0)
+
+    setup_test_environment()
+    runner = DiscoverRunner(verbosity=0)
+    old_config = runner.setup_databases()
+    workdir = tempfile.mkdtemp(prefix='dq-bench-')
+    media_root = os.path.join(workdir, 'media')
+
+    report = {'environment': environment_info(), 'scenarios': {}}
+    try:
+        with override_settings(MEDIA_ROOT=media_root, DATA_QUALITY_JOBS_EAGER=False):
+            for name in args.scenario:
+                report['scenarios'][name] = run_scenario(name, SCENARIOS[name], workdir, args.repeat)
+    finally:
+        runner.teardown_databases(old_config)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    # Пиковое потребление памяти всем процессом (Linux - в килобайтах)
+    report['environment']['max_rss_mb'] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.datetime.now().strftime('%Y%m%d-%H%M%S')
+        output = os.path.join(RESULTS_DIR, f'bench-{stamp}.json')
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 Результаты сохранены: {output}")
+
+    if args.baseline:
+        regressions = compare(load_json(args.baseline), report, args.threshold)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+"""
+bench_api_payloads.py - Размер и время отдачи больших ответов API
+
+Берёт реальные результаты проверок широкой таблицы (по умолчанию 1000 столбцов:
+числовые, текстовые, с пропусками - profile_dataframe по синтетическому DataFrame),
+собирает из них ответ GET /api/datasets/{id}/ и сравнивает:
+- рендеринг: стандартный JSONRenderer DRF и FastJSONRenderer (orjson);
+- байты на проводе и время сжатия: без сжатия, gzip и brotli (если установлен пакет brotli).
+
+База данных не нужна - замеряется только то, что делает рендерер и CompressionMiddleware.
+Время - лучшее из --repeat запусков.
+
+Запуск из папки backend:
+    python -m benchmarks.bench_api_payloads
+    python -m benchmarks.bench_api_payloads --columns 3000 --rows 5000 --output payloads.json
+"""
+
+import argparse
+import json
+import os
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+import numpy as np
+import pandas as pd
+from django.utils.text import compress_string
+from rest_framework.renderers import JSONRenderer
+
+from data_quality import middleware
+from data_quality.profiler import finite_or_none, profile_dataframe
+from data_quality.renderers import FastJSONRenderer, orjson
+
+
+# ============================================================================
+# 1. ДАННЫЕ
+# ============================================================================
+def make_frame(columns, rows, seed=0):
+    """Широкая таблица: 2/3 числовых столбцов, 1/3 текстовых, ~10% пропусков."""
+    rng = np.random.default_rng(seed)
+    data = {}
+    for i in range(columns):
+        if i % 3:
+            values = rng.normal(100, 15, rows)
+            values[rng.random(rows) < 0.1] = np.nan
+            data[f'measure_{i}'] = values
+        else:
+            values = rng.choice([f'категория_{j}' for j in range(50)], rows).astype(object)
+            values[rng.random(rows) < 0.1] = None
+            data[f'label_{i}'] = values
+    return pd.DataFrame(data)
+
+
+def make_payload(frame):
+    """Ответ детального просмотра датасета с тремя проверками, как DatasetSerializer."""
+    missing, statistics = profile_dataframe(frame)
+    duplicates = {'total_rows': len(frame), 'duplicate_rows': 0, 'duplicate_percentage': 0.0,
+                  'duplicate_indices': []}
+    checks = [
+        {'id': i, 'check_type': check_type, 'check_type_display': check_type, 'result_json': result,
+         'created_at': '2026-01-01T00:00:00Z'}
+        for i, (check_type, result) in enumerate(
+            (('missing', missing), ('duplicates', duplicates), ('statistics', statistics)), start=1)
+    ]
+    return finite_or_none({
+        'id': 1, 'name': 'wide.csv', 'status': 'completed', 'status_display': 'Обработан',
+        'row_count': len(frame), 'column_count': len(frame.columns),
+        'checks': checks, 'report': {'id': 1, 'summary': 'Сводка', 'issues_count': missing['missing_cells']},
+    })
+
+
+# ============================================================================
+# 2. ЗАМЕРЫ
+# ============================================================================
+def best_time(function, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def run(columns, rows, repeat):
+    payload = make_payload(make_frame(columns, rows))
+    report = {'columns': columns, 'rows': rows, 'orjson': orjson is not None,
+              'brotli': middleware.brotli is not None, 'render': {}, 'wire': {}}
+
+    for name, renderer in (('drf-json', JSONRenderer()), ('fast-json', FastJSONRenderer())):
+        seconds, body = best_time(lambda: renderer.render(payload), repeat)
+        report['render'][name] = {'ms': round(seconds * 1000, 2), 'bytes': len(body)}
+
+    body = FastJSONRenderer().render(payload)
+    encoders = {'identity': lambda: body, 'gzip': lambda: compress_string(body)}
+    if middleware.brotli is not None:
+        encoders['br'] = lambda: middleware.compress(body, 'br')
+    for name, encode in encoders.items():
+        seconds, encoded = best_time(encode, repeat)
+        report['wire'][name] = {
+            'ms': round(seconds * 1000, 2),
+            'bytes': len(encoded),
+            'ratio': round(len(body) / len(encoded), 1),
+        }
+    return report
+
+
+def print_report(report):
+    print(f"\n📦 Ответ на {report['columns']} столбцов ({report['rows']} строк)")
+    if not report['orjson']:
+        print("⚠️ orjson не установлен - fast-json работает через json из стандартной библиотеки")
+    print(f"{'рендерер':<12} {'мс':>9} {'байт':>12}")
+    for name, row in report['render'].items():
+        print(f"{name:<12} {row['ms']:>9} {row['bytes']:>12}")
+    print(f"\n{'сжатие':<12} {'мс':>9} {'байт':>12} {'во сколько раз':>15}")
+    for name, row in report['wire'].items():
+        print(f"{name:<12} {row['ms']:>9} {row['bytes']:>12} {row['ratio']:>15}")
+    if not report['brotli']:
+        print("ℹ️ brotli не установлен (pip install brotli) - клиентам отдаётся gzip")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--columns', type=int, default=1000, help='Столбцов в таблице')
+    parser.add_argument('--rows', type=int, default=2000, help='Строк в таблице')
+    parser.add_argument('--repeat', type=int, default=5, help='Повторов каждого замера')
+    parser.add_argument('--output', help='Куда сохранить JSON с результатами')
+    args = parser.parse_args()
+
+    report = run(args.columns, args.rows, args.repeat)
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Результаты сохранены: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
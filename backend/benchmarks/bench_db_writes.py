@@ -0,0 +1,261 @@
+#!/usr/bin/env python
+"""
+bench_db_writes.py - Нагрузочный тест записи в базу параллельными анализами
+
+Несколько процессов-писателей ведут себя как воркеры анализа: пишут прогресс
+(save_progress) и сохраняют результаты (CSVAnalyzer._save_results), а процессы-читатели
+опрашивают датасеты, как это делают клиенты. Замеряется, сколько анализов в секунду
+удаётся сохранить, задержка сохранения и сколько записей упало с "database is locked".
+
+Профили базы (см. config/database.py):
+- sqlite-default - SQLite с настройками по умолчанию (rollback journal, BEGIN DEFERRED);
+- sqlite-tuned   - WAL, busy_timeout, synchronous=NORMAL, BEGIN IMMEDIATE;
+- postgres       - PostgreSQL с пулом соединений (нужен запущенный сервер,
+                   например docker compose up -d postgres, и переменные POSTGRES_*).
+
+Каждый профиль запускается в отдельном процессе со своей временной базой:
+для SQLite - файл во временной папке, для PostgreSQL - тестовая база test_<имя>.
+
+Запуск из папки backend:
+    python -m benchmarks.bench_db_writes
+    python -m benchmarks.bench_db_writes --writers 16 --seconds 20
+    POSTGRES_PASSWORD=data_quality python -m benchmarks.bench_db_writes --profile sqlite-tuned postgres
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+# Переменные окружения профилей: читаются в config/settings.py при запуске процесса
+PROFILES = {
+    'sqlite-default': {'DATA_QUALITY_DB': 'sqlite', 'DATA_QUALITY_SQLITE_TUNED': '0'},
+    'sqlite-tuned': {'DATA_QUALITY_DB': 'sqlite', 'DATA_QUALITY_SQLITE_TUNED': '1'},
+    'postgres': {'DATA_QUALITY_DB': 'postgres'},
+}
+
+# Сколько раз писатель обновляет прогресс на один анализ (смена фаз в CSVAnalyzer)
+PROGRESS_UPDATES = 5
+
+CSV_CONTENT = b'id,city,amount\n' + b''.join(
+    f'{i},city{i % 7},{i * 1.5 if i % 5 else ""}\n'.encode() for i in range(200)
+)
+
+
+# ============================================================================
+# 1. ПРОЦЕССЫ ПИСАТЕЛЕЙ И ЧИТАТЕЛЕЙ
+# ============================================================================
+def writer_loop(dataset_id, results, deadline, queue):
+    """Повторяет "анализ" одного датасета до deadline: прогресс + сохранение результатов."""
+    from django.db import OperationalError, connections
+
+    from data_quality.analyzer import CSVAnalyzer
+    from data_quality.models import Dataset
+    from data_quality.progress import PHASES, make_progress, save_progress
+
+    connections.close_all()
+    phases = list(PHASES)[1:1 + PROGRESS_UPDATES]
+    stats = {'saved': 0, 'progress_writes': 0, 'errors': 0, 'latencies': []}
+    dataset = Dataset.objects.get(pk=dataset_id)
+    analyzer = CSVAnalyzer(dataset, mode='full', progress_callback=lambda *args: None)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        while time.time() < deadline:
+            try:
+                for phase in phases:
+                    save_progress(dataset_id, make_progress(phase), status='processing')
+                    stats['progress_writes'] += 1
+                start = time.perf_counter()
+                if analyzer._save_results(*results):
+                    stats['saved'] += 1
+                    stats['latencies'].append(time.perf_counter() - start)
+            except OperationalError:
+                # "database is locked" - ровно то, что видят воркеры под нагрузкой
+                stats['errors'] += 1
+
+    connections.close_all()
+    queue.put(('writer', stats))
+
+
+def reader_loop(deadline, queue):
+    """Опрашивает датасеты, как список в интерфейсе и long-poll прогресса."""
+    from django.db import OperationalError, connections
+
+    from data_quality.models import Dataset
+
+    connections.close_all()
+    stats = {'reads': 0, 'errors': 0}
+    while time.time() < deadline:
+        try:
+            list(Dataset.objects.values('id', 'status', 'progress', 'row_count'))
+            stats['reads'] += 1
+        except OperationalError:
+            stats['errors'] += 1
+    connections.close_all()
+    queue.put(('reader', stats))
+
+
+# ============================================================================
+# 2. ОДИН ПРОФИЛЬ (в отдельном процессе)
+# ============================================================================
+def run_profile(name, writers, readers, seconds, workdir):
+    """
+    Готовит базу и датасеты, запускает писателей и читателей.
+
+    Returns:
+        dict: Метрики профиля
+    """
+    import django
+
+    django.setup()
+
+    from django.conf import settings
+    from django.core.files.base import ContentFile
+    from django.core.management import call_command
+    from django.db import connection, connections
+    from django.test.runner import DiscoverRunner
+
+    from config.database import close_connection_pools
+    from data_quality.analyzer import CSVAnalyzer
+    from data_quality.models import Dataset
+
+    settings.MEDIA_ROOT = os.path.join(workdir, 'media')
+    old_config = None
+    if connection.vendor == 'sqlite':
+        call_command('migrate', verbosity=0)
+    else:
+        # Для PostgreSQL - отдельная тестовая база, рабочая не затрагивается
+        old_config = DiscoverRunner(verbosity=0).setup_databases()
+
+    try:
+        dataset_ids = []
+        for i in range(writers):
+            dataset = Dataset.objects.create(
+                name=f'bench-{i}.csv', csv_file=ContentFile(CSV_CONTENT, name=f'bench-{i}.csv'),
+                content_hash=f'{i:064x}',
+            )
+            dataset_ids.append(dataset.pk)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            analyzer = CSVAnalyzer(dataset, mode='full', progress_callback=lambda *args: None)
+            analyzer._load_csv()
+            results = (
+                analyzer._check_missing_values(),
+                analyzer._check_duplicates(),
+                analyzer._calculate_statistics(),
+            )
+
+        # Соединения и пулы родителя не должны попасть в дочерние процессы
+        close_connection_pools(connections)
+        context = multiprocessing.get_context('fork')
+        queue = context.Queue()
+        deadline = time.time() + seconds
+        processes = [
+            context.Process(target=writer_loop, args=(pk, results, deadline, queue)) for pk in dataset_ids
+        ] + [
+            context.Process(target=reader_loop, args=(deadline, queue)) for _ in range(readers)
+        ]
+        for process in processes:
+            process.start()
+        collected = [queue.get() for _ in processes]
+        for process in processes:
+            process.join()
+    finally:
+        if old_config is not None:
+            DiscoverRunner(verbosity=0).teardown_databases(old_config)
+
+    writer_stats = [stats for kind, stats in collected if kind == 'writer']
+    reader_stats = [stats for kind, stats in collected if kind == 'reader']
+    latencies = sorted(latency for stats in writer_stats for latency in stats['latencies'])
+
+    def percentile(share):
+        return round(latencies[min(int(len(latencies) * share), len(latencies) - 1)] * 1000, 2) if latencies else None
+
+    saved = sum(stats['saved'] for stats in writer_stats)
+    return {
+        'profile': name,
+        'database': settings.DATABASES['default']['ENGINE'].rsplit('.', 1)[-1],
+        'writers': writers,
+        'readers': readers,
+        'seconds': seconds,
+        'saved_per_second': round(saved / seconds, 1),
+        'progress_writes_per_second': round(sum(stats['progress_writes'] for stats in writer_stats) / seconds, 1),
+        'reads_per_second': round(sum(stats['reads'] for stats in reader_stats) / seconds, 1),
+        'write_errors': sum(stats['errors'] for stats in writer_stats),
+        'read_errors': sum(stats['errors'] for stats in reader_stats),
+        'save_p50_ms': percentile(0.5),
+        'save_p95_ms': percentile(0.95),
+    }
+
+
+# ============================================================================
+# 3. ЗАПУСК
+# ============================================================================
+def print_table(reports):
+    print(f"\n{'профиль':<16} {'анализов/с':>11} {'прогресс/с':>11} {'чтений/с':>10} "
+          f"{'ошибок зап.':>12} {'p50, мс':>9} {'p95, мс':>9}")
+    for report in reports:
+        if 'error' in report:
+            print(f"{report['profile']:<16} ❌ {report['error']}")
+            continue
+        print(
+            f"{report['profile']:<16} {report['saved_per_second']:>11} {report['progress_writes_per_second']:>11} "
+            f"{report['reads_per_second']:>10} {report['write_errors']:>12} "
+            f"{report['save_p50_ms'] or '-':>9} {report['save_p95_ms'] or '-':>9}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--profile', nargs='+', default=['sqlite-default', 'sqlite-tuned'], choices=list(PROFILES))
+    parser.add_argument('--writers', type=int, default=8, help='Процессов, сохраняющих результаты анализа')
+    parser.add_argument('--readers', type=int, default=2, help='Процессов, читающих список датасетов')
+    parser.add_argument('--seconds', type=float, default=10, help='Длительность каждого профиля')
+    parser.add_argument('--output', help='Куда сохранить JSON с результатами')
+    parser.add_argument('--run-profile', help=argparse.SUPPRESS)
+    parser.add_argument('--workdir', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_profile:
+        # Дочерний процесс: профиль уже выбран переменными окружения
+        report = run_profile(args.run_profile, args.writers, args.readers, args.seconds, args.workdir)
+        print(json.dumps(report))
+        return
+
+    reports = []
+    for name in args.profile:
+        workdir = tempfile.mkdtemp(prefix='dq-bench-db-')
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE='config.settings', **PROFILES[name])
+        env['DATA_QUALITY_SQLITE_PATH'] = os.path.join(workdir, 'db.sqlite3')
+        print(f"⏱️ {name}: {args.writers} писателей, {args.readers} читателей, {args.seconds:g} с...")
+        try:
+            process = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.bench_db_writes', '--run-profile', name,
+                 '--writers', str(args.writers), '--readers', str(args.readers),
+                 '--seconds', str(args.seconds), '--workdir', workdir],
+                env=env, capture_output=True, text=True,
+            )
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+        if process.returncode != 0:
+            lines = process.stderr.strip().splitlines()
+            reports.append({'profile': name, 'error': lines[-1] if lines else f'код {process.returncode}'})
+            continue
+        reports.append(json.loads(process.stdout.strip().splitlines()[-1]))
+
+    print_table(reports)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(reports, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Результаты сохранены: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
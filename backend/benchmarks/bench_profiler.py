@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+"""
+bench_profiler.py - Сравнение однопроходного профилировщика со старыми проверками
+
+Старые _check_missing_values + _calculate_statistics проходили по DataFrame
+много раз (isna() до 5 раз на столбец, mode() дважды). Скрипт строит широкий
+DataFrame и сравнивает время старого и нового кода.
+
+С --workers N дополнительно меряется параллельный профиль (parallel.py)
+на N процессах; его результат должен совпасть с последовательным.
+
+Запуск из папки backend:
+    python -m benchmarks.bench_profiler --rows 20000 --columns 500 1000
+    python -m benchmarks.bench_profiler --rows 200000 --columns 64 --workers 8
+"""
+
+import argparse
+import math
+import time
+
+import numpy as np
+import pandas as pd
+
+from data_quality.parallel import profile_dataframe_parallel
+from data_quality.profiler import profile_dataframe
+
+
+def make_wide_frame(rows, columns, seed=42):
+    """Широкий DataFrame: половина столбцов числовые, половина текстовые, ~5% пропусков."""
+    rng = np.random.default_rng(seed)
+    data = {}
+    for i in range(columns):
+        if i % 2 == 0:
+            values = rng.normal(100, 15, rows)
+            values[rng.random(rows) < 0.05] = np.nan
+            data[f'num_{i}'] = values
+        else:
+            values = rng.choice([f'value_{k}' for k in range(50)], rows).astype(object)
+            values[rng.random(rows) < 0.05] = np.nan
+            data[f'text_{i}'] = values
+    return pd.DataFrame(data)
+
+
+def legacy_profile(df):
+    """Старая логика _check_missing_values + _calculate_statistics (до однопроходного профиля)."""
+    total_cells = df.size
+    missing_cells = df.isna().sum().sum()
+    columns_with_missing = {}
+    for column in df.columns:
+        missing_count = df[column].isna().sum()
+        if missing_count > 0:
+            columns_with_missing[column] = int(missing_count)
+
+    numeric_stats = {}
+    text_stats = {}
+    for column in df.columns:
+        if pd.api.types.is_numeric_dtype(df[column]):
+            numeric_stats[column] = {
+                'min': float(df[column].min()) if not df[column].isna().all() else None,
+                'max': float(df[column].max()) if not df[column].isna().all() else None,
+                'mean': float(df[column].mean()) if not df[column].isna().all() else None,
+                'std': float(df[column].std()) if not df[column].isna().all() else None,
+                'missing': int(df[column].isna().sum())
+            }
+        elif pd.api.types.is_string_dtype(df[column]) or pd.api.types.is_object_dtype(df[column]):
+            text_stats[column] = {
+                'unique_values': int(df[column].nunique()),
+                'most_common': str(df[column].mode().iloc[0]) if not df[column].mode().empty else None,
+                'missing': int(df[column].isna().sum())
+            }
+    return int(total_cells), int(missing_cells), columns_with_missing, numeric_stats, text_stats
+
+
+def check_same(df, legacy, fused):
+    """Проверяем, что новый код даёт те же числа, что и старый."""
+    _, missing_cells, columns_with_missing, numeric_stats, text_stats = legacy
+    missing_results, statistics_results = fused
+
+    assert missing_results['missing_cells'] == missing_cells
+    assert missing_results['columns_with_missing'] == columns_with_missing
+    assert statistics_results['text_columns'] == text_stats
+    for column, expected in numeric_stats.items():
+        actual = statistics_results['numeric_columns'][column]
+        for key, value in expected.items():
+            if value is None or isinstance(value, int):
+                assert actual[key] == value, (column, key)
+            else:
+                assert math.isclose(actual[key], value, rel_tol=1e-9), (column, key)
+
+
+def timed(func, *args, repeat=3):
+    """Лучшее время из нескольких запусков."""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=20_000)
+    parser.add_argument('--columns', type=int, nargs='+', default=[100, 500, 1000])
+    parser.add_argument('--workers', type=int, default=0, help='Процессов для параллельного профиля (0 - не мерить)')
+    args = parser.parse_args()
+
+    header = f"{'столбцов':>10} {'старый, с':>12} {'новый, с':>12} {'ускорение':>10}"
+    if args.workers:
+        header += f" {'параллельно, с':>15} {'ускорение':>10}"
+    print(header)
+    for columns in args.columns:
+        df = make_wide_frame(args.rows, columns)
+        legacy_time, legacy = timed(legacy_profile, df)
+        fused_time, fused = timed(profile_dataframe, df)
+        check_same(df, legacy, fused)
+        line = f"{columns:>10} {legacy_time:>12.3f} {fused_time:>12.3f} {legacy_time / fused_time:>9.1f}x"
+        if args.workers:
+            parallel_time, parallel = timed(profile_dataframe_parallel, df, args.workers)
+            assert parallel == fused, "Параллельный профиль не совпал с последовательным"
+            line += f" {parallel_time:>15.3f} {fused_time / parallel_time:>9.1f}x"
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
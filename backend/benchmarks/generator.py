@@ -0,0 +1,170 @@
+"""
+generator.py - Детерминированный генератор синтетических CSV для бенчмарков
+
+Один и тот же набор параметров (и seed) всегда даёт байт в байт одинаковый файл,
+поэтому время анализа можно сравнивать между версиями кода.
+
+Параметры:
+- rows, columns - размер таблицы;
+- mix - доли типов столбцов: float, int, text, date;
+- missing_rate - доля пропусков в каждом столбце;
+- duplicate_rate - доля строк, которые повторяют одну из предыдущих строк;
+- encoding - кодировка файла (utf-8 или cp1251; текст содержит кириллицу);
+- delimiter - разделитель.
+
+Запуск из папки backend:
+    python -m benchmarks.generator out.csv --rows 100000 --columns 20 --encoding cp1251
+"""
+
+import argparse
+import csv
+
+import numpy as np
+import pandas as pd
+
+# Типы столбцов по умолчанию: 40% float, 20% int, 30% text, 10% date
+DEFAULT_MIX = {'float': 0.4, 'int': 0.2, 'text': 0.3, 'date': 0.1}
+
+# Файл пишется кусками, чтобы генерировать файлы больше памяти
+CHUNK_ROWS = 100_000
+
+# Словарь для текстовых столбцов (есть кириллица - чтобы проверять кодировки)
+WORDS = [
+    'Москва', 'Казань', 'Новосибирск', 'Екатеринбург', 'Самара',
+    'alpha', 'beta', 'gamma', 'delta', 'omega',
+    'красный', 'зелёный', 'синий', 'green', 'blue',
+]
+
+
+def parse_mix(text):
+    """'float=2,int=1,text=2' -> доли типов столбцов (сумма 1)."""
+    weights = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in DEFAULT_MIX:
+            raise ValueError(f"Неизвестный тип столбца: {name}")
+        weights[name] = float(weight or 1)
+    total = sum(weights.values())
+    return {name: weight / total for name, weight in weights.items()}
+
+
+def column_types(columns, mix=None):
+    """Список типов столбцов по долям mix (детерминированно, без случайности)."""
+    mix = mix or DEFAULT_MIX
+    counts = {name: int(round(share * columns)) for name, share in mix.items()}
+    # Из-за округления сумма может отличаться от columns - поправляем самым частым типом
+    largest = max(counts, key=counts.get)
+    counts[largest] += columns - sum(counts.values())
+
+    types = []
+    for name in mix:
+        types.extend([name] * counts[name])
+    return types
+
+
+def _make_column(kind, rng, rows):
+    """Значения одного столбца для куска строк."""
+    if kind == 'float':
+        return np.round(rng.normal(100, 25, rows), 4)
+    if kind == 'int':
+        return rng.integers(0, 10_000, rows)
+    if kind == 'text':
+        # Часть значений - с номером, чтобы у столбца была высокая кардинальность
+        words = np.asarray(WORDS, dtype=object)[rng.integers(0, len(WORDS), rows)]
+        ids = rng.integers(0, max(rows, 1000), rows).astype(str)
+        return np.where(rng.random(rows) < 0.5, words, words + '_' + ids).astype(object)
+    if kind == 'date':
+        days = rng.integers(0, 3650, rows)
+        return (np.datetime64('2015-01-01') + days.astype('timedelta64[D]')).astype(str).astype(object)
+    raise ValueError(f"Неизвестный тип столбца: {kind}")
+
+
+def generate_frame(rows, columns, mix=None, missing_rate=0.05, duplicate_rate=0.02,
+                   seed=42, row_offset=0):
+    """
+    Генерирует DataFrame (или очередной кусок файла).
+
+    Args:
+        rows: Количество строк
+        columns: Количество столбцов
+        mix: Доли типов столбцов ({'float': 0.5, 'text': 0.5})
+        missing_rate: Доля пропусков в каждом столбце
+        duplicate_rate: Доля строк-дубликатов
+        seed: Зерно генератора
+        row_offset: Номер первой строки куска (влияет на seed куска)
+
+    Дубликаты копируются из строк того же куска, поэтому их доля
+    одинакова при любом количестве строк.
+    """
+    rng = np.random.default_rng([seed, row_offset])
+    types = column_types(columns, mix)
+
+    data = {}
+    for i, kind in enumerate(types):
+        values = _make_column(kind, rng, rows)
+        if missing_rate > 0:
+            mask = rng.random(rows) < missing_rate
+            values = values.astype(object) if kind != 'float' else values
+            values[mask] = np.nan if kind == 'float' else None
+        data[f'{kind}_{i}'] = values
+    df = pd.DataFrame(data)
+
+    # Дубликаты: часть строк заменяем копиями случайных более ранних строк куска
+    if duplicate_rate > 0 and rows > 1:
+        duplicate_count = int(rows * duplicate_rate)
+        targets = np.sort(rng.choice(np.arange(1, rows), size=min(duplicate_count, rows - 1), replace=False))
+        sources = (rng.random(len(targets)) * targets).astype(np.int64)
+        for column in df.columns:
+            values = df[column].to_numpy(copy=True)
+            values[targets] = values[sources]
+            df[column] = values
+
+    return df
+
+
+def generate_csv(path, rows, columns, mix=None, missing_rate=0.05, duplicate_rate=0.02,
+                 encoding='utf-8', delimiter=',', seed=42):
+    """
+    Пишет синтетический CSV кусками по CHUNK_ROWS строк.
+
+    Returns:
+        str: Путь к файлу
+    """
+    with open(path, 'w', encoding=encoding, newline='') as f:
+        for start in range(0, rows, CHUNK_ROWS):
+            chunk = generate_frame(
+                min(CHUNK_ROWS, rows - start), columns, mix=mix,
+                missing_rate=missing_rate, duplicate_rate=duplicate_rate,
+                seed=seed, row_offset=start,
+            )
+            chunk.to_csv(
+                f, index=False, header=(start == 0), sep=delimiter,
+                quoting=csv.QUOTE_MINIMAL, lineterminator='\n',
+            )
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('path')
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--columns', type=int, default=20)
+    parser.add_argument('--mix', type=parse_mix, default=None, help='Например: float=2,int=1,text=2,date=1')
+    parser.add_argument('--missing-rate', type=float, default=0.05)
+    parser.add_argument('--duplicate-rate', type=float, default=0.02)
+    parser.add_argument('--encoding', default='utf-8')
+    parser.add_argument('--delimiter', default=',')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    generate_csv(
+        args.path, args.rows, args.columns, mix=args.mix,
+        missing_rate=args.missing_rate, duplicate_rate=args.duplicate_rate,
+        encoding=args.encoding, delimiter=args.delimiter, seed=args.seed,
+    )
+    print(f"✅ Сгенерирован {args.path}: {args.rows} строк, {args.columns} столбцов ({args.encoding})")
+
+
+if __name__ == '__main__':
+    main()
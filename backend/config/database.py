@@ -0,0 +1,130 @@
+"""
+database.py - Настройки базы данных по переменным окружения
+
+Профиль выбирается переменной DATA_QUALITY_DB:
+
+sqlite (по умолчанию) - файл db.sqlite3 (или DATA_QUALITY_SQLITE_PATH).
+    При каждом подключении выполняются PRAGMA:
+    - journal_mode=WAL - читатели не блокируют писателя и наоборот;
+    - busy_timeout - занятая база ждёт, а не падает с "database is locked";
+    - synchronous=NORMAL - в режиме WAL не теряет целостность, но не делает fsync на каждый коммит.
+    Транзакции начинаются с BEGIN IMMEDIATE: блокировка на запись берётся сразу,
+    а не повышается посреди транзакции (такое повышение busy_timeout не спасает).
+    DATA_QUALITY_SQLITE_TUNED=0 - настройки SQLite по умолчанию (для сравнения в бенчмарке).
+
+postgres - PostgreSQL (параметры POSTGRES_DB, POSTGRES_USER, POSTGRES_PASSWORD,
+    POSTGRES_HOST, POSTGRES_PORT - как у сервиса postgres в docker-compose.yml).
+    Нужен пакет psycopg 3 с пулом (версии закреплены в requirements.txt).
+    По умолчанию соединения берутся из пула psycopg_pool (DATA_QUALITY_DB_POOL_MAX соединений
+    на процесс). DATA_QUALITY_DB_POOL_MAX=0 - без пула, постоянные соединения
+    на DATA_QUALITY_DB_CONN_MAX_AGE секунд.
+
+Пример:
+    docker compose up -d postgres
+    DATA_QUALITY_DB=postgres python manage.py migrate
+"""
+
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+PROFILES = ('sqlite', 'postgres')
+
+
+def _int(env, name, default):
+    value = env.get(name, '')
+    try:
+        return int(value) if value != '' else default
+    except ValueError:
+        raise ImproperlyConfigured(f"{name} должно быть целым числом, получено {value!r}")
+
+
+def _flag(env, name, default):
+    value = env.get(name, '')
+    if value == '':
+        return default
+    return value.lower() not in ('0', 'false', 'no', 'off')
+
+
+def sqlite_settings(base_dir, env):
+    """SQLite: WAL, busy_timeout и synchronous на каждом подключении."""
+    config = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': env.get('DATA_QUALITY_SQLITE_PATH') or base_dir / 'db.sqlite3',
+    }
+    if not _flag(env, 'DATA_QUALITY_SQLITE_TUNED', True):
+        return config
+
+    synchronous = env.get('DATA_QUALITY_SQLITE_SYNCHRONOUS', 'NORMAL').upper()
+    if synchronous not in ('OFF', 'NORMAL', 'FULL', 'EXTRA'):
+        raise ImproperlyConfigured(f"Неизвестный режим synchronous: {synchronous}")
+    busy_timeout = _int(env, 'DATA_QUALITY_SQLITE_BUSY_TIMEOUT_MS', 20_000)
+
+    config['OPTIONS'] = {
+        'init_command': (
+            'PRAGMA journal_mode=WAL;'
+            f'PRAGMA synchronous={synchronous};'
+            f'PRAGMA busy_timeout={busy_timeout};'
+        ),
+        'transaction_mode': 'IMMEDIATE',
+    }
+    return config
+
+
+def postgres_settings(env):
+    """PostgreSQL: пул соединений psycopg_pool или постоянные соединения."""
+    config = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': env.get('POSTGRES_DB', 'data_quality'),
+        'USER': env.get('POSTGRES_USER', 'data_quality'),
+        'PASSWORD': env.get('POSTGRES_PASSWORD', ''),
+        'HOST': env.get('POSTGRES_HOST', 'localhost'),
+        'PORT': env.get('POSTGRES_PORT', '5432'),
+        # Перед использованием соединения проверяем, что оно живое (после рестарта базы)
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {},
+    }
+
+    pool_max = _int(env, 'DATA_QUALITY_DB_POOL_MAX', 10)
+    if pool_max > 0:
+        # С пулом CONN_MAX_AGE должен быть 0: соединение возвращается в пул после запроса
+        config['CONN_MAX_AGE'] = 0
+        config['OPTIONS']['pool'] = {
+            'min_size': min(_int(env, 'DATA_QUALITY_DB_POOL_MIN', 2), pool_max),
+            'max_size': pool_max,
+            # Сколько секунд ждать свободного соединения, прежде чем вернуть ошибку
+            'timeout': _int(env, 'DATA_QUALITY_DB_POOL_TIMEOUT', 10),
+        }
+    else:
+        config['CONN_MAX_AGE'] = _int(env, 'DATA_QUALITY_DB_CONN_MAX_AGE', 60)
+    return config
+
+
+def database_settings(base_dir, env=None):
+    """
+    Настройки DATABASES['default'] для профиля из DATA_QUALITY_DB.
+
+    Args:
+        base_dir: Папка backend (для пути к db.sqlite3 по умолчанию)
+        env: Словарь переменных окружения (по умолчанию os.environ)
+    """
+    env = os.environ if env is None else env
+    profile = env.get('DATA_QUALITY_DB', 'sqlite').lower()
+    if profile == 'sqlite':
+        return sqlite_settings(base_dir, env)
+    if profile == 'postgres':
+        return postgres_settings(env)
+    raise ImproperlyConfigured(
+        f"Неизвестный профиль базы DATA_QUALITY_DB={profile!r}, допустимо: {', '.join(PROFILES)}"
+    )
+
+
+def close_connection_pools(connections):
+    """
+    Закрывает пулы соединений перед fork: пул с открытыми сокетами и фоновыми
+    потоками нельзя делить между процессами - каждый воркер создаст свой.
+    """
+    for connection in connections.all():
+        connection.close()
+        if hasattr(connection, 'close_pool'):
+            connection.close_pool()
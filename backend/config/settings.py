@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from .database import database_settings
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -46,6 +49,10 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
+    # Сжатие JSON-ответов API - выше всех, кто читает или меняет тело ответа
+    'data_quality.middleware.CompressionMiddleware',
+    # Профилирование медленных запросов по заголовку X-DQ-Profile (data_quality/profiling.py)
+    'data_quality.middleware.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -64,6 +71,14 @@ CORS_ALLOWED_ORIGINS = [
 # Если нужно отправлять куки/авторизацию
 CORS_ALLOW_CREDENTIALS = True
 
+# Django REST Framework: JSON через orjson (data_quality/renderers.py), NaN/Infinity -> null
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'data_quality.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+}
+
 
 ROOT_URLCONF = 'config.urls'
 
@@ -88,11 +103,10 @@ WSGI_APPLICATION = 'config.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
+# Профиль выбирается переменной окружения DATA_QUALITY_DB (см. config/database.py):
+# sqlite (по умолчанию, WAL + busy_timeout) или postgres (пул соединений)
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': database_settings(BASE_DIR),
 }
 
 
@@ -133,4 +147,155 @@ USE_TZ = True
 STATIC_URL = 'static/'
 
 
+# Кэши Django. data_quality - готовые ответы детального просмотра датасета и отчёта
+# (см. data_quality/http_cache.py). LocMemCache свой в каждом процессе и при переполнении
+# вытесняет давно не читанные записи. Ключи содержат версию датасета, поэтому запись
+# результатов в другом процессе (воркере) не требует сброса кэша.
+# Общий кэш на несколько процессов - например, FileBasedCache:
+#   'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': '/var/tmp/dq-cache'
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'data_quality': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'data-quality-responses',
+        'OPTIONS': {
+            'MAX_ENTRIES': 1000,
+            # При переполнении удаляется 1/10 записей - самые давно использованные
+            'CULL_FREQUENCY': 10,
+        },
+    },
+}
 
+# Настройки анализатора CSV (data_quality)
+# Файлы больше этого размера анализируются потоково, по чанкам
+DATA_QUALITY_STREAMING_THRESHOLD_MB = 256
+# Примерный лимит памяти на один потоковый анализ
+DATA_QUALITY_MEMORY_LIMIT_MB = 512
+
+# Фоновая очередь анализа (python manage.py run_analysis_workers)
+# Сколько анализов одновременно выполняет пул воркеров
+DATA_QUALITY_WORKER_CONCURRENCY = 2
+# Сколько раз пробовать задачу, прежде чем пометить её ошибкой
+DATA_QUALITY_JOB_MAX_ATTEMPTS = 3
+# Базовая задержка перед повтором (секунды), удваивается с каждой попыткой
+DATA_QUALITY_JOB_RETRY_DELAY = 30
+# Через сколько секунд без отклика (heartbeat) задача в статусе running считается зависшей
+DATA_QUALITY_JOB_STALE_TIMEOUT = 3600
+# Как часто выполняющаяся задача отмечает, что воркер жив (секунды)
+DATA_QUALITY_JOB_HEARTBEAT_INTERVAL = 30
+# True - выполнять анализ прямо в запросе, без воркеров (удобно для разработки)
+DATA_QUALITY_JOBS_EAGER = False
+
+# Кэш результатов анализа по хэшу содержимого файла (модель AnalysisCache)
+# Максимум записей и суммарный размер; лишние вытесняются по давности использования
+DATA_QUALITY_RESULT_CACHE_MAX_ENTRIES = 1000
+DATA_QUALITY_RESULT_CACHE_MAX_MB = 100
+
+# Parquet-sidecar рядом с CSV: после первого разбора повторные анализы читают его
+# вместо CSV. Нужен пакет pyarrow; без него sidecar просто не используется.
+DATA_QUALITY_SIDECAR_ENABLED = True
+
+# Поиск дубликатов строк по отпечаткам (см. data_quality/duplicates.py)
+# Размер отпечатка строки: 64 или 128 бит (128 - практически без коллизий)
+DATA_QUALITY_DUPLICATES_HASH_BITS = 64
+# Сколько первых номеров строк-дубликатов сохранять в результате
+DATA_QUALITY_DUPLICATES_MAX_EXAMPLES = 100
+# Сколько отпечатков держать в памяти; дальше они сбрасываются на диск по разделам
+DATA_QUALITY_DUPLICATES_MAX_FINGERPRINTS = 5_000_000
+DATA_QUALITY_DUPLICATES_SPILL_PARTITIONS = 64
+
+# Приближённая статистика по скетчам (HyperLogLog, Count-Min, t-digest) по умолчанию.
+# Память не зависит от числа разных значений в столбце; в результатах - оценки ошибок.
+# Для отдельного анализа включается параметром ?approximate=1
+DATA_QUALITY_APPROXIMATE_STATS = False
+
+# Быстрая предварительная оценка по выборке строк (?mode=quick, см. data_quality/sampling.py)
+# Сколько строк в выборке и на сколько полос делить файл при чтении с seek
+DATA_QUALITY_QUICK_SAMPLE_ROWS = 10_000
+DATA_QUALITY_QUICK_SAMPLE_BLOCKS = 100
+
+# HTTP-кэширование GET /api/datasets/{id}/ и /api/reports/{id}/ (ETag, 304, кэш ответов).
+# Алиас из CACHES; None - без кэша ответов (ETag и 304 остаются). Время жизни записи - секунды.
+DATA_QUALITY_RESPONSE_CACHE = 'data_quality'
+DATA_QUALITY_RESPONSE_CACHE_TIMEOUT = 600
+
+# Сжатие JSON-ответов (data_quality/middleware.py): brotli, если установлен пакет brotli,
+# иначе gzip. Ответы меньше этого размера (байт) не сжимаются. Качество brotli: 0-11.
+DATA_QUALITY_COMPRESSION_MIN_BYTES = 1024
+DATA_QUALITY_BROTLI_QUALITY = 5
+
+# Индекс строк для GET /api/datasets/{id}/rows/ (см. data_quality/row_index.py).
+# Строится при анализе рядом с CSV (<файл>.rows.npz). Шаг - через сколько строк
+# запоминается байтовое смещение: меньше шаг - быстрее страница, больше индекс.
+DATA_QUALITY_ROW_INDEX_ENABLED = True
+DATA_QUALITY_ROW_INDEX_STRIDE = 256
+# Максимум строк на одной странице
+DATA_QUALITY_ROWS_MAX_LIMIT = 500
+
+# Параллельное профилирование столбцов (см. data_quality/parallel.py)
+# Сколько процессов использует один анализ; None - по числу ядер.
+# Учтите, что воркеров очереди DATA_QUALITY_WORKER_CONCURRENCY штук - каждый со своим пулом.
+DATA_QUALITY_WORKERS = None
+# Таблицы меньше этого числа ячеек профилируются в одном процессе - так быстрее
+DATA_QUALITY_PARALLEL_MIN_CELLS = 5_000_000
+
+# Прогресс анализа (GET /api/datasets/{id}/progress/ - long-poll с ETag)
+# Сколько секунд максимум держать запрос в ожидании изменений
+DATA_QUALITY_PROGRESS_LONGPOLL_TIMEOUT = 25
+# Как часто во время ожидания перечитывать прогресс из базы (секунды):
+# первая пауза, дальше она удваивается до POLL_MAX_INTERVAL
+DATA_QUALITY_PROGRESS_POLL_INTERVAL = 0.5
+DATA_QUALITY_PROGRESS_POLL_MAX_INTERVAL = 5
+# Как часто анализатор записывает прогресс внутри одной фазы (секунды)
+DATA_QUALITY_PROGRESS_MIN_INTERVAL = 0.5
+
+# Максимальный размер загружаемого CSV (МБ). Проверяется на лету во время загрузки
+# (см. data_quality/uploads.py): больший файл отклоняется с кодом 413. 0 - без лимита.
+DATA_QUALITY_UPLOAD_MAX_MB = 1024
+
+# Инкрементальный анализ файлов, которые дописываются в конец (см. data_quality/incremental.py).
+# После потокового анализа рядом с CSV сохраняются отпечатки строк (8-16 байт на уникальную
+# строку), а в базе - состояние накопителей; повторный анализ читает только новый хвост.
+DATA_QUALITY_INCREMENTAL_ENABLED = True
+
+# Замеры фаз анализа: время, процессор, пик памяти, строк в секунду (см. data_quality/instrumentation.py).
+# Сохраняются в AnalysisRun: GET /api/datasets/{id}/profile/ и GET /api/metrics/ (формат Prometheus).
+# Сколько последних запусков хранить на датасет.
+DATA_QUALITY_ANALYSIS_RUNS_ENABLED = True
+DATA_QUALITY_ANALYSIS_RUNS_KEEP = 50
+
+# Сэмплирующий профилировщик (см. data_quality/profiling.py). Профиль (folded stacks для
+# flamegraph.pl / speedscope) сохраняется в ProfileArtifact, только если работа шла
+# не меньше DATA_QUALITY_PROFILE_MIN_SECONDS секунд.
+# Профилировать все анализы / все запросы к API
+DATA_QUALITY_PROFILE_ANALYSES = False
+DATA_QUALITY_PROFILE_REQUESTS = False
+# Разрешить включать профилирование заголовком X-DQ-Profile: 1 (или порог в секундах)
+DATA_QUALITY_PROFILE_HEADER_ENABLED = DEBUG
+DATA_QUALITY_PROFILE_MIN_SECONDS = 5.0
+# Интервал между сэмплами стека (секунды) и сколько профилей хранить на датасет
+DATA_QUALITY_PROFILE_INTERVAL = 0.01
+DATA_QUALITY_PROFILE_KEEP = 20
+
+# Логи анализа и очереди задач (логгеры data_quality.analyzer, data_quality.streaming,
+# data_quality.jobs и др. - все модули приложения) - в консоль.
+# DEBUG - ещё и время каждой фазы по мере завершения.
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'simple': {'format': '{message}', 'style': '{'},
+    },
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler', 'formatter': 'simple'},
+    },
+    'loggers': {
+        'data_quality': {
+            'handlers': ['console'],
+            'level': os.environ.get('DATA_QUALITY_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
+}
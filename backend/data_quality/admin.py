@@ -2,7 +2,10 @@
 from django.contrib import admin
 
 # Импортируем наши модели, которые будем регистрировать
-from .models import Dataset, DataCheck, Report
+from .models import (
+    Dataset, DataCheck, Report, AnalysisJob, AnalysisCache, IncrementalState,
+    DailyQualityRollup, ColumnQualityRollup, AnalysisRun, AnalysisPhase, ProfileArtifact,
+)
 
 # --- НАСТРОЙКА ДЛЯ МОДЕЛИ DataCheck (Проверка) ---
 # Класс для "встроенного" отображения проверок внутри страницы датасета
@@ -33,12 +36,23 @@ class DatasetAdmin(admin.ModelAdmin):
     """
 
     # 1. КАКИЕ ПОЛЯ ПОКАЗЫВАТЬ В СПИСКЕ ВСЕХ ДАТАСЕТОВ
-    list_display = ['id', 'name', 'uploaded_at', 'status', 'report_summary']
+    list_display = [
+        'id', 'name', 'uploaded_at', 'status', 'row_count', 'column_count',
+        'missing_percentage', 'duplicate_percentage', 'report_summary',
+    ]
     # 'id', 'name'... - стандартные поля
     # 'report_summary' - КАСТОМНОЕ ПОЛЕ (метод определим ниже)
 
+    # Отчёт подтягиваем JOIN'ом в том же запросе - иначе report_summary
+    # делает отдельный запрос на каждую строку списка
+    list_select_related = ['report']
+
     # Добавить в класс DatasetAdmin где-то после list_display:
-    readonly_fields = ['uploaded_at']
+    readonly_fields = [
+        'uploaded_at', 'row_count', 'column_count', 'file_size',
+        'missing_cells', 'missing_percentage', 'duplicate_rows', 'duplicate_percentage',
+        'version', 'updated_at',
+    ]
 
     # 2. КЛИКАБЕЛЬНЫЕ ПОЛЯ В СПИСКЕ (по ним можно перейти к редактированию)
     list_display_links = ['id', 'name']
@@ -105,6 +119,8 @@ class ReportAdmin(admin.ModelAdmin):
 
     # 2. ССЫЛКА НА ДАТАСЕТ КАК КЛИКАБЕЛЬНОЕ ПОЛЕ
     list_display_links = ['dataset']
+    # Датасет для колонки 'dataset' - одним JOIN'ом, а не запросом на строку
+    list_select_related = ['dataset']
 
     # 3. ПОЧТИ ВСЕ ПОЛЯ ТОЛЬКО ДЛЯ ЧТЕНИЯ (редактировать вручную не нужно)
     readonly_fields = ['dataset', 'issues_count', 'generated_at']
@@ -140,6 +156,8 @@ class DataCheckAdmin(admin.ModelAdmin):
 
     # Показываем связь с датасетом, тип проверки и дату
     list_display = ['dataset', 'check_type', 'created_at']
+    # Датасет для колонки 'dataset' и __str__ проверки - одним JOIN'ом
+    list_select_related = ['dataset']
     # Фильтруем по типу проверки и дате создания
     list_filter = ['check_type', 'created_at']
     # Поля только для чтения (проверки создаются автоматически)
@@ -157,4 +175,115 @@ class DataCheckAdmin(admin.ModelAdmin):
             'fields': ('created_at',),
             'classes': ('collapse',)
         }),
-    )
\ No newline at end of file
+    )
+
+
+# --- НАСТРОЙКА ДЛЯ МОДЕЛИ AnalysisJob (Задача анализа) ---
+@admin.register(AnalysisJob)
+class AnalysisJobAdmin(admin.ModelAdmin):
+    """
+    Класс для просмотра фоновой очереди анализа.
+    """
+
+    # Показываем датасет, статус, попытки и воркера
+    list_display = ['id', 'dataset', 'status', 'attempts', 'worker', 'created_at', 'heartbeat_at', 'finished_at']
+    list_select_related = ['dataset']
+    # Фильтруем по статусу
+    list_filter = ['status', 'created_at']
+    # Задачи создаются и выполняются автоматически
+    readonly_fields = ['dataset', 'options', 'attempts', 'worker', 'error',
+                       'created_at', 'started_at', 'heartbeat_at', 'finished_at']
+
+
+# --- НАСТРОЙКА ДЛЯ МОДЕЛИ AnalysisCache (Кэш анализа) ---
+@admin.register(AnalysisCache)
+class AnalysisCacheAdmin(admin.ModelAdmin):
+    """
+    Класс для просмотра кэша результатов анализа.
+    Записи можно удалять вручную - следующий анализ просто пересчитает результат.
+    """
+
+    list_display = ['content_hash', 'analyzer_version', 'size_bytes', 'hits', 'last_used_at']
+    list_filter = ['analyzer_version']
+    search_fields = ['content_hash']
+    readonly_fields = ['content_hash', 'analyzer_version', 'results', 'size_bytes',
+                       'hits', 'created_at', 'last_used_at']
+
+
+# --- НАСТРОЙКА ДЛЯ МОДЕЛИ IncrementalState (Состояние инкрементального анализа) ---
+@admin.register(IncrementalState)
+class IncrementalStateAdmin(admin.ModelAdmin):
+    """
+    Класс для просмотра состояний инкрементального анализа.
+    Удаление состояния безопасно - следующий анализ просто прочитает файл целиком.
+    """
+
+    list_display = ['dataset', 'byte_offset', 'total_rows', 'fingerprint_count', 'updated_at']
+    list_select_related = ['dataset']
+    # Накопители столбцов (скетчи) бывают большими - в форме их не показываем
+    exclude = ['columns_state']
+    readonly_fields = ['dataset', 'signature', 'byte_offset', 'prefix_hash', 'total_rows',
+                       'duplicates_state', 'fingerprints_file', 'fingerprint_count', 'updated_at']
+
+
+# --- НАСТРОЙКА ДЛЯ СВОДОК КАЧЕСТВА (DailyQualityRollup, ColumnQualityRollup) ---
+# Сводки ведёт анализатор (см. rollups.py) - в админке только просмотр.
+# Пересчитать с нуля: python manage.py rebuild_rollups
+@admin.register(DailyQualityRollup)
+class DailyQualityRollupAdmin(admin.ModelAdmin):
+    """Класс для просмотра сводок качества по дням загрузки."""
+
+    list_display = ['day', 'datasets_count', 'rows_total', 'missing_cells_total',
+                    'duplicate_rows_total', 'updated_at']
+    date_hierarchy = 'day'
+    readonly_fields = ['day', 'datasets_count', 'rows_total', 'cells_total', 'missing_cells_total',
+                       'duplicate_rows_total', 'missing_percentage_sum', 'duplicate_percentage_sum',
+                       'updated_at']
+
+
+@admin.register(ColumnQualityRollup)
+class ColumnQualityRollupAdmin(admin.ModelAdmin):
+    """Класс для просмотра сводок качества по именам столбцов."""
+
+    list_display = ['column_name', 'missing_percentage', 'datasets_count', 'datasets_with_missing',
+                    'missing_cells_total', 'updated_at']
+    search_fields = ['column_name']
+    ordering = ['-missing_percentage']
+    readonly_fields = ['column_name', 'datasets_count', 'datasets_with_missing', 'rows_total',
+                       'missing_cells_total', 'missing_percentage', 'updated_at']
+
+
+# --- НАСТРОЙКА ДЛЯ МОДЕЛИ AnalysisRun (Замеры запусков анализа) ---
+class AnalysisPhaseInline(admin.TabularInline):
+    """Фазы запуска внутри страницы запуска."""
+    model = AnalysisPhase
+    extra = 0
+    can_delete = False
+    fields = ['position', 'name', 'wall_seconds', 'cpu_seconds', 'peak_rss_bytes', 'rows']
+    readonly_fields = fields
+
+
+@admin.register(AnalysisRun)
+class AnalysisRunAdmin(admin.ModelAdmin):
+    """Класс для просмотра замеров анализов (см. instrumentation.py) - только просмотр."""
+
+    list_display = ['id', 'dataset', 'mode', 'outcome', 'from_cache', 'total_rows',
+                    'wall_seconds', 'peak_rss_bytes', 'started_at']
+    list_select_related = ['dataset']
+    list_filter = ['mode', 'outcome', 'from_cache']
+    inlines = [AnalysisPhaseInline]
+    readonly_fields = ['dataset', 'job', 'mode', 'outcome', 'from_cache', 'total_rows', 'wall_seconds',
+                       'cpu_seconds', 'peak_rss_bytes', 'error', 'started_at']
+
+
+# --- НАСТРОЙКА ДЛЯ МОДЕЛИ ProfileArtifact (Профили медленных анализов и запросов) ---
+@admin.register(ProfileArtifact)
+class ProfileArtifactAdmin(admin.ModelAdmin):
+    """Класс для просмотра профилей (см. profiling.py). Файл стеков открывается по ссылке."""
+
+    list_display = ['id', 'kind', 'label', 'dataset', 'wall_seconds', 'samples', 'created_at']
+    list_select_related = ['dataset']
+    list_filter = ['kind']
+    search_fields = ['label']
+    readonly_fields = ['dataset', 'run', 'kind', 'label', 'folded_file', 'wall_seconds', 'samples',
+                       'interval_ms', 'created_at']
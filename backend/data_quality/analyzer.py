@@ -1,10 +1,37 @@
 """
 analyzer.py - Реальный анализатор CSV файлов с pandas
+
+Сообщения пишутся в лог data_quality.analyzer (настройка LOGGING в config/settings.py),
+время, процессор и память по фазам - в AnalysisRun (см. instrumentation.py).
 """
 
+import logging
+import os
+
 import pandas as pd
 import numpy as np
+from django.conf import settings
 from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+
+from . import incremental, profiling, rollups, row_index
+from .duplicates import DuplicateDetector
+from .instrumentation import PhaseTimer, record_run
+from .parallel import get_worker_count, profile_dataframe_parallel, should_parallelize
+from .profiler import finite_or_none, profile_dataframe, profile_dataframe_approximate
+from .progress import PHASES, ProgressReporter, make_progress
+from .sampling import estimate_results, read_sample
+from .result_cache import CACHED_CHECKS, get_cached_results, hash_file, store_results
+from .sidecar import read_sidecar, write_sidecar
+from .sniffing import SNIFFER_VERSION, read_csv_kwargs, sniff_file
+from .streaming import StreamingAnalyzer
+
+# Версия логики анализа. Увеличивайте при любом изменении формата или смысла
+# результатов проверок - иначе из кэша (AnalysisCache) вернутся устаревшие данные.
+ANALYZER_VERSION = 4
+
+logger = logging.getLogger(__name__)
 
 class CSVAnalyzer:
     """
@@ -12,156 +39,487 @@ class CSVAnalyzer:
     Заменяет старую имитацию _simulate_analysis.
     """
     
-    def __init__(self, dataset):
+    def __init__(self, dataset, mode=None, key_columns=None, approximate=None, progress_callback=None,
+                 job=None, profile=None):
         """
         Инициализация анализатора.
         
         Args:
             dataset: Объект модели Dataset
+            mode: 'full' - весь файл в память, 'streaming' - чтение по чанкам,
+                  'quick' - предварительная оценка по выборке строк (см. sampling.py),
+                  None - выбрать автоматически по размеру файла
+            key_columns: Столбцы, по которым ищутся дубликаты (None - строка целиком)
+            approximate: Приближённая статистика по скетчам (см. sketches.py),
+                         None - по настройке DATA_QUALITY_APPROXIMATE_STATS
+            progress_callback: callback(phase, percent, rows_processed, total_rows) -
+                               None - писать прогресс в Dataset.progress (см. progress.py)
+            job: Задача AnalysisJob - её статус меняется в той же транзакции, что и результаты
+            profile: Сэмплирующий профилировщик (см. profiling.py): True - с порогом из настроек,
+                     число - свой порог в секундах, None - по настройке DATA_QUALITY_PROFILE_ANALYSES
         """
         self.dataset = dataset
         self.file_path = dataset.csv_file.path
+        self.mode = mode
+        self.key_columns = list(key_columns) if key_columns else None
+        if approximate is None:
+            approximate = getattr(settings, 'DATA_QUALITY_APPROXIMATE_STATS', False)
+        self.approximate = bool(approximate)
+        if progress_callback is None:
+            progress_callback = ProgressReporter(dataset.pk, job_id=job.pk if job is not None else None)
+        self.progress_callback = progress_callback
+        self.job = job
+        self.profile = profile
+        # Замеры фаз (см. instrumentation.py) - заново на каждый analyze()
+        self.timer = PhaseTimer()
         self.df = None
+        # Параметры pd.read_csv, с которыми загружен self.df (см. _load_csv)
+        self._read_kwargs = None
+        self._profile = None
+        # Номера строк-дубликатов из _check_duplicates (для индекса строк, см. row_index.py)
+        self._duplicate_row_ids = None
+        # Результаты режима quick: {'missing': ..., 'statistics': ...}
+        self.preview = None
         
     def analyze(self):
         """
-        Основной метод анализа.
+        Основной метод анализа. Каждая фаза замеряется (см. instrumentation.py),
+        замеры сохраняются в AnalysisRun - и при ошибке тоже. Если включён профилировщик
+        и анализ шёл дольше порога - профиль сохраняется в ProfileArtifact.
         
         Returns:
-            bool: True если анализ успешен
+            bool: True если результаты сохранены, False если файл заменили
+                  во время анализа и результаты устарели
         """
-        print(f"🔍 Начинаем анализ файла: {self.file_path}")
+        logger.info("🔍 Начинаем анализ файла: %s", self.file_path)
         
+        self.timer = PhaseTimer()
+        if self.mode == 'quick':
+            mode = 'quick'
+        else:
+            mode = 'streaming' if self._use_streaming() else 'full'
+        self._run = {'mode': mode, 'total_rows': None, 'from_cache': False}
+        threshold = profiling.analysis_threshold(self.profile)
+        sampler = profiling.StackSampler().start() if threshold is not None else None
+        saved, error = None, ''
         try:
+            saved = self._analyze_quick() if mode == 'quick' else self._analyze(mode)
+            return saved
+        except Exception as e:
+            logger.error("❌ Ошибка при анализе: %s", e)
+            error = str(e) or type(e).__name__
+            raise
+        finally:
+            if sampler is not None:
+                sampler.stop()
+            outcome = 'failed' if error else ('completed' if saved else 'stale')
+            run = record_run(self.dataset, self.timer, job=self.job, outcome=outcome, error=error, **self._run)
+            if sampler is not None:
+                profiling.save_artifact(
+                    sampler, 'analysis', f"{mode} {self.dataset.name}", threshold, dataset_id=self.dataset.pk, run=run,
+                )
+    
+    def _analyze(self, mode):
+        """Полный или потоковый анализ (см. analyze)."""
+        cache_version = f"{ANALYZER_VERSION}-{mode}"
+        if self.key_columns:
+            cache_version += f"-keys:{','.join(self.key_columns)}"
+        if self.approximate:
+            cache_version += "-approx"
+        
+        # Потоковый анализ может продолжить с сохранённого состояния, если файл
+        # только дописали в конец (см. incremental.py). Проверка заодно хэширует файл.
+        plan = None
+        with self.timer.phase('hashing'):
+            if mode == 'streaming' and incremental.is_enabled():
+                plan = incremental.plan_analysis(self.dataset, self.file_path, self._incremental_signature())
+                self._remember_content_hash(plan['content_hash'], plan['end_offset'])
+            content_hash = self._get_content_hash()
+        
+        # 0. Такой же файл уже анализировали - копируем готовые результаты, CSV не открываем
+        with self.timer.phase('cache_lookup'):
+            cached = get_cached_results(content_hash, cache_version)
+        if cached is not None:
+            total_rows = cached['missing']['total_rows']
+            self._run.update(total_rows=total_rows, from_cache=True)
+            self._progress('saving', rows_processed=total_rows, total_rows=total_rows)
+            with self.timer.phase('saving'):
+                saved = self._save_results(*(cached[check_type] for check_type in CACHED_CHECKS))
+            if saved:
+                logger.info("⚡ Результаты для %s взяты из кэша", self.dataset.name)
+                self._copy_row_index(content_hash)
+            return saved
+        
+        self._progress('loading')
+        
+        if mode == 'streaming':
+            # Большие файлы анализируем по чанкам с ограничением памяти.
+            # Все проверки считаются за один проход - прогресс по строкам внутри фазы loading
+            with self.timer.phase('streaming') as phase:
+                missing_results, duplicates_results, statistics_results = self._analyze_streaming(plan)
+                total_rows = phase['rows'] = missing_results['total_rows']
+        else:
             # 1. Загружаем CSV
-            self._load_csv()
-            
-            if self.df is None:
-                raise ValueError("Не удалось загрузить CSV файл")
+            with self.timer.phase('parsing') as phase:
+                self._load_csv()
+                if self.df is None:
+                    raise ValueError("Не удалось загрузить CSV файл")
+                total_rows = phase['rows'] = len(self.df)
             
-            # 2. Выполняем проверки
-            missing_results = self._check_missing_values()
-            duplicates_results = self._check_duplicates()
+            # 2. Выполняем проверки. Пропуски и статистика - из одного профиля столбцов
+            self._progress('missing', rows_processed=total_rows, total_rows=total_rows)
+            with self.timer.phase('profiling', rows=total_rows):
+                missing_results = self._check_missing_values()
+            self._progress('duplicates', rows_processed=total_rows, total_rows=total_rows)
+            with self.timer.phase('duplicates', rows=total_rows):
+                duplicates_results = self._check_duplicates()
+            self._progress('statistics', rows_processed=total_rows, total_rows=total_rows)
             statistics_results = self._calculate_statistics()
+            self._build_row_index(
+                self.df.columns, total_rows,
+                np.flatnonzero(self.df.isna().any(axis=1).to_numpy()), self._duplicate_row_ids,
+            )
+        self._run['total_rows'] = total_rows
+        
+        # 3. Сохраняем результаты (NaN/Infinity -> None: JSONField хранит только строгий JSON)
+        self._progress('saving', rows_processed=total_rows, total_rows=total_rows)
+        with self.timer.phase('saving'):
+            missing_results, duplicates_results, statistics_results = (
+                finite_or_none(results) for results in (missing_results, duplicates_results, statistics_results)
+            )
+            saved = self._save_results(missing_results, duplicates_results, statistics_results)
+            # Результаты верны для этого содержимого, даже если датасет уже указывает на другой файл
+            store_results(content_hash, cache_version, dict(zip(
+                CACHED_CHECKS, (missing_results, duplicates_results, statistics_results)
+            )))
+        
+        if saved:
+            logger.info("✅ Анализ завершён для %s", self.dataset.name)
+        return saved
+    
+    def _analyze_quick(self):
+        """
+        Быстрая оценка по выборке строк (см. sampling.py): проверки missing и statistics
+        с пометкой estimated и доверительными интервалами. Полный анализ потом их заменит.
+        
+        Returns:
+            bool: True если оценка сохранена в проверки датасета
+        """
+        with self.timer.phase('sampling') as phase:
+            read_kwargs = self._get_read_kwargs()
+            # Одинаковый файл - одинаковая выборка (хэш всего файла ради этого не считаем)
+            seed = (self.dataset.pk or 0) * 1_000_003 + os.path.getsize(self.file_path)
+            try:
+                sample = read_sample(self.file_path, read_kwargs, seed=seed)
+            except UnicodeDecodeError:
+                sample = read_sample(self.file_path, dict(read_kwargs, encoding='cp1251'), seed=seed)
             
-            # 3. Сохраняем результаты
-            self._save_results(missing_results, duplicates_results, statistics_results)
-            
-            print(f"✅ Анализ завершён для {self.dataset.name}")
-            return True
+            missing_results, statistics_results = (
+                finite_or_none(results) for results in estimate_results(sample, total_rows=self.dataset.row_count)
+            )
+            phase['rows'] = self._run['total_rows'] = len(sample.frame)
+        self.preview = {'missing': missing_results, 'statistics': statistics_results}
+        logger.info("⚡ Оценка по выборке из %s строк для %s", len(sample.frame), self.dataset.name)
+        with self.timer.phase('saving'):
+            return self._save_quick_results(missing_results, statistics_results)
+    
+    def _save_quick_results(self, missing_results, statistics_results):
+        """
+        Сохраняет оценку как проверки missing и statistics - только пока у текущего
+        файла нет результатов полного анализа (Dataset.duplicate_rows пуст).
+        Статус, отчёт и сводки по датасетам не меняются: оценка в сводки не попадает,
+        а вклад результатов по прошлому файлу вычитается вместе с ними.
+        
+        Returns:
+            bool: True если оценка сохранена
+        """
+        from .models import DataCheck, Dataset
+        
+        with transaction.atomic():
+            # Новая версия датасета - и заодно блокировка строки, как в _save_results
+            updated = Dataset.objects.filter(
+                pk=self.dataset.pk,
+                content_hash=self.dataset.content_hash,
+                csv_file=self.dataset.csv_file.name,
+                duplicate_rows__isnull=True,
+            ).update(**Dataset.version_bump())
+            if not updated:
+                logger.warning("⚠️ Для %s уже есть полные результаты или файл заменили - оценка не сохранена",
+                               self.dataset.name)
+                return False
             
+            old_results = rollups.stored_results(self.dataset.pk)
+            DataCheck.objects.filter(dataset=self.dataset).delete()
+            DataCheck.objects.bulk_create([
+                DataCheck(dataset=self.dataset, check_type='missing', result_json=missing_results),
+                DataCheck(dataset=self.dataset, check_type='statistics', result_json=statistics_results),
+            ])
+            rollups.apply_change(self.dataset, old_results=old_results)
+        return True
+    
+    def _progress(self, phase, percent=None, rows_processed=None, total_rows=None):
+        """Сообщает о ходе анализа (см. progress.py)."""
+        if self.progress_callback:
+            self.progress_callback(phase, percent, rows_processed, total_rows)
+    
+    def _streaming_progress(self, rows_processed, estimated_rows):
+        """Прогресс потокового прохода: доля прочитанных строк внутри фаз loading..saving."""
+        fraction = rows_processed / estimated_rows if estimated_rows else 0
+        # Один проход заменяет все проверки - растягиваем его от loading до saving
+        percent = PHASES['loading'] + (PHASES['saving'] - PHASES['loading']) * min(fraction, 0.99)
+        self._progress('loading', percent, rows_processed=rows_processed, total_rows=estimated_rows)
+    
+    def _get_content_hash(self):
+        """
+        SHA-256 файла. Обычно посчитан при загрузке; для старых датасетов
+        и файлов, которые с тех пор дописали (изменился размер), считаем сейчас и запоминаем.
+        """
+        size = os.path.getsize(self.file_path)
+        if not self.dataset.content_hash or self.dataset.file_size not in (None, size):
+            self._remember_content_hash(hash_file(self.file_path), size)
+        return self.dataset.content_hash
+    
+    def _remember_content_hash(self, content_hash, file_size):
+        """Запоминает хэш и размер файла в датасете."""
+        from .models import Dataset
+        if (content_hash, file_size) == (self.dataset.content_hash, self.dataset.file_size):
+            return
+        self.dataset.content_hash = content_hash
+        self.dataset.file_size = file_size
+        Dataset.objects.filter(pk=self.dataset.pk).update(content_hash=content_hash, file_size=file_size)
+    
+    # ------------------------------------------------------------------------
+    # Потоковый и инкрементальный анализ
+    # ------------------------------------------------------------------------
+    def _incremental_signature(self):
+        return incremental.state_signature(
+            ANALYZER_VERSION, self._get_read_kwargs(), self._duplicate_options(), self.approximate
+        )
+    
+    def _analyze_streaming(self, plan=None):
+        """
+        Потоковый анализ. С планом (incremental.plan_analysis) - продолжает
+        с сохранённого состояния и сохраняет новое.
+        """
+        streaming = StreamingAnalyzer(
+            self.file_path,
+            memory_limit_mb=getattr(settings, 'DATA_QUALITY_MEMORY_LIMIT_MB', 512),
+            read_kwargs=self._get_read_kwargs(),
+            duplicate_options=self._duplicate_options(),
+            approximate=self.approximate,
+            progress_callback=self._streaming_progress,
+            known_rows=self.dataset.row_count if plan is None or plan['state'] is None else None,
+            end_offset=plan['end_offset'] if plan else None,
+            collect_rows=row_index.is_enabled(),
+        )
+        if plan is None:
+            results = streaming.run()
+            self._build_streaming_row_index(streaming)
+            return results
+        
+        fingerprints_file = None
+        if plan['can_save']:
+            fingerprints_file = incremental.fingerprints_path(self.file_path, plan['content_hash'])
+        
+        if plan['state'] is not None:
+            logger.info("➕ Инкрементальный анализ: учтено %s строк", plan['state'].total_rows)
+            streaming.restore(**incremental.restore_kwargs(plan['state']))
+            try:
+                results = streaming.run(fingerprints_path=fingerprints_file)
+            except (pd.errors.ParserError, ValueError) as e:
+                # Например, в дописанных строках другое число столбцов
+                logger.warning("♻️ Не удалось дочитать хвост (%s) - полный пересчёт", e)
+                return self._analyze_streaming(dict(plan, state=None))
+        else:
+            results = streaming.run(fingerprints_path=fingerprints_file)
+        
+        if streaming.used_read_kwargs['encoding'] != self._get_read_kwargs()['encoding']:
+            # Середина файла оказалась не в той кодировке - запоминаем, иначе подпись
+            # состояния не совпадёт со следующим анализом
+            self._save_dialect(dict(self.dataset.csv_dialect, encoding=streaming.used_read_kwargs['encoding']))
+        if fingerprints_file is not None:
+            incremental.save_state(
+                self.dataset, self.file_path, self._incremental_signature(), plan,
+                streaming.state(), fingerprints_file, streaming.fingerprint_count,
+            )
+        self._build_streaming_row_index(streaming, plan['end_offset'])
+        return results
+    
+    # ------------------------------------------------------------------------
+    # Индекс строк (см. row_index.py)
+    # ------------------------------------------------------------------------
+    def _build_row_index(self, columns, total_rows, missing_rows, duplicate_rows, read_kwargs=None,
+                         start_offset=0, end_offset=None):
+        """Строит индекс строк. Ошибка индекса не должна ронять анализ."""
+        if not row_index.is_enabled():
+            return
+        try:
+            with self.timer.phase('row_index', rows=total_rows):
+                row_index.build(
+                    self.file_path, read_kwargs or self._get_read_kwargs(), columns, total_rows,
+                    missing_rows=missing_rows, duplicate_rows=duplicate_rows,
+                    key_columns=self.key_columns, start_offset=start_offset, end_offset=end_offset,
+                )
         except Exception as e:
-            print(f"❌ Ошибка при анализе: {str(e)}")
-            raise
+            logger.warning("⚠️ Не удалось построить индекс строк: %s", e)
+            row_index.remove_index(self.file_path)
+    
+    def _build_streaming_row_index(self, streaming, end_offset=None):
+        # После restore() у StreamingAnalyzer только номера дописанных строк -
+        # build() продолжит старый индекс с байта streaming.start_offset
+        self._build_row_index(
+            streaming.columns or [], streaming.total_rows,
+            streaming.missing_row_ids(), streaming.duplicates.duplicate_row_ids(),
+            read_kwargs=streaming.used_read_kwargs, start_offset=streaming.start_offset, end_offset=end_offset,
+        )
+    
+    def _copy_row_index(self, content_hash):
+        """Результаты из кэша: индекс берём у датасета с тем же содержимым файла."""
+        from .models import Dataset
+        if not row_index.is_enabled():
+            return
+        names = (
+            Dataset.objects.filter(content_hash=content_hash)
+            .exclude(pk=self.dataset.pk).exclude(csv_file='')
+            .values_list('csv_file', flat=True)[:10]
+        )
+        try:
+            with self.timer.phase('row_index'):
+                row_index.copy_from(
+                    self.file_path, [default_storage.path(name) for name in names], key_columns=self.key_columns
+                )
+        except Exception as e:
+            logger.warning("⚠️ Не удалось скопировать индекс строк: %s", e)
+    
+    def _use_streaming(self):
+        """Решает, читать ли файл по чанкам."""
+        if self.mode is not None:
+            return self.mode == 'streaming'
+        threshold_mb = getattr(settings, 'DATA_QUALITY_STREAMING_THRESHOLD_MB', 256)
+        return os.path.getsize(self.file_path) > threshold_mb * 1024 * 1024
     
     def _load_csv(self):
-        """Загружает CSV файл в DataFrame pandas."""
+        """
+        Загружает CSV файл в DataFrame pandas.
+        Если есть актуальный Parquet-sidecar (см. sidecar.py) - читаем его, а не CSV.
+        """
+        self._profile = None
+        
+        # Формат нужен и для проверки sidecar: записанный с другим разделителем не годится
+        read_kwargs = self._read_kwargs = self._get_read_kwargs()
+        self.df = read_sidecar(self.file_path, read_kwargs=read_kwargs)
+        if self.df is not None:
+            logger.info("📊 Загружено из sidecar: %s строк, %s столбцов", len(self.df), len(self.df.columns))
+            return
+        
         try:
-            self.df = pd.read_csv(self.file_path, encoding='utf-8')
-            print(f"📊 Загружено: {len(self.df)} строк, {len(self.df.columns)} столбцов")
+            self.df = pd.read_csv(self.file_path, **read_kwargs)
+            logger.info("📊 Загружено: %s строк, %s столбцов (%s)", len(self.df), len(self.df.columns), read_kwargs['encoding'])
         except UnicodeDecodeError:
+            # Образцы начала и конца файла оказались utf-8, а середина - нет
             try:
-                self.df = pd.read_csv(self.file_path, encoding='cp1251')
-                print(f"📊 Загружено с кодировкой cp1251")
+                read_kwargs['encoding'] = 'cp1251'
+                self.df = pd.read_csv(self.file_path, **read_kwargs)
+                self._save_dialect(dict(self.dataset.csv_dialect, encoding='cp1251'))
+                logger.info("📊 Загружено с кодировкой cp1251")
             except Exception as e:
-                print(f"❌ Ошибка загрузки CSV: {e}")
+                logger.error("❌ Ошибка загрузки CSV: %s", e)
                 raise
+        
+        # Следующие анализы этого файла обойдутся без разбора CSV
+        write_sidecar(self.df, self.file_path, read_kwargs=read_kwargs)
+    
+    def _get_read_kwargs(self):
+        """
+        Параметры pd.read_csv по формату файла. Формат определяется один раз
+        по началу и концу файла и сохраняется в Dataset.csv_dialect.
+        """
+        dialect = self.dataset.csv_dialect
+        if not dialect or dialect.get('version') != SNIFFER_VERSION:
+            dialect = sniff_file(self.file_path)
+            self._save_dialect(dialect)
+            logger.info("🔎 Формат CSV: кодировка %s, разделитель %r", dialect['encoding'], dialect['delimiter'])
+        return read_csv_kwargs(dialect)
+    
+    def _save_dialect(self, dialect):
+        """Запоминает формат CSV в датасете."""
+        from .models import Dataset
+        self.dataset.csv_dialect = dialect
+        Dataset.objects.filter(pk=self.dataset.pk).update(csv_dialect=dialect)
+    
+    def _get_profile(self):
+        """
+        Однопроходный профиль всех столбцов (см. profiler.py).
+        Считается один раз и переиспользуется всеми проверками.
+        Большие таблицы профилируются параллельно по столбцам (см. parallel.py).
+        """
+        if self._profile is None:
+            workers = get_worker_count()
+            if should_parallelize(self.df, workers):
+                self._profile = profile_dataframe_parallel(
+                    self.df, workers, csv_path=self.file_path, read_kwargs=self._read_kwargs,
+                    approximate=self.approximate,
+                )
+            elif self.approximate:
+                self._profile = profile_dataframe_approximate(self.df)
+            else:
+                self._profile = profile_dataframe(self.df)
+        return self._profile
     
     def _check_missing_values(self):
         """Проверяет пропущенные значения."""
-        print("🔍 Проверяем пропущенные значения...")
-        
-        total_cells = self.df.size
-        missing_cells = self.df.isna().sum().sum()
-        missing_percentage = (missing_cells / total_cells) * 100 if total_cells > 0 else 0
-        
-        # Детали по столбцам
-        columns_with_missing = {}
-        for column in self.df.columns:
-            missing_count = self.df[column].isna().sum()
-            if missing_count > 0:
-                columns_with_missing[column] = int(missing_count)
+        logger.debug("🔍 Проверяем пропущенные значения...")
         
+        missing_results, _ = self._get_profile()
+        return missing_results
+    
+    def _duplicate_options(self):
+        """Параметры DuplicateDetector из настроек."""
         return {
-            'total_rows': len(self.df),
-            'total_columns': len(self.df.columns),
-            'total_cells': int(total_cells),
-            'missing_cells': int(missing_cells),
-            'missing_percentage': round(missing_percentage, 2),
-            'columns_with_missing': columns_with_missing
+            'subset': self.key_columns,
+            'hash_bits': getattr(settings, 'DATA_QUALITY_DUPLICATES_HASH_BITS', 64),
+            'max_examples': getattr(settings, 'DATA_QUALITY_DUPLICATES_MAX_EXAMPLES', 100),
+            'max_fingerprints': getattr(settings, 'DATA_QUALITY_DUPLICATES_MAX_FINGERPRINTS', 5_000_000),
+            'partitions': getattr(settings, 'DATA_QUALITY_DUPLICATES_SPILL_PARTITIONS', 64),
         }
     
     def _check_duplicates(self):
-        """Проверяет дубликаты строк."""
-        print("♻️ Проверяем дубликаты строк...")
+        """Проверяет дубликаты строк (по отпечаткам строк, см. duplicates.py)."""
+        logger.debug("♻️ Проверяем дубликаты строк...")
         
-        total_rows = len(self.df)
-        duplicate_rows = self.df.duplicated().sum()
-        duplicate_percentage = (duplicate_rows / total_rows) * 100 if total_rows > 0 else 0
-        
-        return {
-            'total_rows': total_rows,
-            'duplicate_rows': int(duplicate_rows),
-            'duplicate_percentage': round(duplicate_percentage, 2)
-        }
+        detector = DuplicateDetector(**self._duplicate_options(), collect_row_ids=row_index.is_enabled())
+        try:
+            detector.update(self.df)
+            results = detector.result()
+            self._duplicate_row_ids = detector.duplicate_row_ids()
+            return results
+        finally:
+            detector.close()
     
     def _calculate_statistics(self):
         """Считает базовую статистику."""
-        print("📊 Считаем статистику...")
-        
-        numeric_stats = {}
-        text_stats = {}
-        
-        for column in self.df.columns:
-            # Для числовых столбцов
-            if pd.api.types.is_numeric_dtype(self.df[column]):
-                numeric_stats[column] = {
-                    'min': float(self.df[column].min()) if not self.df[column].isna().all() else None,
-                    'max': float(self.df[column].max()) if not self.df[column].isna().all() else None,
-                    'mean': float(self.df[column].mean()) if not self.df[column].isna().all() else None,
-                    'std': float(self.df[column].std()) if not self.df[column].isna().all() else None,
-                    'missing': int(self.df[column].isna().sum())
-                }
-            
-            # Для текстовых столбцов
-            elif pd.api.types.is_string_dtype(self.df[column]):
-                text_stats[column] = {
-                    'unique_values': int(self.df[column].nunique()),
-                    'most_common': str(self.df[column].mode().iloc[0]) if not self.df[column].mode().empty else None,
-                    'missing': int(self.df[column].isna().sum())
-                }
+        logger.debug("📊 Считаем статистику...")
         
-        return {
-            'numeric_columns': numeric_stats,
-            'text_columns': text_stats,
-            'total_columns': len(self.df.columns)
-        }
+        _, statistics_results = self._get_profile()
+        return statistics_results
     
     def _save_results(self, missing_results, duplicates_results, statistics_results):
-        """Сохраняет результаты в базу данных."""
-        from .models import DataCheck, Report
-        
-        # УДАЛЯЕМ старые проверки этого датасета
-        DataCheck.objects.filter(dataset=self.dataset).delete()
-        
-        # Сохраняем новые проверки
-        DataCheck.objects.create(
-            dataset=self.dataset,
-            check_type='missing',
-            result_json=missing_results
-        )
+        """
+        Сохраняет результаты в базу данных одной транзакцией:
+        по одному запросу на таблицу, без полузаписанных результатов.
         
-        DataCheck.objects.create(
-            dataset=self.dataset,
-            check_type='duplicates',
-            result_json=duplicates_results
-        )
+        Первым идёт UPDATE датасета с условием на content_hash. Он сразу берёт
+        блокировку на запись (в SQLite не нужно повышать блокировку посреди
+        транзакции, в PostgreSQL второй анализ того же датасета ждёт на строке),
+        и он же защищает от устаревших результатов: если файл заменили или дописали
+        во время анализа, хэш в базе уже другой - ничего не записываем.
+        В той же транзакции обновляются сводки по всем датасетам (см. rollups.py).
         
-        DataCheck.objects.create(
-            dataset=self.dataset,
-            check_type='statistics',
-            result_json=statistics_results
-        )
+        Returns:
+            bool: True если результаты сохранены
+        """
+        from .jobs import finish_job
+        from .models import DataCheck, Dataset, Report
         
         # Создаем сводный отчет
         issues_count = missing_results['missing_cells'] + duplicates_results['duplicate_rows']
@@ -182,19 +540,67 @@ class CSVAnalyzer:
 {self._generate_recommendations(missing_results, duplicates_results)}
         """
         
-        # ОБНОВЛЯЕМ или СОЗДАЕМ отчет
-        report, created = Report.objects.update_or_create(
-            dataset=self.dataset,
-            defaults={
-                'summary': summary,
-                'issues_count': int(issues_count)
-            }
-        )
+        checks = [
+            DataCheck(dataset=self.dataset, check_type='missing', result_json=missing_results),
+            DataCheck(dataset=self.dataset, check_type='duplicates', result_json=duplicates_results),
+            DataCheck(dataset=self.dataset, check_type='statistics', result_json=statistics_results),
+        ]
+        report = Report(dataset=self.dataset, summary=summary, issues_count=int(issues_count),
+                        generated_at=timezone.now())
         
-        if created:
-            print(f"✅ Создан новый отчет для {self.dataset.name}")
-        else:
-            print(f"✅ Обновлен существующий отчет для {self.dataset.name}")
+        with transaction.atomic():
+            # Статус, прогресс, размеры таблицы (файл могли дописать после загрузки) и сводка
+            updated = Dataset.objects.filter(
+                pk=self.dataset.pk, content_hash=self.dataset.content_hash
+            ).update(
+                status='completed',
+                progress=make_progress('completed'),
+                row_count=missing_results['total_rows'],
+                column_count=missing_results['total_columns'],
+                # Главные цифры - в отдельных столбцах для фильтров и дашбордов
+                missing_cells=missing_results['missing_cells'],
+                missing_percentage=missing_results['missing_percentage'],
+                duplicate_rows=duplicates_results['duplicate_rows'],
+                duplicate_percentage=duplicates_results['duplicate_percentage'],
+                # Новая версия - закэшированные ответы с прошлыми результатами больше не отдаются
+                **Dataset.version_bump(),
+            )
+            if not updated:
+                logger.warning("⚠️ Файл %s изменился во время анализа - результаты не сохранены", self.dataset.name)
+                return False
+            
+            # Прошлые результаты нужны, чтобы вычесть их вклад из сводок (см. rollups.py)
+            old_results = rollups.stored_results(self.dataset.pk)
+            
+            # ЗАМЕНЯЕМ старые проверки этого датасета
+            DataCheck.objects.filter(dataset=self.dataset).delete()
+            DataCheck.objects.bulk_create(checks)
+            
+            # ОБНОВЛЯЕМ или СОЗДАЕМ отчет одним INSERT ... ON CONFLICT
+            Report.objects.bulk_create(
+                [report],
+                update_conflicts=True,
+                unique_fields=['dataset'],
+                update_fields=['summary', 'issues_count', 'generated_at'],
+            )
+            
+            # Сводки по всем датасетам: по дню загрузки и по именам столбцов
+            rollups.apply_change(self.dataset, new_results={
+                'missing': missing_results,
+                'duplicates': duplicates_results,
+                'statistics': statistics_results,
+            }, old_results=old_results)
+            
+            if self.job is not None and not finish_job(
+                self.job, status='completed', error='', finished_at=timezone.now()
+            ):
+                # Задачу сочли зависшей и вернули в очередь - результаты запишет её новый воркер
+                transaction.set_rollback(True)
+                return False
+        
+        self.dataset.status = 'completed'
+        logger.info("✅ Сохранены проверки и отчет для %s", self.dataset.name)
+        return True
             
     def _generate_recommendations(self, missing_results, duplicates_results):
         """Генерирует рекомендации на основе результатов."""
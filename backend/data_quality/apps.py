@@ -1,5 +1,13 @@
 from django.apps import AppConfig
+from django.db.models.signals import pre_delete
 
 
 class DataQualityConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
     name = 'data_quality'
+
+    def ready(self):
+        # Удалённый датасет вычитается из сводок качества (см. rollups.py)
+        from . import rollups
+        pre_delete.connect(rollups.dataset_deleted, sender='data_quality.Dataset',
+                           dispatch_uid='data_quality.rollups.dataset_deleted')
@@ -0,0 +1,416 @@
+"""
+duplicates.py - Поиск дубликатов строк по отпечаткам (хэшам) с ограниченной памятью
+
+Вместо self.df.duplicated(), которому нужен весь DataFrame, каждая строка
+превращается в 64- или 128-битный отпечаток (векторно, пачками), и в памяти
+хранятся только отпечатки - в отсортированных массивах numpy. Если уникальных строк больше лимита, отпечатки
+сбрасываются на диск по разделам (partitions) и досчитываются в конце -
+каждый раздел по отдельности помещается в память.
+"""
+
+import logging
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Ключи хэширования (ровно 16 символов): основной (как у pandas по умолчанию)
+# и второй - для старших 64 бит 128-битных отпечатков
+HASH_KEY = '0123456789123456'
+SECOND_HASH_KEY = 'dq-duplicates-v1'
+
+# Размер пачки строк при векторном хэшировании
+BATCH_ROWS = 1_000_000
+
+
+def row_fingerprints(df, subset=None, hash_bits=64):
+    """
+    Векторно считает отпечатки строк.
+    Значения приводятся к одному виду, чтобы отпечаток не зависел от того,
+    как pandas прочитал столбец в конкретном чанке: 1, 1.0 и "1" совпадают,
+    пропуски совпадают независимо от типа столбца.
+
+    Returns:
+        np.ndarray: uint64 для 64 бит или массив формы (n, 2) для 128 бит
+    """
+    frame = df[subset] if subset else df
+    low = _combine_columns(frame, HASH_KEY)
+    if hash_bits == 64:
+        return low
+    return np.column_stack([_combine_columns(frame, SECOND_HASH_KEY), low])
+
+
+def _column_hashes(series, hash_key):
+    """Хэши значений одного столбца: числа (в том числе записанные строкой) - как float64."""
+    if pd.api.types.is_bool_dtype(series):
+        # True/False в соседнем чанке могут оказаться строками 'True'/'False'
+        hashes = pd.util.hash_array(series.astype(str).to_numpy(dtype=object), hash_key=hash_key)
+    elif pd.api.types.is_numeric_dtype(series):
+        numbers = series.to_numpy(dtype=np.float64, na_value=np.nan)
+        hashes = pd.util.hash_array(numbers, hash_key=hash_key)
+    else:
+        hashes = pd.util.hash_array(series.astype(str).to_numpy(dtype=object), hash_key=hash_key)
+        numbers = pd.to_numeric(series, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+        is_number = ~np.isnan(numbers)
+        if is_number.any():
+            hashes[is_number] = pd.util.hash_array(numbers[is_number], hash_key=hash_key)
+
+    missing = series.isna().to_numpy()
+    if missing.any():
+        hashes[missing] = pd.util.hash_array(np.array([np.nan]), hash_key=hash_key)[0]
+    return hashes
+
+
+def _combine_columns(frame, hash_key):
+    """Хэш строки из хэшей её значений (как hash_pandas_object, но по нормализованным значениям)."""
+    hashes = pd.DataFrame(
+        {position: _column_hashes(frame.iloc[:, position], hash_key) for position in range(frame.shape[1])},
+        index=frame.index,
+    )
+    return pd.util.hash_pandas_object(hashes, index=False, hash_key=hash_key).to_numpy(dtype=np.uint64)
+
+
+class DuplicateDetector:
+    """
+    Потоковый детектор дубликатов. Строки подаются через update() в порядке файла.
+
+    Пример:
+        detector = DuplicateDetector(subset=['email'])
+        for chunk in chunks:
+            detector.update(chunk)
+        result = detector.result()
+    """
+
+    def __init__(self, subset=None, hash_bits=64, max_examples=100,
+                 max_fingerprints=5_000_000, partitions=64, spill_dir=None, collect_row_ids=False):
+        """
+        Args:
+            subset: Ключевые столбцы (None - сравниваем строки целиком)
+            hash_bits: Размер отпечатка: 64 или 128 бит
+            max_examples: Сколько первых номеров строк-дубликатов вернуть
+            max_fingerprints: Сколько отпечатков держать в памяти, прежде чем сбросить их на диск
+            partitions: На сколько разделов делить отпечатки на диске
+            spill_dir: Папка для временных файлов (None - системная временная папка)
+            collect_row_ids: Запоминать номера всех строк-дубликатов (для индекса строк,
+                             см. row_index.py) - по 8 байт на дубликат
+        """
+        if hash_bits not in (64, 128):
+            raise ValueError("Отпечаток строки может быть только 64 или 128 бит")
+        self.subset = list(subset) if subset else None
+        self.hash_bits = hash_bits
+        self.max_examples = max_examples
+        self.max_fingerprints = max_fingerprints
+        self.partitions = partitions
+        self.spill_dir = spill_dir
+
+        self.total_rows = 0
+        self.duplicate_rows = 0
+        self.examples = []
+        self._duplicate_ids = [] if collect_row_ids else None
+
+        # Увиденные отпечатки в памяти: несколько отсортированных серий ключей numpy
+        # (8 или 16 байт на отпечаток, см. _add_seen), а не множество чисел Python
+        self._seen = []
+        self._spill_path = None
+        self._spill_files = None
+
+    # ------------------------------------------------------------------------
+    # Приём данных
+    # ------------------------------------------------------------------------
+    def update(self, df):
+        """Учитывает очередную порцию строк (весь DataFrame или чанк)."""
+        if self.subset:
+            missing = [column for column in self.subset if column not in df.columns]
+            if missing:
+                raise ValueError(f"Ключевые столбцы не найдены в файле: {', '.join(map(str, missing))}")
+
+        for start in range(0, len(df), BATCH_ROWS):
+            batch = df.iloc[start:start + BATCH_ROWS]
+            fingerprints = row_fingerprints(batch, self.subset, self.hash_bits)
+            row_ids = np.arange(self.total_rows, self.total_rows + len(batch), dtype=np.int64)
+
+            if self._spill_files is None:
+                self._update_in_memory(fingerprints, row_ids)
+                if self._seen_count > self.max_fingerprints:
+                    self._start_spilling()
+            else:
+                self._write_partitions(fingerprints, row_ids)
+
+            self.total_rows += len(batch)
+
+    def _as_keys(self, fingerprints):
+        """
+        Отпечатки в виде одномерного массива ключей, который можно сортировать и искать
+        через searchsorted: uint64 для 64 бит, 16-байтные значения (V16) для 128 бит.
+        """
+        if self.hash_bits == 64:
+            return fingerprints
+        return np.ascontiguousarray(fingerprints).view('V16').reshape(-1)
+
+    def _as_fingerprints(self, keys):
+        """Обратно к _as_keys: ключи -> массив отпечатков."""
+        if self.hash_bits == 64:
+            return keys
+        return keys.view(np.uint64).reshape(-1, 2)
+
+    @property
+    def _seen_count(self):
+        return sum(len(run) for run in self._seen)
+
+    def _seen_keys(self):
+        """Все увиденные ключи одним массивом (порядок не важен)."""
+        if not self._seen:
+            return np.empty(0, dtype=np.uint64 if self.hash_bits == 64 else 'V16')
+        return np.concatenate(self._seen)
+
+    def _is_seen(self, keys):
+        """Какие из ключей уже встречались: бинарный поиск в каждой отсортированной серии."""
+        seen = np.zeros(len(keys), dtype=bool)
+        for run in self._seen:
+            position = np.minimum(np.searchsorted(run, keys), len(run) - 1)
+            seen |= run[position] == keys
+        return seen
+
+    def _add_seen(self, keys):
+        """
+        Добавляет новые ключи (отсортированные, без повторов и не из _seen).
+        Серии сливаются, как в LSM-дереве: пока последняя серия не больше чем вдвое
+        длиннее добавляемой. Серий остаётся O(log n), и каждый ключ переписывается
+        O(log n) раз, а не при каждой пачке.
+        """
+        while self._seen and len(self._seen[-1]) <= 2 * len(keys):
+            run = self._seen.pop()
+            keys = np.insert(run, np.searchsorted(run, keys), keys)
+        self._seen.append(keys)
+
+    def _update_in_memory(self, fingerprints, row_ids):
+        # Внутри пачки: первое вхождение каждого отпечатка (векторно)
+        keys = self._as_keys(fingerprints)
+        unique_keys, first_index, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        inverse = inverse.reshape(-1)
+
+        # Между пачками: проверяем только уникальные отпечатки пачки
+        seen_before = self._is_seen(unique_keys)
+        if not seen_before.all():
+            self._add_seen(unique_keys[~seen_before])
+
+        is_first_in_batch = np.zeros(len(fingerprints), dtype=bool)
+        is_first_in_batch[first_index] = True
+        is_duplicate = ~is_first_in_batch | seen_before[inverse]
+
+        self.duplicate_rows += int(is_duplicate.sum())
+        self._collect_examples(row_ids[is_duplicate])
+        if self._duplicate_ids is not None:
+            self._duplicate_ids.append(row_ids[is_duplicate])
+
+    def _collect_examples(self, duplicate_ids):
+        """Запоминаем только первые max_examples номеров строк-дубликатов."""
+        room = self.max_examples - len(self.examples)
+        if room > 0 and len(duplicate_ids):
+            self.examples.extend(int(i) for i in duplicate_ids[:room])
+
+    # ------------------------------------------------------------------------
+    # Режим со сбросом на диск
+    # ------------------------------------------------------------------------
+    @property
+    def _record_dtype(self):
+        if self.hash_bits == 64:
+            return np.dtype([('low', '<u8'), ('row', '<i8')])
+        return np.dtype([('high', '<u8'), ('low', '<u8'), ('row', '<i8')])
+
+    @property
+    def _fingerprint_dtype(self):
+        if self.hash_bits == 64:
+            return np.dtype([('low', '<u8')])
+        return np.dtype([('high', '<u8'), ('low', '<u8')])
+
+    def _open_spill_files(self):
+        self._spill_path = tempfile.mkdtemp(prefix='dq-duplicates-', dir=self.spill_dir)
+        self._spill_files = [
+            open(os.path.join(self._spill_path, f'part-{i:04d}.bin'), 'ab')
+            for i in range(self.partitions)
+        ]
+
+    def _start_spilling(self):
+        """Переносим накопленные отпечатки на диск и дальше пишем туда же."""
+        self._open_spill_files()
+        logger.info("💽 Уникальных строк больше %s - отпечатки сбрасываются на диск", self.max_fingerprints)
+
+        # Уже увиденные отпечатки помечаем номером строки -1: они "раньше" всех следующих
+        fingerprints = self._as_fingerprints(self._seen_keys())
+        self._seen = []
+        self._write_partitions(fingerprints, np.full(len(fingerprints), -1, dtype=np.int64))
+
+    def _write_partitions(self, fingerprints, row_ids):
+        """Раскладываем отпечатки по разделам по их старшим битам."""
+        records = np.empty(len(row_ids), dtype=self._record_dtype)
+        if self.hash_bits == 64:
+            records['low'] = fingerprints
+            partition_source = fingerprints
+        else:
+            records['high'] = fingerprints[:, 0]
+            records['low'] = fingerprints[:, 1]
+            partition_source = fingerprints[:, 0]
+        records['row'] = row_ids
+
+        partition = (partition_source % np.uint64(self.partitions)).astype(np.intp)
+        order = np.argsort(partition, kind='stable')
+        bounds = np.searchsorted(partition[order], np.arange(self.partitions + 1))
+        for i in range(self.partitions):
+            part = records[order[bounds[i]:bounds[i + 1]]]
+            if len(part):
+                part.tofile(self._spill_files[i])
+
+    def _finish_spilled(self):
+        """Досчитываем дубликаты по каждому разделу отдельно."""
+        for f in self._spill_files:
+            f.close()
+
+        room = self.max_examples - len(self.examples)
+        candidates = []
+        for i in range(self.partitions):
+            records = np.fromfile(
+                os.path.join(self._spill_path, f'part-{i:04d}.bin'), dtype=self._record_dtype
+            )
+            if not len(records):
+                continue
+            keys = ('row', 'low') if self.hash_bits == 64 else ('row', 'low', 'high')
+            records = records[np.lexsort([records[key] for key in keys])]
+
+            same = records['low'][1:] == records['low'][:-1]
+            if self.hash_bits == 128:
+                same &= records['high'][1:] == records['high'][:-1]
+            duplicate_ids = records['row'][1:][same]
+
+            self.duplicate_rows += len(duplicate_ids)
+            if self._duplicate_ids is not None:
+                self._duplicate_ids.append(duplicate_ids)
+            # От раздела нужны только room наименьших номеров - остальные не храним
+            if room > 0 and len(duplicate_ids):
+                if len(duplicate_ids) > room:
+                    duplicate_ids = np.partition(duplicate_ids, room - 1)[:room]
+                candidates.append(duplicate_ids)
+
+        if candidates:
+            self._collect_examples(np.sort(np.concatenate(candidates)))
+
+        shutil.rmtree(self._spill_path, ignore_errors=True)
+        self._spill_files = None
+
+    # ------------------------------------------------------------------------
+    # Сохранение и восстановление (инкрементальный анализ, см. incremental.py)
+    # ------------------------------------------------------------------------
+    def state(self):
+        """
+        Счётчики детектора для JSON (сами отпечатки - в save_fingerprints).
+        Вызывать после result(): при сбросе на диск дубликаты досчитываются только в нём.
+        """
+        return {
+            'subset': self.subset,
+            'hash_bits': self.hash_bits,
+            'total_rows': self.total_rows,
+            'duplicate_rows': self.duplicate_rows,
+            'examples': list(self.examples),
+        }
+
+    def save_fingerprints(self, path):
+        """
+        Записывает в файл все уникальные отпечатки, увиденные до сих пор.
+        Вызывать до result(): после него разделы на диске уже удалены.
+
+        Returns:
+            int: Количество записанных отпечатков
+        """
+        written = 0
+        with open(path, 'wb') as out:
+            if self._spill_files is None:
+                fingerprints = self._as_fingerprints(self._seen_keys())
+                records = np.empty(len(fingerprints), dtype=self._fingerprint_dtype)
+                if self.hash_bits == 64:
+                    records['low'] = fingerprints
+                else:
+                    records['high'] = fingerprints[:, 0]
+                    records['low'] = fingerprints[:, 1]
+                records.tofile(out)
+                return len(records)
+
+            # Отпечатки на диске: уникальные берём из каждого раздела по очереди
+            for i, f in enumerate(self._spill_files):
+                f.flush()
+                records = np.fromfile(
+                    os.path.join(self._spill_path, f'part-{i:04d}.bin'), dtype=self._record_dtype
+                )
+                fields = list(self._fingerprint_dtype.names)
+                unique = np.unique(records[fields].astype(self._fingerprint_dtype))
+                unique.tofile(out)
+                written += len(unique)
+        return written
+
+    def restore(self, state, fingerprints_path):
+        """
+        Продолжает с сохранённого состояния: следующие строки update() сравниваются
+        и с ранее увиденными. Параметры (subset, hash_bits) должны совпадать.
+        """
+        if state['subset'] != self.subset or state['hash_bits'] != self.hash_bits:
+            raise ValueError("Сохранённые отпечатки посчитаны с другими параметрами")
+
+        self.total_rows = state['total_rows']
+        self.duplicate_rows = state['duplicate_rows']
+        self.examples = list(state['examples'])
+
+        records = np.fromfile(fingerprints_path, dtype=self._fingerprint_dtype)
+        if self.hash_bits == 64:
+            fingerprints = records['low']
+        else:
+            fingerprints = np.column_stack([records['high'], records['low']])
+
+        if len(records) > self.max_fingerprints:
+            # Как в _start_spilling: сохранённые отпечатки "раньше" всех новых строк
+            self._open_spill_files()
+            self._write_partitions(fingerprints, np.full(len(records), -1, dtype=np.int64))
+        else:
+            self._seen = [np.sort(self._as_keys(fingerprints))]
+
+    # ------------------------------------------------------------------------
+    # Результат
+    # ------------------------------------------------------------------------
+    def result(self):
+        """Результат в формате проверки 'duplicates'."""
+        spilled = self._spill_files is not None
+        if spilled:
+            self._finish_spilled()
+
+        total_rows = self.total_rows
+        duplicate_percentage = (self.duplicate_rows / total_rows) * 100 if total_rows > 0 else 0
+
+        return {
+            'total_rows': total_rows,
+            'duplicate_rows': int(self.duplicate_rows),
+            'duplicate_percentage': round(duplicate_percentage, 2),
+            'key_columns': self.subset,
+            'duplicate_row_indices': self.examples,
+            'spilled_to_disk': spilled,
+        }
+
+    def duplicate_row_ids(self):
+        """
+        Номера всех строк-дубликатов по возрастанию (только с collect_row_ids=True,
+        после result()). После restore() - только строки, поданные после него.
+        """
+        if self._duplicate_ids is None:
+            return None
+        if not self._duplicate_ids:
+            return np.empty(0, dtype=np.int64)
+        return np.sort(np.concatenate(self._duplicate_ids))
+
+    def close(self):
+        """Удаляет временные файлы, если анализ прервался до result()."""
+        if self._spill_files is not None:
+            for f in self._spill_files:
+                f.close()
+            shutil.rmtree(self._spill_path, ignore_errors=True)
+            self._spill_files = None
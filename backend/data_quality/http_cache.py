@@ -0,0 +1,89 @@
+"""
+http_cache.py - HTTP-кэширование детального просмотра датасета и отчёта
+
+GET /api/datasets/{id}/ собирает вложенный DatasetSerializer (проверки с большим JSON,
+отчёт), а интерфейс опрашивает его, пока идёт анализ. Меняется же ответ только вместе
+с Dataset.version - счётчиком, который растёт при каждой записи статуса, прогресса
+и результатов (Dataset.version_bump() в том же UPDATE) и при save().
+
+Поэтому запрос сначала читает из базы только version и updated_at:
+1. ETag "dataset-<id>-v<version>-<время изменения>" (сильный) и Last-Modified. Клиент прислал
+   If-None-Match / If-Modified-Since с текущими значениями - сразу 304 без тела.
+2. Иначе ответ берётся из кэша Django (алиас DATA_QUALITY_RESPONSE_CACHE, по умолчанию
+   LocMemCache с вытеснением давно не использованных записей). Ключ содержит версию,
+   поэтому после анализа или правки старая запись просто больше не читается -
+   это работает и когда результаты записывает другой процесс (воркер анализа).
+3. Промах кэша - сериализуем как раньше и кладём ответ в кэш.
+
+Cache-Control: no-cache - браузер хранит ответ, но перед использованием
+переспрашивает сервер с If-None-Match, а тот отвечает 304.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+
+def get_response_cache():
+    """Кэш готовых ответов; None - кэш выключен (DATA_QUALITY_RESPONSE_CACHE = None)."""
+    alias = getattr(settings, 'DATA_QUALITY_RESPONSE_CACHE', 'data_quality')
+    return caches[alias] if alias else None
+
+
+def make_etag(kind, pk, version, updated_at):
+    """
+    Сильный ETag ответа: тип ресурса, id и версия датасета. Время изменения
+    отличает новый датасет от удалённого с тем же id (SQLite переиспользует id).
+    """
+    stamp = int(updated_at.timestamp() * 1_000_000) if updated_at else 0
+    return f'"{kind}-{pk}-v{version}-{stamp:x}"'
+
+
+def cache_key(request, etag):
+    """
+    Ключ кэша. В ответе есть абсолютные URL (csv_file), поэтому ключ зависит
+    и от адреса сервера, по которому пришёл запрос.
+    """
+    host = hashlib.md5(request.build_absolute_uri('/').encode('utf-8')).hexdigest()[:12]
+    tag = etag.strip('"')
+    return f'dq:{tag}:{host}'
+
+
+def cached_response(request, kind, pk, version, updated_at, build):
+    """
+    Ответ на GET с поддержкой 304 и кэшем сериализованных данных.
+
+    Args:
+        kind: Тип ресурса для ETag и ключа ('dataset', 'report')
+        pk: id ресурса
+        version, updated_at: Dataset.version и Dataset.updated_at, прочитанные из базы
+        build: Функция без аргументов, возвращающая данные ответа (сериализатор)
+
+    Версия читается до build(), поэтому запись в кэше может оказаться новее своей
+    версии (анализ завершился между запросами), но никогда не старее.
+    """
+    etag = make_etag(kind, pk, version, updated_at)
+    last_modified = int(updated_at.timestamp()) if updated_at else None
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is None:
+        cache = get_response_cache()
+        key = cache_key(request, etag)
+        data = cache.get(key) if cache is not None else None
+        if data is None:
+            data = build()
+            if cache is not None:
+                cache.set(key, data, getattr(settings, 'DATA_QUALITY_RESPONSE_CACHE_TIMEOUT', 600))
+        response = Response(data)
+    else:
+        response = not_modified
+
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = 'no-cache'
+    return response
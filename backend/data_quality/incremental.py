@@ -0,0 +1,181 @@
+"""
+incremental.py - Инкрементальный повторный анализ файлов, которые дописываются в конец
+
+Многие выгрузки растут: новые строки дописываются в тот же CSV. После потокового
+анализа сохраняем слияемое состояние (IncrementalState): накопители по столбцам,
+счётчики и отпечатки строк для дубликатов, а также сколько байт файла учтено
+и SHA-256 этих байт. Следующий анализ:
+- хэширует файл (это в разы быстрее разбора CSV) и сравнивает хэш учтённой части;
+- совпал - читает только дописанный хвост и сливает его с состоянием;
+- не совпал (файл изменили не только в конце), изменились параметры анализа
+  или формат CSV - полный пересчёт.
+
+Работает для потокового режима: точный режим в памяти (profiler.py) считает
+уникальные значения по всем данным сразу, и слить его результаты нельзя.
+"""
+
+import glob
+import hashlib
+import json
+import logging
+import os
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Версия формата состояния. Увеличьте, если меняется то, что сохраняется.
+STATE_VERSION = 2
+
+# Сколько байт читаем за раз при хэшировании
+HASH_CHUNK_BYTES = 1024 * 1024
+
+
+def is_enabled():
+    return getattr(settings, 'DATA_QUALITY_INCREMENTAL_ENABLED', True)
+
+
+def state_signature(analyzer_version, read_kwargs, duplicate_options, approximate):
+    """
+    Подпись всего, от чего зависит сохранённое состояние. Состояние с другой
+    подписью (другая версия анализатора, формат CSV, ключевые столбцы...) не используется.
+    """
+    payload = {
+        'state_version': STATE_VERSION,
+        'analyzer_version': analyzer_version,
+        'read_kwargs': read_kwargs,
+        'subset': duplicate_options.get('subset'),
+        'hash_bits': duplicate_options.get('hash_bits'),
+        'approximate': approximate,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def fingerprints_path(csv_path, prefix_hash):
+    """
+    Файл отпечатков рядом с CSV (как Parquet-sidecar). В имени - хэш учтённой
+    части: новый файл пишется рядом со старым, а старый удаляется только после
+    того, как в базе сохранено новое состояние.
+    """
+    return f"{csv_path}.fingerprints-{prefix_hash[:16]}"
+
+
+def remove_fingerprints(csv_path, keep=None):
+    """Удаляет файлы отпечатков этого CSV (кроме keep)."""
+    for path in glob.glob(glob.escape(csv_path) + '.fingerprints-*'):
+        if path != keep:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def hash_file_range(path, offset, end):
+    """
+    Один проход по байтам [0, end): SHA-256 первых offset байт и всех end байт.
+
+    Returns:
+        tuple: (хэш [0, offset) или None, хэш [0, end))
+    """
+    hasher = hashlib.sha256()
+    prefix_hash = None
+    position = 0
+    with open(path, 'rb') as f:
+        while position < end:
+            # Не перескакиваем через offset - в этой точке снимаем копию хэша
+            limit = offset if offset is not None and position < offset else end
+            chunk = f.read(min(HASH_CHUNK_BYTES, limit - position))
+            if not chunk:
+                break
+            hasher.update(chunk)
+            position += len(chunk)
+            if offset is not None and position == offset:
+                prefix_hash = hasher.hexdigest()
+    if offset == 0:
+        prefix_hash = hashlib.sha256().hexdigest()
+    return prefix_hash, hasher.hexdigest()
+
+
+def ends_with_newline(path, size):
+    """Последняя строка дописана целиком (иначе её могут ещё дописывать)."""
+    if size == 0:
+        return False
+    with open(path, 'rb') as f:
+        f.seek(size - 1)
+        return f.read(1) == b'\n'
+
+
+def plan_analysis(dataset, csv_path, signature):
+    """
+    Решает, можно ли продолжить с сохранённого состояния.
+
+    Returns:
+        dict:
+            state - IncrementalState, с которого продолжаем, или None (полный анализ);
+            end_offset - до какого байта читаем (размер файла на момент проверки);
+            content_hash - SHA-256 байт [0, end_offset);
+            can_save - можно ли сохранить новое состояние (файл кончается целой строкой)
+    """
+    from .models import IncrementalState
+
+    end_offset = os.path.getsize(csv_path)
+    state = IncrementalState.objects.filter(dataset=dataset).first()
+
+    usable = (
+        state is not None
+        and state.signature == signature
+        and state.byte_offset <= end_offset
+        and os.path.exists(state.fingerprints_file)
+    )
+    prefix_hash, content_hash = hash_file_range(
+        csv_path, state.byte_offset if usable else None, end_offset
+    )
+    if usable and prefix_hash != state.prefix_hash:
+        logger.info("♻️ Начало файла изменилось - полный пересчёт")
+        usable = False
+    elif state is not None and not usable:
+        logger.info("♻️ Сохранённое состояние не подходит (другие параметры или формат) - полный пересчёт")
+
+    return {
+        'state': state if usable else None,
+        'end_offset': end_offset,
+        'content_hash': content_hash,
+        'can_save': ends_with_newline(csv_path, end_offset),
+    }
+
+
+def save_state(dataset, csv_path, signature, plan, streaming_state, fingerprints_file, fingerprint_count):
+    """Сохраняет состояние после анализа и удаляет устаревшие файлы отпечатков."""
+    from .models import IncrementalState
+
+    IncrementalState.objects.update_or_create(
+        dataset=dataset,
+        defaults={
+            'signature': signature,
+            'byte_offset': plan['end_offset'],
+            'prefix_hash': plan['content_hash'],
+            'total_rows': streaming_state['total_rows'],
+            'columns_state': {
+                'columns': streaming_state['columns'],
+                'accumulators': streaming_state['accumulators'],
+            },
+            'duplicates_state': streaming_state['duplicates'],
+            'fingerprints_file': fingerprints_file,
+            'fingerprint_count': fingerprint_count,
+        },
+    )
+    remove_fingerprints(csv_path, keep=fingerprints_file)
+
+
+def restore_kwargs(state):
+    """Состояние из базы в формате StreamingAnalyzer.restore()."""
+    return {
+        'state': {
+            'columns': state.columns_state['columns'],
+            'accumulators': state.columns_state['accumulators'],
+            'total_rows': state.total_rows,
+            'duplicates': state.duplicates_state,
+        },
+        'fingerprints_path': state.fingerprints_file,
+        'start_offset': state.byte_offset,
+    }
@@ -0,0 +1,320 @@
+"""
+instrumentation.py - Замеры фаз анализа: время, процессор, память, скорость
+
+CSVAnalyzer оборачивает каждую фазу analyze() в PhaseTimer.phase():
+    hashing      - хэш файла (и проверка, не дописан ли он - incremental.py)
+    cache_lookup - поиск готовых результатов в кэше (result_cache.py)
+    parsing      - разбор CSV в DataFrame (или чтение Parquet-sidecar)
+    profiling    - однопроходный профиль столбцов: пропуски и статистика
+    duplicates   - поиск дубликатов строк
+    streaming    - потоковый режим: разбор и все проверки за один проход
+    sampling     - режим quick: чтение выборки и оценки
+    row_index    - индекс строк (row_index.py)
+    saving       - запись результатов в базу и в кэш
+
+По каждой фазе: время (wall), процессорное время (своё и дочерних процессов
+parallel.py, после их завершения), пик RSS и строк в секунду. Вложенная фаза
+вычитается из внешней - суммы по фазам не считают одно и то же дважды.
+
+Пик RSS на Linux - VmHWM, который сбрасывается перед каждой фазой
+(/proc/self/clear_refs), то есть это пик именно фазы. Где сбросить нельзя -
+пик процесса с его запуска (ru_maxrss). Память и процессор считаются на весь
+процесс: воркеры анализа - отдельные процессы (run_analysis_workers), а оценка
+?mode=quick в веб-сервере может пересечься с другими запросами.
+
+Накладные расходы - несколько системных вызовов на фазу, поэтому замеры
+всегда включены. Результат каждого анализа сохраняется в AnalysisRun/AnalysisPhase:
+GET /api/datasets/{id}/profile/ - последние запуски датасета,
+GET /api/metrics/ - сводка по всем запускам в формате Prometheus (render_metrics).
+"""
+
+import logging
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - Windows
+    resource = None
+
+from django.conf import settings
+from django.db.models import Count, Max, Q, Sum
+from django.utils import timezone
+
+logger = logging.getLogger('data_quality.analyzer')
+
+# Границы корзин гистограммы длительности фаз (секунды)
+SECONDS_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 900)
+
+
+def is_enabled():
+    return getattr(settings, 'DATA_QUALITY_ANALYSIS_RUNS_ENABLED', True)
+
+
+# ============================================================================
+# 1. ПАМЯТЬ И ПРОЦЕССОР
+# ============================================================================
+def _status_kb(field):
+    """Поле из /proc/self/status в КБ (Linux) или None."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def peak_rss_bytes():
+    """Пик RSS процесса (с последнего сброса, если он возможен) или None."""
+    kb = _status_kb('VmHWM')
+    if kb is not None:
+        return kb * 1024
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux - в КБ, macOS - в байтах
+    return peak if peak > 1 << 32 else peak * 1024
+
+
+def reset_peak_rss():
+    """Сбрасывает VmHWM до текущего RSS (Linux). True - получилось."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def cpu_seconds():
+    """Процессорное время процесса и его завершённых дочерних процессов."""
+    seconds = time.process_time()
+    if resource is not None:
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        seconds += children.ru_utime + children.ru_stime
+    return seconds
+
+
+# ============================================================================
+# 2. ЗАМЕРЫ ФАЗ
+# ============================================================================
+class PhaseTimer:
+    """
+    Замеры фаз одного анализа.
+
+    Пример:
+        timer = PhaseTimer()
+        with timer.phase('parsing') as phase:
+            df = pd.read_csv(path)
+            phase['rows'] = len(df)
+        timer.summary()
+    """
+
+    def __init__(self):
+        self.phases = []
+        self.started_at = timezone.now()
+        self._stack = []
+        self._wall = time.perf_counter()
+        self._cpu = cpu_seconds()
+        self._peak = None
+
+    @contextmanager
+    def phase(self, name, rows=None):
+        """Замер фазы. В словарь фазы можно записать rows, когда число строк станет известно."""
+        record = {'name': name, 'rows': rows, 'wall_seconds': 0.0, 'cpu_seconds': 0.0, 'peak_rss_bytes': None}
+        if self._stack:
+            # Пик внешней фазы до сброса ниже не должен потеряться
+            self._fold_peak(self._stack[-1], peak_rss_bytes())
+        reset_peak_rss()
+        nested = {'wall': 0.0, 'cpu': 0.0, 'peak': None}
+        self._stack.append(nested)
+        wall, cpu = time.perf_counter(), cpu_seconds()
+        try:
+            yield record
+        finally:
+            wall, cpu = time.perf_counter() - wall, cpu_seconds() - cpu
+            self._stack.pop()
+            record['wall_seconds'] = max(wall - nested['wall'], 0.0)
+            record['cpu_seconds'] = max(cpu - nested['cpu'], 0.0)
+            self._fold_peak(nested, peak_rss_bytes())
+            record['peak_rss_bytes'] = nested['peak']
+            if self._stack:
+                parent = self._stack[-1]
+                parent['wall'] += wall
+                parent['cpu'] += cpu
+                self._fold_peak(parent, nested['peak'])
+            if nested['peak'] is not None:
+                self._peak = max(self._peak or 0, nested['peak'])
+            self.phases.append(record)
+            logger.debug("⏱️ Фаза %s: %.3f с, процессор %.3f с", name, record['wall_seconds'], record['cpu_seconds'])
+
+    @staticmethod
+    def _fold_peak(frame, peak):
+        if peak is not None:
+            frame['peak'] = max(frame['peak'] or 0, peak)
+
+    def summary(self):
+        """Итоги анализа: общее время, процессор, пик памяти и фазы по порядку завершения."""
+        peak = self._peak if self._peak is not None else peak_rss_bytes()
+        return {
+            'wall_seconds': time.perf_counter() - self._wall,
+            'cpu_seconds': cpu_seconds() - self._cpu,
+            'peak_rss_bytes': peak,
+            'phases': [dict(record, rows_per_second=rows_per_second(record)) for record in self.phases],
+        }
+
+
+def rows_per_second(record):
+    rows, seconds = record.get('rows'), record.get('wall_seconds')
+    if not rows or not seconds:
+        return None
+    return round(rows / seconds, 1)
+
+
+def format_summary(name, summary):
+    """Одна строка для лога: "⏱️ data.csv: parsing 0.12 с, ... (всего 0.50 с, пик 120 МБ)"."""
+    phases = ', '.join(f"{phase['name']} {phase['wall_seconds']:.2f} с" for phase in summary['phases'])
+    peak = summary['peak_rss_bytes']
+    peak = f", пик {peak / 1024 / 1024:.0f} МБ" if peak else ''
+    return f"⏱️ {name}: {phases} (всего {summary['wall_seconds']:.2f} с{peak})"
+
+
+# ============================================================================
+# 3. СОХРАНЕНИЕ ЗАПУСКОВ
+# ============================================================================
+def record_run(dataset, timer, mode, outcome, job=None, total_rows=None, from_cache=False, error=''):
+    """
+    Сохраняет замеры анализа в AnalysisRun и AnalysisPhase и пишет итог в лог.
+    Хранятся последние DATA_QUALITY_ANALYSIS_RUNS_KEEP запусков каждого датасета.
+    Ошибка записи замеров не должна влиять на анализ - она только логируется.
+
+    Returns:
+        AnalysisRun или None
+    """
+    from .models import AnalysisPhase, AnalysisRun
+
+    summary = timer.summary()
+    logger.info(format_summary(dataset.name, summary), extra={'analysis_run': summary, 'dataset_id': dataset.pk})
+    if not is_enabled():
+        return None
+
+    try:
+        run = AnalysisRun.objects.create(
+            dataset_id=dataset.pk,
+            job_id=job.pk if job is not None else None,
+            mode=mode,
+            outcome=outcome,
+            from_cache=from_cache,
+            total_rows=total_rows,
+            wall_seconds=summary['wall_seconds'],
+            cpu_seconds=summary['cpu_seconds'],
+            peak_rss_bytes=summary['peak_rss_bytes'],
+            error=error[:2000],
+            started_at=timer.started_at,
+        )
+        AnalysisPhase.objects.bulk_create([
+            AnalysisPhase(
+                run=run,
+                position=position,
+                name=phase['name'],
+                wall_seconds=phase['wall_seconds'],
+                cpu_seconds=phase['cpu_seconds'],
+                peak_rss_bytes=phase['peak_rss_bytes'],
+                rows=phase['rows'],
+            )
+            for position, phase in enumerate(summary['phases'])
+        ])
+
+        keep = getattr(settings, 'DATA_QUALITY_ANALYSIS_RUNS_KEEP', 50)
+        old = list(
+            AnalysisRun.objects.filter(dataset_id=dataset.pk)
+            .order_by('-started_at', '-pk').values_list('pk', flat=True)[keep:]
+        )
+        if old:
+            AnalysisRun.objects.filter(pk__in=old).delete()
+        return run
+    except Exception as e:
+        logger.warning("⚠️ Не удалось сохранить замеры анализа: %s", e)
+        return None
+
+
+# ============================================================================
+# 4. МЕТРИКИ PROMETHEUS
+# ============================================================================
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + '}'
+
+
+def _number(value):
+    if value is None:
+        return '0'
+    if isinstance(value, float):
+        return repr(round(value, 6))
+    return str(value)
+
+
+def render_metrics():
+    """
+    Метрики по сохранённым запускам в текстовом формате Prometheus (два запроса к базе).
+    Счётчики уменьшаются, когда старые запуски удаляются (DATA_QUALITY_ANALYSIS_RUNS_KEEP) -
+    для Prometheus это сброс счётчика, rate() его учитывает.
+    """
+    from .models import AnalysisPhase, AnalysisRun
+
+    runs = (
+        AnalysisRun.objects.values('mode', 'outcome')
+        .annotate(count=Count('pk'), wall=Sum('wall_seconds'), cpu=Sum('cpu_seconds'),
+                  rows=Sum('total_rows'), peak=Max('peak_rss_bytes'))
+        .order_by('mode', 'outcome')
+    )
+    buckets = {f'le_{index}': Count('pk', filter=Q(wall_seconds__lte=bound))
+               for index, bound in enumerate(SECONDS_BUCKETS)}
+    phases = (
+        AnalysisPhase.objects.values('name')
+        .annotate(count=Count('pk'), wall=Sum('wall_seconds'), cpu=Sum('cpu_seconds'),
+                  rows=Sum('rows'), peak=Max('peak_rss_bytes'), **buckets)
+        .order_by('name')
+    )
+
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for suffix, labels, value in samples:
+            lines.append(f'{name}{suffix}{_labels(**labels)} {_number(value)}')
+
+    runs = list(runs)
+    metric('dq_analysis_runs_total', 'counter', 'Запуски анализа по режиму и исходу',
+           [('', {'mode': r['mode'], 'outcome': r['outcome']}, r['count']) for r in runs])
+    metric('dq_analysis_seconds_total', 'counter', 'Суммарное время анализов, с',
+           [('', {'mode': r['mode'], 'outcome': r['outcome']}, r['wall']) for r in runs])
+    metric('dq_analysis_cpu_seconds_total', 'counter', 'Суммарное процессорное время анализов, с',
+           [('', {'mode': r['mode'], 'outcome': r['outcome']}, r['cpu']) for r in runs])
+    metric('dq_analysis_rows_total', 'counter', 'Строк обработано анализами',
+           [('', {'mode': r['mode'], 'outcome': r['outcome']}, r['rows']) for r in runs])
+    metric('dq_analysis_peak_rss_bytes', 'gauge', 'Наибольший пик RSS среди анализов, байт',
+           [('', {'mode': r['mode'], 'outcome': r['outcome']}, r['peak']) for r in runs])
+
+    phases = list(phases)
+    samples = []
+    for p in phases:
+        for index, bound in enumerate(SECONDS_BUCKETS):
+            samples.append(('_bucket', {'phase': p['name'], 'le': bound}, p[f'le_{index}']))
+        samples.append(('_bucket', {'phase': p['name'], 'le': '+Inf'}, p['count']))
+        samples.append(('_sum', {'phase': p['name']}, p['wall']))
+        samples.append(('_count', {'phase': p['name']}, p['count']))
+    metric('dq_analysis_phase_seconds', 'histogram', 'Время фаз анализа, с', samples)
+    metric('dq_analysis_phase_cpu_seconds_total', 'counter', 'Процессорное время фаз анализа, с',
+           [('', {'phase': p['name']}, p['cpu']) for p in phases])
+    metric('dq_analysis_phase_rows_total', 'counter', 'Строк обработано в фазе',
+           [('', {'phase': p['name']}, p['rows']) for p in phases])
+    metric('dq_analysis_phase_peak_rss_bytes', 'gauge', 'Наибольший пик RSS в фазе, байт',
+           [('', {'phase': p['name']}, p['peak']) for p in phases])
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,223 @@
+"""
+jobs.py - Фоновая очередь задач анализа на базе таблицы AnalysisJob
+
+API только ставит задачу в очередь (enqueue_analysis), а выполняют её
+отдельные процессы-воркеры: python manage.py run_analysis_workers
+"""
+
+import logging
+import os
+import socket
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import AnalysisJob, Dataset
+from .progress import make_progress, save_progress
+
+logger = logging.getLogger(__name__)
+
+# Задачи, которые ещё не завершены
+ACTIVE_STATUSES = ('queued', 'running')
+
+
+def enqueue_analysis(dataset, options=None):
+    """
+    Ставит датасет в очередь на анализ.
+    Если для датасета уже есть незавершённая задача - возвращает её, а не создаёт дубль.
+
+    Args:
+        dataset: Объект модели Dataset
+        options: Параметры анализа (например, {"mode": "streaming", "key_columns": ["email"], "approximate": True,
+                 "profile": 5.0} - профилировать, если анализ дольше 5 секунд)
+
+    Returns:
+        AnalysisJob: Задача в очереди
+    """
+    job = dataset.jobs.filter(status__in=ACTIVE_STATUSES).first()
+    while job is None:
+        try:
+            # Между проверкой выше и INSERT параллельный запрос мог создать свою задачу -
+            # тогда ограничение dq_job_one_active_per_dataset отклонит вторую
+            with transaction.atomic():
+                job = AnalysisJob.objects.create(
+                    dataset=dataset,
+                    options=options or {},
+                    max_attempts=getattr(settings, 'DATA_QUALITY_JOB_MAX_ATTEMPTS', 3),
+                )
+            logger.info("🕒 Задача #%s поставлена в очередь для %s", job.id, dataset.name)
+        except IntegrityError:
+            # Возвращаем задачу параллельного запроса (если она уже успела завершиться - пробуем снова)
+            job = dataset.jobs.filter(status__in=ACTIVE_STATUSES).first()
+
+    dataset.progress = make_progress('queued')
+    save_progress(dataset.pk, dataset.progress, status='processing')
+    dataset.status = 'processing'
+
+    # Режим для разработки: выполняем задачу сразу, без отдельного воркера
+    if getattr(settings, 'DATA_QUALITY_JOBS_EAGER', False) and job.status == 'queued':
+        job = claim_job(job, worker_name='eager') or job
+        if job.status == 'running':
+            run_job(job)
+
+    return job
+
+
+def default_worker_name():
+    """Имя воркера для логов и поля AnalysisJob.worker: хост:pid."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def claim_job(job, worker_name):
+    """
+    Атомарно забирает задачу в работу.
+    UPDATE ... WHERE status='queued' срабатывает только у одного воркера,
+    поэтому одна задача не выполнится дважды (работает и в SQLite, и в PostgreSQL).
+
+    Returns:
+        AnalysisJob или None, если задачу уже забрал другой воркер
+    """
+    now = timezone.now()
+    claimed = AnalysisJob.objects.filter(pk=job.pk, status='queued').update(
+        status='running',
+        worker=worker_name,
+        started_at=now,
+        heartbeat_at=now,
+        attempts=F('attempts') + 1,
+    )
+    if not claimed:
+        return None
+    job.refresh_from_db()
+    return job
+
+
+def claim_next_job(worker_name):
+    """Берёт из очереди самую старую готовую к запуску задачу."""
+    now = timezone.now()
+    candidates = (
+        AnalysisJob.objects
+        .filter(status='queued')
+        .exclude(run_after__gt=now)
+        .order_by('created_at')
+        .values_list('pk', flat=True)[:10]
+    )
+    for pk in candidates:
+        job = claim_job(AnalysisJob(pk=pk), worker_name)
+        if job is not None:
+            return job
+    return None
+
+
+def run_job(job):
+    """
+    Выполняет задачу: запускает CSVAnalyzer и обновляет статусы.
+    При ошибке задача возвращается в очередь с задержкой, пока не кончатся попытки.
+    Ошибки в самих данных (ValueError: битый CSV, неизвестные столбцы) не повторяются -
+    повтор дал бы тот же результат.
+
+    Returns:
+        bool: True если анализ успешен
+    """
+    # Импортируем здесь: анализатор (sidecar, пул процессов, выборка...) не нужен при импорте URL и моделей
+    from .analyzer import CSVAnalyzer
+
+    dataset = job.dataset
+    logger.info("🚀 [%s] Задача #%s: анализ %s (попытка %s/%s)",
+                job.worker, job.id, dataset.name, job.attempts, job.max_attempts)
+
+    try:
+        # Статус задачи и датасета меняется в одной транзакции с результатами (см. _save_results)
+        saved = CSVAnalyzer(
+            dataset,
+            mode=job.options.get('mode'),
+            key_columns=job.options.get('key_columns'),
+            approximate=job.options.get('approximate'),
+            profile=job.options.get('profile'),
+            job=job,
+        ).analyze()
+    except Exception as e:
+        error = f"{e}\n\n{traceback.format_exc()}"
+
+        if job.attempts < job.max_attempts and not isinstance(e, ValueError):
+            # Экспоненциальная задержка перед повтором: 30с, 60с, 120с...
+            base_delay = getattr(settings, 'DATA_QUALITY_JOB_RETRY_DELAY', 30)
+            run_after = timezone.now() + timedelta(seconds=base_delay * 2 ** (job.attempts - 1))
+            if finish_job(job, status='queued', error=error, finished_at=timezone.now(), run_after=run_after):
+                save_progress(dataset.pk, make_progress('queued'))
+                logger.warning("🔁 Задача #%s упала (%s), повтор после %s",
+                               job.id, e, job.run_after.strftime('%H:%M:%S'))
+        elif finish_job(job, status='failed', error=error, finished_at=timezone.now()):
+            save_progress(dataset.pk, make_progress('failed'), status='failed')
+            logger.error("❌ Задача #%s провалена: %s", job.id, e)
+        return False
+
+    if not saved:
+        # Файл заменили во время анализа: результаты устарели, новый файл ещё не проанализирован
+        # (или задачу отдали другому воркеру - тогда finish_job ничего не запишет)
+        if finish_job(job, status='completed', finished_at=timezone.now(),
+                      error='Файл изменился во время анализа, результаты не сохранены'):
+            if not dataset.jobs.filter(status__in=ACTIVE_STATUSES).exists():
+                save_progress(dataset.pk, {}, status='uploaded')
+            logger.warning("⚠️ Задача #%s завершена без сохранения: файл изменился", job.id)
+        return False
+
+    job.status = 'completed'
+    job.error = ''
+    logger.info("✅ Задача #%s выполнена", job.id)
+    return True
+
+
+def finish_job(job, **fields):
+    """
+    Записывает итог задачи, только если её всё ещё выполняет этот воркер.
+    Как и в claim_job - условный UPDATE ... WHERE worker=<воркер> AND status='running':
+    задачу, которую requeue_stale_jobs вернул в очередь и забрал другой воркер,
+    прежний воркер уже не перезапишет (номер попытки тоже сравниваем - он растёт при каждом claim_job).
+
+    Returns:
+        bool: False, если задача больше не принадлежит воркеру
+    """
+    updated = AnalysisJob.objects.filter(
+        pk=job.pk, worker=job.worker, attempts=job.attempts, status='running'
+    ).update(**fields)
+    if not updated:
+        logger.warning("⚠️ Задача #%s уже не принадлежит воркеру %s - итог не записан", job.id, job.worker)
+        return False
+    for name, value in fields.items():
+        setattr(job, name, value)
+    return True
+
+
+def requeue_stale_jobs(timeout_seconds):
+    """
+    Возвращает в очередь задачи, "зависшие" в статусе running
+    (например, воркер был убит посреди анализа).
+    Зависшей считается задача, от которой timeout_seconds не было отклика
+    (heartbeat_at обновляется вместе с прогрессом, см. progress.py), -
+    долгий, но живой анализ в очередь не возвращается.
+
+    Returns:
+        int: Сколько задач возвращено
+    """
+    deadline = timezone.now() - timedelta(seconds=timeout_seconds)
+    stale = (
+        AnalysisJob.objects
+        .alias(last_seen=Coalesce('heartbeat_at', 'started_at'))
+        .filter(status='running', last_seen__lt=deadline)
+    )
+
+    # Попытки кончились - задача и датасет помечаются ошибкой
+    exhausted = stale.filter(attempts__gte=F('max_attempts'))
+    Dataset.objects.filter(jobs__in=exhausted).update(
+        status='failed', progress=make_progress('failed'), **Dataset.version_bump()
+    )
+    exhausted.update(status='failed', finished_at=timezone.now(), error='Воркер не завершил задачу')
+
+    return stale.filter(attempts__lt=F('max_attempts')).update(
+        status='queued', worker='', run_after=None
+    )
@@ -0,0 +1,26 @@
+"""
+rebuild_rollups - пересчёт сводок качества по всем датасетам с нуля
+
+Обычно сводки обновляются сами при каждом анализе (см. data_quality/rollups.py).
+Пересчёт нужен, если проверки меняли в обход анализатора (например, в админке).
+
+Запуск:
+    python manage.py rebuild_rollups
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает сводки качества (по дням и по столбцам) по всем сохранённым проверкам'
+
+    def handle(self, *args, **options):
+        from data_quality.rollups import rebuild
+
+        start = time.perf_counter()
+        days, columns = rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Сводки пересчитаны за {time.perf_counter() - start:.1f} с: {days} дней, {columns} столбцов"
+        ))
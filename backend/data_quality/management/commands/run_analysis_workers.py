@@ -0,0 +1,101 @@
+"""
+run_analysis_workers - пул процессов-воркеров для фоновой очереди анализа
+
+Запуск:
+    python manage.py run_analysis_workers --concurrency 4
+"""
+
+import multiprocessing
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from config.database import close_connection_pools
+
+
+def worker_loop(poll_interval, stale_timeout, once):
+    """
+    Цикл одного процесса-воркера: забрать задачу -> выполнить -> повторить.
+    Каждый процесс открывает собственное соединение с базой.
+    """
+    from data_quality.jobs import claim_next_job, default_worker_name, requeue_stale_jobs, run_job
+
+    # Соединения, унаследованные от родителя после fork, использовать нельзя
+    connections.close_all()
+    # Ctrl+C обрабатывает родительский процесс
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    worker_name = default_worker_name()
+    print(f"👷 Воркер {worker_name} запущен")
+
+    while True:
+        requeue_stale_jobs(stale_timeout)
+        job = claim_next_job(worker_name)
+
+        if job is None:
+            if once:
+                break
+            time.sleep(poll_interval)
+            continue
+
+        run_job(job)
+        # Длинный анализ мог пережить таймаут соединения - переоткрываем при необходимости
+        connections.close_all()
+
+    print(f"👷 Воркер {worker_name} остановлен: очередь пуста")
+
+
+class Command(BaseCommand):
+    help = 'Запускает пул воркеров, выполняющих задачи анализа из очереди AnalysisJob'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int,
+            default=getattr(settings, 'DATA_QUALITY_WORKER_CONCURRENCY', 2),
+            help='Сколько анализов выполнять одновременно (число процессов)',
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=2.0,
+            help='Пауза (в секундах) между опросами пустой очереди',
+        )
+        parser.add_argument(
+            '--stale-timeout', type=int,
+            default=getattr(settings, 'DATA_QUALITY_JOB_STALE_TIMEOUT', 3600),
+            help='Через сколько секунд без отклика задача в статусе running считается зависшей',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить все задачи из очереди и завершиться',
+        )
+
+    def handle(self, *args, **options):
+        concurrency = max(1, options['concurrency'])
+        self.stdout.write(f"🚀 Запускаем {concurrency} воркер(ов) анализа")
+
+        # Соединение родителя (и пул соединений PostgreSQL) не должно попасть в дочерние процессы
+        close_connection_pools(connections)
+
+        processes = [
+            multiprocessing.Process(
+                target=worker_loop,
+                args=(options['poll_interval'], options['stale_timeout'], options['once']),
+            )
+            for _ in range(concurrency)
+        ]
+        for process in processes:
+            process.start()
+
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            self.stdout.write("🛑 Останавливаем воркеров...")
+            for process in processes:
+                process.terminate()
+            for process in processes:
+                process.join()
+
+        self.stdout.write(self.style.SUCCESS("✅ Все воркеры остановлены"))
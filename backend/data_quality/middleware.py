@@ -0,0 +1,161 @@
+"""
+middleware.py - Сжатие JSON-ответов API (brotli или gzip по Accept-Encoding)
+и профилирование медленных запросов (ProfilingMiddleware, см. profiling.py)
+
+Ответы с проверками (result_json на тысячи столбцов) хорошо сжимаются: повторяются
+имена полей и столбцов. CompressionMiddleware выбирает кодировку по заголовку
+Accept-Encoding клиента:
+- br   - если установлен пакет brotli (необязательная зависимость) и клиент его принимает;
+- gzip - иначе (как django.middleware.gzip.GZipMiddleware).
+
+Сжимаются только JSON-ответы не меньше DATA_QUALITY_COMPRESSION_MIN_BYTES:
+маленькие ответы (прогресс анализа) сжатие только замедлит, а HTML-страницы
+с CSRF-токеном (админка) не сжимаем из-за атаки BREACH.
+
+Сжатое представление отличается от несжатого, поэтому сильный ETag становится
+слабым (W/"..."), как в GZipMiddleware. Проверка If-None-Match сравнивает ETag
+без учёта W/ - 304 по-прежнему работает.
+"""
+
+import re
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - зависит от окружения
+    brotli = None
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence, compress_string
+
+from . import profiling
+
+# Кодировки в порядке предпочтения сервера
+ENCODINGS = ('br', 'gzip')
+
+
+def get_min_bytes():
+    return getattr(settings, 'DATA_QUALITY_COMPRESSION_MIN_BYTES', 1024)
+
+
+def accepted_encodings(header):
+    """
+    Кодировки из Accept-Encoding с q > 0: {"gzip", "br", ...}.
+    "*" означает любую кодировку, кроме явно запрещённых (q=0).
+    """
+    accepted, refused = set(), set()
+    for item in header.split(','):
+        name, _, params = item.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        match = re.search(r'q\s*=\s*([0-9.]+)', params)
+        try:
+            quality = float(match.group(1)) if match else 1.0
+        except ValueError:
+            quality = 1.0
+        (accepted if quality > 0 else refused).add(name)
+    if '*' in accepted:
+        accepted |= {encoding for encoding in ENCODINGS if encoding not in refused}
+    return accepted - refused
+
+
+def choose_encoding(header, streaming=False):
+    """Лучшая кодировка для ответа или None. Потоковые ответы brotli не сжимаем."""
+    accepted = accepted_encodings(header)
+    for encoding in ENCODINGS:
+        if encoding == 'br' and (brotli is None or streaming):
+            continue
+        if encoding in accepted:
+            return encoding
+    return None
+
+
+def compress(content, encoding):
+    if encoding == 'br':
+        # quality 5 - почти как 11 по размеру для JSON, но в десятки раз быстрее
+        return brotli.compress(content, quality=getattr(settings, 'DATA_QUALITY_BROTLI_QUALITY', 5))
+    return compress_string(content)
+
+
+class CompressionMiddleware:
+    """Сжимает JSON-ответы brotli или gzip (см. описание модуля)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        return self.process_response(request, response)
+
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding'):
+            return response
+        if not response.get('Content-Type', '').startswith('application/json'):
+            return response
+
+        # Ответ зависит от Accept-Encoding - кэши должны это учитывать, даже если не сжали
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''), response.streaming)
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = compress_sequence(response.streaming_content)
+            del response['Content-Length']
+        else:
+            if len(response.content) < get_min_bytes():
+                return response
+            compressed = compress(response.content, encoding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    Профилирует запрос сэмплирующим профилировщиком (см. profiling.py), если клиент
+    прислал заголовок X-DQ-Profile (и это разрешено настройкой) или включено
+    DATA_QUALITY_PROFILE_REQUESTS. Профиль сохраняется, только если запрос шёл дольше
+    порога; тогда в ответе есть заголовок X-DQ-Profile-Artifact с id профиля.
+    Запросы к датасету (/api/datasets/{id}/...) прикрепляют профиль к нему.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        threshold = profiling.request_threshold(request)
+        if threshold is None:
+            return self.get_response(request)
+
+        with profiling.StackSampler() as sampler:
+            response = self.get_response(request)
+        artifact = profiling.save_artifact(
+            sampler, 'request', f"{request.method} {request.path}", threshold,
+            dataset_id=self.dataset_id(request),
+        )
+        if artifact is not None:
+            response[profiling.ARTIFACT_HEADER] = str(artifact.pk)
+        return response
+
+    @staticmethod
+    def dataset_id(request):
+        """id датасета из маршрута DatasetViewSet (dataset-detail, dataset-rows...) или None."""
+        from .models import Dataset
+
+        match = getattr(request, 'resolver_match', None)
+        if match is None or not (match.url_name or '').startswith('dataset-'):
+            return None
+        pk = str(match.kwargs.get('pk', ''))
+        if not pk.isdigit() or not Dataset.objects.filter(pk=pk).exists():
+            return None
+        return int(pk)
@@ -0,0 +1,36 @@
+# Generated by Django 6.0.1 on 2026-10-17 05:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_quality', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnalysisJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('queued', '🕒 В очереди'), ('running', '⚙️ Выполняется'), ('completed', '✅ Выполнена'), ('failed', '❌ Ошибка')], default='queued', max_length=20, verbose_name='Статус')),
+                ('options', models.JSONField(blank=True, default=dict, verbose_name='Параметры')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Попыток сделано')),
+                ('max_attempts', models.PositiveIntegerField(default=3, verbose_name='Максимум попыток')),
+                ('run_after', models.DateTimeField(blank=True, null=True, verbose_name='Запустить после')),
+                ('worker', models.CharField(blank=True, max_length=100, verbose_name='Воркер')),
+                ('error', models.TextField(blank=True, verbose_name='Ошибка')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Создана')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Начата')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Завершена')),
+                ('dataset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='jobs', to='data_quality.dataset')),
+            ],
+            options={
+                'verbose_name': 'Задача анализа',
+                'verbose_name_plural': 'Задачи анализа',
+                'ordering': ['created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 6.0.1 on 2026-10-17 05:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_quality', '0002_analysisjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, max_length=64, verbose_name='Хэш содержимого'),
+        ),
+        migrations.CreateModel(
+            name='AnalysisCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=64, verbose_name='Хэш содержимого')),
+                ('analyzer_version', models.CharField(max_length=50, verbose_name='Версия анализатора')),
+                ('results', models.JSONField(default=dict, verbose_name='Результаты')),
+                ('size_bytes', models.PositiveIntegerField(default=0, verbose_name='Размер (байт)')),
+                ('hits', models.PositiveIntegerField(default=0, verbose_name='Попаданий')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Создано')),
+                ('last_used_at', models.DateTimeField(auto_now=True, db_index=True, verbose_name='Последнее использование')),
+            ],
+            options={
+                'verbose_name': 'Кэш анализа',
+                'verbose_name_plural': 'Кэш анализа',
+                'unique_together': {('content_hash', 'analyzer_version')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-17 05:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_quality', '0003_analysiscache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='csv_dialect',
+            field=models.JSONField(blank=True, default=dict, verbose_name='Формат CSV'),
+        ),
+    ]
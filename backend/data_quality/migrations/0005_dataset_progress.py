@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_quality', '0004_dataset_csv_dialect'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='progress',
+            field=models.JSONField(blank=True, default=dict, verbose_name='Прогресс анализа'),
+        ),
+    ]
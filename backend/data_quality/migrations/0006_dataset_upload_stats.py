@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_quality', '0005_dataset_progress'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='column_count',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Столбцов'),
+        ),
+        migrations.AddField(
+            model_name='dataset',
+            name='file_size',
+            field=models.PositiveBigIntegerField(blank=True, null=True, verbose_name='Размер файла (байт)'),
+        ),
+        migrations.AddField(
+            model_name='dataset',
+            name='row_count',
+            field=models.PositiveBigIntegerField(blank=True, null=True, verbose_name='Строк'),
+        ),
+    ]
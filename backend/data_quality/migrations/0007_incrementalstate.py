@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_quality', '0006_dataset_upload_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IncrementalState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('signature', models.CharField(max_length=64, verbose_name='Подпись параметров')),
+                ('byte_offset', models.PositiveBigIntegerField(verbose_name='Прочитано байт')),
+                ('prefix_hash', models.CharField(max_length=64, verbose_name='Хэш прочитанной части')),
+                ('total_rows', models.PositiveBigIntegerField(verbose_name='Строк учтено')),
+                ('columns_state', models.JSONField(default=dict, verbose_name='Состояние столбцов')),
+                ('duplicates_state', models.JSONField(default=dict, verbose_name='Состояние дубликатов')),
+                ('fingerprints_file', models.CharField(max_length=500, verbose_name='Файл отпечатков')),
+                ('fingerprint_count', models.PositiveBigIntegerField(default=0, verbose_name='Отпечатков')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Обновлено')),
+                ('dataset', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='incremental_state', to='data_quality.dataset')),
+            ],
+            options={
+                'verbose_name': 'Состояние инкрементального анализа',
+                'verbose_name_plural': 'Состояния инкрементального анализа',
+            },
+        ),
+    ]
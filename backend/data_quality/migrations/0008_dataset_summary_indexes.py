@@ -0,0 +1,88 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:25
+
+from django.db import migrations, models
+
+
+def backfill_summary(apps, schema_editor):
+    """Заполняет новые столбцы из уже сохранённых проверок."""
+    Dataset = apps.get_model('data_quality', 'Dataset')
+    DataCheck = apps.get_model('data_quality', 'DataCheck')
+
+    summaries = {}
+    checks = DataCheck.objects.filter(check_type__in=('missing', 'duplicates')).order_by('created_at')
+    for dataset_id, check_type, result in checks.values_list('dataset_id', 'check_type', 'result_json').iterator():
+        summary = summaries.setdefault(dataset_id, {})
+        result = result or {}
+        if check_type == 'missing':
+            summary['missing_cells'] = result.get('missing_cells')
+            summary['missing_percentage'] = result.get('missing_percentage')
+            summary['row_count'] = result.get('total_rows')
+            summary['column_count'] = result.get('total_columns')
+        else:
+            summary['duplicate_rows'] = result.get('duplicate_rows')
+            summary['duplicate_percentage'] = result.get('duplicate_percentage')
+
+    datasets = list(Dataset.objects.filter(pk__in=summaries))
+    for dataset in datasets:
+        summary = summaries[dataset.pk]
+        for field in ('missing_cells', 'missing_percentage', 'duplicate_rows', 'duplicate_percentage'):
+            setattr(dataset, field, summary.get(field))
+        # Размеры таблицы могли посчитать при загрузке - их не трогаем
+        if dataset.row_count is None:
+            dataset.row_count = summary.get('row_count')
+            dataset.column_count = summary.get('column_count')
+    Dataset.objects.bulk_update(datasets, [
+        'missing_cells', 'missing_percentage', 'duplicate_rows', 'duplicate_percentage',
+        'row_count', 'column_count',
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_quality', '0007_incrementalstate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='duplicate_percentage',
+            field=models.FloatField(blank=True, null=True, verbose_name='Дубликатов, %'),
+        ),
+        migrations.AddField(
+            model_name='dataset',
+            name='duplicate_rows',
+            field=models.PositiveBigIntegerField(blank=True, null=True, verbose_name='Дубликатов строк'),
+        ),
+        migrations.AddField(
+            model_name='dataset',
+            name='missing_cells',
+            field=models.PositiveBigIntegerField(blank=True, null=True, verbose_name='Пропущенных ячеек'),
+        ),
+        migrations.AddField(
+            model_name='dataset',
+            name='missing_percentage',
+            field=models.FloatField(blank=True, null=True, verbose_name='Пропусков, %'),
+        ),
+        migrations.AddIndex(
+            model_name='datacheck',
+            index=models.Index(fields=['dataset', 'check_type'], name='dq_check_dataset_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dataset',
+            index=models.Index(fields=['-uploaded_at', '-id'], name='dq_dataset_uploaded_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dataset',
+            index=models.Index(fields=['status', '-uploaded_at'], name='dq_dataset_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dataset',
+            index=models.Index(fields=['missing_percentage'], name='dq_dataset_missing_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dataset',
+            index=models.Index(fields=['duplicate_percentage'], name='dq_dataset_duplicates_idx'),
+        ),
+        migrations.RunPython(backfill_summary, migrations.RunPython.noop),
+    ]
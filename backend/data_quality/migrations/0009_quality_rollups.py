@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:28
+
+from django.db import migrations, models
+
+
+def build_rollups(apps, schema_editor):
+    """Сводки по уже проанализированным датасетам."""
+    from data_quality.rollups import rebuild
+    rebuild(apps.get_model)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_quality', '0008_dataset_summary_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ColumnQualityRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('column_name', models.CharField(max_length=255, unique=True, verbose_name='Столбец')),
+                ('datasets_count', models.BigIntegerField(default=0, verbose_name='Датасетов')),
+                ('datasets_with_missing', models.BigIntegerField(default=0, verbose_name='Датасетов с пропусками')),
+                ('rows_total', models.BigIntegerField(default=0, verbose_name='Строк')),
+                ('missing_cells_total', models.BigIntegerField(default=0, verbose_name='Пропущенных ячеек')),
+                ('missing_percentage', models.FloatField(db_index=True, default=0, verbose_name='Пропусков, %')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Обновлено')),
+            ],
+            options={
+                'verbose_name': 'Сводка по столбцу',
+                'verbose_name_plural': 'Сводки по столбцам',
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyQualityRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True, verbose_name='День')),
+                ('datasets_count', models.BigIntegerField(default=0, verbose_name='Датасетов')),
+                ('rows_total', models.BigIntegerField(default=0, verbose_name='Строк')),
+                ('cells_total', models.BigIntegerField(default=0, verbose_name='Ячеек')),
+                ('missing_cells_total', models.BigIntegerField(default=0, verbose_name='Пропущенных ячеек')),
+                ('duplicate_rows_total', models.BigIntegerField(default=0, verbose_name='Дубликатов строк')),
+                ('missing_percentage_sum', models.FloatField(default=0, verbose_name='Сумма % пропусков')),
+                ('duplicate_percentage_sum', models.FloatField(default=0, verbose_name='Сумма % дубликатов')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Обновлено')),
+            ],
+            options={
+                'verbose_name': 'Сводка по дню',
+                'verbose_name_plural': 'Сводки по дням',
+                'ordering': ['-day'],
+            },
+        ),
+        migrations.RunPython(build_rollups, migrations.RunPython.noop),
+    ]
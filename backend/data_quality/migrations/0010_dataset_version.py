@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:34
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_quality', '0009_quality_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='updated_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='Изменён'),
+        ),
+        migrations.AddField(
+            model_name='dataset',
+            name='version',
+            field=models.PositiveBigIntegerField(default=1, editable=False, verbose_name='Версия'),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:45
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_quality', '0010_dataset_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnalysisRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mode', models.CharField(max_length=20, verbose_name='Режим')),
+                ('outcome', models.CharField(choices=[('completed', '✅ Результаты сохранены'), ('stale', '⚠️ Файл изменился, результаты не сохранены'), ('failed', '❌ Ошибка')], max_length=20, verbose_name='Исход')),
+                ('from_cache', models.BooleanField(default=False, verbose_name='Из кэша')),
+                ('total_rows', models.BigIntegerField(blank=True, null=True, verbose_name='Строк')),
+                ('wall_seconds', models.FloatField(default=0, verbose_name='Время, с')),
+                ('cpu_seconds', models.FloatField(default=0, verbose_name='Процессор, с')),
+                ('peak_rss_bytes', models.BigIntegerField(blank=True, null=True, verbose_name='Пик памяти, байт')),
+                ('error', models.TextField(blank=True, verbose_name='Ошибка')),
+                ('started_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Начат')),
+                ('dataset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='runs', to='data_quality.dataset')),
+                ('job', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='runs', to='data_quality.analysisjob')),
+            ],
+            options={
+                'verbose_name': 'Запуск анализа',
+                'verbose_name_plural': 'Запуски анализа',
+                'ordering': ['-started_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='AnalysisPhase',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveSmallIntegerField(verbose_name='Порядок')),
+                ('name', models.CharField(max_length=30, verbose_name='Фаза')),
+                ('wall_seconds', models.FloatField(verbose_name='Время, с')),
+                ('cpu_seconds', models.FloatField(verbose_name='Процессор, с')),
+                ('peak_rss_bytes', models.BigIntegerField(blank=True, null=True, verbose_name='Пик памяти, байт')),
+                ('rows', models.BigIntegerField(blank=True, null=True, verbose_name='Строк')),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='phases', to='data_quality.analysisrun')),
+            ],
+            options={
+                'verbose_name': 'Фаза анализа',
+                'verbose_name_plural': 'Фазы анализа',
+                'ordering': ['run', 'position'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='analysisrun',
+            index=models.Index(fields=['dataset', '-started_at'], name='dq_run_dataset_started_idx'),
+        ),
+    ]
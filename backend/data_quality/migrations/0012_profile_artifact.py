@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_quality', '0011_analysis_runs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProfileArtifact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('analysis', 'Анализ'), ('request', 'Запрос')], max_length=20, verbose_name='Вид')),
+                ('label', models.CharField(max_length=255, verbose_name='Описание')),
+                ('folded_file', models.FileField(upload_to='profiles/%Y/%m/%d/', verbose_name='Стеки (folded)')),
+                ('wall_seconds', models.FloatField(verbose_name='Время, с')),
+                ('samples', models.PositiveIntegerField(verbose_name='Сэмплов')),
+                ('interval_ms', models.FloatField(verbose_name='Интервал, мс')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Создан')),
+                ('dataset', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='profile_artifacts', to='data_quality.dataset')),
+                ('run', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='profile_artifacts', to='data_quality.analysisrun')),
+            ],
+            options={
+                'verbose_name': 'Профиль',
+                'verbose_name_plural': 'Профили',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:12
+
+from django.db import migrations, models
+
+
+def fail_duplicate_active_jobs(apps, schema_editor):
+    """
+    До ограничения на датасет могли попасть две незавершённые задачи.
+    Оставляем самую раннюю, остальные помечаем ошибкой.
+    """
+    AnalysisJob = apps.get_model('data_quality', 'AnalysisJob')
+    seen = set()
+    duplicates = []
+    active = AnalysisJob.objects.filter(status__in=['queued', 'running']).order_by('created_at', 'pk')
+    for pk, dataset_id in active.values_list('pk', 'dataset_id').iterator():
+        if dataset_id in seen:
+            duplicates.append(pk)
+        seen.add(dataset_id)
+    AnalysisJob.objects.filter(pk__in=duplicates).update(status='failed', error='Дубль незавершённой задачи')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_quality', '0013_analysisjob_heartbeat'),
+    ]
+
+    operations = [
+        migrations.RunPython(fail_duplicate_active_jobs, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='analysisjob',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['queued', 'running'])), fields=('dataset',), name='dq_job_one_active_per_dataset'),
+        ),
+    ]
@@ -1,5 +1,7 @@
 # Импортируем необходимый модуль Django для создания моделей
 from django.db import models
+from django.db.models import F
+from django.utils import timezone
 
 # МОДЕЛЬ 1: Dataset (Датасет - загруженный CSV файл)
 class Dataset(models.Model):
@@ -34,14 +36,109 @@ class Dataset(models.Model):
     # default='uploaded' — при создании новой записи автоматически ставится статус 'uploaded'.
     status = models.CharField('Статус', max_length=20, choices=STATUS_CHOICES, default='uploaded')
     
+    # ПОЛЕ 5: SHA-256 содержимого файла. Считается при загрузке.
+    # По нему находим готовые результаты анализа для одинаковых файлов (см. AnalysisCache).
+    content_hash = models.CharField('Хэш содержимого', max_length=64, blank=True, db_index=True)
+    
+    # ПОЛЕ 6: Определённый формат CSV: кодировка, разделитель, кавычки, заголовок.
+    # Заполняется при первом анализе (см. sniffing.py), следующие анализы его переиспользуют.
+    # Например: {"encoding": "cp1251", "delimiter": ";", "quotechar": "\"", "has_header": true}
+    csv_dialect = models.JSONField('Формат CSV', default=dict, blank=True)
+    
+    # ПОЛЕ 7: Прогресс текущего анализа (пишет CSVAnalyzer, см. progress.py).
+    # Например: {"phase": "duplicates", "percent": 60, "rows_processed": 120000, "total_rows": 200000}
+    progress = models.JSONField('Прогресс анализа', default=dict, blank=True)
+    
+    # ПОЛЯ 8-10: Размер таблицы и файла. Считаются на лету во время загрузки (см. uploads.py),
+    # чтобы интерфейс показывал их сразу, ещё до анализа. null - датасет загружен до появления подсчёта.
+    row_count = models.PositiveBigIntegerField('Строк', null=True, blank=True)
+    column_count = models.PositiveIntegerField('Столбцов', null=True, blank=True)
+    file_size = models.PositiveBigIntegerField('Размер файла (байт)', null=True, blank=True)
+    
+    # ПОЛЯ 11-14: Главные цифры анализа - копия из DataCheck.result_json (обновляет CSVAnalyzer).
+    # Отдельные столбцы с индексами: фильтр "пропусков больше 5%" и сортировка по ним
+    # выполняются в базе, без разбора JSON. null - анализа ещё не было.
+    missing_cells = models.PositiveBigIntegerField('Пропущенных ячеек', null=True, blank=True)
+    missing_percentage = models.FloatField('Пропусков, %', null=True, blank=True)
+    duplicate_rows = models.PositiveBigIntegerField('Дубликатов строк', null=True, blank=True)
+    duplicate_percentage = models.FloatField('Дубликатов, %', null=True, blank=True)
+    
+    # ПОЛЯ 15-16: Версия данных датасета для HTTP-кэширования (см. http_cache.py).
+    # Растёт при каждом изменении того, что видно в GET /api/datasets/{id}/: статус, прогресс,
+    # результаты анализа, правка записи. Запросы .update() увеличивают её через version_bump().
+    version = models.PositiveBigIntegerField('Версия', default=1, editable=False)
+    updated_at = models.DateTimeField('Изменён', default=timezone.now, editable=False)
+    
     # СТРОКОВОЕ ПРЕДСТАВЛЕНИЕ объекта. Как модель будет называться в админке и консоли.
     def __str__(self):
         return f"{self.name} ({self.uploaded_at.date()})"
     
+    # Запоминаем, какой файл был у объекта при загрузке из базы,
+    # чтобы в save() заметить замену CSV файла
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._original_csv_name = instance.__dict__.get('csv_file')
+        return instance
+    
+    def save(self, *args, **kwargs):
+        """
+        При замене CSV файла сбрасываем всё, что было посчитано по старому:
+        хэш содержимого, формат CSV, размеры, Parquet-sidecar, индекс строк
+        (см. row_index.py) и состояние инкрементального анализа (см. incremental.py).
+        Каждое сохранение существующей записи увеличивает версию (см. http_cache.py).
+        """
+        original = getattr(self, '_original_csv_name', None)
+        if original and str(original) != self.csv_file.name:
+            from .incremental import remove_fingerprints
+            from .row_index import remove_index
+            from .sidecar import remove_sidecar
+            
+            self.content_hash = ''
+            self.csv_dialect = {}
+            self.row_count = self.column_count = self.file_size = None
+            self.missing_cells = self.missing_percentage = None
+            self.duplicate_rows = self.duplicate_percentage = None
+            IncrementalState.objects.filter(dataset=self).delete()
+            try:
+                original_path = self.csv_file.storage.path(str(original))
+                remove_sidecar(original_path)
+                remove_fingerprints(original_path)
+                remove_index(original_path)
+            except NotImplementedError:
+                # Хранилище без локальных путей - sidecar, отпечатки и индекс там и не создаются
+                pass
+        
+        # Любая правка существующей записи - новая версия (атомарно, в том же UPDATE)
+        bump = not self._state.adding
+        if bump:
+            self.version = F('version') + 1
+            self.updated_at = timezone.now()
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'version', 'updated_at'}
+        
+        super().save(*args, **kwargs)
+        self._original_csv_name = self.csv_file.name
+        if bump:
+            self.refresh_from_db(fields=['version'])
+    
+    @staticmethod
+    def version_bump():
+        """Поля для Dataset.objects.filter(...).update(): новая версия датасета."""
+        return {'version': F('version') + 1, 'updated_at': timezone.now()}
+    
     # Класс Meta для дополнительных настроек модели
     class Meta:
         # Задаём порядок сортировки по умолчанию: сначала новые (по убыванию даты загрузки).
         ordering = ['-uploaded_at']
+        # Индексы под частые запросы: список по дате (курсорная пагинация, date_hierarchy),
+        # фильтр по статусу в админке и фильтры по качеству данных (?min_missing=5)
+        indexes = [
+            models.Index(fields=['-uploaded_at', '-id'], name='dq_dataset_uploaded_idx'),
+            models.Index(fields=['status', '-uploaded_at'], name='dq_dataset_status_idx'),
+            models.Index(fields=['missing_percentage'], name='dq_dataset_missing_idx'),
+            models.Index(fields=['duplicate_percentage'], name='dq_dataset_duplicates_idx'),
+        ]
         # Человекочитаемое имя модели в единственном и множественном числе для админки.
         verbose_name = 'Датасет'
         verbose_name_plural = 'Датасеты'
@@ -83,6 +180,10 @@ class DataCheck(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        # Проверку определённого типа у датасета ищем по обоим полям сразу
+        indexes = [
+            models.Index(fields=['dataset', 'check_type'], name='dq_check_dataset_type_idx'),
+        ]
         verbose_name = 'Проверка данных'
         verbose_name_plural = 'Проверки данных'
 
@@ -113,4 +214,353 @@ class Report(models.Model):
     
     class Meta:
         verbose_name = 'Отчёт'
-        verbose_name_plural = 'Отчёты'
\ No newline at end of file
+        verbose_name_plural = 'Отчёты'
+
+
+# МОДЕЛЬ 4: AnalysisJob (Задача на анализ в фоновой очереди)
+class AnalysisJob(models.Model):
+    """
+    Задача на анализ датасета. Очередь хранится прямо в базе данных:
+    API только ставит задачу, а выполняют её воркеры
+    (python manage.py run_analysis_workers).
+    """
+    
+    # СПРАВОЧНИК СТАТУСОВ ЗАДАЧИ
+    STATUS_CHOICES = [
+        ('queued', '🕒 В очереди'),        # Ждёт свободного воркера
+        ('running', '⚙️ Выполняется'),     # Воркер взял задачу в работу
+        ('completed', '✅ Выполнена'),     # Анализ успешно завершён
+        ('failed', '❌ Ошибка'),           # Все попытки исчерпаны
+    ]
+    
+    # ПОЛЕ 1: Какой датасет анализируем. Обращение: dataset.jobs.all()
+    dataset = models.ForeignKey(Dataset, on_delete=models.CASCADE, related_name='jobs')
+    
+    # ПОЛЕ 2: Текущий статус задачи
+    status = models.CharField('Статус', max_length=20, choices=STATUS_CHOICES, default='queued')
+    
+    # ПОЛЕ 3: Параметры анализа (например, {"mode": "streaming"})
+    options = models.JSONField('Параметры', default=dict, blank=True)
+    
+    # ПОЛЕ 4-5: Повторы при ошибках
+    attempts = models.PositiveIntegerField('Попыток сделано', default=0)
+    max_attempts = models.PositiveIntegerField('Максимум попыток', default=3)
+    
+    # ПОЛЕ 6: Не запускать раньше этого времени (задержка перед повтором)
+    run_after = models.DateTimeField('Запустить после', null=True, blank=True)
+    
+    # ПОЛЕ 7: Имя воркера, который выполняет задачу
+    worker = models.CharField('Воркер', max_length=100, blank=True)
+    
+    # ПОЛЕ 8: Текст последней ошибки
+    error = models.TextField('Ошибка', blank=True)
+    
+    # ПОЛЯ 9-11: Временные метки
+    created_at = models.DateTimeField('Создана', auto_now_add=True)
+    started_at = models.DateTimeField('Начата', null=True, blank=True)
+    finished_at = models.DateTimeField('Завершена', null=True, blank=True)
+    
+    # ПОЛЕ 12: Последний "признак жизни" от воркера (обновляется вместе с прогрессом анализа).
+    # Задача без обновлений дольше DATA_QUALITY_JOB_STALE_TIMEOUT считается зависшей
+    heartbeat_at = models.DateTimeField('Последний отклик', null=True, blank=True)
+    
+    def __str__(self):
+        return f"Задача #{self.pk} ({self.get_status_display()}) для датасета #{self.dataset_id}"
+    
+    class Meta:
+        ordering = ['created_at']
+        verbose_name = 'Задача анализа'
+        verbose_name_plural = 'Задачи анализа'
+        constraints = [
+            # Не больше одной незавершённой задачи на датасет - даже если
+            # два запроса /analyze/ пришли одновременно (см. jobs.enqueue_analysis)
+            models.UniqueConstraint(
+                fields=['dataset'],
+                condition=models.Q(status__in=['queued', 'running']),
+                name='dq_job_one_active_per_dataset',
+            ),
+        ]
+
+
+# МОДЕЛЬ 5: AnalysisCache (Кэш результатов анализа по содержимому файла)
+class AnalysisCache(models.Model):
+    """
+    Готовые результаты проверок для файла с данным содержимым.
+    Повторный анализ того же файла (или его копии под другим именем)
+    просто копирует сохранённые результаты, не открывая CSV.
+    """
+    
+    # ПОЛЕ 1: SHA-256 содержимого файла
+    content_hash = models.CharField('Хэш содержимого', max_length=64)
+    
+    # ПОЛЕ 2: Версия анализатора и режим анализа.
+    # При изменении логики анализа меняется версия - старые записи перестают находиться.
+    analyzer_version = models.CharField('Версия анализатора', max_length=50)
+    
+    # ПОЛЕ 3: Результаты проверок: {"missing": {...}, "duplicates": {...}, "statistics": {...}}
+    results = models.JSONField('Результаты', default=dict)
+    
+    # ПОЛЕ 4: Размер результатов в байтах (для ограничения общего объёма кэша)
+    size_bytes = models.PositiveIntegerField('Размер (байт)', default=0)
+    
+    # ПОЛЕ 5-7: Статистика использования для вытеснения давно не используемых записей (LRU)
+    hits = models.PositiveIntegerField('Попаданий', default=0)
+    created_at = models.DateTimeField('Создано', auto_now_add=True)
+    last_used_at = models.DateTimeField('Последнее использование', auto_now=True, db_index=True)
+    
+    def __str__(self):
+        return f"Кэш {self.content_hash[:12]}… (v{self.analyzer_version})"
+    
+    class Meta:
+        unique_together = [('content_hash', 'analyzer_version')]
+        verbose_name = 'Кэш анализа'
+        verbose_name_plural = 'Кэш анализа'
+
+
+# МОДЕЛЬ 6: IncrementalState (Состояние анализа для файлов, которые дописываются в конец)
+class IncrementalState(models.Model):
+    """
+    Слияемое состояние потокового анализа датасета: накопители по столбцам
+    (счётчики, моменты, скетчи), счётчики дубликатов и файл с отпечатками строк,
+    а также до какого байта файл уже прочитан. Если файл только дописали в конец,
+    следующий анализ читает лишь новый хвост и сливает его с этим состоянием
+    (см. incremental.py).
+    """
+    
+    # ПОЛЕ 1: Датасет. Обращение: dataset.incremental_state
+    dataset = models.OneToOneField(Dataset, on_delete=models.CASCADE, related_name='incremental_state')
+    
+    # ПОЛЕ 2: Версия анализатора, формат CSV и параметры анализа.
+    # Если что-то из этого изменилось, состояние не используется.
+    signature = models.CharField('Подпись параметров', max_length=64)
+    
+    # ПОЛЯ 3-4: Сколько байт файла учтено и SHA-256 этих байт.
+    # Если начало файла изменилось (а не только дописан хвост) - полный пересчёт.
+    byte_offset = models.PositiveBigIntegerField('Прочитано байт')
+    prefix_hash = models.CharField('Хэш прочитанной части', max_length=64)
+    
+    # ПОЛЕ 5: Сколько строк данных учтено
+    total_rows = models.PositiveBigIntegerField('Строк учтено')
+    
+    # ПОЛЕ 6: Накопители по столбцам: {"columns": [...], "accumulators": [...]} (ColumnAccumulator.to_state)
+    columns_state = models.JSONField('Состояние столбцов', default=dict)
+    
+    # ПОЛЕ 7: Счётчики дубликатов (DuplicateDetector.state)
+    duplicates_state = models.JSONField('Состояние дубликатов', default=dict)
+    
+    # ПОЛЯ 8-9: Файл с отпечатками уникальных строк (лежит рядом с CSV) и их количество
+    fingerprints_file = models.CharField('Файл отпечатков', max_length=500)
+    fingerprint_count = models.PositiveBigIntegerField('Отпечатков', default=0)
+    
+    # ПОЛЕ 10: Когда состояние обновлялось
+    updated_at = models.DateTimeField('Обновлено', auto_now=True)
+    
+    def __str__(self):
+        return f"Состояние анализа датасета #{self.dataset_id} ({self.byte_offset} байт)"
+    
+    class Meta:
+        verbose_name = 'Состояние инкрементального анализа'
+        verbose_name_plural = 'Состояния инкрементального анализа'
+
+
+# МОДЕЛЬ 7: DailyQualityRollup (Сводка качества по дням загрузки)
+class DailyQualityRollup(models.Model):
+    """
+    Суммы по всем проанализированным датасетам, загруженным в этот день.
+    Обновляется инкрементально при каждом сохранении результатов (см. rollups.py):
+    вклад прошлого анализа датасета вычитается, нового - прибавляется.
+    Средние и доли считаются из сумм при запросе (GET /api/aggregates/daily/).
+    """
+    
+    # ПОЛЕ 1: День загрузки датасетов
+    day = models.DateField('День', unique=True)
+    
+    # ПОЛЕ 2: Сколько проанализированных датасетов загружено в этот день
+    datasets_count = models.BigIntegerField('Датасетов', default=0)
+    
+    # ПОЛЯ 3-6: Суммы размеров и проблем
+    rows_total = models.BigIntegerField('Строк', default=0)
+    cells_total = models.BigIntegerField('Ячеек', default=0)
+    missing_cells_total = models.BigIntegerField('Пропущенных ячеек', default=0)
+    duplicate_rows_total = models.BigIntegerField('Дубликатов строк', default=0)
+    
+    # ПОЛЯ 7-8: Суммы процентов по датасетам (для среднего по датасетам, а не по ячейкам)
+    missing_percentage_sum = models.FloatField('Сумма % пропусков', default=0)
+    duplicate_percentage_sum = models.FloatField('Сумма % дубликатов', default=0)
+    
+    # ПОЛЕ 9: Когда сводка обновлялась
+    updated_at = models.DateTimeField('Обновлено', auto_now=True)
+    
+    def __str__(self):
+        return f"Сводка за {self.day}: {self.datasets_count} датасетов"
+    
+    class Meta:
+        ordering = ['-day']
+        verbose_name = 'Сводка по дню'
+        verbose_name_plural = 'Сводки по дням'
+
+
+# МОДЕЛЬ 8: ColumnQualityRollup (Сводка качества по имени столбца)
+class ColumnQualityRollup(models.Model):
+    """
+    Суммы по всем датасетам, в которых встречается столбец с таким именем.
+    Обновляется так же, как DailyQualityRollup. Доля пропусков хранится готовой
+    и проиндексирована: "худшие столбцы" - чтение первых строк индекса.
+    """
+    
+    # ПОЛЕ 1: Имя столбца (как в заголовке CSV)
+    column_name = models.CharField('Столбец', max_length=255, unique=True)
+    
+    # ПОЛЯ 2-3: В скольких датасетах столбец встречается и в скольких из них есть пропуски
+    datasets_count = models.BigIntegerField('Датасетов', default=0)
+    datasets_with_missing = models.BigIntegerField('Датасетов с пропусками', default=0)
+    
+    # ПОЛЯ 4-5: Строк в этих датасетах и пропусков в столбце
+    rows_total = models.BigIntegerField('Строк', default=0)
+    missing_cells_total = models.BigIntegerField('Пропущенных ячеек', default=0)
+    
+    # ПОЛЕ 6: Доля пропусков: missing_cells_total / rows_total, в %
+    missing_percentage = models.FloatField('Пропусков, %', default=0, db_index=True)
+    
+    # ПОЛЕ 7: Когда сводка обновлялась
+    updated_at = models.DateTimeField('Обновлено', auto_now=True)
+    
+    def __str__(self):
+        return f"Столбец {self.column_name}: {self.missing_percentage:.2f}% пропусков"
+    
+    class Meta:
+        verbose_name = 'Сводка по столбцу'
+        verbose_name_plural = 'Сводки по столбцам'
+
+
+# МОДЕЛЬ 9: AnalysisRun (Замеры одного запуска анализа)
+class AnalysisRun(models.Model):
+    """
+    Один запуск CSVAnalyzer.analyze(): режим, исход, общее время, процессор и пик памяти.
+    Время по фазам - в AnalysisPhase (см. instrumentation.py).
+    Хранятся последние DATA_QUALITY_ANALYSIS_RUNS_KEEP запусков каждого датасета.
+    """
+    
+    # СПРАВОЧНИК ИСХОДОВ
+    OUTCOME_CHOICES = [
+        ('completed', '✅ Результаты сохранены'),
+        ('stale', '⚠️ Файл изменился, результаты не сохранены'),
+        ('failed', '❌ Ошибка'),
+    ]
+    
+    # ПОЛЕ 1: Датасет. Обращение: dataset.runs.all()
+    dataset = models.ForeignKey(Dataset, on_delete=models.CASCADE, related_name='runs')
+    
+    # ПОЛЕ 2: Задача очереди, в которой выполнялся анализ (None - анализ из запроса, например ?mode=quick)
+    job = models.ForeignKey(AnalysisJob, on_delete=models.SET_NULL, null=True, blank=True, related_name='runs')
+    
+    # ПОЛЯ 3-5: Режим (full, streaming, quick), исход и взяты ли результаты из кэша
+    mode = models.CharField('Режим', max_length=20)
+    outcome = models.CharField('Исход', max_length=20, choices=OUTCOME_CHOICES)
+    from_cache = models.BooleanField('Из кэша', default=False)
+    
+    # ПОЛЕ 6: Сколько строк обработано (None - анализ не дошёл до чтения файла)
+    total_rows = models.BigIntegerField('Строк', null=True, blank=True)
+    
+    # ПОЛЯ 7-9: Общее время, процессорное время (секунды) и пик RSS процесса (байты)
+    wall_seconds = models.FloatField('Время, с', default=0)
+    cpu_seconds = models.FloatField('Процессор, с', default=0)
+    peak_rss_bytes = models.BigIntegerField('Пик памяти, байт', null=True, blank=True)
+    
+    # ПОЛЕ 10: Текст ошибки (для исхода failed)
+    error = models.TextField('Ошибка', blank=True)
+    
+    # ПОЛЕ 11: Когда анализ начался
+    started_at = models.DateTimeField('Начат', default=timezone.now)
+    
+    def __str__(self):
+        return f"Анализ #{self.pk} датасета #{self.dataset_id} ({self.mode}, {self.wall_seconds:.2f} с)"
+    
+    class Meta:
+        ordering = ['-started_at']
+        indexes = [models.Index(fields=['dataset', '-started_at'], name='dq_run_dataset_started_idx')]
+        verbose_name = 'Запуск анализа'
+        verbose_name_plural = 'Запуски анализа'
+
+
+# МОДЕЛЬ 10: AnalysisPhase (Замеры одной фазы запуска анализа)
+class AnalysisPhase(models.Model):
+    """
+    Фаза анализа (parsing, profiling, duplicates, saving...): время, процессор,
+    пик памяти и строки. Вложенные фазы вычтены из внешних (см. instrumentation.py).
+    """
+    
+    # ПОЛЕ 1: Запуск. Обращение: run.phases.all()
+    run = models.ForeignKey(AnalysisRun, on_delete=models.CASCADE, related_name='phases')
+    
+    # ПОЛЯ 2-3: Порядковый номер (по завершению) и имя фазы
+    position = models.PositiveSmallIntegerField('Порядок')
+    name = models.CharField('Фаза', max_length=30)
+    
+    # ПОЛЯ 4-6: Время и процессор (секунды), пик RSS за фазу (байты)
+    wall_seconds = models.FloatField('Время, с')
+    cpu_seconds = models.FloatField('Процессор, с')
+    peak_rss_bytes = models.BigIntegerField('Пик памяти, байт', null=True, blank=True)
+    
+    # ПОЛЕ 7: Строк обработано в фазе (None - фаза не про строки, например saving)
+    rows = models.BigIntegerField('Строк', null=True, blank=True)
+    
+    @property
+    def rows_per_second(self):
+        if not self.rows or not self.wall_seconds:
+            return None
+        return round(self.rows / self.wall_seconds, 1)
+    
+    def __str__(self):
+        return f"{self.name}: {self.wall_seconds:.3f} с"
+    
+    class Meta:
+        ordering = ['run', 'position']
+        verbose_name = 'Фаза анализа'
+        verbose_name_plural = 'Фазы анализа'
+
+
+# МОДЕЛЬ 11: ProfileArtifact (Профиль медленного анализа или запроса)
+class ProfileArtifact(models.Model):
+    """
+    Профиль сэмплирующего профилировщика (см. profiling.py) в формате folded stacks -
+    готов для flamegraph.pl, inferno или speedscope. Сохраняется только для анализов
+    и запросов дольше порога DATA_QUALITY_PROFILE_MIN_SECONDS.
+    """
+    
+    # СПРАВОЧНИК: ЧТО ПРОФИЛИРОВАЛИ
+    KIND_CHOICES = [
+        ('analysis', 'Анализ'),   # CSVAnalyzer.analyze()
+        ('request', 'Запрос'),    # Запрос к API (ProfilingMiddleware)
+    ]
+    
+    # ПОЛЕ 1: Датасет (None - запрос не про конкретный датасет). Обращение: dataset.profile_artifacts.all()
+    dataset = models.ForeignKey(Dataset, on_delete=models.CASCADE, null=True, blank=True,
+                                related_name='profile_artifacts')
+    
+    # ПОЛЕ 2: Запуск анализа с замерами по фазам (для профилей анализа)
+    run = models.ForeignKey(AnalysisRun, on_delete=models.SET_NULL, null=True, blank=True,
+                            related_name='profile_artifacts')
+    
+    # ПОЛЯ 3-4: Что профилировали: вид и описание ("full data.csv", "GET /api/datasets/5/")
+    kind = models.CharField('Вид', max_length=20, choices=KIND_CHOICES)
+    label = models.CharField('Описание', max_length=255)
+    
+    # ПОЛЕ 5: Файл со стеками: "f1 (...);f2 (...) <число сэмплов>" на строку
+    folded_file = models.FileField('Стеки (folded)', upload_to='profiles/%Y/%m/%d/')
+    
+    # ПОЛЯ 6-8: Длительность, число сэмплов и интервал между ними
+    wall_seconds = models.FloatField('Время, с')
+    samples = models.PositiveIntegerField('Сэмплов')
+    interval_ms = models.FloatField('Интервал, мс')
+    
+    # ПОЛЕ 9: Когда профиль сохранён
+    created_at = models.DateTimeField('Создан', auto_now_add=True)
+    
+    def __str__(self):
+        return f"Профиль {self.label} ({self.wall_seconds:.1f} с)"
+    
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Профиль'
+        verbose_name_plural = 'Профили'
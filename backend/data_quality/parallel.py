@@ -0,0 +1,198 @@
+"""
+parallel.py - Параллельное профилирование столбцов на нескольких ядрах
+
+Столбцы DataFrame независимы, поэтому их профили можно считать в пуле процессов.
+Чтобы не копировать данные в каждый процесс через pickle:
+- числовые столбцы один раз записываются в общий memory-mapped файл (float64,
+  столбец за столбцом), и процессы читают из него только свои столбцы;
+- текстовые столбцы процессы читают сами из Parquet-sidecar (тоже memory-map),
+  а если sidecar нет - получают только свои столбцы.
+
+Каждый столбец целиком обрабатывается в одном процессе теми же функциями,
+что и последовательный profiler.py, поэтому результаты совпадают с ним точно.
+Если пул не удаётся запустить (нет прав на семафоры, лимит процессов) или
+он падает, профиль считается последовательно.
+"""
+
+import logging
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+
+from .profiler import (
+    accumulate_column, build_missing_results, build_results, column_to_numpy, profile_column,
+    profile_dataframe, profile_dataframe_approximate, profile_numeric,
+)
+from .sidecar import fresh_sidecar_path
+from .streaming import accumulator_statistics
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - зависит от окружения
+    pq = None
+
+logger = logging.getLogger(__name__)
+
+
+def get_worker_count():
+    """Количество процессов из настроек (0 или None - по числу ядер)."""
+    workers = getattr(settings, 'DATA_QUALITY_WORKERS', None) or os.cpu_count() or 1
+    return max(1, int(workers))
+
+
+def should_parallelize(df, workers):
+    """Для маленьких таблиц запуск процессов дороже самого профилирования."""
+    min_cells = getattr(settings, 'DATA_QUALITY_PARALLEL_MIN_CELLS', 5_000_000)
+    return workers > 1 and len(df.columns) > 1 and df.size >= min_cells
+
+
+def _split(items, parts):
+    """Делит список на parts примерно равных непустых частей."""
+    parts = max(1, min(parts, len(items)))
+    return [items[i::parts] for i in range(parts) if items[i::parts]]
+
+
+# ============================================================================
+# 1. ЗАДАЧИ ДЛЯ ПРОЦЕССОВ ПУЛА
+# ============================================================================
+def _profile_numeric_task(matrix_path, shape, positions, approximate):
+    """
+    Профили числовых столбцов из общего memory-mapped файла.
+
+    Args:
+        matrix_path: Путь к файлу с матрицей float64 (столбцы x строки)
+        shape: Форма матрицы
+        positions: Номера строк матрицы (т.е. столбцов DataFrame) этой задачи
+        approximate: Считать через скетчи (ColumnAccumulator), а не точно
+
+    Returns:
+        list: [(номер, профиль или накопитель), ...]
+    """
+    matrix = np.memmap(matrix_path, dtype=np.float64, mode='r', shape=shape)
+    results = []
+    for position in positions:
+        values = np.asarray(matrix[position])
+        if approximate:
+            results.append((position, accumulate_column(position, pd.Series(values))))
+        else:
+            results.append((position, ('numeric', profile_numeric(values))))
+    del matrix
+    return results
+
+
+def _profile_text_task(positions, parquet_path=None, names=None, frame=None, approximate=False):
+    """
+    Профили текстовых (и прочих) столбцов.
+    Данные берутся из sidecar (parquet_path + names), если он есть, иначе из frame.
+
+    Returns:
+        list: [(номер, профиль или накопитель), ...]
+    """
+    if parquet_path is not None:
+        frame = pq.read_table(parquet_path, columns=names, memory_map=True).to_pandas()
+
+    results = []
+    for i, position in enumerate(positions):
+        series = frame.iloc[:, i]
+        if approximate:
+            results.append((position, accumulate_column(position, series)))
+        else:
+            results.append((position, profile_column(series)))
+    return results
+
+
+# ============================================================================
+# 2. ПАРАЛЛЕЛЬНЫЙ ПРОФИЛЬ DATAFRAME
+# ============================================================================
+def profile_dataframe_parallel(df, workers, csv_path=None, read_kwargs=None, approximate=False):
+    """
+    То же, что profile_dataframe / profile_dataframe_approximate, но столбцы
+    распределяются по пулу из workers процессов.
+
+    Args:
+        df: DataFrame
+        workers: Количество процессов
+        csv_path: Путь к исходному CSV - чтобы процессы читали текст из sidecar
+        read_kwargs: Параметры pd.read_csv, с которыми получен df (sidecar должен им соответствовать)
+        approximate: Приближённый режим (скетчи)
+
+    Returns:
+        tuple: (missing_results, statistics_results)
+    """
+    try:
+        return _profile_in_pool(df, workers, csv_path, read_kwargs, approximate)
+    except (OSError, BrokenProcessPool) as e:
+        logger.warning("⚠️ Пул процессов недоступен (%s), профилируем последовательно", e)
+        return profile_dataframe_approximate(df) if approximate else profile_dataframe(df)
+
+
+def _profile_in_pool(df, workers, csv_path, read_kwargs, approximate):
+    """Профиль на пуле процессов (см. profile_dataframe_parallel)."""
+    columns = list(df.columns)
+    # Между процессами передаём номера столбцов, а не имена
+    numeric_positions = [
+        i for i, column in enumerate(columns) if pd.api.types.is_numeric_dtype(df.iloc[:, i])
+    ]
+    numeric_set = set(numeric_positions)
+    other_positions = [i for i in range(len(columns)) if i not in numeric_set]
+
+    parquet_path = fresh_sidecar_path(csv_path, read_kwargs) if csv_path and pq is not None else None
+
+    logger.info("⚙️ Параллельный профиль: %s столбцов, %s процессов", len(columns), workers)
+
+    spill_path = tempfile.mkdtemp(prefix='dq-parallel-')
+    try:
+        futures = []
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # Числовые столбцы: одна общая матрица на диске/в page cache вместо копий
+            if numeric_positions:
+                matrix_path = os.path.join(spill_path, 'numeric.f64')
+                shape = (len(numeric_positions), len(df))
+                matrix = np.memmap(matrix_path, dtype=np.float64, mode='w+', shape=shape)
+                for row, position in enumerate(numeric_positions):
+                    matrix[row] = column_to_numpy(df.iloc[:, position])
+                matrix.flush()
+                del matrix
+
+                for rows in _split(list(range(len(numeric_positions))), workers):
+                    futures.append(('numeric', pool.submit(
+                        _profile_numeric_task, matrix_path, shape, rows, approximate
+                    )))
+
+            # Текстовые столбцы: из sidecar или только нужные столбцы через pickle
+            for positions in _split(other_positions, workers):
+                if parquet_path is not None:
+                    source = {'parquet_path': parquet_path, 'names': [columns[i] for i in positions]}
+                else:
+                    source = {'frame': df.iloc[:, positions]}
+                futures.append(('other', pool.submit(
+                    _profile_text_task, positions, approximate=approximate, **source
+                )))
+
+            profiles = {}
+            for kind, future in futures:
+                for key, profile in future.result():
+                    position = numeric_positions[key] if kind == 'numeric' else key
+                    profiles[position] = profile
+    finally:
+        shutil.rmtree(spill_path, ignore_errors=True)
+
+    # Собираем в исходном порядке столбцов - как в последовательном профиле
+    ordered = [(columns[i], profiles[i]) for i in range(len(columns))]
+    if approximate:
+        accumulators = {}
+        for column, accumulator in ordered:
+            accumulator.name = column
+            accumulators[column] = accumulator
+        missing_results = build_missing_results(len(df), {
+            column: acc.missing for column, acc in accumulators.items()
+        })
+        return missing_results, accumulator_statistics(accumulators)
+
+    return build_results(df, dict(ordered))
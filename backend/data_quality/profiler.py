@@ -0,0 +1,218 @@
+"""
+profiler.py - Однопроходный профилировщик столбцов DataFrame
+
+Раньше каждая проверка CSVAnalyzer заново проходила по DataFrame:
+isna() считался по несколько раз на столбец, mode() - дважды.
+Здесь каждый столбец обходится ОДИН раз (векторно, по NumPy-буферу),
+а из полученного профиля собираются результаты всех проверок.
+
+profile_dataframe_approximate() - приближённый вариант: вместо точных хэш-таблиц
+уникальных значений столбцы проходят через скетчи (см. sketches.py), память
+на столбец не зависит от числа разных значений.
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+
+from .sketches import ADD_BLOCK_ROWS
+from .streaming import ColumnAccumulator, accumulator_statistics
+
+
+def finite_or_none(data):
+    """
+    Копия результатов, в которой NaN и ±Infinity заменены на None.
+    Строгий JSON их не допускает: JSONField (JSON_VALID в SQLite, jsonb в PostgreSQL)
+    отказывается их сохранять, а API - отдавать. А появляются они законно:
+    std по одному значению - NaN, "inf" в CSV - бесконечность в min/max.
+    """
+    if isinstance(data, float):
+        return data if math.isfinite(data) else None
+    if isinstance(data, dict):
+        return {key: finite_or_none(value) for key, value in data.items()}
+    if isinstance(data, (list, tuple)):
+        return [finite_or_none(value) for value in data]
+    return data
+
+
+def is_text_column(series):
+    """Текстовый столбец: строки или object (строки вперемешку с пропусками)."""
+    return pd.api.types.is_string_dtype(series) or pd.api.types.is_object_dtype(series)
+
+
+def profile_numeric(values):
+    """
+    Профиль числового столбца по NumPy-массиву float64 (пропуски = NaN).
+
+    Returns:
+        dict: min, max, mean, std, missing - как в _calculate_statistics
+    """
+    mask = np.isnan(values)
+    missing = int(np.count_nonzero(mask))
+    valid = values[~mask] if missing else values
+    count = len(valid)
+
+    if not count:
+        return {'min': None, 'max': None, 'mean': None, 'std': None, 'missing': missing}
+
+    mean = valid.mean()
+    # Выборочное std (ddof=1), как в pandas; для одного значения - NaN
+    std = math.sqrt(((valid - mean) ** 2).sum() / (count - 1)) if count > 1 else float('nan')
+
+    return {
+        'min': float(valid.min()),
+        'max': float(valid.max()),
+        'mean': float(mean),
+        'std': float(std),
+        'missing': missing,
+    }
+
+
+def profile_codes(codes, uniques):
+    """
+    Профиль текстового столбца по результату pd.factorize:
+    codes - номер значения для каждой строки (-1 = пропуск), uniques - сами значения.
+
+    Returns:
+        dict: unique_values, most_common, missing - как в _calculate_statistics
+    """
+    present = codes[codes >= 0]
+    missing = len(codes) - len(present)
+
+    most_common = None
+    if len(uniques):
+        counts = np.bincount(present, minlength=len(uniques))
+        candidates = uniques[counts == counts.max()]
+        # mode() в pandas сортирует значения - при равенстве частот берём наименьшее
+        try:
+            most_common = str(min(candidates))
+        except TypeError:
+            most_common = str(candidates[0])
+
+    return {
+        'unique_values': int(len(uniques)),
+        'most_common': most_common,
+        'missing': int(missing),
+    }
+
+
+def column_to_numpy(series):
+    """Буфер числового столбца в виде float64 с NaN вместо пропусков."""
+    return series.to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def profile_column(series):
+    """
+    Профиль одного столбца за один проход.
+
+    Returns:
+        tuple: (kind, stats), где kind - 'numeric', 'text' или 'other'
+    """
+    if pd.api.types.is_numeric_dtype(series):
+        return 'numeric', profile_numeric(column_to_numpy(series))
+
+    if is_text_column(series):
+        codes, uniques = pd.factorize(series, use_na_sentinel=True)
+        return 'text', profile_codes(codes, np.asarray(uniques, dtype=object))
+
+    # Прочие типы (даты, категории) - только пропуски
+    return 'other', {'missing': int(series.isna().sum())}
+
+
+def build_missing_results(total_rows, missing_by_column):
+    """
+    Результат проверки пропусков.
+
+    Args:
+        total_rows: Количество строк
+        missing_by_column: {столбец: число пропусков} по всем столбцам
+    """
+    total_columns = len(missing_by_column)
+    total_cells = total_rows * total_columns
+    missing_cells = sum(missing_by_column.values())
+    missing_percentage = (missing_cells / total_cells) * 100 if total_cells > 0 else 0
+
+    return {
+        'total_rows': total_rows,
+        'total_columns': total_columns,
+        'total_cells': int(total_cells),
+        'missing_cells': int(missing_cells),
+        'missing_percentage': round(missing_percentage, 2),
+        'columns_with_missing': {
+            column: missing for column, missing in missing_by_column.items() if missing > 0
+        },
+    }
+
+
+def build_results(df, column_profiles):
+    """
+    Собирает из профилей столбцов результаты проверок пропусков и статистики.
+
+    Args:
+        df: Исходный DataFrame
+        column_profiles: {столбец: (kind, stats)} в порядке столбцов df
+
+    Returns:
+        tuple: (missing_results, statistics_results)
+    """
+    total_columns = len(df.columns)
+    numeric_stats = {}
+    text_stats = {}
+
+    for column, (kind, stats) in column_profiles.items():
+        if kind == 'numeric':
+            numeric_stats[column] = stats
+        elif kind == 'text':
+            text_stats[column] = stats
+
+    missing_results = build_missing_results(len(df), {
+        column: stats['missing'] for column, (_, stats) in column_profiles.items()
+    })
+    statistics_results = {
+        'numeric_columns': numeric_stats,
+        'text_columns': text_stats,
+        'total_columns': total_columns,
+    }
+    return missing_results, statistics_results
+
+
+def profile_dataframe(df):
+    """
+    Профилирует все столбцы DataFrame за один проход по каждому.
+
+    Returns:
+        tuple: (missing_results, statistics_results)
+    """
+    column_profiles = {column: profile_column(df[column]) for column in df.columns}
+    return build_results(df, column_profiles)
+
+
+def accumulate_column(name, series):
+    """
+    Накопитель приближённого режима по столбцу. Столбец подаётся блоками
+    по ADD_BLOCK_ROWS строк, как чанки потокового анализа: временные массивы
+    (маска пропусков, хэши, частоты блока) не растут с длиной столбца.
+    """
+    accumulator = ColumnAccumulator(name, approximate=True)
+    # Пустой столбец тоже подаём - по нему определяется тип (текст или число)
+    for start in range(0, max(len(series), 1), ADD_BLOCK_ROWS):
+        accumulator.update(series.iloc[start:start + ADD_BLOCK_ROWS])
+    return accumulator
+
+
+def profile_dataframe_approximate(df):
+    """
+    Приближённый профиль: уникальные значения - HyperLogLog, самые частые -
+    Space-Saving и Count-Min, квантили числовых столбцов - t-digest.
+    В statistics попадают оценки ошибок каждого скетча.
+
+    Returns:
+        tuple: (missing_results, statistics_results)
+    """
+    accumulators = {column: accumulate_column(column, df[column]) for column in df.columns}
+
+    missing_results = build_missing_results(len(df), {
+        column: acc.missing for column, acc in accumulators.items()
+    })
+    return missing_results, accumulator_statistics(accumulators)
@@ -0,0 +1,230 @@
+"""
+profiling.py - Сэмплирующий профилировщик для медленных анализов и запросов
+
+Когда анализ конкретного файла идёт 10 минут, замеров по фазам (instrumentation.py)
+мало - нужно видеть, в каких функциях проходит время. StackSampler раз в
+DATA_QUALITY_PROFILE_INTERVAL секунд снимает стек профилируемого потока
+(sys._current_frames() из отдельного потока) и считает одинаковые стеки.
+Сам код при этом не замедляется трассировкой, как в cProfile: накладные расходы -
+один обход стека на сэмпл, поэтому профилировщик можно включать и в продакшене.
+
+Результат сохраняется в формате "folded stacks" - строка на стек:
+    analyze (data_quality/analyzer.py:73);_analyze (...);read_csv (pandas/...) 42
+Его принимают flamegraph.pl, inferno и speedscope (https://www.speedscope.app).
+Файл прикрепляется к датасету как ProfileArtifact - но только если профилируемая
+работа шла не меньше порога (DATA_QUALITY_PROFILE_MIN_SECONDS): быстрые запуски
+не засоряют хранилище.
+
+Как включить:
+- анализы - DATA_QUALITY_PROFILE_ANALYSES = True (все, с порогом) или заголовок
+  X-DQ-Profile у POST /api/datasets/{id}/analyze/ - для одного анализа в воркере;
+- запросы к API - заголовок X-DQ-Profile у любого запроса (ProfilingMiddleware)
+  или DATA_QUALITY_PROFILE_REQUESTS = True для всех запросов.
+Значение заголовка: "1" - порог из настроек, число - свой порог в секундах.
+Заголовок учитывается, только если DATA_QUALITY_PROFILE_HEADER_ENABLED = True.
+
+Ограничения: сэмплируется один поток. Процессы параллельного профилирования
+(parallel.py) в профиль не попадают - видно только ожидание их результатов.
+Пока C-код (например, разбор CSV в pandas) держит GIL, сэмплы откладываются
+и достаются стеку, который был активен в момент снятия.
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.utils import timezone
+
+logger = logging.getLogger('data_quality.profiling')
+
+# Заголовок запроса, включающий профилирование
+HEADER = 'X-DQ-Profile'
+
+# Ответ на профилированный запрос, если профиль сохранён: id ProfileArtifact
+ARTIFACT_HEADER = 'X-DQ-Profile-Artifact'
+
+# Стек глубже этого обрезается (по самым внешним кадрам)
+MAX_DEPTH = 256
+
+
+def get_interval():
+    return getattr(settings, 'DATA_QUALITY_PROFILE_INTERVAL', 0.01)
+
+
+def get_min_seconds():
+    return getattr(settings, 'DATA_QUALITY_PROFILE_MIN_SECONDS', 5.0)
+
+
+def parse_threshold(value):
+    """
+    Значение заголовка или параметра profile -> порог в секундах или None (не профилировать).
+    True / "1" / "yes" - порог из настроек, число - свой порог.
+    """
+    if value is None or value is False:
+        return None
+    if value is True:
+        return get_min_seconds()
+    if isinstance(value, (int, float)):
+        return max(float(value), 0.0)
+    value = str(value).strip().lower()
+    if value in ('', '0', 'false', 'no', 'off'):
+        return None
+    if value in ('1', 'true', 'yes', 'on'):
+        return get_min_seconds()
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        return None
+
+
+def header_threshold(request):
+    """Порог из заголовка X-DQ-Profile или None (заголовка нет или он выключен настройкой)."""
+    if not getattr(settings, 'DATA_QUALITY_PROFILE_HEADER_ENABLED', False):
+        return None
+    return parse_threshold(request.headers.get(HEADER))
+
+
+def analysis_threshold(profile=None):
+    """Порог профилирования анализа: из параметра анализа, иначе из DATA_QUALITY_PROFILE_ANALYSES."""
+    if profile is None:
+        profile = getattr(settings, 'DATA_QUALITY_PROFILE_ANALYSES', False)
+    return parse_threshold(profile)
+
+
+def request_threshold(request):
+    """Порог профилирования запроса: заголовок, иначе DATA_QUALITY_PROFILE_REQUESTS."""
+    threshold = header_threshold(request)
+    if threshold is None and getattr(settings, 'DATA_QUALITY_PROFILE_REQUESTS', False):
+        threshold = get_min_seconds()
+    return threshold
+
+
+# ============================================================================
+# 1. СЭМПЛЕР
+# ============================================================================
+def _short_path(filename):
+    """Путь к модулю без начала: site-packages/pandas/... -> pandas/..., проект - от BASE_DIR."""
+    marker = f'site-packages{os.sep}'
+    if marker in filename:
+        return filename.rsplit(marker, 1)[1]
+    base = str(getattr(settings, 'BASE_DIR', ''))
+    if base and filename.startswith(base):
+        return os.path.relpath(filename, base)
+    return os.path.basename(filename)
+
+
+class StackSampler:
+    """
+    Сэмплирующий профилировщик одного потока (по умолчанию - того, что его создал).
+
+    Пример:
+        with StackSampler() as sampler:
+            work()
+        sampler.folded()  # "f1 (...);f2 (...) 17\n..."
+    """
+
+    def __init__(self, thread_id=None, interval=None):
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.interval = interval if interval is not None else get_interval()
+        self.counts = Counter()
+        self.samples = 0
+        self.wall_seconds = 0.0
+        self._labels = {}
+        self._stop = threading.Event()
+        self._thread = None
+        self._started = None
+
+    def start(self):
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name='dq-stack-sampler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.wall_seconds = time.perf_counter() - self._started
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                return  # Поток завершился
+            self.counts[self._fold(frame)] += 1
+            self.samples += 1
+
+    def _label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            label = f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+            label = self._labels[code] = label.replace(';', ':').replace('\n', ' ')
+        return label
+
+    def _fold(self, frame):
+        """Стек от внешнего кадра к текущему через ";"."""
+        labels = []
+        while frame is not None and len(labels) < MAX_DEPTH:
+            labels.append(self._label(frame.f_code))
+            frame = frame.f_back
+        return ';'.join(reversed(labels))
+
+    def folded(self):
+        """Профиль в формате folded stacks (для flamegraph.pl, inferno, speedscope)."""
+        return ''.join(f"{stack} {count}\n" for stack, count in sorted(self.counts.items()))
+
+
+# ============================================================================
+# 2. СОХРАНЕНИЕ ПРОФИЛЯ
+# ============================================================================
+def save_artifact(sampler, kind, label, min_seconds, dataset_id=None, run=None):
+    """
+    Сохраняет профиль, если работа шла не меньше min_seconds.
+    Хранятся последние DATA_QUALITY_PROFILE_KEEP профилей датасета (и столько же без датасета).
+    Ошибка сохранения профиля только логируется.
+
+    Returns:
+        ProfileArtifact или None
+    """
+    from .models import ProfileArtifact
+
+    if not sampler.samples or sampler.wall_seconds < min_seconds:
+        return None
+    try:
+        artifact = ProfileArtifact(
+            dataset_id=dataset_id,
+            run=run,
+            kind=kind,
+            label=label[:255],
+            wall_seconds=sampler.wall_seconds,
+            samples=sampler.samples,
+            interval_ms=sampler.interval * 1000,
+        )
+        name = f"{kind}-{dataset_id or 'none'}-{timezone.now():%Y%m%d-%H%M%S}.folded"
+        artifact.folded_file.save(name, ContentFile(sampler.folded().encode('utf-8')), save=False)
+        artifact.save()
+        logger.info("🔥 Профиль %s (%.1f с, %s сэмплов) сохранён: %s",
+                    label, sampler.wall_seconds, sampler.samples, artifact.folded_file.name)
+
+        keep = getattr(settings, 'DATA_QUALITY_PROFILE_KEEP', 20)
+        old = ProfileArtifact.objects.filter(dataset_id=dataset_id).order_by('-created_at', '-pk')[keep:]
+        for stale in old:
+            stale.folded_file.delete(save=False)
+            stale.delete()
+        return artifact
+    except Exception as e:
+        logger.warning("⚠️ Не удалось сохранить профиль %s: %s", label, e)
+        return None
@@ -0,0 +1,99 @@
+"""
+progress.py - Прогресс анализа датасета
+
+CSVAnalyzer сообщает о смене фаз (loading, missing, duplicates, statistics, saving)
+и о количестве обработанных строк; ProgressReporter записывает это в Dataset.progress.
+Клиенты получают изменения через long-poll эндпоинт
+GET /api/datasets/{id}/progress/ с заголовком If-None-Match (см. views.py),
+не перезапрашивая весь датасет с проверками.
+"""
+
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.utils import timezone
+
+# Фазы анализа по порядку и доля общего времени, с которой начинается каждая (в %)
+PHASES = {
+    'queued': 0,
+    'loading': 5,
+    'missing': 45,
+    'duplicates': 60,
+    'statistics': 80,
+    'saving': 95,
+    'completed': 100,
+    'failed': 100,
+}
+
+
+def make_progress(phase, percent=None, rows_processed=None, total_rows=None):
+    """Словарь прогресса в формате Dataset.progress."""
+    return {
+        'phase': phase,
+        'percent': PHASES[phase] if percent is None else int(percent),
+        'rows_processed': rows_processed,
+        'total_rows': total_rows,
+    }
+
+
+def progress_etag(status, progress):
+    """ETag состояния анализа: меняется при любой смене статуса, фазы или процента."""
+    payload = json.dumps({'status': status, 'progress': progress}, sort_keys=True, default=str)
+    return '"' + hashlib.md5(payload.encode('utf-8')).hexdigest() + '"'
+
+
+def save_progress(dataset_id, progress, status=None):
+    """Записывает прогресс (и, если передан, статус) одним UPDATE - с новой версией датасета."""
+    from .models import Dataset
+
+    fields = {'progress': progress, **Dataset.version_bump()}
+    if status is not None:
+        fields['status'] = status
+    Dataset.objects.filter(pk=dataset_id).update(**fields)
+
+
+def heartbeat(job_id):
+    """Отмечает, что воркер задачи жив (только пока задача выполняется)."""
+    from .models import AnalysisJob
+
+    AnalysisJob.objects.filter(pk=job_id, status='running').update(heartbeat_at=timezone.now())
+
+
+class ProgressReporter:
+    """
+    Callback прогресса для CSVAnalyzer: reporter(phase, percent, rows_processed, total_rows).
+
+    Смена фазы записывается сразу, а обновления внутри фазы (например, по каждому
+    чанку в потоковом режиме) - не чаще раза в min_interval секунд,
+    чтобы не нагружать базу.
+
+    Если анализ выполняется задачей очереди (job_id), каждый вызов заодно служит
+    "признаком жизни": AnalysisJob.heartbeat_at обновляется не чаще раза
+    в DATA_QUALITY_JOB_HEARTBEAT_INTERVAL секунд (см. jobs.requeue_stale_jobs).
+    """
+
+    def __init__(self, dataset_id, min_interval=None, job_id=None):
+        self.dataset_id = dataset_id
+        if min_interval is None:
+            min_interval = getattr(settings, 'DATA_QUALITY_PROGRESS_MIN_INTERVAL', 0.5)
+        self.min_interval = min_interval
+        self.job_id = job_id
+        self.heartbeat_interval = getattr(settings, 'DATA_QUALITY_JOB_HEARTBEAT_INTERVAL', 30)
+        self._last_phase = None
+        self._last_saved = 0.0
+        # claim_job уже записал heartbeat_at при взятии задачи
+        self._last_heartbeat = time.monotonic()
+
+    def __call__(self, phase, percent=None, rows_processed=None, total_rows=None):
+        now = time.monotonic()
+        if self.job_id is not None and now - self._last_heartbeat >= self.heartbeat_interval:
+            self._last_heartbeat = now
+            heartbeat(self.job_id)
+        if phase == self._last_phase and now - self._last_saved < self.min_interval:
+            return
+        self._last_phase = phase
+        self._last_saved = now
+        save_progress(self.dataset_id, make_progress(phase, percent, rows_processed, total_rows))
+
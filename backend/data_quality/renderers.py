@@ -0,0 +1,47 @@
+"""
+renderers.py - Быстрый JSON-рендерер для API
+
+Проверка statistics у файла на тысячу столбцов - словарь на тысячи вложенных значений,
+и стандартный JSONRenderer DRF (модуль json) тратит на него заметную часть запроса.
+FastJSONRenderer сериализует через orjson - в разы быстрее и сразу в UTF-8 байты.
+
+NaN и ±Infinity отдаются как null - так же, как анализатор сохраняет их
+в результаты (profiler.finite_or_none), и через orjson, и без него.
+Стандартный рендерер на них падал с ValueError.
+
+orjson - необязательная зависимость: без него используется json из стандартной
+библиотеки (с той же заменой NaN/Infinity на null).
+"""
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - зависит от окружения
+    orjson = None
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+from .profiler import finite_or_none
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer на orjson. Формат ответа тот же: UTF-8 без экранирования
+    не-ASCII символов, отступы - если клиент попросил (Accept: application/json; indent=2).
+    Типы, которых orjson не знает (ленивые строки, Decimal, QuerySet...),
+    преобразуются так же, как в DRF (rest_framework.utils.encoders.JSONEncoder).
+    """
+
+    encoder = encoders.JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if orjson is None:
+            return super().render(finite_or_none(data), accepted_media_type, renderer_context)
+
+        renderer_context = renderer_context or {}
+        options = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if self.get_indent(accepted_media_type, renderer_context):
+            options |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, default=self.encoder.default, option=options)
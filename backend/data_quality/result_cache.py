@@ -0,0 +1,124 @@
+"""
+result_cache.py - Кэш результатов анализа по хэшу содержимого файла
+
+Ключ кэша = SHA-256 файла + версия анализатора (+ режим анализа).
+Объём кэша ограничен настройками; при переполнении вытесняются записи,
+которые дольше всех не использовались (LRU).
+"""
+
+import hashlib
+import json
+import logging
+
+from django.conf import settings
+from django.db import IntegrityError
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from .models import AnalysisCache
+
+logger = logging.getLogger(__name__)
+
+# Типы проверок, которые хранятся в кэше (в порядке сохранения)
+CACHED_CHECKS = ('missing', 'duplicates', 'statistics')
+
+
+def hash_chunks(chunks):
+    """
+    Считает SHA-256 по потоку кусков байтов (например, UploadedFile.chunks()).
+
+    Returns:
+        str: Хэш в виде hex-строки
+    """
+    hasher = hashlib.sha256()
+    for chunk in chunks:
+        hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def hash_file(path, chunk_size=1024 * 1024):
+    """SHA-256 файла на диске, читаем кусками по chunk_size байт."""
+    with open(path, 'rb') as f:
+        return hash_chunks(iter(lambda: f.read(chunk_size), b''))
+
+
+def get_cached_results(content_hash, analyzer_version):
+    """
+    Ищет готовые результаты в кэше.
+
+    Returns:
+        dict или None: {"missing": {...}, "duplicates": {...}, "statistics": {...}}
+    """
+    if not content_hash:
+        return None
+
+    entry = AnalysisCache.objects.filter(
+        content_hash=content_hash, analyzer_version=analyzer_version
+    ).first()
+    if entry is None:
+        return None
+
+    # Обновляем счётчик и last_used_at (auto_now не срабатывает при update())
+    AnalysisCache.objects.filter(pk=entry.pk).update(hits=F('hits') + 1, last_used_at=timezone.now())
+    return entry.results
+
+
+def store_results(content_hash, analyzer_version, results):
+    """Сохраняет результаты анализа в кэш и при необходимости вытесняет старые записи."""
+    if not content_hash:
+        return
+
+    size_bytes = len(json.dumps(results, ensure_ascii=False, default=str).encode('utf-8'))
+    max_entry_bytes = getattr(settings, 'DATA_QUALITY_RESULT_CACHE_MAX_MB', 100) * 1024 * 1024
+    if size_bytes > max_entry_bytes:
+        # Запись больше всего кэша - не сохраняем
+        return
+
+    try:
+        AnalysisCache.objects.update_or_create(
+            content_hash=content_hash,
+            analyzer_version=analyzer_version,
+            defaults={'results': results, 'size_bytes': size_bytes},
+        )
+    except IntegrityError:
+        # Параллельный анализ такого же файла успел сохранить запись первым
+        pass
+
+    evict()
+
+
+def evict():
+    """
+    Ограничивает кэш по количеству записей и суммарному размеру.
+    Удаляет записи с самым старым last_used_at.
+
+    Returns:
+        int: Сколько записей удалено
+    """
+    max_entries = getattr(settings, 'DATA_QUALITY_RESULT_CACHE_MAX_ENTRIES', 1000)
+    max_bytes = getattr(settings, 'DATA_QUALITY_RESULT_CACHE_MAX_MB', 100) * 1024 * 1024
+
+    stats = AnalysisCache.objects.aggregate(count=Count('pk'), total=Sum('size_bytes'))
+    if stats['count'] <= max_entries and (stats['total'] or 0) <= max_bytes:
+        return 0
+
+    # Идём от самых свежих записей к старым, пока укладываемся в лимиты.
+    # Первая не поместившаяся запись - граница: удаляем её и всё, что старше
+    # (одним DELETE по условию, а не по списку оставленных pk - он упёрся бы
+    # в лимит параметров запроса SQLite).
+    entries = AnalysisCache.objects.order_by('-last_used_at', '-pk').values_list('pk', 'last_used_at', 'size_bytes')
+    kept, kept_bytes = 0, 0
+    for pk, last_used_at, size in entries.iterator():
+        if kept >= max_entries or kept_bytes + size > max_bytes:
+            break
+        kept += 1
+        kept_bytes += size
+    else:
+        return 0
+
+    deleted, _ = AnalysisCache.objects.filter(
+        Q(last_used_at__lt=last_used_at) | Q(last_used_at=last_used_at, pk__lte=pk)
+    ).delete()
+    if deleted:
+        logger.info("🧹 Из кэша анализа вытеснено записей: %s", deleted)
+    return deleted
@@ -0,0 +1,274 @@
+"""
+rollups.py - Сводки качества данных по всем датасетам (материализованные агрегаты)
+
+Таблицы DailyQualityRollup (по дню загрузки) и ColumnQualityRollup (по имени столбца)
+хранят суммы по всем проанализированным датасетам. Они обновляются инкрементально
+в той же транзакции, что и результаты анализа (CSVAnalyzer._save_results):
+вклад прошлого анализа датасета вычитается, нового - прибавляется. Удаление датасета
+вычитает его вклад (сигнал pre_delete, см. apps.py).
+
+Поэтому запросы "средняя доля пропусков по дням" или "худшие столбцы" читают
+несколько строк сводок, а не разбирают JSON всех DataCheck.
+
+Если сводки разошлись с данными (например, проверки меняли вручную в админке):
+    python manage.py rebuild_rollups
+"""
+
+from collections import defaultdict
+
+from django.apps import apps as django_apps
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+# Поля сводок, которые складываются и вычитаются
+DAILY_FIELDS = (
+    'datasets_count', 'rows_total', 'cells_total', 'missing_cells_total', 'duplicate_rows_total',
+    'missing_percentage_sum', 'duplicate_percentage_sum',
+)
+COLUMN_FIELDS = ('datasets_count', 'datasets_with_missing', 'rows_total', 'missing_cells_total')
+
+# Длина ColumnQualityRollup.column_name
+MAX_COLUMN_NAME = 255
+
+# Сколько строк сводки обновлять одним запросом
+BATCH_SIZE = 500
+
+
+# ============================================================================
+# 1. ВКЛАД ОДНОГО ДАТАСЕТА
+# ============================================================================
+def upload_day(dataset):
+    """День загрузки датасета - ключ дневной сводки."""
+    return timezone.localdate(dataset.uploaded_at)
+
+
+def contribution(results):
+    """
+    Вклад результатов анализа одного датасета в сводки.
+
+    Args:
+        results: {"missing": {...}, "duplicates": {...}, "statistics": {...}}
+
+    Returns:
+        (daily, columns): суммы для дневной сводки и {имя столбца: суммы}.
+        (None, {}) - если результатов нет (датасет ещё не анализировали).
+    """
+    missing = results.get('missing')
+    duplicates = results.get('duplicates')
+    if not missing or not duplicates:
+        return None, {}
+
+    total_rows = missing.get('total_rows', 0)
+    daily = {
+        'datasets_count': 1,
+        'rows_total': total_rows,
+        'cells_total': missing.get('total_cells', 0),
+        'missing_cells_total': missing.get('missing_cells', 0),
+        'duplicate_rows_total': duplicates.get('duplicate_rows', 0),
+        'missing_percentage_sum': missing.get('missing_percentage', 0),
+        'duplicate_percentage_sum': duplicates.get('duplicate_percentage', 0),
+    }
+
+    # Все столбцы датасета - из статистики; пропуски - только у столбцов, где они есть
+    statistics = results.get('statistics') or {}
+    missing_by_column = missing.get('columns_with_missing') or {}
+    names = set(statistics.get('numeric_columns') or ()) | set(statistics.get('text_columns') or ())
+    names |= set(missing_by_column)
+
+    columns = {}
+    for name in names:
+        missing_count = missing_by_column.get(name, 0)
+        key = str(name)[:MAX_COLUMN_NAME]
+        totals = columns.setdefault(key, dict.fromkeys(COLUMN_FIELDS, 0))
+        totals['datasets_count'] += 1
+        totals['datasets_with_missing'] += 1 if missing_count else 0
+        totals['rows_total'] += total_rows
+        totals['missing_cells_total'] += missing_count
+    return daily, columns
+
+
+def _difference(new, old, fields):
+    """new - old по полям; None означает "нет вклада"."""
+    new = new or {}
+    old = old or {}
+    return {field: new.get(field, 0) - old.get(field, 0) for field in fields}
+
+
+def _is_zero(deltas):
+    return not any(deltas.values())
+
+
+# ============================================================================
+# 2. ИНКРЕМЕНТАЛЬНОЕ ОБНОВЛЕНИЕ
+# ============================================================================
+def stored_results(dataset_id):
+    """Результаты проверок датасета, сохранённые сейчас в базе: {check_type: result_json}."""
+    from .models import DataCheck
+
+    return dict(DataCheck.objects.filter(dataset_id=dataset_id).values_list('check_type', 'result_json'))
+
+
+def apply_change(dataset, new_results=None, old_results=None):
+    """
+    Переносит в сводки изменение результатов датасета: вычитает вклад old_results
+    и прибавляет вклад new_results. Вызывается внутри транзакции сохранения результатов.
+    Каждая сводка обновляется одним запросом (INSERT ... ON CONFLICT DO UPDATE).
+    """
+    from .models import ColumnQualityRollup, DailyQualityRollup
+
+    new_daily, new_columns = contribution(new_results or {})
+    old_daily, old_columns = contribution(old_results or {})
+
+    day = upload_day(dataset)
+    daily_deltas = _difference(new_daily, old_daily, DAILY_FIELDS)
+    if not _is_zero(daily_deltas):
+        increment(DailyQualityRollup, 'day', {day: daily_deltas})
+
+    column_deltas = {}
+    for name in set(new_columns) | set(old_columns):
+        deltas = _difference(new_columns.get(name), old_columns.get(name), COLUMN_FIELDS)
+        if not _is_zero(deltas):
+            column_deltas[name] = deltas
+    if column_deltas:
+        increment(ColumnQualityRollup, 'column_name', column_deltas,
+                  ratio=('missing_percentage', 'missing_cells_total', 'rows_total'))
+
+
+def dataset_deleted(sender, instance, **kwargs):
+    """pre_delete для Dataset: вычитаем вклад датасета из сводок."""
+    old_results = stored_results(instance.pk)
+    if old_results:
+        apply_change(instance, old_results=old_results)
+
+
+def _percent(numerator, denominator):
+    return numerator * 100.0 / denominator if denominator > 0 else 0.0
+
+
+def increment(model, key_field, rows, ratio=None):
+    """
+    Прибавляет к строкам сводки значения из rows ({ключ: {поле: прибавка}}),
+    создавая недостающие строки.
+
+    Args:
+        ratio: (поле, числитель, знаменатель) - поле с долей в %, которое
+               пересчитывается по новым суммам в том же запросе
+
+    В SQLite и PostgreSQL - один INSERT ... ON CONFLICT DO UPDATE SET поле = поле + excluded.поле
+    на BATCH_SIZE строк: атомарно, без чтения строк и без гонок между параллельными анализами.
+    """
+    if connection.vendor not in ('sqlite', 'postgresql'):
+        return _increment_orm(model, key_field, rows, ratio)
+
+    fields = list(next(iter(rows.values())))
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    key_internal = model._meta.get_field(key_field)
+
+    columns = [key_field, *fields, 'updated_at'] + ([ratio[0]] if ratio else [])
+    updates = [f"{quote(field)} = {table}.{quote(field)} + excluded.{quote(field)}" for field in fields]
+    updates.append(f"{quote('updated_at')} = excluded.{quote('updated_at')}")
+    if ratio:
+        target, numerator, denominator = (quote(field) for field in ratio)
+        new_numerator = f"({table}.{numerator} + excluded.{numerator})"
+        new_denominator = f"({table}.{denominator} + excluded.{denominator})"
+        updates.append(
+            f"{target} = CASE WHEN {new_denominator} > 0 "
+            f"THEN {new_numerator} * 100.0 / {new_denominator} ELSE 0 END"
+        )
+
+    items = list(rows.items())
+    with connection.cursor() as cursor:
+        for start in range(0, len(items), BATCH_SIZE):
+            batch = items[start:start + BATCH_SIZE]
+            params = []
+            for key, deltas in batch:
+                params.append(key_internal.get_db_prep_value(key, connection))
+                params.extend(deltas[field] for field in fields)
+                params.append(now)
+                if ratio:
+                    params.append(_percent(deltas[ratio[1]], deltas[ratio[2]]))
+            placeholders = ', '.join(['(' + ', '.join(['%s'] * len(columns)) + ')'] * len(batch))
+            cursor.execute(
+                f"INSERT INTO {table} ({', '.join(quote(column) for column in columns)}) "
+                f"VALUES {placeholders} "
+                f"ON CONFLICT ({quote(key_field)}) DO UPDATE SET {', '.join(updates)}",
+                params,
+            )
+
+
+def _increment_orm(model, key_field, rows, ratio=None):
+    """Запасной вариант для остальных баз: UPDATE ... SET поле = поле + x по одной строке."""
+    for key, deltas in rows.items():
+        updated = model.objects.filter(**{key_field: key}).update(
+            **{field: F(field) + value for field, value in deltas.items()}
+        )
+        if not updated:
+            model.objects.create(**{key_field: key}, **deltas)
+        if ratio:
+            row = model.objects.get(**{key_field: key})
+            setattr(row, ratio[0], _percent(getattr(row, ratio[1]), getattr(row, ratio[2])))
+            row.save(update_fields=[ratio[0]])
+
+
+# ============================================================================
+# 3. ПОЛНЫЙ ПЕРЕСЧЁТ
+# ============================================================================
+def rebuild(get_model=None):
+    """
+    Пересчитывает сводки с нуля по всем сохранённым проверкам.
+
+    Args:
+        get_model: apps.get_model (в миграциях - исторические модели)
+
+    Returns:
+        (дней, столбцов) в сводках
+    """
+    get_model = get_model or django_apps.get_model
+    Dataset = get_model('data_quality', 'Dataset')
+    DataCheck = get_model('data_quality', 'DataCheck')
+    DailyQualityRollup = get_model('data_quality', 'DailyQualityRollup')
+    ColumnQualityRollup = get_model('data_quality', 'ColumnQualityRollup')
+
+    upload_days = {
+        pk: timezone.localdate(uploaded_at)
+        for pk, uploaded_at in Dataset.objects.values_list('pk', 'uploaded_at').iterator()
+    }
+    results = defaultdict(dict)
+    checks = DataCheck.objects.order_by('created_at').values_list('dataset_id', 'check_type', 'result_json')
+    for dataset_id, check_type, result in checks.iterator():
+        results[dataset_id][check_type] = result
+
+    daily = defaultdict(lambda: dict.fromkeys(DAILY_FIELDS, 0))
+    columns = defaultdict(lambda: dict.fromkeys(COLUMN_FIELDS, 0))
+    for dataset_id, dataset_results in results.items():
+        dataset_daily, dataset_columns = contribution(dataset_results)
+        if dataset_daily is None or dataset_id not in upload_days:
+            continue
+        for field, value in dataset_daily.items():
+            daily[upload_days[dataset_id]][field] += value
+        for name, totals in dataset_columns.items():
+            for field, value in totals.items():
+                columns[name][field] += value
+
+    with transaction.atomic():
+        DailyQualityRollup.objects.all().delete()
+        ColumnQualityRollup.objects.all().delete()
+        DailyQualityRollup.objects.bulk_create(
+            [DailyQualityRollup(day=day, **totals) for day, totals in daily.items()],
+            batch_size=BATCH_SIZE,
+        )
+        ColumnQualityRollup.objects.bulk_create(
+            [
+                ColumnQualityRollup(
+                    column_name=name,
+                    missing_percentage=_percent(totals['missing_cells_total'], totals['rows_total']),
+                    **totals,
+                )
+                for name, totals in columns.items()
+            ],
+            batch_size=BATCH_SIZE,
+        )
+    return len(daily), len(columns)
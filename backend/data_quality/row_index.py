@@ -0,0 +1,419 @@
+"""
+row_index.py - Индекс строк CSV для постраничного просмотра (GET /api/datasets/{id}/rows/)
+
+Чтобы показать 20 строк с пропусками из середины многогигабайтного файла, не нужно
+разбирать его с начала: во время анализа рядом с CSV сохраняется индекс
+(uploads/.../data.csv -> uploads/.../data.csv.rows.npz):
+- offsets   - байтовое смещение каждой STRIDE-й строки данных (строки 0, STRIDE, 2*STRIDE...);
+- missing   - битовая карта строк, в которых есть пропуски;
+- duplicate - битовая карта строк-дубликатов (как в проверке duplicates, с теми же ключевыми столбцами);
+- meta      - формат CSV, заголовок, столбцы, число строк, размер и время изменения файла.
+
+Страница N: seek() к ближайшей контрольной точке и не больше STRIDE-1 строк вперёд.
+
+Границы строк ищутся векторно (NumPy) по блокам файла с учётом кавычек:
+перевод строки внутри значения в кавычках строку не заканчивает.
+Пустые строки пропускаются, как их пропускает pandas. Если число найденных строк
+не совпало с числом строк анализа (например, pandas отбросил какие-то строки),
+индекс не сохраняется - лучше без него, чем со сдвинутыми номерами.
+
+Номера строк - с нуля, без заголовка, как duplicate_row_indices в результатах анализа.
+"""
+
+import io
+import json
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Версия формата индекса. Увеличьте, если меняется то, что сохраняется.
+INDEX_VERSION = 1
+
+# Сколько байт файла сканируется за раз при поиске границ строк
+SCAN_BLOCK_BYTES = 8 * 1024 * 1024
+
+FILTERS = ('missing', 'duplicate')
+
+# Битовые карты при выборке страницы обходятся блоками по столько байт (8 строк в байте)
+BITMAP_BLOCK_BYTES = 1024 * 1024
+
+# Число единичных битов в каждом байте
+POPCOUNT = np.array([bin(value).count('1') for value in range(256)], dtype=np.uint8)
+
+
+def is_enabled():
+    return getattr(settings, 'DATA_QUALITY_ROW_INDEX_ENABLED', True)
+
+
+def get_stride():
+    return getattr(settings, 'DATA_QUALITY_ROW_INDEX_STRIDE', 256)
+
+
+def index_path(csv_path):
+    """Путь к индексу рядом с CSV файлом."""
+    return f"{csv_path}.rows.npz"
+
+
+def remove_index(csv_path):
+    """Удаляет индекс (при замене CSV файла)."""
+    try:
+        os.remove(index_path(csv_path))
+    except FileNotFoundError:
+        pass
+
+
+def _source_stat(csv_path):
+    stat = os.stat(csv_path)
+    return {'source_size': stat.st_size, 'source_mtime_ns': stat.st_mtime_ns}
+
+
+def _quote_byte(read_kwargs):
+    quotechar = read_kwargs.get('quotechar', '"')
+    return quotechar.encode('ascii')[0] if quotechar and quotechar.isascii() else None
+
+
+# ============================================================================
+# 1. ГРАНИЦЫ СТРОК
+# ============================================================================
+def scan_records(path, read_kwargs, stride, start=0, end=None, first_row=0, has_header=False):
+    """
+    Ищет начала строк файла (с учётом кавычек, без пустых строк).
+
+    Args:
+        start, end: Байтовый диапазон (start - начало строки)
+        first_row: Номер первой строки данных диапазона (для продолжения индекса)
+        has_header: Первая непустая строка - заголовок, а не данные
+
+    Returns:
+        dict: checkpoints - смещения строк с номерами, кратными stride;
+              rows - сколько строк данных найдено; data_start - где кончается заголовок
+    """
+    quote = _quote_byte(read_kwargs)
+    end = os.path.getsize(path) if end is None else end
+    checkpoints = []
+    row = first_row
+    data_start = start
+    record_start = start   # Начало текущей (ещё не законченной) строки
+    parity = 0             # Нечётное число кавычек - мы внутри значения в кавычках
+    last_byte = None       # Последний байт прошлого блока (для строки из одного \r)
+    position = start
+
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while position < end:
+            block = f.read(min(SCAN_BLOCK_BYTES, end - position))
+            if not block:
+                break
+            data = np.frombuffer(block, dtype=np.uint8)
+            newlines = np.flatnonzero(data == 10)
+            if quote is not None and len(newlines):
+                quotes = np.flatnonzero(data == quote)
+                quotes_before = np.searchsorted(quotes, newlines)
+                newlines = newlines[((quotes_before + parity) & 1) == 0]
+                parity = (parity + len(quotes)) & 1
+            elif quote is not None:
+                parity = (parity + int(np.count_nonzero(data == quote))) & 1
+
+            ends = newlines.astype(np.int64) + position
+            starts = np.concatenate(([record_start], ends[:-1] + 1)) if len(ends) else np.empty(0, np.int64)
+            lengths = ends - starts
+            # Пустая строка: "\n" или "\r\n"
+            first_bytes = np.array(
+                [block[s - position] if s >= position else last_byte for s in starts[lengths == 1]],
+                dtype=object,
+            )
+            blank = lengths == 0
+            blank[np.flatnonzero(lengths == 1)[first_bytes == 13]] = True
+            if len(ends):
+                record_start = int(ends[-1]) + 1
+
+            valid = starts[~blank]
+            if has_header and len(valid):
+                data_start = int(ends[~blank][0]) + 1
+                valid = valid[1:]
+                has_header = False
+            numbers = row + np.arange(len(valid))
+            checkpoints.append(valid[numbers % stride == 0])
+            row += len(valid)
+
+            last_byte = block[-1]
+            position += len(block)
+
+    # Последняя строка без перевода строки в конце файла
+    if record_start < end:
+        with open(path, 'rb') as f:
+            f.seek(record_start)
+            tail = f.read(end - record_start)
+        if tail.strip(b'\r'):
+            if has_header:
+                data_start = end
+            else:
+                if row % stride == 0:
+                    checkpoints.append(np.array([record_start], dtype=np.int64))
+                row += 1
+
+    return {
+        'checkpoints': np.concatenate(checkpoints).astype(np.uint64) if checkpoints else np.empty(0, np.uint64),
+        'rows': row - first_row,
+        'data_start': data_start,
+    }
+
+
+def _bitmap(rows, total_rows, base=None):
+    """Номера строк -> упакованная битовая карта (бит на строку), дополняя карту base."""
+    bitmap = np.zeros((total_rows + 7) // 8, dtype=np.uint8)
+    if base is not None:
+        bitmap[:len(base)] = base
+    rows = np.asarray(rows, dtype=np.int64)
+    rows = rows[(rows >= 0) & (rows < total_rows)]
+    if len(rows):
+        np.bitwise_or.at(bitmap, rows >> 3, (128 >> (rows & 7)).astype(np.uint8))
+    return bitmap
+
+
+# ============================================================================
+# 2. ИНДЕКС
+# ============================================================================
+class RowIndex:
+    """Загруженный индекс строк одного CSV."""
+
+    def __init__(self, meta, offsets, missing=None, duplicate=None):
+        self.meta = meta
+        self.offsets = offsets
+        self.bitmaps = {'missing': missing, 'duplicate': duplicate}
+
+    @property
+    def total_rows(self):
+        return self.meta['total_rows']
+
+    @property
+    def columns(self):
+        return self.meta['columns']
+
+    def has_filter(self, row_filter):
+        return row_filter is None or self.bitmaps[row_filter] is not None
+
+    def page(self, row_filter=None, offset=0, limit=50):
+        """
+        Страница номеров строк под фильтр ('missing', 'duplicate' или None - все строки).
+        Битовая карта обходится блоками: для общего числа - подсчёт битов,
+        распаковываются только блоки, где лежит страница.
+
+        Returns:
+            (номера строк страницы, сколько всего строк под фильтром)
+        """
+        if row_filter is None:
+            total = self.total_rows
+            return np.arange(min(offset, total), min(offset + limit, total), dtype=np.int64), total
+
+        bitmap = self.bitmaps[row_filter]
+        rows = []
+        total = 0
+        skip = offset
+        for start in range(0, len(bitmap), BITMAP_BLOCK_BYTES):
+            block = bitmap[start:start + BITMAP_BLOCK_BYTES]
+            count = int(POPCOUNT[block].sum(dtype=np.int64))
+            total += count
+            if len(rows) >= limit or not count:
+                continue
+            if skip >= count:
+                skip -= count
+                continue
+            found = np.flatnonzero(np.unpackbits(block)) + start * 8
+            rows.extend(found[skip:skip + limit - len(rows)].tolist())
+            skip = 0
+        return np.array(rows, dtype=np.int64), total
+
+    def _records(self, f, rows):
+        """Сырые байты строк rows (по возрастанию): seek к контрольной точке и вперёд."""
+        quote = _quote_byte(self.meta['read_kwargs'])
+        stride = self.meta['stride']
+        records = []
+        current = None
+        for row in rows:
+            # Следующая нужная строка дальше, чем ближайшая контрольная точка, - прыгаем к ней
+            if current is None or row < current or row - current >= stride:
+                checkpoint = row // stride
+                f.seek(int(self.offsets[checkpoint]))
+                current = checkpoint * stride
+            while current < row:
+                if not _next_record(f, quote):
+                    return records
+                current += 1
+            record = _next_record(f, quote)
+            if not record:
+                return records  # Файл кончился раньше - индекс устарел
+            records.append(record if record.endswith(b'\n') else record + b'\n')
+            current += 1
+        return records
+
+    def read_rows(self, csv_path, rows, columns=None):
+        """
+        Строки rows файла в виде DataFrame (значения - как в файле, пропуски - NaN).
+
+        Args:
+            rows: Номера строк по возрастанию
+            columns: Нужные столбцы (None - все)
+        """
+        rows = [int(row) for row in rows]
+        columns = list(columns) if columns else list(self.columns)
+        read_kwargs = dict(self.meta['read_kwargs'])
+        with open(csv_path, 'rb') as f:
+            header = f.read(self.meta['data_start']) if read_kwargs.get('header', 'infer') is not None else b''
+            records = self._records(f, rows) if rows else []
+        frame = pd.read_csv(io.BytesIO(header + b''.join(records)), dtype=str, usecols=columns, **read_kwargs)
+        if len(frame) != len(rows):
+            raise ValueError("Индекс строк не совпадает с файлом")
+        return frame[columns]
+
+
+def _next_record(f, quote):
+    """Следующая непустая строка с текущей позиции (с учётом кавычек); b'' - конец файла."""
+    while True:
+        record = f.readline()
+        if not record:
+            return b''
+        while quote is not None and record.count(quote) % 2:
+            more = f.readline()
+            if not more:
+                break
+            record += more
+        if record.strip(b'\r\n'):
+            return record
+
+
+def load(csv_path, check_fresh=True):
+    """
+    Загружает индекс, если он есть и построен по текущей версии файла.
+
+    Returns:
+        RowIndex или None
+    """
+    path = index_path(csv_path)
+    if not os.path.exists(path) or not os.path.exists(csv_path):
+        return None
+    try:
+        with np.load(path) as archive:
+            meta = json.loads(str(archive['meta']))
+            if meta.get('version') != INDEX_VERSION:
+                return None
+            if check_fresh and any(meta.get(key) != value for key, value in _source_stat(csv_path).items()):
+                return None
+            return RowIndex(
+                meta,
+                archive['offsets'],
+                archive['missing'] if 'missing' in archive.files else None,
+                archive['duplicate'] if 'duplicate' in archive.files else None,
+            )
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _write(csv_path, meta, arrays):
+    """Пишем во временный файл и переименовываем - читатели не увидят недописанный индекс."""
+    path = index_path(csv_path)
+    tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+    np.savez(tmp_path, meta=np.array(json.dumps(meta)), **arrays)
+    os.replace(tmp_path, path)
+
+
+# ============================================================================
+# 3. ПОСТРОЕНИЕ (во время анализа)
+# ============================================================================
+def build(csv_path, read_kwargs, columns, total_rows, missing_rows=None, duplicate_rows=None,
+          key_columns=None, start_offset=0, end_offset=None):
+    """
+    Строит и сохраняет индекс после анализа.
+
+    Args:
+        read_kwargs: Параметры pd.read_csv, с которыми файл разобран при анализе
+        columns: Столбцы таблицы
+        total_rows: Число строк по анализу - с ним сверяется число найденных строк
+        missing_rows, duplicate_rows: Номера строк с пропусками и строк-дубликатов
+                                      (None - неизвестны, фильтр будет недоступен)
+        key_columns: Ключевые столбцы поиска дубликатов
+        start_offset: > 0 - инкрементальный анализ: старый индекс продолжается с этого байта
+        end_offset: До какого байта учтён файл (None - до конца)
+
+    Returns:
+        bool: True если индекс сохранён
+    """
+    if not is_enabled():
+        return False
+
+    stride = get_stride()
+    has_header = read_kwargs.get('header', 'infer') is not None
+    base = None
+    if start_offset:
+        # Дописанный хвост: продолжаем индекс учтённой части, если он про неё
+        base = load(csv_path, check_fresh=False)
+        if base is None or base.meta.get('end_offset') != start_offset or base.meta['stride'] != stride:
+            base = None
+            start_offset = 0
+
+    first_row = base.total_rows if base is not None else 0
+    scan = scan_records(csv_path, read_kwargs, stride, start=start_offset, end=end_offset,
+                        first_row=first_row, has_header=has_header and base is None)
+    if first_row + scan['rows'] != total_rows:
+        logger.warning("⚠️ Индекс строк не сохранён: в файле %s строк, в анализе %s", first_row + scan['rows'], total_rows)
+        remove_index(csv_path)
+        return False
+
+    offsets = scan['checkpoints']
+    arrays = {}
+    for name, rows in (('missing', missing_rows), ('duplicate', duplicate_rows)):
+        if rows is None:
+            continue
+        if base is not None and not base.has_filter(name):
+            continue
+        arrays[name] = _bitmap(rows, total_rows, base.bitmaps[name] if base is not None else None)
+    if base is not None:
+        offsets = np.concatenate([base.offsets, offsets])
+
+    meta = {
+        'version': INDEX_VERSION,
+        'stride': stride,
+        'total_rows': int(total_rows),
+        'columns': [str(column) for column in columns],
+        'read_kwargs': read_kwargs,
+        'data_start': base.meta['data_start'] if base is not None else scan['data_start'],
+        'end_offset': end_offset if end_offset is not None else os.path.getsize(csv_path),
+        'key_columns': key_columns,
+        **_source_stat(csv_path),
+    }
+    _write(csv_path, meta, dict(arrays, offsets=offsets))
+    return True
+
+
+def copy_from(csv_path, source_csv_paths, key_columns=None):
+    """
+    Результаты анализа взяты из кэша (тот же файл уже анализировали под другим
+    датасетом) - копируем его индекс: содержимое файлов одинаковое, смещения тоже.
+
+    Returns:
+        bool: True если индекс скопирован
+    """
+    if not is_enabled():
+        return False
+    current = load(csv_path)
+    if current is not None and current.meta.get('key_columns') == key_columns:
+        return True
+    for source in source_csv_paths:
+        index = load(source)
+        if index is None or index.meta.get('key_columns') != key_columns:
+            continue
+        if index.meta['source_size'] != os.path.getsize(csv_path):
+            continue
+        meta = dict(index.meta, **_source_stat(csv_path))
+        arrays = {'offsets': index.offsets}
+        for name, bitmap in index.bitmaps.items():
+            if bitmap is not None:
+                arrays[name] = bitmap
+        _write(csv_path, meta, arrays)
+        return True
+    return False
@@ -0,0 +1,243 @@
+"""
+sampling.py - Быстрый предварительный профиль по выборке строк (режим quick)
+
+Чтобы показать первые цифры по новому файлу за доли секунды, а не ждать полного
+анализа многогигабайтного CSV, читаем не весь файл, а выборку строк:
+
+1. Файл делится на BLOCKS равных по байтам полос. Проходим по ним один раз
+   от начала к концу: в каждой полосе seek() на случайное смещение, дочитываем
+   строку до конца (она обрезана) и берём следующие несколько строк.
+2. Прочитанные строки проходят через резервуар (Algorithm R): в выборке остаётся
+   sample_rows строк, каждая прочитанная строка попадает в неё с равной вероятностью.
+3. Выборка профилируется тем же profile_dataframe, а результаты масштабируются
+   на всю таблицу. Формат тот же, что у проверок missing и statistics, плюс пометка
+   "estimated": true и 95% доверительные интервалы:
+   - доли пропусков (по столбцам) - интервал Уилсона;
+   - общая доля пропусков и средние числовых столбцов - нормальное приближение
+     с поправкой на конечную совокупность.
+   min/max, unique_values и most_common посчитаны по выборке - это оценки снизу/по выборке.
+
+Маленький файл (вся таблица укладывается в выборку) читается целиком - результаты точные.
+
+Ограничение: если seek попал внутрь значения в кавычках с переносами строк,
+несколько строк этой полосы разберутся неверно (лишние поля отбрасываются).
+Полный анализ всё равно заменит предварительные результаты.
+"""
+
+import io
+import math
+import os
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+
+from .profiler import profile_dataframe
+
+# Квантиль нормального распределения для 95% доверительного интервала
+Z_95 = 1.959964
+
+# Во сколько раз прочитать больше строк, чем нужно в выборке (резервуар выбирает из них)
+OVERSAMPLING = 2
+
+
+def get_sample_rows():
+    return getattr(settings, 'DATA_QUALITY_QUICK_SAMPLE_ROWS', 10_000)
+
+
+def get_sample_blocks():
+    return getattr(settings, 'DATA_QUALITY_QUICK_SAMPLE_BLOCKS', 100)
+
+
+# ============================================================================
+# 1. ВЫБОРКА СТРОК ЗА ОДИН ПРОХОД С SEEK
+# ============================================================================
+class Sample:
+    """Результат read_sample: DataFrame выборки и сведения о ней."""
+
+    def __init__(self, frame, exhaustive, estimated_rows, bytes_read):
+        self.frame = frame
+        self.exhaustive = exhaustive          # True - прочитан весь файл, оценки точные
+        self.estimated_rows = estimated_rows  # Оценка числа строк данных во всём файле
+        self.bytes_read = bytes_read
+
+
+def _read_lines(f, count):
+    """До count непустых строк с текущей позиции."""
+    lines = []
+    while len(lines) < count:
+        line = f.readline()
+        if not line:
+            break
+        if line.strip():
+            lines.append(line)
+    return lines
+
+
+def read_sample(path, read_kwargs, sample_rows=None, blocks=None, seed=0):
+    """
+    Читает случайную выборку строк CSV (см. описание модуля).
+
+    Args:
+        path: Путь к CSV
+        read_kwargs: Параметры pd.read_csv (см. sniffing.read_csv_kwargs)
+        sample_rows: Размер выборки (по умолчанию DATA_QUALITY_QUICK_SAMPLE_ROWS)
+        blocks: На сколько полос делить файл (по умолчанию DATA_QUALITY_QUICK_SAMPLE_BLOCKS)
+        seed: Зерно генератора - одинаковый файл даёт одинаковую выборку
+
+    Returns:
+        Sample
+    """
+    sample_rows = sample_rows or get_sample_rows()
+    blocks = blocks or get_sample_blocks()
+    lines_per_block = max(1, math.ceil(OVERSAMPLING * sample_rows / blocks))
+    rng = np.random.default_rng(seed)
+    size = os.path.getsize(path)
+    has_header = read_kwargs.get('header', 'infer') is not None
+
+    with open(path, 'rb') as f:
+        header = f.readline() if has_header else b''
+        data_start = f.tell()
+
+        # Пробные строки с начала: средняя длина строки и решение, читать ли файл целиком
+        probe = _read_lines(f, lines_per_block)
+        mean_length = sum(map(len, probe)) / len(probe) if probe else 1
+        data_bytes = size - data_start
+        if data_bytes <= OVERSAMPLING * sample_rows * mean_length:
+            frame = pd.read_csv(path, **read_kwargs)
+            return Sample(frame, exhaustive=True, estimated_rows=len(frame), bytes_read=size)
+
+        # Один проход по полосам от начала к концу, в каждой - со случайного смещения
+        reservoir = []
+        seen = 0
+        bytes_read = len(header)
+        stride = data_bytes / blocks
+        for block in range(blocks):
+            offset = data_start + int(block * stride + rng.random() * stride)
+            f.seek(offset)
+            if offset > data_start:
+                f.readline()  # Попали в середину строки - её хвост пропускаем
+            lines = _read_lines(f, lines_per_block)
+            bytes_read += sum(map(len, lines))
+            for line in lines:
+                # Algorithm R: i-я строка заменяет случайную строку резервуара с вероятностью k/i
+                seen += 1
+                if len(reservoir) < sample_rows:
+                    reservoir.append(line)
+                else:
+                    slot = rng.integers(0, seen)
+                    if slot < sample_rows:
+                        reservoir[slot] = line
+
+    sampled_bytes = sum(map(len, reservoir))
+    estimated_rows = round(data_bytes / (sampled_bytes / len(reservoir))) if reservoir else 0
+    frame = pd.read_csv(io.BytesIO(header + b''.join(reservoir)), on_bad_lines='skip', **read_kwargs)
+    return Sample(frame, exhaustive=False, estimated_rows=estimated_rows, bytes_read=bytes_read)
+
+
+# ============================================================================
+# 2. ОЦЕНКИ С ДОВЕРИТЕЛЬНЫМИ ИНТЕРВАЛАМИ
+# ============================================================================
+def _fpc(n, population):
+    """Поправка на конечную совокупность: выборка без возвращения из population строк."""
+    if not population:
+        return 1.0
+    if n >= population:
+        return 0.0  # Выборка - вся таблица, ошибки выборки нет
+    return math.sqrt((population - n) / (population - 1))
+
+
+def proportion_interval(successes, n, population=None):
+    """95% интервал Уилсона для доли (в %), с поправкой на конечную совокупность."""
+    if n == 0:
+        return None
+    p = successes / n
+    fpc = _fpc(n, population)
+    z2 = (Z_95 * fpc) ** 2 / n
+    center = (p + z2 / 2) / (1 + z2)
+    half = math.sqrt(p * (1 - p) * z2 + z2 ** 2 / 4) / (1 + z2)
+    return [round(max(center - half, 0.0) * 100, 2), round(min(center + half, 1.0) * 100, 2)]
+
+
+def mean_interval(mean, std, n, population=None):
+    """95% интервал для среднего (нормальное приближение)."""
+    if mean is None or std is None or n < 2:
+        return None
+    half = Z_95 * std / math.sqrt(n) * _fpc(n, population)
+    return [mean - half, mean + half]
+
+
+def _scale(count, n, total):
+    """Число в выборке -> оценка для всей таблицы."""
+    return int(round(count * total / n)) if n else 0
+
+
+def estimate_results(sample, total_rows=None):
+    """
+    Результаты проверок missing и statistics по выборке.
+
+    Args:
+        sample: Sample из read_sample
+        total_rows: Точное число строк, если известно (Dataset.row_count), иначе оценка по размеру
+
+    Returns:
+        (missing_results, statistics_results) - в формате полного анализа
+        плюс estimated, sample_rows, confidence_level и интервалы
+    """
+    frame = sample.frame
+    n = len(frame)
+    if sample.exhaustive:
+        total_rows = n
+    elif total_rows is None:
+        total_rows = sample.estimated_rows
+    total_rows = max(total_rows, n)
+
+    missing_results, statistics_results = profile_dataframe(frame)
+    estimate = {
+        'estimated': not sample.exhaustive,
+        'sample_rows': n,
+        'confidence_level': 0.95,
+    }
+
+    # --- Пропуски ---
+    columns = list(frame.columns)
+    total_cells = total_rows * len(columns)
+    row_missing_share = frame.isna().mean(axis=1) if n and columns else pd.Series(dtype=float)
+    share = float(row_missing_share.mean()) if n else 0.0
+    share_interval = mean_interval(share, float(row_missing_share.std()) if n > 1 else None, n, total_rows)
+
+    missing_by_column = missing_results['columns_with_missing']
+    missing_results.update({
+        'total_rows': int(total_rows),
+        'total_cells': int(total_cells),
+        'missing_cells': int(round(share * total_cells)),
+        'missing_percentage': round(share * 100, 2),
+        'columns_with_missing': {
+            column: _scale(count, n, total_rows) for column, count in missing_by_column.items()
+        },
+        **estimate,
+        'confidence_intervals': {
+            'missing_percentage': (
+                [round(max(bound, 0.0) * 100, 2) for bound in share_interval] if share_interval else None
+            ),
+            'columns': {
+                column: proportion_interval(count, n, total_rows)
+                for column, count in missing_by_column.items()
+            },
+        },
+    })
+
+    # --- Статистика ---
+    for kind in ('numeric_columns', 'text_columns'):
+        for column, stats in statistics_results[kind].items():
+            missing = stats['missing']
+            intervals = {'missing_percentage': proportion_interval(missing, n, total_rows)}
+            if kind == 'numeric_columns':
+                valid = n - missing
+                valid_total = total_rows * valid / n if n else 0
+                intervals['mean'] = mean_interval(stats['mean'], stats['std'], valid, valid_total)
+            stats['missing'] = _scale(missing, n, total_rows)
+            stats['confidence_intervals'] = intervals
+    statistics_results.update(estimate)
+
+    return missing_results, statistics_results
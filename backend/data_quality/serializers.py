@@ -2,7 +2,10 @@
 # Импортируем необходимый модуль из Django REST Framework
 from rest_framework import serializers
 # Импортируем наши модели, которые будем "переводить"
-from .models import DataCheck, Report, Dataset  # Импортируем ВСЕ модели, которые используем!
+from .models import (  # Импортируем ВСЕ модели, которые используем!
+    DataCheck, Report, Dataset, AnalysisJob, DailyQualityRollup, ColumnQualityRollup,
+    AnalysisRun, AnalysisPhase, ProfileArtifact,
+)
 
 
 class DataCheckSerializer(serializers.ModelSerializer):
@@ -73,10 +76,22 @@ class DatasetSerializer(serializers.ModelSerializer):
             'uploaded_at',
             'status',
             'status_display',
+            'progress',  # ← Прогресс текущего анализа (фаза, процент, строки)
+            'row_count',      # ← Размеры считаются при загрузке (до анализа)
+            'column_count',
+            'file_size',
+            'missing_cells',         # ← Главные цифры анализа (копия из проверок)
+            'missing_percentage',
+            'duplicate_rows',
+            'duplicate_percentage',
             'checks',    # ← Автоматически включит все проверки
             'report',    # ← Автоматически включит отчёт
         ]
-        read_only_fields = ['id', 'uploaded_at', 'checks', 'report', 'status_display']
+        read_only_fields = [
+            'id', 'uploaded_at', 'progress', 'row_count', 'column_count', 'file_size',
+            'missing_cells', 'missing_percentage', 'duplicate_rows', 'duplicate_percentage',
+            'checks', 'report', 'status_display',
+        ]
     
     # 3. Валидация CSV файла
     def validate_csv_file(self, value):
@@ -86,4 +101,159 @@ class DatasetSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(
                 'Поддерживаются только файлы с расширением .csv'
             )
-        return value
\ No newline at end of file
+        return value
+
+
+class DatasetListSerializer(serializers.ModelSerializer):
+    """
+    Компактный сериализатор для СПИСКА датасетов (GET /api/datasets/).
+    Без вложенных проверок и полного текста отчёта - в списке нужны только
+    поля для карточки. Вложенные данные можно запросить явно:
+    ?expand=checks,report
+    """
+    
+    # Количество проблем берём из отчёта (None, если анализа ещё не было)
+    issues_count = serializers.IntegerField(
+        source='report.issues_count',
+        read_only=True,
+        allow_null=True
+    )
+    
+    # Необязательные вложенные данные (только при ?expand=...)
+    checks = DataCheckSerializer(many=True, read_only=True)
+    report = ReportSerializer(read_only=True)
+    
+    # Поля, которые можно запросить через ?expand=
+    EXPANDABLE_FIELDS = ('checks', 'report')
+    
+    class Meta:
+        model = Dataset
+        fields = [
+            'id', 'name', 'status', 'issues_count', 'row_count', 'column_count',
+            'missing_percentage', 'duplicate_percentage', 'uploaded_at', 'checks', 'report',
+        ]
+        read_only_fields = fields
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Убираем вложенные поля, которые не запрошены через ?expand=
+        expand = self.context.get('expand', ())
+        for field_name in self.EXPANDABLE_FIELDS:
+            if field_name not in expand:
+                self.fields.pop(field_name)
+
+
+class AnalysisJobSerializer(serializers.ModelSerializer):
+    """
+    Сериализатор для задачи анализа из фоновой очереди.
+    Только для чтения - задачи создаёт POST /api/datasets/{id}/analyze/.
+    """
+    
+    status_display = serializers.CharField(
+        source='get_status_display',
+        read_only=True
+    )
+    
+    class Meta:
+        model = AnalysisJob
+        fields = [
+            'id',
+            'dataset',
+            'status',
+            'status_display',
+            'options',
+            'attempts',
+            'max_attempts',
+            'error',
+            'created_at',
+            'started_at',
+            'heartbeat_at',
+            'finished_at',
+        ]
+        read_only_fields = fields
+
+
+def percent(numerator, denominator):
+    """Доля в % с округлением как в результатах проверок (None, если делить не на что)."""
+    return round(numerator * 100 / denominator, 2) if denominator else None
+
+
+class DailyQualityRollupSerializer(serializers.ModelSerializer):
+    """
+    Сводка качества за день загрузки (GET /api/aggregates/daily/).
+    Доли считаются из сумм: missing_rate - по всем ячейкам дня,
+    avg_missing_percentage - среднее по датасетам.
+    """
+    
+    missing_rate = serializers.SerializerMethodField()
+    duplicate_rate = serializers.SerializerMethodField()
+    avg_missing_percentage = serializers.SerializerMethodField()
+    avg_duplicate_percentage = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = DailyQualityRollup
+        fields = [
+            'day', 'datasets_count', 'rows_total', 'cells_total',
+            'missing_cells_total', 'duplicate_rows_total',
+            'missing_rate', 'duplicate_rate', 'avg_missing_percentage', 'avg_duplicate_percentage',
+        ]
+        read_only_fields = fields
+    
+    def get_missing_rate(self, obj):
+        return percent(obj.missing_cells_total, obj.cells_total)
+    
+    def get_duplicate_rate(self, obj):
+        return percent(obj.duplicate_rows_total, obj.rows_total)
+    
+    def get_avg_missing_percentage(self, obj):
+        return round(obj.missing_percentage_sum / obj.datasets_count, 2) if obj.datasets_count else None
+    
+    def get_avg_duplicate_percentage(self, obj):
+        return round(obj.duplicate_percentage_sum / obj.datasets_count, 2) if obj.datasets_count else None
+
+
+class ColumnQualityRollupSerializer(serializers.ModelSerializer):
+    """Сводка качества столбца по всем датасетам (GET /api/aggregates/columns/)."""
+    
+    class Meta:
+        model = ColumnQualityRollup
+        fields = [
+            'column_name', 'datasets_count', 'datasets_with_missing',
+            'rows_total', 'missing_cells_total', 'missing_percentage',
+        ]
+        read_only_fields = fields
+
+
+class AnalysisPhaseSerializer(serializers.ModelSerializer):
+    """Замеры одной фазы анализа (см. instrumentation.py)."""
+    
+    rows_per_second = serializers.FloatField(read_only=True)
+    
+    class Meta:
+        model = AnalysisPhase
+        fields = ['name', 'wall_seconds', 'cpu_seconds', 'peak_rss_bytes', 'rows', 'rows_per_second']
+        read_only_fields = fields
+
+
+class AnalysisRunSerializer(serializers.ModelSerializer):
+    """Запуск анализа с фазами (GET /api/datasets/{id}/profile/)."""
+    
+    outcome_display = serializers.CharField(source='get_outcome_display', read_only=True)
+    phases = AnalysisPhaseSerializer(many=True, read_only=True)
+    
+    class Meta:
+        model = AnalysisRun
+        fields = [
+            'id', 'job', 'mode', 'outcome', 'outcome_display', 'from_cache', 'total_rows',
+            'wall_seconds', 'cpu_seconds', 'peak_rss_bytes', 'error', 'started_at', 'phases',
+        ]
+        read_only_fields = fields
+
+
+class ProfileArtifactSerializer(serializers.ModelSerializer):
+    """Профиль медленного анализа или запроса (см. profiling.py); folded_file - ссылка на стеки."""
+    
+    class Meta:
+        model = ProfileArtifact
+        fields = ['id', 'kind', 'label', 'run', 'wall_seconds', 'samples', 'interval_ms', 'folded_file', 'created_at']
+        read_only_fields = fields
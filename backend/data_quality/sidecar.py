@@ -0,0 +1,150 @@
+"""
+sidecar.py - Колоночный Parquet-"спутник" для загруженных CSV
+
+После первого разбора CSV рядом с файлом сохраняется типизированная копия
+в формате Parquet (uploads/.../data.csv -> uploads/.../data.csv.parquet).
+Следующие анализы читают её через memory-map и не разбирают CSV заново.
+Sidecar годится, только если CSV не менялся (размер и время изменения) и
+разобран с теми же параметрами pd.read_csv (кодировка, разделитель... -
+см. sniffing.py): иначе в нём были бы не те столбцы.
+
+pyarrow - необязательная зависимость: без него sidecar просто не используется.
+"""
+
+import json
+import logging
+import os
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - зависит от окружения
+    pa = None
+    pq = None
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Версия формата sidecar. Увеличьте, если меняется способ записи файла.
+# 2 - в метаданных хранятся параметры разбора CSV
+SIDECAR_VERSION = '2'
+
+# Ключи метаданных Parquet, по которым проверяем актуальность sidecar
+META_VERSION = b'dq_sidecar_version'
+META_SOURCE_SIZE = b'dq_source_size'
+META_SOURCE_MTIME = b'dq_source_mtime_ns'
+META_READ_KWARGS = b'dq_read_kwargs'
+
+
+def is_enabled():
+    """Sidecar используется, если он включён в настройках и установлен pyarrow."""
+    return pa is not None and getattr(settings, 'DATA_QUALITY_SIDECAR_ENABLED', True)
+
+
+def sidecar_path(csv_path):
+    """Путь к sidecar рядом с CSV файлом."""
+    return f"{csv_path}.parquet"
+
+
+def _source_metadata(csv_path, read_kwargs):
+    """
+    Размер и время изменения CSV и параметры его разбора -
+    если что-то из этого поменялось, sidecar устарел.
+    """
+    stat = os.stat(csv_path)
+    return {
+        META_VERSION: SIDECAR_VERSION.encode(),
+        META_SOURCE_SIZE: str(stat.st_size).encode(),
+        META_SOURCE_MTIME: str(stat.st_mtime_ns).encode(),
+        META_READ_KWARGS: json.dumps(read_kwargs or {}, sort_keys=True, ensure_ascii=False).encode('utf-8'),
+    }
+
+
+def _is_fresh(csv_path, parquet_path, read_kwargs):
+    """Проверяет, что sidecar существует и построен по текущей версии CSV с теми же параметрами разбора."""
+    if not os.path.exists(parquet_path) or not os.path.exists(csv_path):
+        return False
+    metadata = pq.read_schema(parquet_path).metadata or {}
+    expected = _source_metadata(csv_path, read_kwargs)
+    return all(metadata.get(key) == value for key, value in expected.items())
+
+
+def write_sidecar(df, csv_path, read_kwargs=None):
+    """
+    Сохраняет DataFrame в sidecar. Пишем во временный файл и переименовываем,
+    чтобы параллельный анализ никогда не прочитал недописанный файл.
+
+    Args:
+        df: DataFrame, прочитанный из csv_path
+        csv_path: Путь к исходному CSV
+        read_kwargs: Параметры pd.read_csv, с которыми получен df
+
+    Returns:
+        bool: True если sidecar записан
+    """
+    if not is_enabled():
+        return False
+
+    parquet_path = sidecar_path(csv_path)
+    tmp_path = f"{parquet_path}.{os.getpid()}.tmp"
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        metadata = dict(table.schema.metadata or {})
+        metadata.update(_source_metadata(csv_path, read_kwargs))
+        pq.write_table(table.replace_schema_metadata(metadata), tmp_path)
+        os.replace(tmp_path, parquet_path)
+    except (pa.ArrowException, OSError) as e:
+        # Например, столбец с числами и строками вперемешку - Arrow не сможет его типизировать
+        logger.warning("⚠️ Sidecar не записан: %s", e)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
+
+    logger.info("💾 Sidecar сохранён: %s", parquet_path)
+    return True
+
+
+def fresh_sidecar_path(csv_path, read_kwargs=None):
+    """Путь к sidecar, если он есть и актуален для этих параметров разбора, иначе None."""
+    if not is_enabled():
+        return None
+    parquet_path = sidecar_path(csv_path)
+    try:
+        return parquet_path if _is_fresh(csv_path, parquet_path, read_kwargs) else None
+    except (pa.ArrowException, OSError):
+        return None
+
+
+def read_sidecar(csv_path, columns=None, read_kwargs=None):
+    """
+    Читает sidecar (memory-map), если он актуален.
+
+    Args:
+        csv_path: Путь к исходному CSV
+        columns: Список столбцов, если нужны не все (читаются только они)
+        read_kwargs: Параметры pd.read_csv - sidecar, записанный с другими, не используется
+
+    Returns:
+        DataFrame или None, если sidecar нет или он устарел
+    """
+    if not is_enabled():
+        return None
+
+    parquet_path = sidecar_path(csv_path)
+    try:
+        if not _is_fresh(csv_path, parquet_path, read_kwargs):
+            return None
+        table = pq.read_table(parquet_path, columns=columns, memory_map=True)
+    except (pa.ArrowException, OSError) as e:
+        logger.warning("⚠️ Sidecar не прочитан, разбираем CSV: %s", e)
+        return None
+    return table.to_pandas()
+
+
+def remove_sidecar(csv_path):
+    """Удаляет sidecar (например, когда у датасета заменили CSV файл)."""
+    parquet_path = sidecar_path(csv_path)
+    if os.path.exists(parquet_path):
+        os.remove(parquet_path)
+        logger.info("🗑️ Sidecar удалён: %s", parquet_path)
@@ -0,0 +1,406 @@
+"""
+sketches.py - Компактные вероятностные структуры ("скетчи") для потокового анализа
+
+Скетч хранит сжатую сводку по столбцу фиксированного размера, независимо от
+количества строк в файле. Все скетчи можно СЛИВАТЬ (merge): результат слияния
+сводок двух чанков равен сводке, посчитанной по обоим чанкам сразу.
+
+Каждый скетч умеет сохранять себя в JSON-совместимый словарь (to_state/from_state),
+чтобы частичные результаты можно было передать между процессами или сохранить.
+"""
+
+import base64
+import math
+
+import numpy as np
+import pandas as pd
+
+
+# Сколько значений за раз разбирает SpaceSaving.add: точная таблица частот
+# строится только по такому блоку, а не по всему столбцу
+ADD_BLOCK_ROWS = 65_536
+
+
+def _encode_array(array):
+    """NumPy-массив -> строка base64 (для JSON)."""
+    return base64.b64encode(np.ascontiguousarray(array).tobytes()).decode('ascii')
+
+
+def _decode_array(text, dtype):
+    """Строка base64 -> NumPy-массив (копия, доступная для записи)."""
+    return np.frombuffer(base64.b64decode(text), dtype=dtype).copy()
+
+
+# ============================================================================
+# 1. HYPERLOGLOG - ПРИБЛИЗИТЕЛЬНОЕ ЧИСЛО УНИКАЛЬНЫХ ЗНАЧЕНИЙ
+# ============================================================================
+class HyperLogLog:
+    """
+    Оценка количества уникальных значений (аналог nunique()) за O(2^p) памяти.
+
+    При p=14 скетч занимает 16 КБ, а относительная ошибка ≈ 1.04 / sqrt(2^p) ≈ 0.8%.
+    """
+
+    def __init__(self, p=14):
+        """
+        Args:
+            p: Точность - количество бит хэша, выбирающих регистр (4..18)
+        """
+        if not 4 <= p <= 18:
+            raise ValueError("Точность HyperLogLog должна быть в диапазоне 4..18")
+        self.p = p
+        self.m = 1 << p
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+
+    @staticmethod
+    def hash_values(values):
+        """Превращает значения (Series/массив) в 64-битные хэши без NaN."""
+        series = pd.Series(values)
+        series = series[series.notna()]
+        if series.empty:
+            return np.empty(0, dtype=np.uint64)
+        return pd.util.hash_pandas_object(series, index=False).to_numpy(dtype=np.uint64)
+
+    def add(self, values):
+        """Добавляет значения столбца в скетч."""
+        self.add_hashes(self.hash_values(values))
+
+    def add_hashes(self, hashes):
+        """Добавляет уже посчитанные 64-битные хэши (векторизованно)."""
+        if len(hashes) == 0:
+            return
+        hashes = np.asarray(hashes, dtype=np.uint64)
+
+        # Старшие p бит - номер регистра
+        index = (hashes >> np.uint64(64 - self.p)).astype(np.intp)
+
+        # Оставшиеся биты сдвигаем влево и считаем ведущие нули
+        rest = hashes << np.uint64(self.p)
+        rank = self._leading_zeros(rest)
+        rank = np.minimum(rank, 64 - self.p) + 1
+
+        np.maximum.at(self.registers, index, rank.astype(np.uint8))
+
+    @staticmethod
+    def _leading_zeros(values):
+        """Количество ведущих нулей в 64-битных числах (без потери точности float)."""
+        high = (values >> np.uint64(32)).astype(np.float64)
+        low = (values & np.uint64(0xFFFFFFFF)).astype(np.float64)
+
+        # frexp возвращает показатель степени = длина числа в битах (для 0 -> 0)
+        high_bits = np.frexp(high)[1]
+        low_bits = np.frexp(low)[1]
+
+        return np.where(high_bits > 0, 32 - high_bits, 64 - low_bits)
+
+    def merge(self, other):
+        """Сливает другой скетч в текущий (поэлементный максимум регистров)."""
+        if self.p != other.p:
+            raise ValueError("Нельзя сливать HyperLogLog с разной точностью")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    @property
+    def relative_error(self):
+        """Стандартная относительная ошибка оценки."""
+        return 1.04 / np.sqrt(self.m)
+
+    def to_state(self):
+        return {'p': self.p, 'registers': _encode_array(self.registers)}
+
+    @classmethod
+    def from_state(cls, state):
+        sketch = cls(p=state['p'])
+        sketch.registers = _decode_array(state['registers'], np.uint8)
+        return sketch
+
+    def estimate(self):
+        """Возвращает оценку количества уникальных значений."""
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        raw = alpha * self.m ** 2 / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+
+        # Поправка для малых кардинальностей (linear counting)
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * self.m and zeros:
+            return int(round(self.m * np.log(self.m / zeros)))
+        return int(round(raw))
+
+
+# ============================================================================
+# 2. SPACE-SAVING - ПРИБЛИЗИТЕЛЬНЫЕ САМЫЕ ЧАСТЫЕ ЗНАЧЕНИЯ
+# ============================================================================
+class SpaceSaving:
+    """
+    Хранит не более k самых частых значений с их счётчиками (аналог mode()).
+
+    Завышение любого счётчика не превышает error_bound = N / k,
+    где N - общее количество учтённых значений.
+    """
+
+    def __init__(self, k=256):
+        """
+        Args:
+            k: Максимальное число отслеживаемых значений
+        """
+        self.k = k
+        self.total = 0
+        self.counts = pd.Series(dtype=np.int64)
+        self.errors = pd.Series(dtype=np.int64)
+
+    def add(self, values):
+        """
+        Добавляет значения столбца (NaN игнорируются).
+        Значения учитываются блоками по ADD_BLOCK_ROWS: в памяти одновременно
+        не больше k + ADD_BLOCK_ROWS разных значений, сколько бы их ни было в столбце.
+        """
+        values = pd.Series(values)
+        for start in range(0, len(values), ADD_BLOCK_ROWS):
+            counts = values.iloc[start:start + ADD_BLOCK_ROWS].value_counts(dropna=True)
+            zeros = pd.Series(0, index=counts.index, dtype=np.int64)
+            self._merge_counts(counts, zeros, floor=0, total=int(counts.sum()))
+
+    def merge(self, other):
+        """Сливает другой скетч в текущий."""
+        self._merge_counts(other.counts, other.errors, floor=other._floor(), total=other.total)
+        return self
+
+    def _floor(self):
+        """Минимальный счётчик заполненного скетча (0, если место ещё есть)."""
+        if len(self.counts) < self.k:
+            return 0
+        return int(self.counts.min())
+
+    def _merge_counts(self, counts, errors, floor, total):
+        """
+        Слияние двух сводок (алгоритм Mergeable Summaries).
+        Значение, отсутствующее в одной из сводок, могло встречаться там
+        не чаще её минимального счётчика - его и добавляем как погрешность.
+        """
+        if counts.empty:
+            return
+        own_floor = self._floor()
+        union = self.counts.index.union(counts.index, sort=False)
+
+        merged_counts = (
+            self.counts.reindex(union, fill_value=own_floor)
+            + counts.reindex(union, fill_value=floor)
+        )
+        merged_errors = (
+            self.errors.reindex(union, fill_value=own_floor)
+            + errors.reindex(union, fill_value=floor)
+        )
+
+        top = merged_counts.nlargest(self.k, keep='first').index
+        self.counts = merged_counts.loc[top].astype(np.int64)
+        self.errors = merged_errors.loc[top].astype(np.int64)
+        self.total += total
+
+    @property
+    def error_bound(self):
+        """Максимальное завышение любого счётчика."""
+        return int(np.ceil(self.total / self.k)) if self.total else 0
+
+    def most_common(self, n=1):
+        """Возвращает n самых частых значений в виде списка (значение, счётчик)."""
+        top = self.counts.sort_values(ascending=False, kind='stable').head(n)
+        return list(top.items())
+
+    def to_state(self):
+        return {
+            'k': self.k,
+            'total': self.total,
+            'items': [_to_json_value(item) for item in self.counts.index],
+            'counts': [int(count) for count in self.counts],
+            'errors': [int(error) for error in self.errors],
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        sketch = cls(k=state['k'])
+        sketch.total = state['total']
+        index = pd.Index(state['items'], dtype=object)
+        sketch.counts = pd.Series(state['counts'], index=index, dtype=np.int64)
+        sketch.errors = pd.Series(state['errors'], index=index, dtype=np.int64)
+        return sketch
+
+
+def _to_json_value(value):
+    """Значения из pandas (np.int64, np.float64...) -> обычные типы Python."""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+# ============================================================================
+# 3. COUNT-MIN SKETCH - ОЦЕНКА ЧАСТОТЫ ЛЮБОГО ЗНАЧЕНИЯ
+# ============================================================================
+class CountMinSketch:
+    """
+    Таблица depth x width счётчиков. Оценка частоты значения никогда не занижена,
+    а завышение не больше epsilon * N с вероятностью confidence,
+    где epsilon = e / width, confidence = 1 - e^(-depth).
+    """
+
+    def __init__(self, width=2048, depth=5):
+        self.width = width
+        self.depth = depth
+        self.total = 0
+        self.table = np.zeros((depth, width), dtype=np.int64)
+
+    def _columns(self, hashes):
+        """Для каждой строки таблицы - своя хэш-функция (двойное хэширование)."""
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        low = hashes & np.uint64(0xFFFFFFFF)
+        high = hashes >> np.uint64(32)
+        rows = np.arange(self.depth, dtype=np.uint64)[:, None]
+        return ((low[None, :] + rows * high[None, :]) % np.uint64(self.width)).astype(np.intp)
+
+    def add_hashes(self, hashes):
+        """Учитывает значения по их 64-битным хэшам (см. HyperLogLog.hash_values)."""
+        if len(hashes) == 0:
+            return
+        columns = self._columns(hashes)
+        for row in range(self.depth):
+            self.table[row] += np.bincount(columns[row], minlength=self.width)
+        self.total += len(hashes)
+
+    def estimate_hashes(self, hashes):
+        """Оценки частот для значений с данными хэшами."""
+        columns = self._columns(hashes)
+        return self.table[np.arange(self.depth)[:, None], columns].min(axis=0)
+
+    def merge(self, other):
+        if (self.width, self.depth) != (other.width, other.depth):
+            raise ValueError("Нельзя сливать Count-Min скетчи разного размера")
+        self.table += other.table
+        self.total += other.total
+        return self
+
+    @property
+    def epsilon(self):
+        return math.e / self.width
+
+    @property
+    def confidence(self):
+        return 1 - math.exp(-self.depth)
+
+    @property
+    def error_bound(self):
+        """Максимальное завышение частоты (с вероятностью confidence)."""
+        return int(math.ceil(self.epsilon * self.total))
+
+    def to_state(self):
+        return {
+            'width': self.width,
+            'depth': self.depth,
+            'total': self.total,
+            'table': _encode_array(self.table),
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        sketch = cls(width=state['width'], depth=state['depth'])
+        sketch.total = state['total']
+        sketch.table = _decode_array(state['table'], np.int64).reshape(sketch.depth, sketch.width)
+        return sketch
+
+
+# ============================================================================
+# 4. T-DIGEST - ПРИБЛИЗИТЕЛЬНЫЕ КВАНТИЛИ ЧИСЛОВОГО СТОЛБЦА
+# ============================================================================
+class TDigest:
+    """
+    Хранит числовой столбец в виде нескольких сотен "центроидов" (среднее + вес).
+    Около краёв распределения центроиды мельче, поэтому хвостовые квантили
+    (p5, p95) точнее средних. Сжатие выполняется векторно: отсортированные точки
+    группируются по шкале k(q) = compression / (2π) * asin(2q - 1).
+    """
+
+    def __init__(self, compression=200):
+        self.compression = compression
+        self.means = np.empty(0, dtype=np.float64)
+        self.weights = np.empty(0, dtype=np.float64)
+        self.min = None
+        self.max = None
+
+    @property
+    def count(self):
+        return float(self.weights.sum())
+
+    def add(self, values):
+        """Добавляет значения (без NaN)."""
+        values = np.asarray(values, dtype=np.float64)
+        if not len(values):
+            return
+        self.min = float(values.min()) if self.min is None else min(self.min, float(values.min()))
+        self.max = float(values.max()) if self.max is None else max(self.max, float(values.max()))
+        self._compress(
+            np.concatenate([self.means, values]),
+            np.concatenate([self.weights, np.ones(len(values))]),
+        )
+
+    def merge(self, other):
+        if other.min is None:
+            return self
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+        self._compress(
+            np.concatenate([self.means, other.means]),
+            np.concatenate([self.weights, other.weights]),
+        )
+        return self
+
+    def _compress(self, means, weights):
+        order = np.argsort(means, kind='stable')
+        means = means[order]
+        weights = weights[order]
+
+        total = weights.sum()
+        # Квантиль середины каждой точки/центроида
+        q = (np.cumsum(weights) - weights / 2) / total
+        k = self.compression / (2 * math.pi) * np.arcsin(np.clip(2 * q - 1, -1, 1))
+        groups = np.floor(k - k[0]).astype(np.int64)
+
+        new_weights = np.bincount(groups, weights=weights)
+        new_sums = np.bincount(groups, weights=means * weights)
+        keep = new_weights > 0
+        self.weights = new_weights[keep]
+        self.means = new_sums[keep] / self.weights
+
+    def quantile(self, q):
+        """Оценка квантиля q (0..1) линейной интерполяцией между центроидами."""
+        if not len(self.means):
+            return None
+        if len(self.means) == 1:
+            return float(self.means[0])
+        positions = np.cumsum(self.weights) - self.weights / 2
+        target = q * self.weights.sum()
+        xs = np.concatenate([[0], positions, [self.weights.sum()]])
+        ys = np.concatenate([[self.min], self.means, [self.max]])
+        return float(np.interp(target, xs, ys))
+
+    @property
+    def rank_error(self):
+        """
+        Оценка ошибки квантиля в долях ранга: половина веса самого крупного центроида.
+        Например, 0.005 - найденное значение лежит между квантилями q-0.5% и q+0.5%.
+        """
+        if not len(self.weights):
+            return 0.0
+        return float(self.weights.max() / (2 * self.weights.sum()))
+
+    def to_state(self):
+        return {
+            'compression': self.compression,
+            'means': _encode_array(self.means),
+            'weights': _encode_array(self.weights),
+            'min': self.min,
+            'max': self.max,
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        sketch = cls(compression=state['compression'])
+        sketch.means = _decode_array(state['means'], np.float64)
+        sketch.weights = _decode_array(state['weights'], np.float64)
+        sketch.min = state['min']
+        sketch.max = state['max']
+        return sketch
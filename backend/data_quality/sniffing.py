@@ -0,0 +1,150 @@
+"""
+sniffing.py - Быстрое определение кодировки и формата (диалекта) CSV
+
+Вместо того чтобы читать весь файл как utf-8 и при ошибке перечитывать как cp1251,
+смотрим только на начало и конец файла (по 64 КБ) и выбираем кодировку,
+разделитель, символ кавычек и наличие строки заголовка ДО единственного разбора.
+"""
+
+import csv
+import io
+import os
+
+# Сколько байт читаем с начала и с конца файла
+SAMPLE_BYTES = 64 * 1024
+
+# Сколько строк анализируем для определения разделителя и заголовка
+SAMPLE_LINES = 50
+
+# Поддерживаемые разделители
+CANDIDATE_DELIMITERS = ',;\t|'
+
+# Версия логики определения - если меняется, сохранённые диалекты пересчитываются
+SNIFFER_VERSION = 1
+
+UTF8_BOM = b'\xef\xbb\xbf'
+
+
+def sniff_file(path):
+    """
+    Определяет диалект CSV файла по его началу и концу.
+
+    Returns:
+        dict: encoding, delimiter, quotechar, has_header, columns_count, version
+    """
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        head = f.read(SAMPLE_BYTES)
+        tail = b''
+        if size > SAMPLE_BYTES:
+            f.seek(max(size - SAMPLE_BYTES, SAMPLE_BYTES))
+            tail = f.read()
+    return sniff_bytes(head, tail)
+
+
+def sniff_bytes(head, tail=b''):
+    """Определяет диалект по байтам начала (и, если есть, конца) файла."""
+    encoding = detect_encoding(head, tail)
+
+    sample = sample_text(head, encoding)
+
+    delimiter, quotechar = detect_delimiter(sample)
+    rows = list(csv.reader(io.StringIO(sample), delimiter=delimiter, quotechar=quotechar))
+    rows = [row for row in rows if row]
+
+    return {
+        'encoding': encoding,
+        'delimiter': delimiter,
+        'quotechar': quotechar,
+        'has_header': detect_header(sample, rows),
+        'columns_count': len(rows[0]) if rows else 0,
+        'version': SNIFFER_VERSION,
+    }
+
+
+def sample_text(head, encoding):
+    """Первые SAMPLE_LINES целых строк образца в виде текста."""
+    text = head.decode(encoding, errors='replace')
+    # Последняя строка образца может быть обрезана - отбрасываем её
+    lines = text.splitlines()
+    if len(head) >= SAMPLE_BYTES and len(lines) > 1:
+        lines = lines[:-1]
+    return '\n'.join(lines[:SAMPLE_LINES])
+
+
+def detect_encoding(head, tail=b''):
+    """
+    utf-8 (с BOM или без), если оба образца корректно декодируются, иначе cp1251.
+    Образцы вырезаны из середины файла, поэтому многобайтный символ на границе
+    образца может быть обрезан - такие байты не считаем ошибкой.
+    """
+    if head.startswith(UTF8_BOM):
+        return 'utf-8-sig'
+    if _is_utf8(head, cut_start=False) and _is_utf8(tail, cut_start=True):
+        return 'utf-8'
+    return 'cp1251'
+
+
+def _is_utf8(data, cut_start):
+    if not data:
+        return True
+    if cut_start:
+        # Пропускаем "хвост" символа, начавшегося до образца (байты 10xxxxxx)
+        skip = 0
+        while skip < min(3, len(data)) and data[skip] & 0xC0 == 0x80:
+            skip += 1
+        data = data[skip:]
+    try:
+        data.decode('utf-8')
+        return True
+    except UnicodeDecodeError as e:
+        # Обрезанный символ в самом конце образца - не ошибка кодировки
+        return e.reason == 'unexpected end of data' and e.start >= len(data) - 3
+
+
+def detect_delimiter(sample):
+    """Разделитель и символ кавычек; если определить не удалось - запятая и двойные кавычки."""
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=CANDIDATE_DELIMITERS)
+        return dialect.delimiter, dialect.quotechar or '"'
+    except csv.Error:
+        return ',', '"'
+
+
+def detect_header(sample, rows):
+    """
+    Есть ли строка заголовка. Заголовком считаем первую строку, если в ней нет
+    чисел (как у большинства выгрузок) или если так решил csv.Sniffer.
+    """
+    if not rows:
+        return True
+    if not any(_is_number(cell) for cell in rows[0]):
+        return True
+    try:
+        return csv.Sniffer().has_header(sample)
+    except csv.Error:
+        return True
+
+
+def _is_number(value):
+    try:
+        float(value.replace(',', '.'))
+        return True
+    except ValueError:
+        return False
+
+
+def read_csv_kwargs(dialect):
+    """
+    Превращает сохранённый диалект в параметры для pd.read_csv.
+    Для файлов без заголовка даём столбцам имена column_1, column_2, ...
+    """
+    kwargs = {
+        'encoding': dialect.get('encoding', 'utf-8'),
+        'sep': dialect.get('delimiter', ','),
+        'quotechar': dialect.get('quotechar', '"'),
+    }
+    if not dialect.get('has_header', True) and dialect.get('columns_count'):
+        kwargs['header'] = None
+        kwargs['names'] = [f"column_{i + 1}" for i in range(dialect['columns_count'])]
+    return kwargs
@@ -0,0 +1,523 @@
+"""
+streaming.py - Потоковый (чанковый) анализ CSV файлов, которые не помещаются в память
+
+Вместо одного большого DataFrame файл читается кусками фиксированного размера.
+По каждому чанку считаются частичные результаты, которые затем сливаются:
+- пропуски - простое суммирование счётчиков;
+- min/max/mean/std - слияние моментов по формулам Уэлфорда/Чана;
+- уникальные и самые частые значения - через скетчи (см. sketches.py);
+- в приближённом режиме ещё и квантили (t-digest) и частоты (Count-Min) с оценками ошибок;
+- дубликаты строк - через отпечатки (хэши) строк, см. duplicates.py.
+
+Все частичные результаты можно сохранить и продолжить с них позже:
+так файл, который дописывается в конец, повторно читается только с места
+остановки (см. incremental.py).
+"""
+
+import io
+import logging
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+from .duplicates import DuplicateDetector
+from .sketches import CountMinSketch, HyperLogLog, SpaceSaving, TDigest
+
+logger = logging.getLogger(__name__)
+
+# Сколько строк читаем, чтобы оценить "вес" одной строки в памяти
+SAMPLE_ROWS = 1000
+
+# Какую долю лимита памяти отдаём под сам чанк.
+# Остальное - под временные копии (маски isna, хэши, приведение типов) и скетчи.
+CHUNK_MEMORY_SHARE = 0.25
+
+# Границы размера чанка в строках
+MIN_CHUNK_ROWS = 1_000
+MAX_CHUNK_ROWS = 5_000_000
+
+# Квантили числовых столбцов в приближённом режиме
+QUANTILES = {'p5': 0.05, 'p25': 0.25, 'p50': 0.5, 'p75': 0.75, 'p95': 0.95}
+
+
+# ============================================================================
+# 1. НАКОПИТЕЛЬ СТАТИСТИКИ ПО ОДНОМУ СТОЛБЦУ
+# ============================================================================
+class ColumnAccumulator:
+    """
+    Частичные результаты по одному столбцу.
+    Два накопителя можно слить через merge() - так объединяются чанки.
+    """
+
+    def __init__(self, name, approximate=False):
+        """
+        Args:
+            name: Имя столбца
+            approximate: Приближённый режим - дополнительно считать квантили
+                         (t-digest) и частоту самого частого значения (Count-Min)
+        """
+        self.name = name
+        self.approximate = approximate
+        self.missing = 0
+
+        # Числовые моменты (алгоритм Уэлфорда): количество, среднее, сумма квадратов отклонений
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+
+        # Хотя бы в одном чанке столбец оказался текстовым -
+        # тогда и pandas при полном чтении считал бы его текстовым
+        self.saw_text = False
+
+        # Скетчи для текстовых столбцов
+        self.unique = HyperLogLog()
+        self.top_values = SpaceSaving()
+
+        # Скетчи приближённого режима
+        self.frequencies = CountMinSketch() if approximate else None
+        self.quantiles = TDigest() if approximate else None
+
+    def update(self, series):
+        """Учитывает очередной чанк столбца."""
+        mask = series.isna()
+        self.missing += int(mask.sum())
+        valid = series[~mask]
+
+        if pd.api.types.is_numeric_dtype(series):
+            values = valid.to_numpy(dtype=np.float64)
+            if len(values):
+                mean = values.mean()
+                self._merge_moments(
+                    len(values),
+                    float(mean),
+                    float(((values - mean) ** 2).sum()),
+                    float(values.min()),
+                    float(values.max()),
+                )
+                if self.quantiles is not None:
+                    self.quantiles.add(values)
+        else:
+            self.saw_text = True
+            self.add_text(valid)
+
+    def add_text(self, values):
+        """
+        Учитывает текстовые значения (без пропусков) в скетчах.
+        Отдельно от update() - так в скетчи досылаются строки, которые в более
+        ранних чанках были прочитаны как числа (см. StreamingAnalyzer._process_chunk).
+        """
+        # Хэши считаем один раз - они нужны и HyperLogLog, и Count-Min
+        hashes = HyperLogLog.hash_values(values)
+        self.unique.add_hashes(hashes)
+        self.top_values.add(values)
+        if self.frequencies is not None:
+            self.frequencies.add_hashes(hashes)
+
+    def merge(self, other):
+        """Сливает накопитель другого чанка в текущий."""
+        self.missing += other.missing
+        if other.count:
+            self._merge_moments(other.count, other.mean, other.m2, other.min, other.max)
+        self.saw_text = self.saw_text or other.saw_text
+        self.unique.merge(other.unique)
+        self.top_values.merge(other.top_values)
+        if self.frequencies is not None and other.frequencies is not None:
+            self.frequencies.merge(other.frequencies)
+        if self.quantiles is not None and other.quantiles is not None:
+            self.quantiles.merge(other.quantiles)
+        return self
+
+    def to_state(self):
+        """Состояние накопителя для JSON (см. incremental.py)."""
+        return {
+            'name': self.name,
+            'approximate': self.approximate,
+            'missing': self.missing,
+            'count': self.count,
+            'mean': self.mean,
+            'm2': self.m2,
+            'min': self.min,
+            'max': self.max,
+            'saw_text': self.saw_text,
+            'unique': self.unique.to_state(),
+            'top_values': self.top_values.to_state(),
+            'frequencies': self.frequencies.to_state() if self.frequencies is not None else None,
+            'quantiles': self.quantiles.to_state() if self.quantiles is not None else None,
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        accumulator = cls(state['name'], approximate=state['approximate'])
+        for key in ('missing', 'count', 'mean', 'm2', 'min', 'max', 'saw_text'):
+            setattr(accumulator, key, state[key])
+        accumulator.unique = HyperLogLog.from_state(state['unique'])
+        accumulator.top_values = SpaceSaving.from_state(state['top_values'])
+        if state['frequencies'] is not None:
+            accumulator.frequencies = CountMinSketch.from_state(state['frequencies'])
+        if state['quantiles'] is not None:
+            accumulator.quantiles = TDigest.from_state(state['quantiles'])
+        return accumulator
+
+    def _merge_moments(self, count, mean, m2, min_value, max_value):
+        """Параллельное слияние моментов (формула Чана)."""
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta ** 2 * self.count * count / total
+        self.count = total
+        self.min = min_value if self.min is None else min(self.min, min_value)
+        self.max = max_value if self.max is None else max(self.max, max_value)
+
+    @property
+    def is_numeric(self):
+        return not self.saw_text
+
+    def numeric_result(self):
+        """Результат в формате _calculate_statistics для числового столбца."""
+        if not self.count:
+            return {'min': None, 'max': None, 'mean': None, 'std': None, 'missing': self.missing}
+        # Как и pandas, считаем выборочное std (ddof=1); для одного значения - NaN
+        std = math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else float('nan')
+        result = {
+            'min': self.min,
+            'max': self.max,
+            'mean': self.mean,
+            'std': std,
+            'missing': self.missing,
+        }
+        if self.quantiles is not None:
+            result['quantiles'] = {
+                label: self.quantiles.quantile(q) for label, q in QUANTILES.items()
+            }
+            # Найденный квантиль q лежит между точными квантилями q ± rank_error
+            result['error_bounds'] = {'quantile_rank_error': round(self.quantiles.rank_error, 6)}
+        return result
+
+    def text_result(self):
+        """Результат в формате _calculate_statistics для текстового столбца."""
+        top = self.top_values.most_common(1)
+        result = {
+            'unique_values': self.unique.estimate(),
+            'most_common': str(top[0][0]) if top else None,
+            'missing': self.missing,
+            'error_bounds': {
+                # Стандартная относительная ошибка числа уникальных значений
+                'unique_values_relative_error': round(float(self.unique.relative_error), 6),
+                # Счётчик самого частого значения завышен не больше чем на столько
+                'most_common_count_error': int(self.top_values.error_bound),
+            },
+        }
+        if self.frequencies is not None and top:
+            # Count-Min никогда не занижает частоту, поэтому берём меньшую из двух оценок
+            hashes = HyperLogLog.hash_values(pd.Series([top[0][0]], dtype=object))
+            result['most_common_count'] = int(min(top[0][1], self.frequencies.estimate_hashes(hashes)[0]))
+            result['error_bounds']['count_min_error'] = self.frequencies.error_bound
+            result['error_bounds']['count_min_confidence'] = round(self.frequencies.confidence, 6)
+        return result
+
+
+# ============================================================================
+# 2. ЧТЕНИЕ ДИАПАЗОНА БАЙТОВ
+# ============================================================================
+class ByteRangeReader(io.RawIOBase):
+    """
+    Файл, в котором видны только байты [start, end).
+    Так pandas читает лишь дописанный хвост файла и не заходит за end,
+    даже если файл продолжают дописывать во время анализа.
+    """
+
+    def __init__(self, path, start=0, end=None):
+        super().__init__()
+        self._file = open(path, 'rb')
+        self._file.seek(start)
+        self._remaining = None if end is None else max(end - start, 0)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        view = memoryview(buffer)
+        if self._remaining is not None:
+            view = view[:self._remaining]
+        read = self._file.readinto(view)
+        if self._remaining is not None:
+            self._remaining -= read
+        return read
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+# ============================================================================
+# 3. ПОТОКОВЫЙ АНАЛИЗАТОР
+# ============================================================================
+class StreamingAnalyzer:
+    """
+    Анализирует CSV по чанкам с ограничением по памяти.
+    Возвращает те же три словаря, что и методы CSVAnalyzer.
+    """
+
+    def __init__(self, file_path, memory_limit_mb=512, read_kwargs=None, duplicate_options=None,
+                 approximate=False, progress_callback=None, known_rows=None, end_offset=None,
+                 collect_rows=False):
+        """
+        Args:
+            file_path: Путь к CSV файлу
+            memory_limit_mb: Примерный лимит памяти на анализ (в мегабайтах)
+            read_kwargs: Параметры pd.read_csv (кодировка, разделитель... - см. sniffing.py)
+            duplicate_options: Параметры DuplicateDetector (ключевые столбцы, лимиты)
+            approximate: Приближённый режим статистики (квантили, Count-Min, см. ColumnAccumulator)
+            progress_callback: Вызывается после каждого чанка: callback(rows_processed, estimated_total_rows)
+            known_rows: Точное число строк, если известно (посчитано при загрузке, см. uploads.py)
+            end_offset: Читать файл только до этого байта (None - до конца)
+            collect_rows: Запоминать номера строк с пропусками и строк-дубликатов
+                          (для индекса строк, см. row_index.py)
+        """
+        self.file_path = file_path
+        self.memory_limit_mb = memory_limit_mb
+        self.read_kwargs = read_kwargs or {}
+        self.duplicate_options = duplicate_options or {}
+        self.approximate = approximate
+        self.progress_callback = progress_callback
+        self.known_rows = known_rows
+        self.estimated_rows = None
+        self.start_offset = 0
+        self.end_offset = end_offset
+        self.used_read_kwargs = None
+        self.chunk_rows = MIN_CHUNK_ROWS
+        self.fingerprint_count = 0
+        self.collect_rows = collect_rows
+        self.duplicates = None
+        self._reset()
+
+    def _reset(self):
+        """Сбрасывает частичные результаты (например, перед повтором с другой кодировкой)."""
+        self.columns = None
+        self.accumulators = {}
+        self.total_rows = 0
+        self.missing_rows = [] if self.collect_rows else None
+        if self.duplicates is not None:
+            self.duplicates.close()
+        self.duplicates = DuplicateDetector(**self.duplicate_options, collect_row_ids=self.collect_rows)
+
+    def restore(self, state, fingerprints_path, start_offset):
+        """
+        Продолжает с сохранённого состояния (см. state()): run() прочитает
+        файл только с байта start_offset, начала записи после уже учтённых строк.
+        """
+        self.columns = list(state['columns'])
+        self.accumulators = {
+            column: ColumnAccumulator.from_state(accumulator)
+            for column, accumulator in zip(self.columns, state['accumulators'])
+        }
+        self.total_rows = state['total_rows']
+        self.duplicates.restore(state['duplicates'], fingerprints_path)
+        self.start_offset = start_offset
+
+    def state(self):
+        """Состояние после run() - всё, что нужно, чтобы продолжить с этого места."""
+        return {
+            'columns': list(self.columns or []),
+            'accumulators': [self.accumulators[column].to_state() for column in self.columns or []],
+            'total_rows': self.total_rows,
+            'duplicates': self.duplicates.state(),
+        }
+
+    def run(self, fingerprints_path=None):
+        """
+        Читает файл по чанкам (целиком или, после restore(), только хвост).
+
+        Args:
+            fingerprints_path: Куда сохранить отпечатки строк для следующего
+                               инкрементального анализа (None - не сохранять)
+
+        Returns:
+            tuple: (missing_results, duplicates_results, statistics_results)
+        """
+        read_kwargs = dict(self.read_kwargs)
+        read_kwargs.setdefault('encoding', 'utf-8')
+        try:
+            try:
+                self._consume(read_kwargs)
+            except UnicodeDecodeError:
+                if read_kwargs['encoding'] == 'cp1251':
+                    raise
+                # Ошибка декодирования может случиться на любом чанке - начинаем заново,
+                # причём с начала файла (сохранённое состояние посчитано в другой кодировке)
+                self._reset()
+                self.start_offset = 0
+                read_kwargs['encoding'] = 'cp1251'
+                self._consume(read_kwargs)
+                logger.info("📊 Потоковое чтение с кодировкой cp1251")
+
+            if fingerprints_path is not None:
+                self.fingerprint_count = self.duplicates.save_fingerprints(fingerprints_path)
+            return self._missing_results(), self.duplicates.result(), self._statistics_results()
+        finally:
+            self.duplicates.close()
+
+    def _consume(self, read_kwargs):
+        """Основной цикл: читаем чанки и обновляем накопители."""
+        chunk_rows = self._estimate_chunk_rows(read_kwargs)
+        self.chunk_rows = chunk_rows
+        self.used_read_kwargs = read_kwargs
+        self.estimated_rows = self.known_rows or self._estimate_total_rows()
+        logger.info("🌊 Потоковый анализ: чанки по %s строк (лимит %s МБ)", chunk_rows, self.memory_limit_mb)
+
+        # Столбцы, уже известные как текстовые (из сохранённого состояния), сразу читаем строками
+        text_columns = [column for column, acc in self.accumulators.items() if acc.saw_text]
+
+        if self.start_offset == 0 and self.end_offset is None:
+            source = self.file_path
+        else:
+            if self.end_offset is not None and self.start_offset >= self.end_offset:
+                return  # Новых строк нет - результат целиком из сохранённого состояния
+            source = io.BufferedReader(ByteRangeReader(self.file_path, self.start_offset, self.end_offset))
+            if self.start_offset:
+                # Хвост файла: строки заголовка в нём нет, имена столбцов - из состояния
+                read_kwargs = dict(read_kwargs, header=None, names=self.columns)
+                logger.info("➕ Дочитываем файл с байта %s", self.start_offset)
+        if text_columns:
+            read_kwargs = dict(read_kwargs, dtype={column: str for column in text_columns})
+
+        reader = pd.read_csv(source, chunksize=chunk_rows, **read_kwargs)
+        try:
+            with reader:
+                for chunk in reader:
+                    self._process_chunk(chunk)
+        finally:
+            if not isinstance(source, str):
+                source.close()
+
+    def _estimate_chunk_rows(self, read_kwargs):
+        """Подбирает размер чанка по "весу" строки в памяти и лимиту."""
+        sample = pd.read_csv(self.file_path, nrows=SAMPLE_ROWS, **read_kwargs)
+        if sample.empty:
+            return MIN_CHUNK_ROWS
+        bytes_per_row = sample.memory_usage(index=False, deep=True).sum() / len(sample)
+        budget = self.memory_limit_mb * 1024 * 1024 * CHUNK_MEMORY_SHARE
+        rows = int(budget / max(bytes_per_row, 1))
+        return max(MIN_CHUNK_ROWS, min(rows, MAX_CHUNK_ROWS))
+
+    def _estimate_total_rows(self):
+        """Примерное число строк файла по средней длине первых строк (только для прогресса)."""
+        with open(self.file_path, 'rb') as f:
+            sample = f.read(1024 * 1024)
+        lines = sample.count(b'\n')
+        if not lines:
+            return None
+        # Минус строка заголовка
+        return max(1, int(os.path.getsize(self.file_path) / (len(sample) / lines)) - 1)
+
+    def _process_chunk(self, chunk):
+        """Обновляет все накопители по одному чанку."""
+        if self.columns is None:
+            self.columns = list(chunk.columns)
+            self.accumulators = {
+                column: ColumnAccumulator(column, self.approximate) for column in self.columns
+            }
+
+        for position, column in enumerate(self.columns):
+            accumulator = self.accumulators[column]
+            series = chunk[column]
+            if not pd.api.types.is_numeric_dtype(series):
+                if not accumulator.saw_text and self.total_rows:
+                    # Столбец стал текстовым только сейчас: при полном чтении pandas
+                    # считал бы текстом и прежние строки - досылаем их в скетчи строками
+                    for values in self._read_as_text(position, 0, self.total_rows):
+                        accumulator.add_text(values.dropna())
+            elif accumulator.saw_text and series.notna().any():
+                # Текстовый столбец, а в этом чанке только числа - берём исходные строки
+                series = pd.concat(list(self._read_as_text(position, self.total_rows, len(chunk))))
+            accumulator.update(series)
+
+        self.duplicates.update(chunk)
+        if self.missing_rows is not None:
+            self.missing_rows.append(np.flatnonzero(chunk.isna().any(axis=1).to_numpy()) + self.total_rows)
+        self.total_rows += len(chunk)
+
+        if self.progress_callback is not None:
+            self.progress_callback(self.total_rows, self.estimated_rows)
+
+    def _read_as_text(self, position, start, count):
+        """
+        Перечитывает строки [start, start + count) одного столбца как текст, чанками.
+        Нужно редко - только когда тип столбца меняется от чанка к чанку.
+        """
+        read_kwargs = dict(self.used_read_kwargs, usecols=[position], dtype=str, nrows=count,
+                           chunksize=self.chunk_rows)
+        header_lines = 0 if read_kwargs.get('header', 'infer') is None else 1
+        if start:
+            read_kwargs['skiprows'] = range(header_lines, header_lines + start)
+        with pd.read_csv(self.file_path, **read_kwargs) as reader:
+            for frame in reader:
+                yield frame.iloc[:, 0]
+
+    def missing_row_ids(self):
+        """Номера строк с пропусками (с collect_rows=True; после restore() - только новые)."""
+        if self.missing_rows is None:
+            return None
+        return np.concatenate(self.missing_rows) if self.missing_rows else np.empty(0, dtype=np.int64)
+
+    # ------------------------------------------------------------------------
+    # Формирование результатов (те же ключи, что и у CSVAnalyzer)
+    # ------------------------------------------------------------------------
+    def _missing_results(self):
+        columns = self.columns or []
+        total_cells = self.total_rows * len(columns)
+        missing_cells = sum(acc.missing for acc in self.accumulators.values())
+        missing_percentage = (missing_cells / total_cells) * 100 if total_cells > 0 else 0
+
+        return {
+            'total_rows': self.total_rows,
+            'total_columns': len(columns),
+            'total_cells': int(total_cells),
+            'missing_cells': int(missing_cells),
+            'missing_percentage': round(missing_percentage, 2),
+            'columns_with_missing': {
+                column: acc.missing for column, acc in self.accumulators.items() if acc.missing > 0
+            },
+        }
+
+    def _statistics_results(self):
+        return accumulator_statistics(self.accumulators)
+
+
+def accumulator_statistics(accumulators):
+    """
+    Результат проверки 'statistics' по накопителям столбцов.
+    Используется и потоковым анализом, и приближённым профилем в памяти (profiler.py).
+    """
+    numeric_stats = {}
+    text_stats = {}
+
+    for column, acc in accumulators.items():
+        if acc.is_numeric:
+            numeric_stats[column] = acc.numeric_result()
+        else:
+            text_stats[column] = acc.text_result()
+
+    results = {
+        'numeric_columns': numeric_stats,
+        'text_columns': text_stats,
+        'total_columns': len(accumulators),
+        # unique_values и most_common - оценки по скетчам
+        'approximate': True,
+    }
+
+    # Параметры скетчей - чтобы по ним можно было пересчитать гарантии точности
+    sample = next(iter(accumulators.values()), None)
+    if sample is not None and sample.approximate:
+        results['sketches'] = {
+            'hyperloglog_precision': sample.unique.p,
+            'space_saving_capacity': sample.top_values.k,
+            'count_min_width': sample.frequencies.width,
+            'count_min_depth': sample.frequencies.depth,
+            'tdigest_compression': sample.quantiles.compression,
+        }
+    return results
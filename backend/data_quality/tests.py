@@ -1,3 +1,1200 @@
-from django.test import TestCase
+"""
+tests.py - Тесты API Data Quality Dashboard
 
-# Create your tests here.
+- Потоковый анализ по чанкам даёт те же результаты, что и анализ в памяти.
+- Зависшие задачи очереди определяются по heartbeat, а не по времени старта.
+- Очередь задач: фильтр /api/jobs/, одна активная задача на датасет, итог пишет только владелец задачи.
+- Однопроходный профиль столбцов (profiler.py) совпадает с расчётом через pandas.
+- Кэш результатов анализа по хэшу содержимого (result_cache.py).
+- Parquet-sidecar и проверка его актуальности (sidecar.py).
+- Дубликаты по отпечаткам строк: в памяти и со сбросом на диск (duplicates.py).
+- Скетчи приближённого режима не строят таблицу всех разных значений (sketches.py).
+- Профиль на пуле процессов совпадает с последовательным (parallel.py).
+- Компактный список датасетов с курсорной пагинацией и ?expand=.
+- "Бюджет запросов" к базе для API и админки: количество SQL-запросов на страницу
+  не должно зависеть от количества строк (иначе где-то потерян
+  select_related / prefetch_related - проблема N+1).
+- Long-poll прогресса анализа.
+- Проверка CSV во время загрузки.
+- Инкрементальный анализ дописанного файла.
+- Сохранение результатов анализа одной транзакцией.
+- Профили базы данных (config/database.py).
+- Фильтры списка по столбцам сводки и их индексы.
+- Сводки по всем датасетам (rollups.py) и /api/aggregates/.
+- Постраничное чтение строк по индексу (row_index.py).
+- Замеры фаз анализа, /api/datasets/{id}/profile/ и /api/metrics/ (instrumentation.py).
+- Сэмплирующий профилировщик анализов и запросов (profiling.py).
+
+Запуск: python manage.py test data_quality
+"""
+
+import gzip
+import io
+import math
+import os
+import shutil
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError, connection, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from config.database import database_settings
+
+from .analyzer import CSVAnalyzer
+from .duplicates import DuplicateDetector, row_fingerprints
+from .instrumentation import PhaseTimer
+from .jobs import claim_job, enqueue_analysis, requeue_stale_jobs, run_job
+from .middleware import ProfilingMiddleware
+from .parallel import profile_dataframe_parallel
+from .models import (
+    AnalysisCache, AnalysisJob, AnalysisRun, ColumnQualityRollup, DailyQualityRollup, DataCheck, Dataset, IncrementalState,
+    ProfileArtifact, Report,
+)
+from .profiling import StackSampler
+from .profiler import finite_or_none, profile_dataframe, profile_dataframe_approximate
+from .progress import ProgressReporter, make_progress, save_progress
+from .renderers import FastJSONRenderer
+from .result_cache import evict
+from .sidecar import fresh_sidecar_path, read_sidecar, sidecar_path, write_sidecar
+from .sketches import ADD_BLOCK_ROWS, SpaceSaving
+from .sniffing import read_csv_kwargs
+from .rollups import rebuild
+from .row_index import remove_index
+from .streaming import ByteRangeReader
+
+MEDIA_ROOT = tempfile.mkdtemp(prefix='dq-tests-')
+
+
+class QueryBudgetMixin:
+    """
+    Помощник для тестов: проверяет, что запрос к URL укладывается в фиксированное
+    число SQL-запросов и что это число не растёт с количеством строк.
+
+    Пример:
+        self.assertQueryBudget('/api/datasets/', budget=1, make_rows=self.make_datasets)
+    """
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, f"{url}: {response.status_code}")
+        return len(context.captured_queries), context.captured_queries
+
+    def assertQueryBudget(self, url, budget, make_rows, small=1, large=10):
+        """
+        Args:
+            url: URL или функция без аргументов, возвращающая URL (если он зависит от данных)
+            budget: Максимальное число SQL-запросов
+            make_rows: Функция make_rows(count), создающая ещё count строк данных
+            small, large: Сколько строк создать для первого и второго замера
+        """
+        get_url = url if callable(url) else lambda: url
+
+        make_rows(small)
+        small_count, _ = self.count_queries(get_url())
+        make_rows(large - small)
+        large_count, queries = self.count_queries(get_url())
+
+        sql = '\n'.join(query['sql'] for query in queries)
+        self.assertEqual(
+            small_count, large_count,
+            f"{get_url()}: запросов стало больше с ростом числа строк "
+            f"({small_count} -> {large_count}), похоже на N+1:\n{sql}"
+        )
+        self.assertLessEqual(large_count, budget, f"{get_url()}: превышен бюджет запросов:\n{sql}")
+
+
+def analyze_checks(dataset, **kwargs):
+    """Анализирует датасет и возвращает результаты проверок: {check_type: result_json}."""
+    dataset.refresh_from_db()
+    CSVAnalyzer(dataset, progress_callback=lambda *args: None, **kwargs).analyze()
+    return {check.check_type: check.result_json for check in dataset.checks.all()}
+
+
+# Чанки по MIN_CHUNK_ROWS (1000) строк - файлы тестов читаются в несколько чанков
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, DATA_QUALITY_SIDECAR_ENABLED=False, DATA_QUALITY_MEMORY_LIMIT_MB=0.001,
+                   DATA_QUALITY_INCREMENTAL_ENABLED=False)
+class StreamingAnalysisTests(TestCase):
+
+    def assertSameResults(self, content):
+        full, streaming = (
+            analyze_checks(Dataset.objects.create(name='data.csv', csv_file=ContentFile(content, name='data.csv')),
+                           mode=mode)
+            for mode in ('full', 'streaming')
+        )
+        self.assertEqual(streaming['missing'], full['missing'])
+        self.assertEqual(streaming['duplicates'], full['duplicates'])
+
+        approximate, exact = streaming['statistics'], full['statistics']
+        self.assertEqual(approximate['numeric_columns'].keys(), exact['numeric_columns'].keys())
+        for column, stats in exact['numeric_columns'].items():
+            for key, value in stats.items():
+                self.assertAlmostEqual(approximate['numeric_columns'][column][key], value, places=6, msg=column)
+        self.assertEqual(approximate['text_columns'].keys(), exact['text_columns'].keys())
+        for column, stats in exact['text_columns'].items():
+            for key in ('unique_values', 'most_common', 'missing'):
+                self.assertEqual(approximate['text_columns'][column][key], stats[key], f'{column}.{key}')
+        return full
+
+    def test_chunks_match_full_analysis(self):
+        # Строки повторяются через 1200 - дубликаты из разных чанков.
+        # code - числа, кроме строк 1100..1199 периода: первый чанк целиком числовой,
+        # во втором и третьем появляется текст, четвёртый снова только из чисел
+        content = 'id,amount,city,code\n' + ''.join(
+            f'{i % 1200},{"" if i % 1200 % 11 == 0 else (i % 1200) * 0.25},{"Москва" if i % 3 else "Казань"},'
+            f'{f"c{i % 3}" if i % 1200 >= 1100 else i % 1200 % 50}\n'
+            for i in range(3500)
+        )
+        full = self.assertSameResults(content.encode('utf-8'))
+        self.assertEqual(full['missing']['missing_cells'], 320)
+        self.assertEqual(full['duplicates']['duplicate_rows'], 2300)
+        self.assertEqual(full['statistics']['text_columns']['code']['unique_values'], 53)
+
+    def test_logs_instead_of_printing(self):
+        dataset = Dataset.objects.create(name='data.csv', csv_file=ContentFile(b'a,b\n1,x\n', name='data.csv'))
+        with redirect_stdout(io.StringIO()) as stdout, self.assertLogs('data_quality', 'INFO') as logs:
+            analyze_checks(dataset, mode='streaming')
+        self.assertEqual(stdout.getvalue(), '')
+        self.assertIn('data_quality.streaming', {record.name for record in logs.records})
+
+    def test_fingerprints_ignore_parsed_type(self):
+        numbers = pd.DataFrame({'code': [1.0, np.nan], 'flag': [True, False]})
+        strings = pd.DataFrame({'code': ['1', None], 'flag': ['True', 'False']})
+        for hash_bits in (64, 128):
+            np.testing.assert_array_equal(
+                row_fingerprints(numbers, hash_bits=hash_bits), row_fingerprints(strings, hash_bits=hash_bits),
+            )
+
+    def test_cp1251_in_the_middle_of_file(self):
+        # Начало и конец файла - ASCII (формат определится как utf-8), ошибка декодирования - в 16-м чанке
+        rows = [f'{i},{i % 13},c{i % 5}\n'.encode() for i in range(30_000)]
+        rows[15_000] = '15000,0,Пермь\n'.encode('cp1251')
+        full = self.assertSameResults(b'id,amount,city\n' + b''.join(rows))
+        self.assertEqual(full['statistics']['text_columns']['city']['unique_values'], 6)
+
+    def test_byte_range_reader(self):
+        path = Path(MEDIA_ROOT) / 'range.bin'
+        path.write_bytes(bytes(range(100)))
+        with io.BufferedReader(ByteRangeReader(path, 10, 75), buffer_size=16) as reader:
+            self.assertEqual(reader.read(), bytes(range(10, 75)))
+        with io.BufferedReader(ByteRangeReader(path, 90)) as reader:
+            self.assertEqual(reader.read(), bytes(range(90, 100)))
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, DATA_QUALITY_JOB_HEARTBEAT_INTERVAL=0)
+class JobHeartbeatTests(TestCase):
+
+    def make_job(self, started_minutes_ago):
+        dataset = Dataset.objects.create(name='data.csv', csv_file=ContentFile(b'a\n1\n', name='data.csv'))
+        started_at = timezone.now() - timedelta(minutes=started_minutes_ago)
+        return AnalysisJob.objects.create(
+            dataset=dataset, status='running', attempts=1, started_at=started_at, heartbeat_at=started_at,
+        )
+
+    def test_long_running_job_with_heartbeat_is_not_requeued(self):
+        job = self.make_job(started_minutes_ago=120)
+        ProgressReporter(job.dataset_id, job_id=job.pk)('loading', rows_processed=1000)
+        self.assertEqual(requeue_stale_jobs(3600), 0)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'running')
+
+    def test_job_without_heartbeat_is_requeued(self):
+        job = self.make_job(started_minutes_ago=120)
+        self.assertEqual(requeue_stale_jobs(3600), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.worker), ('queued', ''))
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class JobQueueTests(TestCase):
+
+    def setUp(self):
+        self.dataset = Dataset.objects.create(name='data.csv', csv_file=ContentFile(b'a\n1\n', name='data.csv'))
+
+    def test_jobs_filtered_by_dataset(self):
+        job = AnalysisJob.objects.create(dataset=self.dataset)
+        AnalysisJob.objects.create(dataset=Dataset.objects.create(name='other.csv'))
+        jobs = self.client.get('/api/jobs/', {'dataset': self.dataset.pk}).json()
+        self.assertEqual([item['id'] for item in jobs], [job.pk])
+        for value in ('abc', '-1'):
+            self.assertEqual(self.client.get('/api/jobs/', {'dataset': value}).status_code, 400, value)
+
+    def test_one_active_job_per_dataset(self):
+        job = enqueue_analysis(self.dataset)
+        self.assertEqual(enqueue_analysis(self.dataset).pk, job.pk)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            AnalysisJob.objects.create(dataset=self.dataset, status='running')
+
+        # Параллельный запрос создал задачу между проверкой и INSERT - возвращается она
+        first_lookup = mock.patch.object(
+            type(self.dataset.jobs), 'filter', side_effect=[AnalysisJob.objects.none(), self.dataset.jobs.all()],
+        )
+        with first_lookup as lookup:
+            self.assertEqual(enqueue_analysis(self.dataset).pk, job.pk)
+        self.assertEqual(lookup.call_count, 2)
+
+    def test_failure_does_not_overwrite_job_of_another_worker(self):
+        job = claim_job(enqueue_analysis(self.dataset), worker_name='first')
+
+        def stale_and_failed():
+            # Пока анализ шёл, задачу вернули в очередь и забрал другой воркер
+            AnalysisJob.objects.filter(pk=job.pk).update(status='queued', worker='')
+            claim_job(AnalysisJob(pk=job.pk), worker_name='second')
+            raise RuntimeError('воркер потерял задачу')
+
+        with mock.patch.object(CSVAnalyzer, 'analyze', side_effect=stale_and_failed):
+            self.assertFalse(run_job(job))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.worker, job.attempts, job.error), ('running', 'second', 2, ''))
+        self.assertEqual(AnalysisJob.objects.filter(dataset=self.dataset).count(), 1)
+
+
+class ProfilerTests(SimpleTestCase):
+
+    def test_matches_pandas(self):
+        df = pd.DataFrame({
+            'amount': [1.5, np.nan, 3.0, 3.0, -2.0],
+            'count': [1, 2, 3, 4, 5],
+            'city': ['b', 'a', None, 'b', 'a'],
+            # object со строками и числами вперемешку - тоже текстовый столбец
+            'code': ['x', 1, np.nan, 'x', 1],
+            'day': pd.to_datetime(['2024-01-01', None, '2024-01-02', '2024-01-03', None]),
+        })
+        missing, statistics = profile_dataframe(df)
+
+        self.assertEqual(missing['columns_with_missing'], df.isna().sum()[lambda s: s > 0].to_dict())
+        self.assertEqual((missing['total_cells'], missing['missing_cells']), (25, 5))
+        for column in ('amount', 'count'):
+            stats = statistics['numeric_columns'][column]
+            for key in ('min', 'max', 'mean', 'std'):
+                self.assertAlmostEqual(stats[key], getattr(df[column], key)(), msg=f'{column}.{key}')
+        self.assertEqual(statistics['text_columns']['city'], {
+            'unique_values': df['city'].nunique(),
+            # Частоты 'a' и 'b' равны - как и mode(), берём наименьшее значение
+            'most_common': str(df['city'].mode()[0]),
+            'missing': 1,
+        })
+        self.assertEqual(statistics['text_columns']['code']['unique_values'], 2)
+        self.assertEqual(statistics['text_columns']['code']['missing'], 1)
+        self.assertNotIn('day', statistics['numeric_columns'].keys() | statistics['text_columns'].keys())
+
+    def test_single_value_and_empty_columns(self):
+        missing, statistics = profile_dataframe(pd.DataFrame({'one': [7.0, np.nan], 'empty': [np.nan, np.nan]}))
+        self.assertTrue(math.isnan(statistics['numeric_columns']['one']['std']))
+        self.assertEqual(statistics['numeric_columns']['empty'], {
+            'min': None, 'max': None, 'mean': None, 'std': None, 'missing': 2,
+        })
+        self.assertEqual(missing['missing_percentage'], 75.0)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, DATA_QUALITY_SIDECAR_ENABLED=False)
+class ResultCacheTests(TestCase):
+
+    def test_same_content_is_not_parsed_again(self):
+        content = b'a,b\n1,x\n1,x\n,y\n'
+        first = Dataset.objects.create(name='a.csv', csv_file=ContentFile(content, name='a.csv'))
+        expected = analyze_checks(first, mode='full')
+
+        copy = Dataset.objects.create(name='b.csv', csv_file=ContentFile(content, name='b.csv'))
+        with mock.patch('data_quality.analyzer.pd.read_csv', side_effect=AssertionError('CSV разобран')):
+            self.assertEqual(analyze_checks(copy, mode='full'), expected)
+        self.assertTrue(copy.runs.get().from_cache)
+        self.assertEqual(AnalysisCache.objects.get().hits, 1)
+
+    def make_entries(self, count, size_bytes=100):
+        now = timezone.now()
+        for i in range(count):
+            entry = AnalysisCache.objects.create(content_hash=f'{i:064d}', analyzer_version='v', size_bytes=size_bytes)
+            # Одинаковое время у двух записей - граница вытеснения должна учитывать и pk
+            AnalysisCache.objects.filter(pk=entry.pk).update(last_used_at=now + timedelta(seconds=i // 2 * 2))
+
+    @override_settings(DATA_QUALITY_RESULT_CACHE_MAX_ENTRIES=3)
+    def test_evict_keeps_newest_entries(self):
+        self.make_entries(6)
+        self.assertEqual(evict(), 3)
+        self.assertEqual(sorted(AnalysisCache.objects.values_list('content_hash', flat=True)),
+                         [f'{i:064d}' for i in (3, 4, 5)])
+        self.assertEqual(evict(), 0)
+
+    @override_settings(DATA_QUALITY_RESULT_CACHE_MAX_MB=250 / 1024 / 1024)
+    def test_evict_by_total_size(self):
+        self.make_entries(4)
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(evict(), 2)
+        self.assertEqual(AnalysisCache.objects.count(), 2)
+        # Удаление - по условию на last_used_at, а не по списку оставленных pk
+        delete = next(query['sql'] for query in context.captured_queries if query['sql'].startswith('DELETE'))
+        self.assertNotIn(' IN (', delete)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, DATA_QUALITY_SIDECAR_ENABLED=True)
+class SidecarTests(TestCase):
+
+    def setUp(self):
+        self.path = Path(tempfile.mkdtemp(dir=MEDIA_ROOT)) / 'data.csv'
+        self.path.write_bytes(b'a,b\n1,x\n2,y\n')
+        self.df = pd.read_csv(self.path)
+        self.assertTrue(write_sidecar(self.df, str(self.path)))
+
+    def test_fresh_sidecar_is_read(self):
+        pd.testing.assert_frame_equal(read_sidecar(str(self.path)), self.df)
+        self.assertEqual(list(read_sidecar(str(self.path), columns=['b']).columns), ['b'])
+
+    def test_changed_csv_invalidates_sidecar(self):
+        stat = self.path.stat()
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        self.assertIsNone(read_sidecar(str(self.path)))
+
+        self.assertTrue(write_sidecar(self.df, str(self.path)))
+        with open(self.path, 'ab') as f:
+            f.write(b'3,z\n')
+        # То же время изменения, что и при записи sidecar, - отличается только размер
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        self.assertIsNone(read_sidecar(str(self.path)))
+
+    def test_sidecar_parsed_with_other_dialect_is_ignored(self):
+        # Sidecar, записанный до определения формата (разбор с запятой по умолчанию)
+        dataset = Dataset.objects.create(name='data.csv', csv_file=ContentFile(b'a;b\n1;x\n2;\n', name='data.csv'))
+        path = dataset.csv_file.path
+        self.assertTrue(write_sidecar(pd.read_csv(path), path))
+        self.assertEqual(len(read_sidecar(path).columns), 1)
+
+        results = analyze_checks(dataset, mode='full')
+        self.assertEqual(results['missing']['total_columns'], 2)
+        self.assertEqual(results['missing']['columns_with_missing'], {'b': 1})
+        # Sidecar перезаписан с параметрами разбора по найденному формату
+        self.assertIsNone(read_sidecar(path))
+        self.assertEqual(list(read_sidecar(path, read_kwargs=read_csv_kwargs(dataset.csv_dialect)).columns), ['a', 'b'])
+
+    def test_analysis_reuses_sidecar_and_replaced_file_drops_it(self):
+        dataset = Dataset.objects.create(name='data.csv', csv_file=ContentFile(b'a,b\n1,x\n2,\n', name='data.csv'))
+        expected = analyze_checks(dataset, mode='full')
+        self.assertTrue(os.path.exists(sidecar_path(dataset.csv_file.path)))
+
+        AnalysisCache.objects.all().delete()
+        with mock.patch('data_quality.analyzer.pd.read_csv', side_effect=AssertionError('CSV разобран')):
+            self.assertEqual(analyze_checks(dataset, mode='full'), expected)
+
+        old_path = dataset.csv_file.path
+        dataset.csv_file = ContentFile(b'a\n1\n', name='new.csv')
+        dataset.save()
+        self.assertFalse(os.path.exists(sidecar_path(old_path)))
+
+
+class DuplicateDetectorTests(SimpleTestCase):
+
+    def setUp(self):
+        # 300 строк, 120 разных: дубликаты и внутри чанка, и между чанками
+        self.df = pd.DataFrame({'a': [i % 120 for i in range(300)], 'b': [f'x{i % 40}' for i in range(300)]})
+        self.expected = np.flatnonzero(self.df.duplicated().to_numpy()).tolist()
+
+    def detect(self, df, detector, chunk_rows=37):
+        for start in range(0, len(df), chunk_rows):
+            detector.update(df.iloc[start:start + chunk_rows])
+        return detector
+
+    def test_spilled_and_in_memory_results_match(self):
+        for hash_bits in (64, 128):
+            with self.subTest(hash_bits=hash_bits):
+                options = {'hash_bits': hash_bits, 'max_examples': 50, 'collect_row_ids': True}
+                in_memory = self.detect(self.df, DuplicateDetector(**options))
+                spilled = self.detect(self.df, DuplicateDetector(max_fingerprints=10, partitions=4, **options))
+
+                memory_result, spilled_result = in_memory.result(), spilled.result()
+                self.assertEqual((memory_result.pop('spilled_to_disk'), spilled_result.pop('spilled_to_disk')),
+                                 (False, True))
+                self.assertEqual(spilled_result, memory_result)
+                self.assertEqual(memory_result['duplicate_rows'], len(self.expected))
+                self.assertEqual(memory_result['duplicate_row_indices'], self.expected[:50])
+                self.assertEqual(spilled.duplicate_row_ids().tolist(), self.expected)
+                self.assertEqual(in_memory.duplicate_row_ids().tolist(), self.expected)
+
+    def test_fingerprints_kept_in_sorted_arrays(self):
+        df = pd.DataFrame({'a': np.arange(20_000) % 7_000})
+        expected = int(df.duplicated().sum())
+        for hash_bits, key_bytes in ((64, 8), (128, 16)):
+            with self.subTest(hash_bits=hash_bits):
+                detector = self.detect(df, DuplicateDetector(hash_bits=hash_bits), chunk_rows=100)
+                runs = detector._seen
+                # Серий O(log n), внутри каждой - отсортированные ключи numpy без повторов
+                self.assertLessEqual(len(runs), 8)
+                self.assertTrue(all(isinstance(run, np.ndarray) and run.itemsize == key_bytes for run in runs))
+                keys = np.concatenate(runs)
+                self.assertEqual((len(keys), len(np.unique(keys))), (7_000, 7_000))
+                self.assertTrue(all((np.sort(run) == run).all() for run in runs))
+                self.assertEqual(detector.result()['duplicate_rows'], expected)
+
+    def test_restore_above_limit_spills(self):
+        head, tail = self.df.iloc[:150], self.df.iloc[150:]
+        for hash_bits in (64, 128):
+            with self.subTest(hash_bits=hash_bits), tempfile.NamedTemporaryFile() as fingerprints:
+                # Первый проход тоже сбрасывает отпечатки на диск - save_fingerprints берёт их из разделов
+                first = self.detect(head, DuplicateDetector(hash_bits=hash_bits, max_fingerprints=10, partitions=4))
+                self.assertEqual(first.save_fingerprints(fingerprints.name), 120)
+                # Как в StreamingAnalyzer.run: отпечатки, затем result(), затем state()
+                self.assertEqual(first.result()['duplicate_rows'], 30)
+                state = first.state()
+
+                detector = DuplicateDetector(hash_bits=hash_bits, max_fingerprints=10, partitions=4)
+                detector.restore(state, fingerprints.name)
+                result = self.detect(tail, detector).result()
+                self.assertTrue(result['spilled_to_disk'])
+                self.assertEqual(result['duplicate_rows'], len(self.expected))
+                self.assertEqual(result['duplicate_row_indices'], self.expected[:100])
+
+
+class SketchTests(SimpleTestCase):
+
+    def setUp(self):
+        # 200 000 разных значений и одно частое
+        values = [f'id{i}' for i in range(200_000)] + ['popular'] * 1000
+        self.series = pd.Series(values).sample(frac=1, random_state=1).reset_index(drop=True)
+
+    def count_value_counts_sizes(self):
+        """Подменяет Series.value_counts, запоминая размер каждой таблицы частот."""
+        sizes = []
+        original = pd.Series.value_counts
+
+        def value_counts(series, *args, **kwargs):
+            counts = original(series, *args, **kwargs)
+            sizes.append(len(counts))
+            return counts
+        return sizes, mock.patch.object(pd.Series, 'value_counts', value_counts)
+
+    def test_space_saving_stays_within_capacity(self):
+        sketch = SpaceSaving(k=16)
+        sizes, patch = self.count_value_counts_sizes()
+        with patch:
+            sketch.add(self.series)
+        self.assertLessEqual(max(sizes), ADD_BLOCK_ROWS)
+        self.assertGreater(len(sizes), 1)
+        self.assertLessEqual(len(sketch.counts), 16)
+        self.assertEqual(sketch.total, len(self.series))
+        self.assertEqual(sketch.most_common(1)[0][0], 'popular')
+
+    def test_approximate_profile_of_high_cardinality_column(self):
+        sizes, patch = self.count_value_counts_sizes()
+        with patch:
+            _, statistics = profile_dataframe_approximate(pd.DataFrame({'key': self.series}))
+        self.assertLessEqual(max(sizes), ADD_BLOCK_ROWS)
+        stats = statistics['text_columns']['key']
+        self.assertEqual(stats['most_common'], 'popular')
+        self.assertAlmostEqual(stats['unique_values'], 200_001, delta=200_001 * 0.03)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, DATA_QUALITY_SIDECAR_ENABLED=True)
+class ParallelProfileTests(TestCase):
+
+    def setUp(self):
+        rows = 2000
+        self.df = pd.DataFrame({
+            'amount': [np.nan if i % 7 == 0 else i * 0.5 for i in range(rows)],
+            'peak': [np.inf if i == 3 else float(i % 10) for i in range(rows)],
+            'count': list(range(rows)),
+            'empty': [np.nan] * rows,
+            'city': [None if i % 5 == 0 else f'c{i % 3}' for i in range(rows)],
+            'code': ['x' if i % 2 else i for i in range(rows)],
+            'day': pd.to_datetime(['2024-01-01'] * rows),
+        })
+
+    def assertSameProfile(self, actual, expected):
+        # NaN != NaN - сравниваем так же, как результаты сохраняются в базу
+        self.assertEqual(finite_or_none(actual), finite_or_none(expected))
+
+    def test_matches_serial_profile(self):
+        self.assertSameProfile(profile_dataframe_parallel(self.df, 3), profile_dataframe(self.df))
+        self.assertSameProfile(
+            profile_dataframe_parallel(self.df, 3, approximate=True), profile_dataframe_approximate(self.df),
+        )
+
+    def test_text_columns_from_sidecar(self):
+        path = Path(tempfile.mkdtemp(dir=MEDIA_ROOT)) / 'data.csv'
+        self.df.drop(columns=['day']).to_csv(path, index=False)
+        read_kwargs = {'encoding': 'utf-8', 'sep': ',', 'quotechar': '"'}
+        df = pd.read_csv(path, **read_kwargs)
+        self.assertTrue(write_sidecar(df, str(path), read_kwargs=read_kwargs))
+
+        # Процессы читают текстовые столбцы из sidecar, а не получают их через pickle
+        self.assertIsNotNone(fresh_sidecar_path(str(path), read_kwargs))
+        result = profile_dataframe_parallel(df, 2, csv_path=str(path), read_kwargs=read_kwargs)
+        self.assertSameProfile(result, profile_dataframe(df))
+
+    @override_settings(DATA_QUALITY_WORKERS=2, DATA_QUALITY_PARALLEL_MIN_CELLS=1, DATA_QUALITY_SIDECAR_ENABLED=False)
+    def test_falls_back_when_pool_cannot_start(self):
+        dataset = Dataset.objects.create(name='data.csv', csv_file=ContentFile(b'a,b\n1,x\n,y\n1,x\n', name='data.csv'))
+        with mock.patch('data_quality.parallel.ProcessPoolExecutor', side_effect=OSError('no semaphores')):
+            results = analyze_checks(dataset, mode='full')
+        self.assertEqual(results['missing']['columns_with_missing'], {'a': 1})
+        self.assertEqual(results['statistics']['text_columns']['b']['most_common'], 'x')
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class DatasetListTests(TestCase):
+
+    def make_dataset(self, name):
+        dataset = Dataset.objects.create(name=name, csv_file=ContentFile(b'a\n1\n', name='data.csv'))
+        DataCheck.objects.create(dataset=dataset, check_type='missing', result_json={'total_rows': 1})
+        Report.objects.create(dataset=dataset, summary='Сводка', issues_count=2)
+        return dataset
+
+    def test_compact_list_and_expand(self):
+        dataset = self.make_dataset('a.csv')
+        item = self.client.get('/api/datasets/').json()['results'][0]
+        self.assertEqual((item['id'], item['issues_count']), (dataset.pk, 2))
+        self.assertNotIn('checks', item)
+        self.assertNotIn('report', item)
+
+        item = self.client.get('/api/datasets/?expand=checks,report').json()['results'][0]
+        self.assertEqual([check['check_type'] for check in item['checks']], ['missing'])
+        self.assertEqual(item['report']['summary'], 'Сводка')
+        # Детальный просмотр - по-прежнему целиком
+        self.assertIn('checks', self.client.get(f'/api/datasets/{dataset.pk}/').json())
+
+    def test_cursor_pages_are_stable(self):
+        datasets = [self.make_dataset(f'{i}.csv') for i in range(5)]
+        page = self.client.get('/api/datasets/?page_size=2').json()
+        seen = [item['id'] for item in page['results']]
+        # Новый файл, загруженный между страницами, не сдвигает следующие страницы
+        self.make_dataset('new.csv')
+        while page['next']:
+            page = self.client.get(page['next']).json()
+            seen.extend(item['id'] for item in page['results'])
+        self.assertEqual(seen, [dataset.pk for dataset in reversed(datasets)])
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def make_datasets(self, count):
+        """Датасеты с полным набором проверок, отчётом и задачей анализа."""
+        for _ in range(count):
+            dataset = Dataset.objects.create(
+                name='data.csv',
+                csv_file=ContentFile(b'a,b\n1,x\n', name='data.csv'),
+                status='completed',
+            )
+            for check_type, _ in DataCheck.CHECK_TYPES:
+                DataCheck.objects.create(dataset=dataset, check_type=check_type, result_json={})
+            Report.objects.create(dataset=dataset, summary='Сводка', issues_count=1)
+            AnalysisJob.objects.create(dataset=dataset, status='completed')
+
+    def latest_dataset_url(self):
+        return f'/api/datasets/{Dataset.objects.first().pk}/'
+
+    # ------------------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------------------
+    def test_dataset_list(self):
+        self.assertQueryBudget('/api/datasets/', budget=1, make_rows=self.make_datasets)
+
+    def test_dataset_list_expanded(self):
+        self.assertQueryBudget('/api/datasets/?expand=checks,report', budget=2, make_rows=self.make_datasets)
+
+    def test_dataset_detail(self):
+        # Версия датасета (для ETag и кэша) + датасет с отчётом + проверки; из кэша - только версия
+        self.assertQueryBudget(self.latest_dataset_url, budget=3, make_rows=self.make_datasets)
+
+    def test_checks_list(self):
+        self.assertQueryBudget('/api/checks/', budget=1, make_rows=self.make_datasets)
+
+    def test_reports_list(self):
+        self.assertQueryBudget('/api/reports/', budget=1, make_rows=self.make_datasets)
+
+    def test_jobs_list(self):
+        self.assertQueryBudget('/api/jobs/', budget=1, make_rows=self.make_datasets)
+
+    # ------------------------------------------------------------------------
+    # Админка
+    # ------------------------------------------------------------------------
+    def test_admin_changelists(self):
+        user = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(user)
+
+        for model in ('dataset', 'datacheck', 'report', 'analysisjob'):
+            with self.subTest(model=model):
+                # Сессия, пользователь, COUNT для пагинатора, сами строки, фильтры/date_hierarchy
+                self.assertQueryBudget(
+                    f'/admin/data_quality/{model}/', budget=10, make_rows=self.make_datasets
+                )
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ProgressEndpointTests(TestCase):
+
+    def setUp(self):
+        self.dataset = Dataset.objects.create(
+            name='data.csv',
+            csv_file=ContentFile(b'a,b\n1,x\n', name='data.csv'),
+            status='processing',
+            progress={'phase': 'loading', 'percent': 5, 'rows_processed': None, 'total_rows': None},
+        )
+        self.url = f'/api/datasets/{self.dataset.pk}/progress/?timeout=0'
+
+    def test_returns_progress_with_etag(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['phase'], 'loading')
+        self.assertTrue(response['ETag'])
+
+    def test_not_modified_until_progress_changes(self):
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        Dataset.objects.filter(pk=self.dataset.pk).update(
+            progress={'phase': 'duplicates', 'percent': 60, 'rows_processed': 1, 'total_rows': 1}
+        )
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_rejects_non_finite_timeout(self):
+        url = f'/api/datasets/{self.dataset.pk}/progress/'
+        for value in ('nan', 'inf', '-inf', 'abc'):
+            self.assertEqual(self.client.get(url, {'timeout': value}).status_code, 400, value)
+        # Отрицательный таймаут - не ждать вовсе
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.get(url, {'timeout': '-5'}, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_non_numeric_pk_is_not_found(self):
+        self.assertEqual(self.client.get('/api/datasets/abc/progress/?timeout=0').status_code, 404)
+
+    def test_wait_backs_off(self):
+        clock = [0.0]
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            clock[0] += seconds
+
+        etag = self.client.get(self.url)['ETag']
+        with mock.patch('data_quality.views.time.monotonic', lambda: clock[0]), \
+                mock.patch('data_quality.views.time.sleep', sleep), \
+                CaptureQueriesContext(connection) as context:
+            response = self.client.get(f'/api/datasets/{self.dataset.pk}/progress/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(sleeps, [0.5, 1, 2, 4, 5, 5, 5, 2.5])
+        self.assertEqual(len(context.captured_queries), len(sleeps) + 1)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class UploadInspectionTests(TestCase):
+
+    def upload(self, content, name='data.csv'):
+        return self.client.post('/api/upload/', {'file': SimpleUploadedFile(name, content)})
+
+    def test_stores_upload_stats(self):
+        content = 'город;сумма\nМосква;1\n"Казань\nцентр";2\n\nСамара;3\n'.encode('cp1251')
+        response = self.upload(content)
+        self.assertEqual(response.status_code, 201)
+
+        dataset = Dataset.objects.get(pk=response.json()['data']['id'])
+        self.assertEqual(dataset.row_count, 3)  # Перенос в кавычках и пустая строка - не записи
+        self.assertEqual(dataset.column_count, 2)
+        self.assertEqual(dataset.file_size, len(content))
+        self.assertEqual(dataset.csv_dialect['encoding'], 'cp1251')
+        self.assertEqual(dataset.csv_dialect['delimiter'], ';')
+        self.assertEqual(len(dataset.content_hash), 64)
+
+    def test_rejects_malformed_file(self):
+        response = self.upload(b'a,b\n1,"unterminated\n')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Dataset.objects.exists())
+
+    @override_settings(DATA_QUALITY_UPLOAD_MAX_MB=0.001)
+    def test_rejects_oversized_file(self):
+        response = self.upload(b'a,b\n' + b'1,2\n' * 1000)
+        self.assertEqual(response.status_code, 413)
+        self.assertFalse(Dataset.objects.exists())
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, DATA_QUALITY_SIDECAR_ENABLED=False)
+class IncrementalAnalysisTests(TestCase):
+
+    def make_dataset(self, content):
+        return Dataset.objects.create(name='feed.csv', csv_file=ContentFile(content, name='feed.csv'))
+
+    def analyze(self, dataset):
+        dataset.refresh_from_db()
+        CSVAnalyzer(dataset, mode='streaming', progress_callback=lambda *args: None).analyze()
+        return {check.check_type: check.result_json for check in dataset.checks.all()}
+
+    def test_appended_rows_match_full_recompute(self):
+        head = b'id,city,amount\n' + b''.join(f'{i},city{i % 7},{i * 1.5}\n'.encode() for i in range(200))
+        tail = b''.join(f'{i},city{i % 7},{i * 1.5}\n'.encode() for i in range(150, 260))
+
+        dataset = self.make_dataset(head)
+        self.analyze(dataset)
+        state = IncrementalState.objects.get(dataset=dataset)
+        self.assertEqual((state.byte_offset, state.total_rows), (len(head), 200))
+
+        with open(dataset.csv_file.path, 'ab') as f:
+            f.write(tail)
+        incremental = self.analyze(dataset)
+        state.refresh_from_db()
+        self.assertEqual((state.byte_offset, state.total_rows), (len(head) + len(tail), 310))
+
+        with self.settings(DATA_QUALITY_INCREMENTAL_ENABLED=False):
+            full = self.analyze(self.make_dataset(head + tail))
+        self.assertEqual(incremental['missing'], full['missing'])
+        self.assertEqual(incremental['duplicates'], full['duplicates'])
+        self.assertEqual(incremental['duplicates']['duplicate_rows'], 50)
+        self.assertEqual(
+            incremental['statistics']['numeric_columns']['amount']['max'],
+            full['statistics']['numeric_columns']['amount']['max'],
+        )
+
+    def test_changed_prefix_falls_back_to_full_recompute(self):
+        dataset = self.make_dataset(b'a,b\n1,x\n2,y\n')
+        self.analyze(dataset)
+        with open(dataset.csv_file.path, 'wb') as f:
+            f.write(b'a,b\n1,x\n1,x\n3,z\n')
+        results = self.analyze(dataset)
+        self.assertEqual(results['missing']['total_rows'], 3)
+        self.assertEqual(results['duplicates']['duplicate_rows'], 1)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class SaveResultsTests(TestCase):
+
+    def setUp(self):
+        self.dataset = Dataset.objects.create(
+            name='data.csv',
+            csv_file=ContentFile(b'a,b\n1,x\n1,x\n', name='data.csv'),
+            status='processing',
+            content_hash='a' * 64,
+        )
+        self.job = AnalysisJob.objects.create(dataset=self.dataset, status='running')
+        self.analyzer = CSVAnalyzer(
+            self.dataset, mode='full', progress_callback=lambda *args: None, job=self.job
+        )
+        self.analyzer._load_csv()
+        self.results = (
+            self.analyzer._check_missing_values(),
+            self.analyzer._check_duplicates(),
+            self.analyzer._calculate_statistics(),
+        )
+
+    def test_one_query_per_table(self):
+        self.assertTrue(self.analyzer._save_results(*self.results))
+        # Повтор замеряем на той же, снова выполняющейся задаче
+        AnalysisJob.objects.filter(pk=self.job.pk).update(status='running')
+        with CaptureQueriesContext(connection) as context:
+            self.assertTrue(self.analyzer._save_results(*self.results))
+        # SAVEPOINT/RELEASE транзакции теста + UPDATE датасета, SELECT прошлых проверок (для сводок),
+        # DELETE и INSERT проверок, INSERT ... ON CONFLICT отчёта и двух сводок, UPDATE задачи
+        sql = '\n'.join(query['sql'] for query in context.captured_queries)
+        self.assertLessEqual(len(context.captured_queries), 10, sql)
+
+        self.dataset.refresh_from_db()
+        self.assertEqual((self.dataset.status, self.dataset.row_count), ('completed', 2))
+        self.assertEqual((self.dataset.duplicate_rows, self.dataset.duplicate_percentage), (1, 50.0))
+        self.assertEqual(self.dataset.checks.count(), 3)
+        self.assertEqual(Report.objects.get(dataset=self.dataset).issues_count, 1)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, 'completed')
+
+    def test_outdated_results_are_not_saved(self):
+        # Файл заменили во время анализа - в базе уже другой хэш
+        Dataset.objects.filter(pk=self.dataset.pk).update(content_hash='b' * 64)
+        self.assertFalse(self.analyzer._save_results(*self.results))
+
+        self.dataset.refresh_from_db()
+        self.assertEqual(self.dataset.status, 'processing')
+        self.assertFalse(self.dataset.checks.exists())
+        self.assertFalse(Report.objects.filter(dataset=self.dataset).exists())
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, 'running')
+
+    def test_job_taken_by_another_worker_is_not_overwritten(self):
+        # Задачу сочли зависшей, вернули в очередь, и её забрал другой воркер
+        AnalysisJob.objects.filter(pk=self.job.pk).update(status='queued', worker='')
+        claim_job(AnalysisJob(pk=self.job.pk), worker_name='other')
+        self.assertFalse(self.analyzer._save_results(*self.results))
+
+        self.assertFalse(self.dataset.checks.exists())
+        job = AnalysisJob.objects.get(pk=self.job.pk)
+        self.assertEqual((job.status, job.worker), ('running', 'other'))
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, DATA_QUALITY_SIDECAR_ENABLED=False,
+                   DATA_QUALITY_QUICK_SAMPLE_ROWS=500, DATA_QUALITY_QUICK_SAMPLE_BLOCKS=20)
+class QuickAnalysisTests(TestCase):
+
+    def setUp(self):
+        # 20% пропусков в amount, 5000 строк - больше, чем читается в выборку
+        content = b'id,amount,city\n' + b''.join(
+            f'{i},{"" if i % 5 == 0 else i % 100},c{i % 7}\n'.encode() for i in range(5000)
+        )
+        self.dataset = Dataset.objects.create(name='big.csv', csv_file=ContentFile(content, name='big.csv'))
+
+    def test_quick_estimate_is_replaced_by_full_analysis(self):
+        response = self.client.post(f'/api/datasets/{self.dataset.pk}/analyze/?mode=quick')
+        self.assertEqual(response.status_code, 202)
+        missing = response.json()['preview']['missing']
+        self.assertTrue(missing['estimated'])
+        self.assertEqual(missing['sample_rows'], 500)
+        low, high = missing['confidence_intervals']['columns']['amount']
+        self.assertLess(low, 20.0)
+        self.assertGreater(high, 20.0)
+        # Оценка сохранена в проверки, но датасет ещё не проанализирован и в сводки не попал
+        self.dataset.refresh_from_db()
+        self.assertEqual(self.dataset.status, 'processing')
+        self.assertEqual(set(self.dataset.checks.values_list('check_type', flat=True)), {'missing', 'statistics'})
+        self.assertFalse(DailyQualityRollup.objects.filter(datasets_count__gt=0).exists())
+
+        CSVAnalyzer(self.dataset, mode='full', progress_callback=lambda *args: None).analyze()
+        result = self.dataset.checks.get(check_type='missing').result_json
+        self.assertNotIn('estimated', result)
+        self.assertEqual(result['columns_with_missing'], {'amount': 1000})
+        # После полного анализа оценка больше не перезаписывает результаты
+        self.assertFalse(CSVAnalyzer(self.dataset, mode='quick').analyze())
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class HttpCacheTests(TestCase):
+
+    def setUp(self):
+        caches['data_quality'].clear()
+        self.dataset = Dataset.objects.create(name='data.csv', csv_file=ContentFile(b'a\n1\n', name='data.csv'))
+        self.url = f'/api/datasets/{self.dataset.pk}/'
+
+    def test_not_modified_and_cached(self):
+        first = self.client.get(self.url)
+        etag = first['ETag']
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(self.url).json(), first.json())
+
+        # Прогресс анализа меняет версию - новый ответ и новый ETag
+        save_progress(self.dataset.pk, make_progress('loading'), status='processing')
+        second = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second['ETag'], etag)
+        self.assertEqual(second.json()['status'], 'processing')
+
+        # Правка записи через save() тоже
+        self.dataset.name = 'renamed.csv'
+        self.dataset.save()
+        self.assertEqual(self.client.get(self.url).json()['name'], 'renamed.csv')
+
+    def test_non_numeric_pk_is_not_found(self):
+        for url in ('/api/datasets/abc/', '/api/reports/abc/', '/api/reports/999/'):
+            self.assertEqual(self.client.get(url).status_code, 404, url)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, DATA_QUALITY_RESPONSE_CACHE=None, DATA_QUALITY_SIDECAR_ENABLED=False)
+class RenderingTests(TestCase):
+
+    def setUp(self):
+        self.dataset = Dataset.objects.create(name='wide.csv', csv_file=ContentFile(b'a\n1\n', name='wide.csv'))
+        numeric = {f'col_{i}': {'min': 1.0, 'max': 1.0, 'mean': 1.0, 'std': None, 'missing': 0} for i in range(200)}
+        DataCheck.objects.create(dataset=self.dataset, check_type='statistics',
+                                 result_json={'numeric_columns': numeric, 'text_columns': {}, 'total_columns': 200})
+        self.url = f'/api/datasets/{self.dataset.pk}/'
+
+    def test_non_finite_numbers_become_null(self):
+        self.assertEqual(FastJSONRenderer().render({'std': float('nan'), 'max': float('-inf')}),
+                         b'{"std":null,"max":null}')
+        # Одна строка: std = NaN, "inf" в CSV - бесконечность. Раньше сохранение падало на JSON_VALID
+        dataset = Dataset.objects.create(name='one.csv', csv_file=ContentFile(b'a,b\n1,inf\n', name='one.csv'))
+        self.assertTrue(CSVAnalyzer(dataset, mode='full', progress_callback=lambda *args: None).analyze())
+        stats = self.client.get(f'/api/datasets/{dataset.pk}/').json()['checks']
+        numeric = next(check for check in stats if check['check_type'] == 'statistics')['result_json']['numeric_columns']
+        self.assertEqual((numeric['a']['std'], numeric['b']['max']), (None, None))
+
+    def test_gzip_negotiation(self):
+        plain = self.client.get(self.url)
+        compressed = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip;q=1.0, identity;q=0.5')
+        self.assertEqual(compressed['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', compressed['Vary'])
+        self.assertEqual(gzip.decompress(compressed.content), plain.content)
+        self.assertLess(len(compressed.content), len(plain.content) / 5)
+
+        # Слабый ETag сжатого ответа подходит для 304
+        self.assertTrue(compressed['ETag'].startswith('W/'))
+        revalidated = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=compressed['ETag'])
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertFalse(self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip;q=0').has_header('Content-Encoding'))
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, DATA_QUALITY_SIDECAR_ENABLED=False, DATA_QUALITY_ROW_INDEX_STRIDE=2)
+class RowIndexTests(TestCase):
+
+    def setUp(self):
+        # Перевод строки внутри кавычек, пустая строка, CRLF, нет перевода строки в конце
+        content = (
+            b'id,name,note\r\n'
+            b'0,a,"first\nline"\r\n'
+            b'1,,x\r\n'
+            b'\r\n'
+            b'2,a,"first\nline"\r\n'
+            b'3,b,"say ""hi"""\r\n'
+            b'4,,x\r\n'
+            b'5,c,'
+        )
+        self.dataset = Dataset.objects.create(name='rows.csv', csv_file=ContentFile(content, name='rows.csv'))
+        self.url = f'/api/datasets/{self.dataset.pk}/rows/'
+
+    def assert_pages(self):
+        page = self.client.get(self.url, {'offset': 3, 'limit': 2}).json()
+        self.assertEqual((page['total'], page['next_offset']), (6, 5))
+        self.assertEqual(page['rows'], [{'row': 3, 'values': ['3', 'b', 'say "hi"']},
+                                        {'row': 4, 'values': ['4', None, 'x']}])
+
+        missing = self.client.get(self.url, {'filter': 'missing', 'columns': 'id,note'}).json()
+        self.assertEqual(missing['rows'], [{'row': 1, 'values': ['1', 'x']}, {'row': 4, 'values': ['4', 'x']},
+                                           {'row': 5, 'values': ['5', None]}])
+        duplicate = self.client.get(self.url, {'filter': 'duplicate', 'columns': 'name,note'}).json()
+        self.assertEqual(duplicate['total'], 0)
+
+    def test_rows_after_full_and_streaming_analysis(self):
+        self.assertEqual(self.client.get(self.url).status_code, 409)
+        for mode in ('full', 'streaming'):
+            remove_index(self.dataset.csv_file.path)
+            CSVAnalyzer(self.dataset, mode=mode, progress_callback=lambda *args: None).analyze()
+            self.assert_pages()
+        self.assertEqual(self.client.get(self.url, {'columns': 'nope'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'filter': 'odd'}).status_code, 400)
+
+        # Дубликаты по ключевым столбцам: строка 2 повторяет строку 0
+        CSVAnalyzer(self.dataset, mode='full', key_columns=['name', 'note'],
+                    progress_callback=lambda *args: None).analyze()
+        duplicate = self.client.get(self.url, {'filter': 'duplicate'}).json()
+        self.assertEqual([row['row'] for row in duplicate['rows']], [2, 4])
+
+    def test_incremental_analysis_extends_index(self):
+        path = self.dataset.csv_file.path
+        with open(path, 'ab') as f:
+            f.write(b'\r\n')
+        CSVAnalyzer(self.dataset, mode='streaming', progress_callback=lambda *args: None).analyze()
+        with open(path, 'ab') as f:
+            f.write(b'6,,"new\nrow"\n7,b,"say ""hi"""\n')
+        CSVAnalyzer(self.dataset, mode='streaming', progress_callback=lambda *args: None).analyze()
+        self.assertEqual(IncrementalState.objects.get(dataset=self.dataset).total_rows, 8)
+
+        page = self.client.get(self.url, {'offset': 5}).json()
+        self.assertEqual([row['values'] for row in page['rows']],
+                         [['5', 'c', None], ['6', None, 'new\nrow'], ['7', 'b', 'say "hi"']])
+        missing = self.client.get(self.url, {'filter': 'missing'}).json()
+        self.assertEqual([row['row'] for row in missing['rows']], [1, 4, 5, 6])
+        duplicate = self.client.get(self.url, {'filter': 'duplicate'}).json()
+        self.assertEqual([row['row'] for row in duplicate['rows']], [])
+
+    def test_non_numeric_pk_is_not_found(self):
+        self.assertEqual(self.client.get('/api/datasets/abc/rows/').status_code, 404)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, DATA_QUALITY_SIDECAR_ENABLED=False)
+class InstrumentationTests(TestCase):
+
+    def analyze(self, dataset, **options):
+        return CSVAnalyzer(dataset, progress_callback=lambda *args: None, **options).analyze()
+
+    def test_nested_phase_is_not_counted_twice(self):
+        timer = PhaseTimer()
+        with timer.phase('saving'):
+            with timer.phase('row_index', rows=10):
+                sum(range(200_000))
+        inner, outer = timer.phases
+        self.assertEqual((inner['name'], outer['name']), ('row_index', 'saving'))
+        self.assertLess(outer['wall_seconds'], inner['wall_seconds'])
+        self.assertGreater(timer.summary()['phases'][0]['rows_per_second'], 0)
+
+    def test_runs_are_recorded_and_exposed(self):
+        dataset = Dataset.objects.create(name='data.csv', csv_file=ContentFile(b'a,b\n1,x\n1,x\n,y\n', name='data.csv'))
+        self.assertTrue(self.analyze(dataset, mode='full'))
+        run = AnalysisRun.objects.get(dataset=dataset)
+        self.assertEqual((run.mode, run.outcome, run.total_rows), ('full', 'completed', 3))
+        self.assertEqual(
+            list(run.phases.values_list('name', flat=True)),
+            ['hashing', 'cache_lookup', 'parsing', 'profiling', 'duplicates', 'row_index', 'saving'],
+        )
+
+        # Повтор - из кэша; ошибка - тоже запуск
+        self.assertTrue(self.analyze(dataset, mode='full'))
+        Dataset.objects.filter(pk=dataset.pk).update(csv_dialect={})
+        dataset.csv_file.storage.delete(dataset.csv_file.name)
+        with self.assertRaises(Exception):
+            self.analyze(Dataset.objects.get(pk=dataset.pk), mode='full')
+
+        profile = self.client.get(f'/api/datasets/{dataset.pk}/profile/').json()
+        self.assertEqual([(r['outcome'], r['from_cache']) for r in profile['runs']],
+                         [('failed', False), ('completed', True), ('completed', False)])
+        parsing = next(p for p in profile['runs'][2]['phases'] if p['name'] == 'parsing')
+        self.assertEqual(parsing['rows'], 3)
+
+        metrics = self.client.get('/api/metrics/')
+        self.assertTrue(metrics['Content-Type'].startswith('text/plain'))
+        text = metrics.content.decode()
+        self.assertIn('dq_analysis_runs_total{mode="full",outcome="completed"} 2', text)
+        self.assertIn('dq_analysis_phase_seconds_count{phase="parsing"} 1', text)
+        self.assertIn('dq_analysis_phase_seconds_bucket{phase="parsing",le="+Inf"} 1', text)
+
+    def test_profile_of_non_numeric_pk_is_not_found(self):
+        self.assertEqual(self.client.get('/api/datasets/abc/profile/').status_code, 404)
+
+
+def busy_loop(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        sum(range(1000))
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, DATA_QUALITY_SIDECAR_ENABLED=False, DATA_QUALITY_PROFILE_INTERVAL=0.001,
+                   DATA_QUALITY_PROFILE_HEADER_ENABLED=True, DATA_QUALITY_PROFILE_MIN_SECONDS=0.02)
+class ProfilingTests(TestCase):
+
+    def test_sampler_folds_stacks(self):
+        with StackSampler(interval=0.001) as sampler:
+            busy_loop(0.05)
+        self.assertGreater(sampler.samples, 0)
+        count = sampler.folded().splitlines()[0].rsplit(' ', 1)[1]
+        self.assertIn('busy_loop (data_quality/tests.py:', sampler.folded())
+        self.assertGreater(int(count), 0)
+
+    def test_slow_analysis_is_saved_fast_one_is_not(self):
+        content = b'id,amount\n' + b''.join(f'{i},{i % 7}\n'.encode() for i in range(20_000))
+        dataset = Dataset.objects.create(name='slow.csv', csv_file=ContentFile(content, name='slow.csv'))
+        CSVAnalyzer(dataset, mode='full', profile=0, progress_callback=lambda *args: None).analyze()
+        artifact = ProfileArtifact.objects.get(dataset=dataset)
+        self.assertEqual((artifact.kind, artifact.run.dataset_id), ('analysis', dataset.pk))
+        with artifact.folded_file.open('rb') as f:
+            self.assertIn(b'analyze (data_quality/analyzer.py:', f.read())
+
+        CSVAnalyzer(dataset, mode='full', profile=3600, progress_callback=lambda *args: None).analyze()
+        self.assertEqual(ProfileArtifact.objects.filter(dataset=dataset).count(), 1)
+        profile = self.client.get(f'/api/datasets/{dataset.pk}/profile/').json()
+        self.assertEqual([a['id'] for a in profile['artifacts']], [artifact.pk])
+
+    def test_header_profiles_requests_and_queued_analyses(self):
+        middleware = ProfilingMiddleware(lambda request: (busy_loop(0.05), HttpResponse())[1])
+        response = middleware(RequestFactory().get('/api/slow/', HTTP_X_DQ_PROFILE='1'))
+        artifact = ProfileArtifact.objects.get(pk=response['X-DQ-Profile-Artifact'])
+        self.assertEqual((artifact.kind, artifact.label, artifact.dataset), ('request', 'GET /api/slow/', None))
+        self.assertFalse(middleware(RequestFactory().get('/api/slow/')).has_header('X-DQ-Profile-Artifact'))
+
+        dataset = Dataset.objects.create(name='data.csv', csv_file=ContentFile(b'a\n1\n', name='data.csv'))
+        self.client.post(f'/api/datasets/{dataset.pk}/analyze/', HTTP_X_DQ_PROFILE='2.5')
+        self.assertEqual(dataset.jobs.get().options, {'profile': 2.5})
+        with override_settings(DATA_QUALITY_PROFILE_HEADER_ENABLED=False):
+            self.assertIsNone(ProfilingMiddleware.dataset_id(RequestFactory().get('/')))
+            response = middleware(RequestFactory().get('/api/slow/', HTTP_X_DQ_PROFILE='1'))
+            self.assertFalse(response.has_header('X-DQ-Profile-Artifact'))
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class SummaryFilterTests(TestCase):
+
+    def setUp(self):
+        for name, missing in (('clean.csv', 0.0), ('dirty.csv', 12.5), ('pending.csv', None)):
+            Dataset.objects.create(
+                name=name, csv_file=ContentFile(b'a\n1\n', name=name),
+                status='uploaded' if missing is None else 'completed', missing_percentage=missing,
+            )
+
+    def names(self, query):
+        response = self.client.get(f'/api/datasets/?{query}')
+        self.assertEqual(response.status_code, 200)
+        return {item['name'] for item in response.json()['results']}
+
+    def test_filters(self):
+        self.assertEqual(self.names('min_missing=5'), {'dirty.csv'})
+        self.assertEqual(self.names('max_missing=5'), {'clean.csv'})
+        self.assertEqual(self.names('status=uploaded'), {'pending.csv'})
+        for value in ('abc', 'nan', 'inf', '-inf'):
+            self.assertEqual(self.client.get('/api/datasets/', {'min_missing': value}).status_code, 400, value)
+
+    def test_filter_uses_index(self):
+        # Без сортировки по дате (как в счётчиках дашборда) - поиск по индексу, а не просмотр таблицы
+        plan = Dataset.objects.filter(missing_percentage__gte=5).order_by().explain()
+        self.assertIn('dq_dataset_missing_idx', plan)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, DATA_QUALITY_SIDECAR_ENABLED=False)
+class RollupTests(TestCase):
+
+    def analyze(self, name, content):
+        dataset = Dataset.objects.create(name=name, csv_file=ContentFile(content, name=name))
+        CSVAnalyzer(dataset, mode='full', progress_callback=lambda *args: None).analyze()
+        return dataset
+
+    def rollups(self):
+        daily = list(DailyQualityRollup.objects.filter(datasets_count__gt=0).values())
+        columns = list(ColumnQualityRollup.objects.filter(datasets_count__gt=0).order_by('column_name').values())
+        for row in daily + columns:
+            del row['id'], row['updated_at']
+        return daily, columns
+
+    def test_rollups_follow_analyses(self):
+        self.analyze('a.csv', b'email,age\nx@y,1\n,2\n,3\n')       # email: 2 пропуска из 3
+        second = self.analyze('b.csv', b'email,city\na@b,M\nc@d,\n')  # city: 1 из 2
+
+        totals = self.client.get('/api/aggregates/').json()
+        self.assertEqual((totals['datasets_count'], totals['rows_total']), (2, 5))
+        self.assertEqual(totals['missing_cells_total'], 3)
+        self.assertEqual(totals['missing_rate'], 30.0)
+
+        worst = self.client.get('/api/aggregates/columns/?limit=2').json()['results']
+        self.assertEqual([row['column_name'] for row in worst], ['city', 'email'])
+        self.assertEqual(worst[1]['missing_percentage'], 40.0)  # 2 из 5 строк
+        self.assertEqual(self.client.get('/api/aggregates/daily/').json()['results'][0]['datasets_count'], 2)
+
+        # Повторный анализ не считается дважды, удаление - вычитается
+        CSVAnalyzer(second, mode='full', progress_callback=lambda *args: None).analyze()
+        second.delete()
+        incremental = self.rollups()
+        rebuild()
+        self.assertEqual(incremental, self.rollups())
+        self.assertEqual(incremental[0][0]['datasets_count'], 1)
+
+    def test_rejects_bad_parameters(self):
+        self.assertEqual(self.client.get('/api/aggregates/daily/?from=yesterday').status_code, 400)
+        self.assertEqual(self.client.get('/api/aggregates/columns/?limit=-1').status_code, 400)
+
+
+class DatabaseProfileTests(SimpleTestCase):
+    databases = {'default'}
+
+    def test_sqlite_pragmas_applied_on_connect(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertGreater(cursor.fetchone()[0], 0)
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+        self.assertEqual(connection.transaction_mode, 'IMMEDIATE')
+
+    def test_profiles(self):
+        base_dir = Path('/srv/app')
+        self.assertNotIn('OPTIONS', database_settings(base_dir, {'DATA_QUALITY_SQLITE_TUNED': '0'}))
+
+        pooled = database_settings(base_dir, {'DATA_QUALITY_DB': 'postgres', 'DATA_QUALITY_DB_POOL_MAX': '4'})
+        self.assertEqual(pooled['OPTIONS']['pool']['max_size'], 4)
+        self.assertEqual(pooled['CONN_MAX_AGE'], 0)
+
+        persistent = database_settings(base_dir, {'DATA_QUALITY_DB': 'postgres', 'DATA_QUALITY_DB_POOL_MAX': '0'})
+        self.assertNotIn('pool', persistent['OPTIONS'])
+        self.assertEqual(persistent['CONN_MAX_AGE'], 60)
+
+        with self.assertRaises(ImproperlyConfigured):
+            database_settings(base_dir, {'DATA_QUALITY_DB': 'mysql'})
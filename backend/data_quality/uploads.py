@@ -0,0 +1,306 @@
+"""
+uploads.py - Проверка CSV прямо во время загрузки
+
+CSVUploadHandler встаёт первым в цепочку upload handlers Django и видит каждый
+кусок файла, пока тот приходит по сети (и дальше передаёт его обычным handlers,
+которые сохраняют файл в память или во временный файл). За один проход:
+- считаем SHA-256 (ключ кэша результатов, см. result_cache.py);
+- проверяем кодировку по всему файлу (utf-8, иначе cp1251);
+- определяем формат по началу и концу файла (см. sniffing.py);
+- считаем строки с учётом переносов внутри кавычек;
+- отклоняем слишком большие и явно битые файлы, не дочитывая их.
+
+Результат сохраняется в Dataset (content_hash, csv_dialect, row_count,
+column_count, file_size), поэтому анализу не нужно заново читать файл
+ради хэша и формата.
+"""
+
+import codecs
+import csv
+import hashlib
+import io
+import logging
+import re
+
+from django.conf import settings
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile
+
+from .sniffing import SAMPLE_BYTES, sample_text, sniff_bytes
+
+logger = logging.getLogger(__name__)
+
+# Поля формы, в которых приходит CSV (FileUploadView и DatasetViewSet)
+CSV_FIELD_NAMES = ('file', 'csv_file')
+
+# Пустые строки pandas пропускает - их не считаем (перекрывающиеся \n\n)
+BLANK_LINE = re.compile(rb'\n(?=\n)')
+
+
+class UploadRejected(Exception):
+    """Файл отклонён во время загрузки. http_status - код ответа для клиента."""
+
+    def __init__(self, message, http_status=400):
+        super().__init__(message)
+        self.http_status = http_status
+
+
+# ============================================================================
+# 1. ПОДСЧЁТ СТРОК
+# ============================================================================
+class RowCounter:
+    """
+    Считает записи CSV по потоку байтов. Перенос строки внутри кавычек
+    не заканчивает запись, пустые строки не считаются (как в pd.read_csv).
+
+    Кусок делится по символу кавычек: части через одну лежат вне кавычек,
+    и только в них считаются переносы - без цикла по байтам в Python.
+    """
+
+    def __init__(self, quotechar='"'):
+        self.quote = quotechar.encode('ascii')
+        self.in_quotes = False
+        self.newlines = 0
+        self.blank_lines = 0
+        self.last_byte = b'\n'  # Как будто перед файлом был перенос: ведущие пустые строки не считаются
+
+    def feed(self, data):
+        if b'\r' in data:
+            data = data.replace(b'\r', b'')
+        if not data:
+            return
+
+        parts = data.split(self.quote)
+        outside = parts[1::2] if self.in_quotes else parts[0::2]
+        # Части соединяем кавычкой: переносы по разные стороны поля в кавычках не соседние
+        text = self.quote.join(outside)
+        if not self.in_quotes:
+            # Первая часть продолжает строку прошлого куска - нужна для поиска пустых строк на стыке
+            text = self.last_byte + text
+            self.newlines -= self.last_byte.count(b'\n')
+
+        self.newlines += text.count(b'\n')
+        if b'\n\n' in text:
+            self.blank_lines += len(BLANK_LINE.findall(text))
+
+        # Каждая кавычка переключает состояние
+        if (len(parts) - 1) % 2:
+            self.in_quotes = not self.in_quotes
+        if self.in_quotes:
+            self.last_byte = self.quote
+        else:
+            self.last_byte = parts[-1][-1:] or self.quote
+
+    @property
+    def rows(self):
+        """Количество непустых записей (включая строку заголовка)."""
+        # Последняя строка без завершающего переноса - тоже запись
+        unterminated = 1 if self.last_byte != b'\n' else 0
+        return self.newlines - self.blank_lines + unterminated
+
+
+# ============================================================================
+# 2. ПРОВЕРКА ФАЙЛА ПО КУСКАМ
+# ============================================================================
+def get_max_upload_bytes():
+    """Лимит размера загружаемого CSV из настроек (0 или None - без лимита)."""
+    max_mb = getattr(settings, 'DATA_QUALITY_UPLOAD_MAX_MB', 1024)
+    return int(max_mb * 1024 * 1024) if max_mb else None
+
+
+class UploadInspector:
+    """
+    Собирает сведения о CSV по кускам байтов в порядке поступления.
+    Не зависит от Django: так же можно проверить файл с диска.
+
+    Пример:
+        inspector = UploadInspector()
+        for chunk in uploaded_file.chunks():
+            inspector.feed(chunk)
+        fields = inspector.finish()  # поля для Dataset
+    """
+
+    def __init__(self, max_bytes=None):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hasher = hashlib.sha256()
+        self.dialect = None
+        self.counter = None
+        # Начало файла копим, пока не наберётся образец для определения формата
+        self.head = bytearray()
+        self.pending = []
+        self.utf8_decoder = codecs.getincrementaldecoder('utf-8')()
+        self.is_utf8 = True
+        # 0x98 - единственный байт, которого нет в cp1251
+        self.has_cp1251_gap = False
+
+    def feed(self, chunk):
+        """Обрабатывает очередной кусок. Бросает UploadRejected, если файл не подходит."""
+        self.size += len(chunk)
+        if self.max_bytes and self.size > self.max_bytes:
+            raise UploadRejected(
+                f'Файл больше {self.max_bytes / (1024 * 1024):g} МБ', http_status=413
+            )
+        if b'\x00' in chunk:
+            raise UploadRejected('Файл содержит нулевые байты - это не текстовый CSV '
+                                 '(или кодировка UTF-16, которая не поддерживается)')
+
+        self.hasher.update(chunk)
+        if self.is_utf8:
+            try:
+                self.utf8_decoder.decode(chunk)
+            except UnicodeDecodeError:
+                self.is_utf8 = False
+        if not self.has_cp1251_gap and b'\x98' in chunk:
+            self.has_cp1251_gap = True
+
+        if self.counter is not None:
+            self.counter.feed(chunk)
+            return
+
+        self.head += chunk
+        self.pending.append(chunk)
+        if len(self.head) >= SAMPLE_BYTES:
+            self._start_counting()
+
+    def _start_counting(self):
+        """Образец набран: определяем формат, проверяем первые строки и считаем накопленное."""
+        head = bytes(self.head[:SAMPLE_BYTES])
+        self.dialect = sniff_bytes(head)
+        self._check_sample(head)
+
+        self.counter = RowCounter(self.dialect['quotechar'])
+        for chunk in self.pending:
+            self.counter.feed(chunk)
+        self.pending = []
+        self.head = bytearray()
+
+    def _check_sample(self, head):
+        """В первых строках не должно быть больше полей, чем в заголовке (pandas на этом падает)."""
+        sample = sample_text(head, self.dialect['encoding'])
+        reader = csv.reader(
+            io.StringIO(sample), delimiter=self.dialect['delimiter'], quotechar=self.dialect['quotechar']
+        )
+        expected = self.dialect['columns_count']
+        for line_number, row in enumerate(reader, start=1):
+            if len(row) > expected:
+                raise UploadRejected(
+                    f'Строка {line_number}: ожидалось {expected} полей, найдено {len(row)}. '
+                    f'Проверьте разделитель и кавычки'
+                )
+
+    def finish(self):
+        """
+        Завершает проверку.
+
+        Returns:
+            dict: Поля Dataset - content_hash, csv_dialect, row_count, column_count, file_size
+        """
+        if self.counter is None:
+            self._start_counting()
+        try:
+            self.utf8_decoder.decode(b'', final=True)
+        except UnicodeDecodeError:
+            self.is_utf8 = False
+
+        if self.size == 0:
+            raise UploadRejected('Файл пустой')
+        if self.counter.in_quotes:
+            raise UploadRejected('Незакрытая кавычка: файл обрезан или повреждён')
+        if not self.is_utf8 and self.has_cp1251_gap:
+            raise UploadRejected('Не удалось определить кодировку: файл не в utf-8 и не в cp1251')
+
+        # Кодировка проверена по всему файлу, а не только по образцу
+        if self.is_utf8:
+            encoding = 'utf-8-sig' if self.dialect['encoding'] == 'utf-8-sig' else 'utf-8'
+        else:
+            encoding = 'cp1251'
+        dialect = dict(self.dialect, encoding=encoding)
+
+        rows = self.counter.rows
+        if dialect['has_header']:
+            rows = max(rows - 1, 0)
+
+        return {
+            'content_hash': self.hasher.hexdigest(),
+            'csv_dialect': dialect,
+            'row_count': rows,
+            'column_count': dialect['columns_count'],
+            'file_size': self.size,
+        }
+
+
+# ============================================================================
+# 3. UPLOAD HANDLER ДЛЯ DJANGO
+# ============================================================================
+class CSVUploadHandler(FileUploadHandler):
+    """
+    Upload handler, который проверяет CSV на лету и передаёт куски дальше
+    по цепочке без изменений. Ошибку не бросает наружу, а сохраняет в error:
+    view отвечает клиенту понятным сообщением.
+
+    После разбора запроса:
+        handler.error  - UploadRejected или None
+        handler.result - поля Dataset (см. UploadInspector.finish)
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.inspector = None
+        self.error = None
+        self.result = None
+        self.request_size = None
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        # Размер всего тела запроса известен заранее - слишком большой файл отклоняем сразу
+        self.request_size = content_length
+
+    def new_file(self, field_name, file_name, *args, **kwargs):
+        super().new_file(field_name, file_name, *args, **kwargs)
+        self.inspector = None
+        if field_name not in CSV_FIELD_NAMES:
+            return
+
+        max_bytes = get_max_upload_bytes()
+        if not file_name.lower().endswith('.csv'):
+            self._reject(UploadRejected('Поддерживаются только CSV файлы (.csv)'))
+        if max_bytes and self.request_size and self.request_size > max_bytes + 64 * 1024:
+            # 64 КБ - запас на остальные поля формы и границы multipart
+            self._reject(UploadRejected(
+                f'Файл больше {max_bytes / (1024 * 1024):g} МБ', http_status=413
+            ))
+        self.inspector = UploadInspector(max_bytes=max_bytes)
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.inspector is not None:
+            try:
+                self.inspector.feed(raw_data)
+            except UploadRejected as e:
+                self._reject(e)
+        return raw_data
+
+    def file_complete(self, file_size):
+        if self.inspector is not None:
+            try:
+                self.result = self.inspector.finish()
+            except UploadRejected as e:
+                self.error = e
+            self.inspector = None
+        # Сам файл создаст следующий handler в цепочке
+        return None
+
+    def _reject(self, error):
+        """Запоминает ошибку; SkipFile - Django дочитает этот файл без сохранения."""
+        logger.warning("❌ Загрузка отклонена: %s", error)
+        self.error = error
+        self.inspector = None
+        raise SkipFile(str(error))
+
+
+def install_upload_handler(request):
+    """
+    Ставит CSVUploadHandler первым в цепочку. Вызывать до первого обращения
+    к request.data / request.FILES - после разбора тела handlers уже не меняются.
+    """
+    handler = CSVUploadHandler(request)
+    request.upload_handlers.insert(0, handler)
+    return handler
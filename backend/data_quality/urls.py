@@ -9,7 +9,10 @@ from .views import (
     DatasetViewSet,      # Основной ViewSet для датасетов
     FileUploadView,      # Простой View для загрузки файлов
     DataCheckViewSet,    # ViewSet для проверок (только чтение)
-    ReportViewSet        # ViewSet для отчётов (только чтение)
+    ReportViewSet,       # ViewSet для отчётов (только чтение)
+    AnalysisJobViewSet,  # ViewSet для задач анализа (только чтение)
+    AggregatesViewSet,   # Сводки качества по всем датасетам
+    MetricsView          # Метрики анализов для Prometheus
 )
 
 # ============================================================================
@@ -22,13 +25,17 @@ router = DefaultRouter()
 
 router.register(r'datasets', DatasetViewSet, basename='dataset')
 # Эта одна строка создаст:
-# - GET    /datasets/          - список всех датасетов
+# - GET    /datasets/          - список датасетов (компактный, курсорная пагинация, ?expand=checks,report,
+#                                 фильтры ?status=, ?min_missing=5, ?max_missing=, ?min_duplicates=, ?max_duplicates=)
 # - POST   /datasets/          - создание нового датасета  
 # - GET    /datasets/{id}/     - получение конкретного датасета
 # - PUT    /datasets/{id}/     - полное обновление датасета
 # - PATCH  /datasets/{id}/     - частичное обновление датасета
 # - DELETE /datasets/{id}/     - удаление датасета
-# - POST   /datasets/{id}/analyze/ - наше кастомное действие!
+# - POST   /datasets/{id}/analyze/ - наше кастомное действие (ставит задачу в очередь)!
+# - GET    /datasets/{id}/progress/ - прогресс анализа (long-poll, If-None-Match/ETag)
+# - GET    /datasets/{id}/rows/     - строки файла постранично (?offset=, ?limit=, ?columns=, ?filter=missing|duplicate)
+# - GET    /datasets/{id}/profile/  - замеры последних анализов по фазам и профили медленных (?limit=)
 
 router.register(r'checks', DataCheckViewSet, basename='datacheck')
 # Создаст только для чтения:
@@ -38,6 +45,17 @@ router.register(r'checks', DataCheckViewSet, basename='datacheck')
 router.register(r'reports', ReportViewSet, basename='report')
 # Аналогично для отчётов
 
+router.register(r'jobs', AnalysisJobViewSet, basename='analysisjob')
+# Статусы задач фоновой очереди анализа:
+# - GET    /jobs/              - список задач (?dataset=<id> - только по датасету)
+# - GET    /jobs/{id}/         - статус конкретной задачи
+
+router.register(r'aggregates', AggregatesViewSet, basename='aggregates')
+# Сводки по всем датасетам (из таблиц сводок, см. rollups.py):
+# - GET    /aggregates/          - итоги
+# - GET    /aggregates/daily/    - по дням загрузки (?from=, ?to=)
+# - GET    /aggregates/columns/  - худшие столбцы по доле пропусков (?limit=, ?min_datasets=)
+
 # ============================================================================
 # 2. ОПРЕДЕЛЯЕМ URLPATTERNS - КОНКРЕТНЫЕ ПУТИ ДОСТУПА
 # ============================================================================
@@ -49,6 +67,9 @@ urlpatterns = [
     # Отдельный маршрут для загрузки файлов
     # Будет доступен по /api/upload/
     path('upload/', FileUploadView.as_view(), name='file-upload'),
+    
+    # Метрики анализов в формате Prometheus: /api/metrics/
+    path('metrics/', MetricsView.as_view(), name='metrics'),
 ]
 
 # ============================================================================
@@ -61,8 +82,13 @@ urlpatterns = [
   ├── /datasets/                    ← DatasetViewSet (CRUD + analyze)
   │     ├── GET, POST /             (список/создание)
   │     ├── GET, PUT, PATCH, DELETE /{id}/ (конкретный датасет)
-  │     └── POST /{id}/analyze/     (запуск анализа)
+  │     ├── POST /{id}/analyze/     (постановка анализа в очередь, 202)
+  │     ├── GET /{id}/rows/         (строки файла постранично по индексу строк)
+  │     └── GET /{id}/profile/      (время, процессор и память по фазам анализа)
   ├── /upload/                      ← FileUploadView (только POST)
   ├── /checks/                      ← DataCheckViewSet (только GET)
-  └── /reports/                     ← ReportViewSet (только GET)
+  ├── /reports/                     ← ReportViewSet (только GET)
+  ├── /jobs/                        ← AnalysisJobViewSet (только GET)
+  ├── /aggregates/                  ← AggregatesViewSet (итоги, /daily/, /columns/)
+  └── /metrics/                     ← MetricsView (формат Prometheus)
 """
\ No newline at end of file
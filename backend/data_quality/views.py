@@ -2,14 +2,88 @@
 views.py - Views для API Data Quality Dashboard
 """
 
+import logging
+import math
+import time
+
+from django.conf import settings
+from django.db.models import Count, Prefetch, Sum
+from django.http import HttpResponse
+from django.utils.dateparse import parse_date
 from rest_framework import viewsets, status, permissions
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import CursorPagination
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from .models import Dataset, DataCheck, Report
-from .serializers import DatasetSerializer, DataCheckSerializer, ReportSerializer
+from . import profiling, row_index
+from .http_cache import cached_response
+from .instrumentation import render_metrics
+from .jobs import enqueue_analysis
+from .models import (
+    Dataset, DataCheck, Report, AnalysisJob, DailyQualityRollup, ColumnQualityRollup, AnalysisRun, AnalysisPhase,
+    ProfileArtifact,
+)
+from .progress import progress_etag
+from .uploads import install_upload_handler
+from .serializers import (
+    DatasetSerializer,
+    DatasetListSerializer,
+    DataCheckSerializer,
+    ReportSerializer,
+    AnalysisJobSerializer,
+    AnalysisRunSerializer,
+    ProfileArtifactSerializer,
+    DailyQualityRollupSerializer,
+    ColumnQualityRollupSerializer,
+    percent,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def get_non_negative_int(request, name, default):
+    """Неотрицательное целое из параметра запроса ?name= (нет параметра - default, иначе 400)."""
+    value = request.query_params.get(name)
+    if not value:
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise ValidationError({name: f'Ожидается целое число, получено: {value}'})
+    if number < 0:
+        raise ValidationError({name: 'Число должно быть неотрицательным'})
+    return number
+
+
+def parse_pk(pk):
+    """
+    pk из URL как целое. Не число - 404, как и у get_object():
+    иначе filter(pk='abc') упал бы с ValueError (500).
+    """
+    try:
+        return int(pk)
+    except (TypeError, ValueError):
+        raise NotFound()
+
+
+# ============================================================================
+# 0. ПАГИНАЦИЯ СПИСКА ДАТАСЕТОВ
+# ============================================================================
+class DatasetCursorPagination(CursorPagination):
+    """
+    Курсорная пагинация: сначала новые датасеты.
+    В отличие от ?page=N, курсор не "съезжает", когда загружаются новые файлы,
+    и не требует COUNT(*) по всей таблице.
+    Ответ: {"next": url, "previous": url, "results": [...]}
+    """
+    ordering = ('-uploaded_at', '-id')  # id - чтобы порядок был однозначным
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
 
 # ============================================================================
 # 1. DATASET VIEWSET - ОСНОВНОЙ КОНТРОЛЛЕР
@@ -18,59 +92,358 @@ class DatasetViewSet(viewsets.ModelViewSet):
     """
     ViewSet для работы с датасетами.
     Предоставляет полный CRUD + кастомное действие analyze.
+    
+    Список (GET /api/datasets/) - компактный и постраничный, вложенные
+    проверки и отчёт только по запросу: ?expand=checks,report.
+    Фильтры списка (по индексированным столбцам, без разбора JSON проверок):
+    ?status=completed, ?min_missing=5, ?max_missing=, ?min_duplicates=, ?max_duplicates= (в %).
+    Детальный просмотр (GET /api/datasets/{id}/) - всё целиком, с ETag/304
+    и кэшем готового ответа по версии датасета (см. http_cache.py).
     """
     
-    queryset = Dataset.objects.all().prefetch_related('checks')
+    queryset = Dataset.objects.all()
     serializer_class = DatasetSerializer
+    pagination_class = DatasetCursorPagination
     parser_classes = [MultiPartParser, FormParser]
     permission_classes = [permissions.AllowAny]  # Позже заменим на IsAuthenticated
     
+    def _get_expand(self):
+        """Какие вложенные данные запрошены в списке: ?expand=checks,report"""
+        expand = self.request.query_params.get('expand', '')
+        return {name.strip() for name in expand.split(',') if name.strip()}
+    
+    # Фильтры списка: параметр запроса -> условие на столбец сводки
+    PERCENT_FILTERS = {
+        'min_missing': 'missing_percentage__gte',
+        'max_missing': 'missing_percentage__lte',
+        'min_duplicates': 'duplicate_percentage__gte',
+        'max_duplicates': 'duplicate_percentage__lte',
+    }
+    
+    def _filter_list(self, queryset):
+        """Фильтры списка по статусу и качеству данных (?min_missing=5 - пропусков не меньше 5%)."""
+        params = self.request.query_params
+        status_value = params.get('status')
+        if status_value:
+            if status_value not in dict(Dataset.STATUS_CHOICES):
+                raise ValidationError({'status': f'Неизвестный статус: {status_value}'})
+            queryset = queryset.filter(status=status_value)
+        
+        for param, lookup in self.PERCENT_FILTERS.items():
+            value = params.get(param)
+            if value in (None, ''):
+                continue
+            try:
+                number = float(value)
+            except ValueError:
+                number = math.nan
+            # nan и inf - тоже float, но молча отфильтровали бы всё или ничего
+            if not math.isfinite(number):
+                raise ValidationError({param: f'Ожидается число (процент), получено: {value}'})
+            queryset = queryset.filter(**{lookup: number})
+        return queryset
+    
+    def get_queryset(self):
+        queryset = Dataset.objects.select_related('report')
+        if self.action != 'list' or 'checks' in self._get_expand():
+            queryset = queryset.prefetch_related('checks')
+        if self.action == 'list':
+            queryset = self._filter_list(queryset)
+        return queryset
+    
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return DatasetListSerializer
+        return DatasetSerializer
+    
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.action == 'list':
+            context['expand'] = self._get_expand()
+        return context
+    
+    def create(self, request, *args, **kwargs):
+        """
+        Создание датасета с загрузкой CSV: файл проверяется на лету (см. uploads.py),
+        хэш, формат и размеры сохраняются сразу.
+        """
+        self.upload_handler = install_upload_handler(request)
+        # Разбираем тело запроса - handler проверяет файл по кускам
+        request.data
+        if self.upload_handler.error is not None:
+            error = self.upload_handler.error
+            return Response({'csv_file': [str(error)]}, status=error.http_status)
+        return super().create(request, *args, **kwargs)
+    
+    def perform_create(self, serializer):
+        serializer.save(**(self.upload_handler.result or {}))
+    
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Детальный просмотр. Сначала одним лёгким запросом читается версия датасета:
+        не изменился - 304, есть в кэше - готовый ответ, иначе сериализуем.
+        """
+        pk = parse_pk(kwargs['pk'])
+        state = Dataset.objects.filter(pk=pk).values('version', 'updated_at').first()
+        if state is None:
+            return Response({'detail': 'Датасет не найден'}, status=status.HTTP_404_NOT_FOUND)
+        return cached_response(
+            request, 'dataset', pk, state['version'], state['updated_at'],
+            lambda: self.get_serializer(self.get_object()).data,
+        )
+    
     # ============================================================================
     # КАСТОМНОЕ ДЕЙСТВИЕ: АНАЛИЗ ДАТАСЕТА
     # ============================================================================
     @action(detail=True, methods=['post'], url_path='analyze')
     def analyze_dataset(self, request, pk=None):
         """
-        Запускает РЕАЛЬНЫЙ анализ датасета с помощью pandas.
+        Ставит РЕАЛЬНЫЙ анализ датасета в фоновую очередь.
         Доступно по URL: POST /api/datasets/{id}/analyze/
+        
+        Сам анализ выполняют воркеры (python manage.py run_analysis_workers),
+        поэтому ответ приходит сразу: 202 + id задачи для отслеживания.
+        
+        ?mode=quick - сначала прямо в запросе считается оценка по выборке строк
+        (см. sampling.py): она приходит в поле preview и сохраняется в проверки
+        датасета, а полный анализ ставится в очередь и потом её заменяет.
+        
+        Заголовок X-DQ-Profile: 1 (или порог в секундах) - профилировать анализ
+        в воркере (см. profiling.py); профиль появится в GET /api/datasets/{id}/profile/.
         """
         # Получаем объект датасета
         dataset = self.get_object()
         
-        print(f"🚀 Запускаем РЕАЛЬНЫЙ анализ датасета: {dataset.name}")
+        # Необязательный режим анализа: ?mode=full, ?mode=streaming или ?mode=quick
+        options = {}
+        mode = request.query_params.get('mode')
+        if mode:
+            if mode not in ('full', 'streaming', 'quick'):
+                return Response(
+                    {'status': 'error', 'message': f'Неизвестный режим анализа: {mode}'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            if mode != 'quick':
+                options['mode'] = mode
         
-        try:
-            # Импортируем анализатор (импортируем здесь чтобы избежать циклических импортов)
+        # Необязательные ключевые столбцы для поиска дубликатов: ?key_columns=email,phone
+        key_columns = request.query_params.get('key_columns')
+        if key_columns:
+            options['key_columns'] = [column.strip() for column in key_columns.split(',') if column.strip()]
+        
+        # Необязательная приближённая статистика по скетчам: ?approximate=1 (или 0, чтобы отключить)
+        approximate = request.query_params.get('approximate')
+        if approximate is not None:
+            options['approximate'] = approximate.lower() in ('1', 'true', 'yes')
+        
+        # Профилирование анализа по заголовку X-DQ-Profile (если разрешено настройкой)
+        profile_threshold = profiling.header_threshold(request)
+        if profile_threshold is not None:
+            options['profile'] = profile_threshold
+        
+        # Оценка по выборке - за доли секунды; если не вышло, полный анализ всё равно будет
+        preview = None
+        if mode == 'quick':
+            # Как и в jobs.run_job: анализатор импортируется только там, где он нужен
             from .analyzer import CSVAnalyzer
+            analyzer = CSVAnalyzer(dataset, mode='quick')
+            try:
+                analyzer.analyze()
+                preview = analyzer.preview
+            except Exception as e:
+                logger.warning("⚠️ Не удалось оценить %s по выборке: %s", dataset.name, e)
+        
+        logger.info("🚀 Ставим в очередь анализ датасета: %s", dataset.name)
+        
+        job = enqueue_analysis(dataset, options)
+        
+        data = {
+            'status': 'queued',
+            'message': f'Анализ датасета "{dataset.name}" поставлен в очередь',
+            'dataset_id': dataset.id,
+            'job_id': job.id,
+            'job_status': job.status,
+            'job_url': f'/api/jobs/{job.id}/',
+            'progress_url': f'/api/datasets/{dataset.id}/progress/',
+        }
+        if mode == 'quick':
+            data['preview'] = preview
+        return Response(data, status=status.HTTP_202_ACCEPTED)
+    
+    # ============================================================================
+    # КАСТОМНОЕ ДЕЙСТВИЕ: ПРОГРЕСС АНАЛИЗА (LONG-POLL)
+    # ============================================================================
+    @action(detail=True, methods=['get'], url_path='progress')
+    def progress(self, request, pk=None):
+        """
+        Прогресс анализа: статус, фаза, процент и количество строк.
+        Доступно по URL: GET /api/datasets/{id}/progress/
+        
+        Long-poll: если клиент прислал If-None-Match с ETag прошлого ответа,
+        запрос ждёт (до ?timeout= секунд, 0..DATA_QUALITY_PROGRESS_LONGPOLL_TIMEOUT),
+        пока прогресс не изменится. Изменился - 200 с новым ETag, не изменился
+        за время ожидания - 304. Читаются только поля status и progress, без проверок и отчёта.
+        
+        Во время ожидания прогресс перечитывается с нарастающей паузой
+        (DATA_QUALITY_PROGRESS_POLL_INTERVAL, удваивается до DATA_QUALITY_PROGRESS_POLL_MAX_INTERVAL):
+        за 25 секунд ожидания - 9 запросов к базе, а не 50.
+        """
+        pk = parse_pk(pk)
+        max_timeout = getattr(settings, 'DATA_QUALITY_PROGRESS_LONGPOLL_TIMEOUT', 25)
+        poll_interval = getattr(settings, 'DATA_QUALITY_PROGRESS_POLL_INTERVAL', 0.5)
+        max_poll_interval = getattr(settings, 'DATA_QUALITY_PROGRESS_POLL_MAX_INTERVAL', 5)
+        value = request.query_params.get('timeout')
+        timeout = max_timeout
+        if value:
+            try:
+                timeout = float(value)
+            except ValueError:
+                timeout = math.nan
+            # nan прошёл бы через min() и ожидание никогда бы не кончилось
+            if not math.isfinite(timeout):
+                raise ValidationError({'timeout': f'Ожидается число секунд, получено: {value}'})
+            timeout = min(max(timeout, 0), max_timeout)
+        
+        known_etag = request.headers.get('If-None-Match')
+        deadline = time.monotonic() + timeout
+        
+        while True:
+            state = Dataset.objects.filter(pk=pk).values('status', 'progress').first()
+            if state is None:
+                return Response({'detail': 'Датасет не найден'}, status=status.HTTP_404_NOT_FOUND)
             
-            # Запускаем реальный анализ
-            analyzer = CSVAnalyzer(dataset)
-            analyzer.analyze()
-            
-            # Обновляем статус датасета
-            dataset.status = 'completed'
-            dataset.save()
-            
-            # Возвращаем успешный ответ
-            return Response({
-                'status': 'success',
-                'message': f'Анализ датасета "{dataset.name}" завершён',
-                'dataset_id': dataset.id,
-                'view_url': f'/admin/data_quality/dataset/{dataset.id}/change/'
-            })
-            
-        except Exception as e:
-            # В случае ошибки
-            dataset.status = 'failed'
-            dataset.save()
-            
-            print(f"❌ Ошибка при анализе: {str(e)}")
-            
-            return Response({
-                'status': 'error',
-                'message': f'Ошибка при анализе: {str(e)}',
-                'dataset_id': dataset.id
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            etag = progress_etag(state['status'], state['progress'])
+            # Анализ не идёт - ждать изменений бессмысленно
+            finished = state['status'] != 'processing'
+            remaining = deadline - time.monotonic()
+            if etag != known_etag or finished or remaining <= 0:
+                break
+            time.sleep(min(poll_interval, remaining))
+            poll_interval = min(poll_interval * 2, max_poll_interval)
+        
+        if etag == known_etag:
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response({'dataset_id': pk, 'status': state['status'], **state['progress']})
+        response['ETag'] = etag
+        response['Cache-Control'] = 'no-cache'
+        return response
+    
+    # ============================================================================
+    # КАСТОМНОЕ ДЕЙСТВИЕ: СТРОКИ ФАЙЛА ПО СТРАНИЦАМ
+    # ============================================================================
+    @action(detail=True, methods=['get'], url_path='rows')
+    def rows(self, request, pk=None):
+        """
+        Строки CSV файла постранично, без чтения файла с начала (см. row_index.py).
+        Доступно по URL: GET /api/datasets/{id}/rows/
+        
+        Параметры:
+        - ?offset=0&limit=50 - страница (limit не больше DATA_QUALITY_ROWS_MAX_LIMIT);
+        - ?columns=a,b - только эти столбцы (по умолчанию все);
+        - ?filter=missing - строки с пропусками, ?filter=duplicate - строки-дубликаты.
+        
+        Индекс строится при анализе: нет индекса (файл не анализировали или заменили) - 409.
+        """
+        dataset = Dataset.objects.filter(pk=parse_pk(pk)).only('id', 'csv_file').first()
+        if dataset is None:
+            return Response({'detail': 'Датасет не найден'}, status=status.HTTP_404_NOT_FOUND)
+        
+        params = request.query_params
+        offset = get_non_negative_int(request, 'offset', 0)
+        max_limit = getattr(settings, 'DATA_QUALITY_ROWS_MAX_LIMIT', 500)
+        limit = min(get_non_negative_int(request, 'limit', 50), max_limit)
+        row_filter = params.get('filter') or None
+        if row_filter is not None and row_filter not in row_index.FILTERS:
+            raise ValidationError({'filter': f'Неизвестный фильтр: {row_filter}'})
+        
+        index = row_index.load(dataset.csv_file.path) if dataset.csv_file else None
+        if index is None:
+            return Response(
+                {'detail': 'Индекс строк ещё не построен - запустите анализ датасета'},
+                status=status.HTTP_409_CONFLICT
+            )
+        if not index.has_filter(row_filter):
+            return Response(
+                {'detail': f'Для фильтра {row_filter} нет данных - запустите анализ заново'},
+                status=status.HTTP_409_CONFLICT
+            )
+        
+        columns = index.columns
+        if params.get('columns'):
+            columns = [column.strip() for column in params['columns'].split(',') if column.strip()]
+            unknown = [column for column in columns if column not in index.columns]
+            if unknown:
+                raise ValidationError({'columns': f'Нет таких столбцов: {", ".join(unknown)}'})
+        
+        row_numbers, total = index.page(row_filter, offset, limit)
+        try:
+            frame = index.read_rows(dataset.csv_file.path, row_numbers, columns)
+        except ValueError:
+            return Response(
+                {'detail': 'Индекс строк устарел - запустите анализ заново'},
+                status=status.HTTP_409_CONFLICT
+            )
+        
+        rows = [
+            {'row': int(row), 'values': [None if isinstance(value, float) and math.isnan(value) else value
+                                         for value in values]}
+            for row, values in zip(row_numbers, frame.itertuples(index=False, name=None))
+        ]
+        next_offset = offset + len(rows)
+        return Response({
+            'dataset_id': dataset.id,
+            'columns': columns,
+            'filter': row_filter,
+            'offset': offset,
+            'limit': limit,
+            'total': total,
+            'next_offset': next_offset if next_offset < total else None,
+            'rows': rows,
+        })
+    
+    # ============================================================================
+    # КАСТОМНОЕ ДЕЙСТВИЕ: ЗАМЕРЫ ПОСЛЕДНИХ АНАЛИЗОВ
+    # ============================================================================
+    @action(detail=True, methods=['get'], url_path='profile')
+    def profile(self, request, pk=None):
+        """
+        Последние запуски анализа датасета: время, процессор, пик памяти
+        и строки в секунду по фазам (см. instrumentation.py), и сохранённые
+        профили медленных анализов и запросов (folded stacks, см. profiling.py).
+        Доступно по URL: GET /api/datasets/{id}/profile/?limit=10
+        """
+        pk = parse_pk(pk)
+        if not Dataset.objects.filter(pk=pk).exists():
+            return Response({'detail': 'Датасет не найден'}, status=status.HTTP_404_NOT_FOUND)
+        limit = min(get_non_negative_int(request, 'limit', 10), getattr(settings, 'DATA_QUALITY_ANALYSIS_RUNS_KEEP', 50))
+        runs = (
+            AnalysisRun.objects.filter(dataset_id=pk)
+            .order_by('-started_at', '-pk')
+            .prefetch_related(Prefetch('phases', queryset=AnalysisPhase.objects.order_by('position')))[:limit]
+        )
+        artifacts = ProfileArtifact.objects.filter(dataset_id=pk).order_by('-created_at', '-pk')[:limit]
+        context = self.get_serializer_context()
+        return Response({
+            'dataset_id': pk,
+            'runs': AnalysisRunSerializer(runs, many=True).data,
+            'artifacts': ProfileArtifactSerializer(artifacts, many=True, context=context).data,
+        })
+
+
+# ============================================================================
+# 1.1. МЕТРИКИ ДЛЯ PROMETHEUS
+# ============================================================================
+class MetricsView(APIView):
+    """
+    Метрики анализов в текстовом формате Prometheus (см. instrumentation.render_metrics).
+    Доступно по URL: GET /api/metrics/
+    """
+    
+    permission_classes = [permissions.AllowAny]
+    
+    def get(self, request, format=None):
+        return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
 
 # ============================================================================
 # 2. FILE UPLOAD VIEW - ПРОСТОЙ ВЬЮ ДЛЯ ЗАГРУЗКИ ФАЙЛОВ
@@ -88,34 +461,38 @@ class FileUploadView(APIView):
         """
         Обрабатывает POST запрос с файлом.
         """
-        print("📥 Получен запрос на загрузку файла")
+        logger.info("📥 Получен запрос на загрузку файла")
         
-        # 1. Получаем файл из запроса
+        # 1. Проверяем файл на лету, пока он загружается (см. uploads.py):
+        # хэш, кодировка, формат, число строк, лимит размера
+        upload_handler = install_upload_handler(request)
         csv_file = request.FILES.get('file')
         
-        # 2. Проверяем, что файл есть
-        if not csv_file:
+        # 2. Файл отклонён во время загрузки (не CSV, слишком большой, повреждён)
+        if upload_handler.error is not None:
             return Response(
-                {'error': 'Файл не предоставлен'},
-                status=status.HTTP_400_BAD_REQUEST
+                {'error': str(upload_handler.error)},
+                status=upload_handler.error.http_status
             )
         
-        # 3. Проверяем расширение
-        if not csv_file.name.lower().endswith('.csv'):
+        # 3. Проверяем, что файл есть
+        if not csv_file:
             return Response(
-                {'error': 'Поддерживаются только CSV файлы (.csv)'},
+                {'error': 'Файл не предоставлен'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
         # 4. Создаём запись в базе
         try:
+            # Хэш (ключ кэша результатов), формат CSV и размеры уже посчитаны при загрузке
             dataset = Dataset.objects.create(
                 name=csv_file.name,
                 csv_file=csv_file,
-                status='uploaded'
+                status='uploaded',
+                **(upload_handler.result or {})
             )
             
-            print(f"✅ Файл сохранён: {csv_file.name} -> ID: {dataset.id}")
+            logger.info("✅ Файл сохранён: %s -> ID: %s", csv_file.name, dataset.id)
             
             # 5. Сериализуем данные для ответа
             serializer = DatasetSerializer(dataset)
@@ -135,7 +512,7 @@ class FileUploadView(APIView):
             )
             
         except Exception as e:
-            print(f"❌ Ошибка при сохранении файла: {str(e)}")
+            logger.error("❌ Ошибка при сохранении файла: %s", e)
             return Response(
                 {'error': f'Ошибка при сохранении файла: {str(e)}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -149,7 +526,7 @@ class DataCheckViewSet(viewsets.ReadOnlyModelViewSet):
     ViewSet только для чтения проверок.
     Полезно для отладки.
     """
-    queryset = DataCheck.objects.all()
+    queryset = DataCheck.objects.select_related('dataset')
     serializer_class = DataCheckSerializer
 
 
@@ -157,5 +534,115 @@ class ReportViewSet(viewsets.ReadOnlyModelViewSet):
     """
     ViewSet только для чтения отчётов.
     """
-    queryset = Report.objects.all()
-    serializer_class = ReportSerializer
\ No newline at end of file
+    queryset = Report.objects.select_related('dataset')
+    serializer_class = ReportSerializer
+    
+    def retrieve(self, request, *args, **kwargs):
+        """Отчёт меняется только вместе с датасетом - ETag и кэш по его версии."""
+        pk = parse_pk(kwargs['pk'])
+        state = Report.objects.filter(pk=pk).values('dataset__version', 'dataset__updated_at').first()
+        if state is None:
+            return Response({'detail': 'Отчёт не найден'}, status=status.HTTP_404_NOT_FOUND)
+        return cached_response(
+            request, 'report', pk, state['dataset__version'], state['dataset__updated_at'],
+            lambda: self.get_serializer(self.get_object()).data,
+        )
+
+
+class AnalysisJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    ViewSet только для чтения задач анализа.
+    GET /api/jobs/{id}/ - статус задачи (queued, running, completed, failed).
+    Фильтр по датасету: GET /api/jobs/?dataset=5
+    """
+    serializer_class = AnalysisJobSerializer
+    
+    def get_queryset(self):
+        queryset = AnalysisJob.objects.all()
+        dataset_id = get_non_negative_int(self.request, 'dataset', None)
+        if dataset_id is not None:
+            queryset = queryset.filter(dataset_id=dataset_id)
+        return queryset
+
+
+
+# ============================================================================
+# 4. СВОДКИ ПО ВСЕМ ДАТАСЕТАМ
+# ============================================================================
+class AggregatesViewSet(viewsets.ViewSet):
+    """
+    Сводки качества по всем датасетам. Читаются из таблиц сводок, которые анализатор
+    обновляет при каждом сохранении результатов (см. rollups.py), - JSON проверок не разбирается.
+    
+    GET /api/aggregates/          - итоги по всем датасетам
+    GET /api/aggregates/daily/    - по дням загрузки (?from=2026-01-01&to=2026-01-31)
+    GET /api/aggregates/columns/  - худшие столбцы по доле пропусков (?limit=20&min_datasets=2)
+    """
+    permission_classes = [permissions.AllowAny]
+    
+    # Сколько столбцов максимум отдаёт /columns/
+    MAX_COLUMNS = 500
+    
+    def _get_date(self, name):
+        value = self.request.query_params.get(name)
+        if not value:
+            return None
+        day = parse_date(value)
+        if day is None:
+            raise ValidationError({name: f'Ожидается дата ГГГГ-ММ-ДД, получено: {value}'})
+        return day
+    
+    def list(self, request):
+        """Итоги по всем проанализированным датасетам: суммы дневных сводок."""
+        totals = DailyQualityRollup.objects.filter(datasets_count__gt=0).aggregate(
+            days=Count('pk'),
+            datasets_count=Sum('datasets_count'),
+            rows_total=Sum('rows_total'),
+            cells_total=Sum('cells_total'),
+            missing_cells_total=Sum('missing_cells_total'),
+            duplicate_rows_total=Sum('duplicate_rows_total'),
+            missing_percentage_sum=Sum('missing_percentage_sum'),
+            duplicate_percentage_sum=Sum('duplicate_percentage_sum'),
+        )
+        totals = {name: value or 0 for name, value in totals.items()}
+        datasets_count = totals['datasets_count']
+        return Response({
+            'days': totals['days'],
+            'datasets_count': datasets_count,
+            'rows_total': totals['rows_total'],
+            'cells_total': totals['cells_total'],
+            'missing_cells_total': totals['missing_cells_total'],
+            'duplicate_rows_total': totals['duplicate_rows_total'],
+            'missing_rate': percent(totals['missing_cells_total'], totals['cells_total']),
+            'duplicate_rate': percent(totals['duplicate_rows_total'], totals['rows_total']),
+            'avg_missing_percentage': (
+                round(totals['missing_percentage_sum'] / datasets_count, 2) if datasets_count else None
+            ),
+            'avg_duplicate_percentage': (
+                round(totals['duplicate_percentage_sum'] / datasets_count, 2) if datasets_count else None
+            ),
+        })
+    
+    @action(detail=False, methods=['get'])
+    def daily(self, request):
+        """Сводки по дням загрузки, от старых к новым."""
+        queryset = DailyQualityRollup.objects.filter(datasets_count__gt=0).order_by('day')
+        date_from = self._get_date('from')
+        date_to = self._get_date('to')
+        if date_from:
+            queryset = queryset.filter(day__gte=date_from)
+        if date_to:
+            queryset = queryset.filter(day__lte=date_to)
+        return Response({'results': DailyQualityRollupSerializer(queryset, many=True).data})
+    
+    @action(detail=False, methods=['get'])
+    def columns(self, request):
+        """Столбцы с наибольшей долей пропусков по всем датасетам (по индексу missing_percentage)."""
+        limit = min(get_non_negative_int(request, 'limit', 20), self.MAX_COLUMNS)
+        min_datasets = max(get_non_negative_int(request, 'min_datasets', 1), 1)
+        queryset = (
+            ColumnQualityRollup.objects
+            .filter(datasets_count__gte=min_datasets)
+            .order_by('-missing_percentage', 'column_name')[:limit]
+        )
+        return Response({'results': ColumnQualityRollupSerializer(queryset, many=True).data})
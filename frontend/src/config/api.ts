@@ -22,7 +22,10 @@ export const API_CONFIG = {
         DATASETS: '/datasets/',
         DATASET_BY_ID: (id: number) => `/datasets/${id}/`,
         ANALYZE_DATASET: (id: number) => `/datasets/${id}/analyze/`,
-        UPLOAD_DATASET: '/datasets/upload/',
+        DATASET_PROGRESS: (id: number) => `/datasets/${id}/progress/`,
+        DATASET_ROWS: (id: number) => `/datasets/${id}/rows/`,
+        DATASET_PROFILE: (id: number) => `/datasets/${id}/profile/`,
+        UPLOAD_DATASET: '/datasets/',   // POST создаёт датасет (CSV проверяется на лету)
 
         // Проверки
         CHECKS: '/checks/',
@@ -30,12 +33,16 @@ export const API_CONFIG = {
 
         // Отчёты
         REPORTS: '/reports/',
+
+        // Задачи фоновой очереди анализа
+        ANALYSIS_JOB_BY_ID: (id: number) => `/jobs/${id}/`,
     } as const,
 
     // Настройки запросов
     REQUEST_CONFIG: {
         DEFAULT_TIMEOUT: 30000,      // 30 секунд
         UPLOAD_TIMEOUT: 120000,      // 2 минуты для загрузки
+        LONG_POLL_TIMEOUT: 40000,    // Long-poll прогресса (сервер держит до 25 секунд)
         MAX_RETRIES: 3,              // Количество попыток
         RETRY_DELAY: 1000,           // Задержка между попытками
     },
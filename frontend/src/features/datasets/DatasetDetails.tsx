@@ -1,8 +1,8 @@
 import React, { useEffect, useState } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
 import { useAppDispatch, useAppSelector } from '../../app/hooks';
-import { fetchDatasets, analyzeDataset, updateDataset } from './datasetsSlice';
-import { DataCheck } from '../../services/api';
+import { fetchDataset, analyzeDataset, updateDataset } from './datasetsSlice';
+import { DataCheck, DatasetProgress } from '../../services/api';
 import { datasetsApi } from '../../services/api';
 
 
@@ -12,77 +12,96 @@ const DatasetDetails = () => {
     const { id } = useParams<{ id: string }>();
     const navigate = useNavigate();
     const dispatch = useAppDispatch();
-    const { items: datasets, loading, error } = useAppSelector(
+    const { currentDataset, loading, error } = useAppSelector(
         (state) => state.datasets
     );
 
     const datasetId = parseInt(id || '0');
-    const dataset = datasets.find(d => d.id === datasetId);
+    // Список датасетов компактный (без проверок и отчёта) - полный датасет грузим отдельно
+    const dataset = currentDataset?.id === datasetId ? currentDataset : undefined;
 
-
-    // === АВТООБНОВЛЕНИЕ СТАТУСА ===
     useEffect(() => {
+        if (datasetId) {
+            dispatch(fetchDataset(datasetId));
+        }
+    }, [datasetId, dispatch]);
+
 
+    // === ПРОГРЕСС АНАЛИЗА (LONG-POLL) ===
+    const [progress, setProgress] = useState<DatasetProgress | null>(null);
+    const isProcessing = dataset?.status === 'processing';
 
+    useEffect(() => {
         if (window.location.hash === '#report' && dataset?.report) {
             setActiveTab('report');
         }
+    }, [dataset]);
 
-        // Проверка на существование датасета
-        if (!dataset || dataset.status !== 'processing') return;
+    useEffect(() => {
+        if (!datasetId || !isProcessing) return;
 
-        console.log('🔄 Запускаем автообновление для датасета', dataset.id);
+        console.log('🔄 Следим за прогрессом анализа датасета', datasetId);
 
         let isPollingActive = true;
         let timeoutId: NodeJS.Timeout;
+        let etag: string | null = null;
 
-        const pollStatus = async () => {
+        const pollProgress = async () => {
             if (!isPollingActive) return;
 
             try {
-                console.log('📡 Опрашиваем статус датасета', dataset.id);
-
-                const response = await datasetsApi.getById(datasetId);
-                const freshDataset = response.data;
+                // Сервер отвечает сразу при изменении прогресса или через ~25 секунд (304)
+                const response = await datasetsApi.getProgress(datasetId, etag);
+                if (!isPollingActive) return;
 
+                if (response.status === 200) {
+                    etag = response.headers['etag'] || null;
+                    setProgress(response.data);
 
-
-                if (freshDataset.status !== dataset.status) {
-                    console.log('✅ Статус обновился!');
-                    dispatch(updateDataset(freshDataset));
-
-                    if (freshDataset.status === 'completed' || freshDataset.status === 'failed') {
+                    if (response.data.status === 'completed' || response.data.status === 'failed') {
                         console.log('🏁 Анализ завершён');
                         isPollingActive = false;
+                        // Проверки и отчёт загружаем один раз - после завершения
+                        const fresh = await datasetsApi.getById(datasetId);
+                        dispatch(updateDataset(fresh.data));
                         return;
                     }
                 }
 
-                if (isPollingActive && freshDataset.status === 'processing') {
-                    timeoutId = setTimeout(pollStatus, 3000);
-                }
-
+                pollProgress();
             } catch (error) {
                 console.error('❌ Ошибка:', error);
                 if (isPollingActive) {
-                    timeoutId = setTimeout(pollStatus, 5000);
+                    timeoutId = setTimeout(pollProgress, 5000);
                 }
             }
         };
 
-        pollStatus();
+        pollProgress();
 
         return () => {
-            console.log('🛑 Останавливаем автообновление');
+            console.log('🛑 Останавливаем отслеживание прогресса');
             isPollingActive = false;
             if (timeoutId) clearTimeout(timeoutId);
         };
-    }, [dataset, dispatch]);    // Функция для запуска анализа
-
+    }, [datasetId, isProcessing, dispatch]);
+
+    const PHASE_LABELS: Record<string, string> = {
+        queued: 'В очереди',
+        loading: 'Чтение файла',
+        missing: 'Поиск пропусков',
+        duplicates: 'Поиск дубликатов',
+        statistics: 'Статистика по столбцам',
+        saving: 'Сохранение результатов',
+        completed: 'Готово',
+        failed: 'Ошибка',
+    };
 
+    // Функция для запуска анализа
     const handleAnalyze = () => {
         if (dataset && dataset.status === 'uploaded') {
-            dispatch(analyzeDataset(dataset.id));
+            // Оценка по выборке уже сохранена в проверки - показываем её до конца анализа
+            dispatch(analyzeDataset(dataset.id)).then(() => dispatch(fetchDataset(dataset.id)));
         }
     };
 
@@ -98,6 +117,15 @@ const DatasetDetails = () => {
 
         return (
             <div className="space-y-6">
+                {data.estimated && (
+                    <p className="text-sm text-amber-700 bg-amber-50 border border-amber-100 rounded-lg px-3 py-2">
+                        Предварительная оценка по выборке из {data.sample_rows?.toLocaleString()} строк
+                        {data.confidence_intervals?.missing_percentage && (
+                            <> · пропусков {data.confidence_intervals.missing_percentage[0]}–{data.confidence_intervals.missing_percentage[1]}% (95%)</>
+                        )}
+                        . Точные цифры появятся после полного анализа.
+                    </p>
+                )}
                 {/* Статистика в карточках */}
                 <div className="grid grid-cols-2 md:grid-cols-4 gap-4">
                     <div className="bg-blue-50 p-4 rounded-xl border border-blue-100">
@@ -368,7 +396,7 @@ const DatasetDetails = () => {
     };
 
     // Загрузка
-    if (loading && !dataset) {
+    if (!dataset && !error) {
         return (
             <div className="flex items-center justify-center min-h-[400px]">
                 <div className="animate-spin rounded-full h-12 w-12 border-b-2 border-blue-600"></div>
@@ -445,6 +473,18 @@ const DatasetDetails = () => {
                                 <span>📊</span>
                                 {dataset.checks.length} проверок
                             </span>
+                            {dataset.row_count != null && (
+                                <span className="flex items-center gap-1.5">
+                                    <span>🧮</span>
+                                    {dataset.row_count.toLocaleString('ru-RU')} строк × {dataset.column_count} столбцов
+                                </span>
+                            )}
+                            {dataset.file_size != null && (
+                                <span className="flex items-center gap-1.5">
+                                    <span>💾</span>
+                                    {(dataset.file_size / (1024 * 1024)).toFixed(1)} МБ
+                                </span>
+                            )}
                         </div>
                     </div>
 
@@ -502,6 +542,30 @@ const DatasetDetails = () => {
                                 <p>Проверок: <span className="font-medium">{dataset.checks.length}</span></p>
                             </div>
                         </div>
+
+                        {/* Прогресс анализа */}
+                        {isProcessing && (
+                            <div className="mt-3">
+                                <div className="flex justify-between text-sm text-gray-600 mb-1">
+                                    <span>{PHASE_LABELS[progress?.phase || dataset.progress?.phase || 'queued']}</span>
+                                    <span>
+                                        {progress?.rows_processed != null && (
+                                            <>
+                                                {progress.rows_processed.toLocaleString('ru-RU')}
+                                                {progress.total_rows ? ` / ~${progress.total_rows.toLocaleString('ru-RU')}` : ''} строк · {' '}
+                                            </>
+                                        )}
+                                        {progress?.percent ?? dataset.progress?.percent ?? 0}%
+                                    </span>
+                                </div>
+                                <div className="w-full bg-gray-200 rounded-full h-2">
+                                    <div
+                                        className="h-2 rounded-full bg-yellow-500 transition-all"
+                                        style={{ width: `${Math.min(progress?.percent ?? dataset.progress?.percent ?? 0, 100)}%` }}
+                                    ></div>
+                                </div>
+                            </div>
+                        )}
                     </div>
                 </div>
             </div>
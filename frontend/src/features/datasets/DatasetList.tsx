@@ -1,7 +1,7 @@
 import React, { useEffect, useMemo } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { useAppDispatch, useAppSelector } from '../../app/hooks';
-import { fetchDatasets, analyzeDataset } from './datasetsSlice';
+import { fetchDatasets, fetchMoreDatasets, analyzeDataset } from './datasetsSlice';
 import { DatasetStatus } from '../../services/api'; //
 
 
@@ -10,7 +10,7 @@ const DatasetList = () => {
 
     const dispatch = useAppDispatch();
     const navigate = useNavigate();
-    const { items: datasets, loading, error } = useAppSelector(
+    const { items: datasets, nextPageUrl, loading, error } = useAppSelector(
         (state) => state.datasets
     );
 
@@ -20,7 +20,7 @@ const DatasetList = () => {
         JSON.stringify(datasets.map(d => ({
             id: d.id,
             status: d.status,
-            checksLength: d.checks?.length || 0
+            issuesCount: d.issues_count ?? null
         })))
     ]);
 
@@ -132,18 +132,23 @@ const DatasetList = () => {
                                             <span className="text-gray-400">📅</span>
                                             <span>{new Date(dataset.uploaded_at).toLocaleDateString()}</span>
                                         </div>
-                                        <div className="flex items-center gap-2">
-                                            <span className="text-gray-400">🔢</span>
-                                            <span>
-                                                {dataset.checks?.length || 0} проверок
-                                            </span>
-                                        </div>
                                         <div className="flex items-center gap-2">
                                             <span className="text-gray-400">📊</span>
                                             <span>
-                                                {dataset.report?.issues_count || 0} проблем
+                                                {dataset.issues_count ?? 0} проблем
+                                                {dataset.missing_percentage != null && (
+                                                    <> · {dataset.missing_percentage}% пропусков</>
+                                                )}
                                             </span>
                                         </div>
+                                        {dataset.row_count != null && (
+                                            <div className="flex items-center gap-2">
+                                                <span className="text-gray-400">🧮</span>
+                                                <span>
+                                                    {dataset.row_count.toLocaleString('ru-RU')} × {dataset.column_count}
+                                                </span>
+                                            </div>
+                                        )}
                                         <div className="flex items-center gap-2">
                                             <span className="text-gray-400">#</span>
                                             <span className="font-mono">ID: {dataset.id}</span>
@@ -169,7 +174,7 @@ const DatasetList = () => {
                                         </button>
                                     )}
 
-                                    {dataset.status === 'completed' && dataset.report && (
+                                    {dataset.status === 'completed' && dataset.issues_count != null && (
                                         <button onClick={() => navigate(`/dataset/${dataset.id}#report`)}>
                                             📄 Отчёт
                                         </button>
@@ -185,17 +190,19 @@ const DatasetList = () => {
                                     )}
                                 </div>
                             </div>
-
-                            {/* Детали при клике */}
-                            {dataset.report?.summary && (
-                                <div className="mt-4 pt-4 border-t border-gray-100">
-                                    <p className="text-gray-700 line-clamp-2">
-                                        {dataset.report.summary}
-                                    </p>
-                                </div>
-                            )}
                         </div>
                     ))}
+
+                    {/* Список приходит страницами - следующая по кнопке */}
+                    {nextPageUrl && (
+                        <button
+                            onClick={() => dispatch(fetchMoreDatasets(nextPageUrl))}
+                            disabled={loading}
+                            className="w-full px-4 py-3 bg-gray-50 text-gray-700 rounded-lg hover:bg-gray-100 disabled:opacity-50"
+                        >
+                            {loading ? 'Загружаем...' : 'Показать ещё'}
+                        </button>
+                    )}
                 </div>
             )}
         </div>
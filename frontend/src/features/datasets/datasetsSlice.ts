@@ -1,10 +1,11 @@
 import { createSlice, createAsyncThunk, PayloadAction } from '@reduxjs/toolkit';
-import { datasetsApi, Dataset, DatasetStatus, AnalysisSuccessResponse, AnalysisErrorResponse } from '../../services/api';
+import { datasetsApi, Dataset, DatasetListItem, DatasetStatus, AnalysisQueuedResponse, AnalysisErrorResponse } from '../../services/api';
 
 // Состояние, которое будет храниться в Redux
 interface DatasetsState {
-    items: Dataset[];
-    currentDataset: Dataset | null;
+    items: DatasetListItem[];       // Компактный список (без проверок и отчётов)
+    nextPageUrl: string | null;     // Ссылка на следующую страницу списка
+    currentDataset: Dataset | null; // Полный датасет для страницы деталей
     loading: boolean;
     error: string | null;
     uploadProgress: number;
@@ -13,6 +14,7 @@ interface DatasetsState {
 // Начальное состояние
 const initialState: DatasetsState = {
     items: [],
+    nextPageUrl: null,
     currentDataset: null,
     loading: false,
     error: null,
@@ -28,7 +30,7 @@ export const fetchDatasets = createAsyncThunk(
     async (_, { rejectWithValue }) => {
         try {
             const response = await datasetsApi.getAll();
-            return response.data; // Массив Dataset[]
+            return response.data; // Первая страница: { next, previous, results }
         } catch (error: any) {
             // Возвращаем ошибку в формате, понятном для Redux
             return rejectWithValue(error.response?.data?.detail || error.message);
@@ -36,6 +38,32 @@ export const fetchDatasets = createAsyncThunk(
     }
 );
 
+// 1.1. Thunk для следующей страницы списка
+export const fetchMoreDatasets = createAsyncThunk(
+    'datasets/fetchMore',
+    async (pageUrl: string, { rejectWithValue }) => {
+        try {
+            const response = await datasetsApi.getAll(pageUrl);
+            return response.data;
+        } catch (error: any) {
+            return rejectWithValue(error.response?.data?.detail || error.message);
+        }
+    }
+);
+
+// 1.2. Thunk для полного датасета (с проверками и отчётом) - страница деталей
+export const fetchDataset = createAsyncThunk(
+    'datasets/fetchOne',
+    async (datasetId: number, { rejectWithValue }) => {
+        try {
+            const response = await datasetsApi.getById(datasetId);
+            return response.data;
+        } catch (error: any) {
+            return rejectWithValue(error.response?.data?.detail || error.message);
+        }
+    }
+);
+
 // 2. Thunk для загрузки нового файла (ОСНОВНОЙ!)
 export const uploadDataset = createAsyncThunk(
     'datasets/upload',
@@ -44,7 +72,10 @@ export const uploadDataset = createAsyncThunk(
             const response = await datasetsApi.uploadFile(payload.file, payload.customName);
             return response.data;
         } catch (error: any) {
-            return rejectWithValue(error.response?.data?.detail || error.message);
+            // Файл, отклонённый при загрузке (не CSV, слишком большой, повреждён): {"csv_file": ["..."]}
+            return rejectWithValue(
+                error.response?.data?.csv_file?.[0] || error.response?.data?.detail || error.message
+            );
         }
     }
 );
@@ -55,8 +86,9 @@ export const analyzeDataset = createAsyncThunk(
     'datasets/analyze',
     async (datasetId: number, { rejectWithValue }) => {
         try {
-            const response = await datasetsApi.analyzeDataset(datasetId);
-            return response.data; // AnalysisSuccessResponse или AnalysisErrorResponse
+            // Сначала быстрая оценка по выборке - её видно, пока идёт полный анализ
+            const response = await datasetsApi.analyzeDataset(datasetId, 'quick');
+            return response.data; // AnalysisQueuedResponse (202) или AnalysisErrorResponse
         } catch (error: any) {
             return rejectWithValue(error.response?.data?.detail || error.message);
         }
@@ -84,7 +116,15 @@ const datasetsSlice = createSlice({
         updateDataset: (state, action: PayloadAction<Dataset>) => {
             const index = state.items.findIndex(d => d.id === action.payload.id);
             if (index !== -1) {
-                state.items[index] = action.payload;
+                state.items[index] = {
+                    ...state.items[index],
+                    status: action.payload.status,
+                    issues_count: action.payload.report?.issues_count ?? null,
+                    row_count: action.payload.row_count,
+                    column_count: action.payload.column_count,
+                    missing_percentage: action.payload.missing_percentage,
+                    duplicate_percentage: action.payload.duplicate_percentage,
+                };
             }
             // Также обновляем currentDataset если он активен
             if (state.currentDataset?.id === action.payload.id) {
@@ -102,13 +142,43 @@ const datasetsSlice = createSlice({
             })
             .addCase(fetchDatasets.fulfilled, (state, action) => {
                 state.loading = false;
-                state.items = action.payload;
+                state.items = action.payload.results;
+                state.nextPageUrl = action.payload.next;
             })
             .addCase(fetchDatasets.rejected, (state, action) => {
                 state.loading = false;
                 state.error = action.payload as string || 'Ошибка загрузки датасетов';
             })
 
+            // ========== fetchMoreDatasets ==========
+            .addCase(fetchMoreDatasets.pending, (state) => {
+                state.loading = true;
+                state.error = null;
+            })
+            .addCase(fetchMoreDatasets.fulfilled, (state, action) => {
+                state.loading = false;
+                state.items.push(...action.payload.results);
+                state.nextPageUrl = action.payload.next;
+            })
+            .addCase(fetchMoreDatasets.rejected, (state, action) => {
+                state.loading = false;
+                state.error = action.payload as string || 'Ошибка загрузки датасетов';
+            })
+
+            // ========== fetchDataset ==========
+            .addCase(fetchDataset.pending, (state) => {
+                state.loading = true;
+                state.error = null;
+            })
+            .addCase(fetchDataset.fulfilled, (state, action) => {
+                state.loading = false;
+                state.currentDataset = action.payload;
+            })
+            .addCase(fetchDataset.rejected, (state, action) => {
+                state.loading = false;
+                state.error = action.payload as string || 'Ошибка загрузки датасета';
+            })
+
             // ========== uploadDataset ==========
             .addCase(uploadDataset.pending, (state) => {
                 state.loading = true;
@@ -136,15 +206,16 @@ const datasetsSlice = createSlice({
             })
             .addCase(analyzeDataset.fulfilled, (state, action) => {
                 state.loading = false;
-                // Обновляем статус датасета, если анализ запущен успешно
-                const successResponse = action.payload as AnalysisSuccessResponse;
-                if (state.currentDataset && state.currentDataset.id === successResponse.dataset_id) {
-                    state.currentDataset.status = 'completed';
+                // Анализ поставлен в очередь - датасет в обработке,
+                // итоговый статус подтянет опрос в DatasetDetails
+                const queuedResponse = action.payload as AnalysisQueuedResponse;
+                if (state.currentDataset && state.currentDataset.id === queuedResponse.dataset_id) {
+                    state.currentDataset.status = 'processing';
                 }
                 // Также можно обновить датасет в списке
-                const index = state.items.findIndex(d => d.id === successResponse.dataset_id);
+                const index = state.items.findIndex(d => d.id === queuedResponse.dataset_id);
                 if (index !== -1) {
-                    state.items[index].status = 'completed';
+                    state.items[index].status = 'processing';
                 }
             })
             .addCase(analyzeDataset.rejected, (state, action) => {
@@ -28,10 +28,56 @@ export interface Dataset {
     status_display: string;
     checks: DataCheck[];
     report: Report | null;
-    // Возможные дополнительные поля:
-    // rows_count?: number;
-    // file_size?: number;
-    // columns?: string[];
+    progress?: DatasetProgressState;
+    // Размеры считаются при загрузке, до анализа (null - старые датасеты)
+    row_count: number | null;
+    column_count: number | null;
+    file_size: number | null;
+    // Главные цифры анализа (null - анализа ещё не было)
+    missing_cells: number | null;
+    missing_percentage: number | null;
+    duplicate_rows: number | null;
+    duplicate_percentage: number | null;
+}
+
+// Компактный датасет из списка GET /api/datasets/ (DatasetListSerializer).
+// checks и report приходят только при ?expand=checks,report
+export interface DatasetListItem {
+    id: number;
+    name: string;
+    status: DatasetStatus;
+    uploaded_at: string;
+    issues_count?: number | null; // null - анализа ещё не было
+    row_count: number | null;
+    column_count: number | null;
+    missing_percentage: number | null;
+    duplicate_percentage: number | null;
+    checks?: DataCheck[];
+    report?: Report | null;
+}
+
+// Страница курсорной пагинации DRF
+export interface PaginatedResponse<T> {
+    next: string | null;        // Полный URL следующей страницы
+    previous: string | null;
+    results: T[];
+}
+
+// Прогресс анализа (Dataset.progress на бэкенде, см. data_quality/progress.py)
+export type AnalysisPhase =
+    'queued' | 'loading' | 'missing' | 'duplicates' | 'statistics' | 'saving' | 'completed' | 'failed';
+
+export interface DatasetProgressState {
+    phase?: AnalysisPhase;
+    percent?: number;
+    rows_processed?: number | null;
+    total_rows?: number | null;  // В потоковом режиме - оценка по размеру файла
+}
+
+// Ответ long-poll GET /api/datasets/{id}/progress/
+export interface DatasetProgress extends DatasetProgressState {
+    dataset_id: number;
+    status: DatasetStatus;
 }
 
 export type CheckType = 'missing' | 'duplicates' | 'statistics';
@@ -63,6 +109,118 @@ export interface AnalysisSuccessResponse {
     dataset?: Dataset;          // Возможно возвращается обновлённый датасет
 }
 
+// Ответ 202: анализ поставлен в фоновую очередь
+export interface AnalysisQueuedResponse {
+    status: 'queued';
+    message: string;
+    dataset_id: number;
+    job_id: number;
+    job_status: AnalysisJobStatus;
+    job_url: string;
+    progress_url: string;
+    // Только для ?mode=quick: оценка по выборке строк (null - оценить не удалось)
+    preview?: AnalysisPreview | null;
+}
+
+// Режим quick (см. backend/data_quality/sampling.py): те же проверки missing и statistics,
+// но посчитанные по выборке строк, с 95% доверительными интервалами
+export interface SampleEstimate {
+    estimated?: boolean;
+    sample_rows?: number;
+    confidence_level?: number;
+    confidence_intervals?: Record<string, any>;
+}
+
+export interface AnalysisPreview {
+    missing: Record<string, any> & SampleEstimate;
+    statistics: Record<string, any> & SampleEstimate;
+}
+
+export type AnalysisMode = 'full' | 'streaming' | 'quick';
+
+// Строки файла постранично (GET /api/datasets/{id}/rows/, см. backend/data_quality/row_index.py).
+// row - номер строки данных с нуля, values - значения в порядке columns (пропуск - null)
+export type RowFilter = 'missing' | 'duplicate';
+
+export interface DatasetRowsQuery {
+    offset?: number;
+    limit?: number;
+    columns?: string[];
+    filter?: RowFilter;
+}
+
+export interface DatasetRows {
+    dataset_id: number;
+    columns: string[];
+    filter: RowFilter | null;
+    offset: number;
+    limit: number;
+    total: number;
+    next_offset: number | null;
+    rows: { row: number; values: (string | null)[] }[];
+}
+
+// Замеры анализов по фазам (GET /api/datasets/{id}/profile/, см. backend/data_quality/instrumentation.py)
+export interface AnalysisPhaseTiming {
+    name: string;
+    wall_seconds: number;
+    cpu_seconds: number;
+    peak_rss_bytes: number | null;
+    rows: number | null;
+    rows_per_second: number | null;
+}
+
+export interface AnalysisRun {
+    id: number;
+    job: number | null;
+    mode: AnalysisMode;
+    outcome: 'completed' | 'stale' | 'failed';
+    outcome_display: string;
+    from_cache: boolean;
+    total_rows: number | null;
+    wall_seconds: number;
+    cpu_seconds: number;
+    peak_rss_bytes: number | null;
+    error: string;
+    started_at: string;
+    phases: AnalysisPhaseTiming[];
+}
+
+export interface ProfileArtifact {
+    id: number;
+    kind: 'analysis' | 'request';
+    label: string;
+    run: number | null;
+    wall_seconds: number;
+    samples: number;
+    interval_ms: number;
+    folded_file: string;
+    created_at: string;
+}
+
+export interface DatasetProfile {
+    dataset_id: number;
+    runs: AnalysisRun[];
+    artifacts: ProfileArtifact[];
+}
+
+export type AnalysisJobStatus = 'queued' | 'running' | 'completed' | 'failed';
+
+export interface AnalysisJob {
+    id: number;
+    dataset: number;
+    status: AnalysisJobStatus;
+    status_display: string;
+    options: Record<string, any>;
+    attempts: number;
+    max_attempts: number;
+    error: string;
+    created_at: string;
+    started_at: string | null;
+    heartbeat_at: string | null;
+    finished_at: string | null;
+}
+
 export interface AnalysisErrorResponse {
     status: 'error';
     message: string;
@@ -71,15 +229,16 @@ export interface AnalysisErrorResponse {
     error_code?: string;
 }
 
-export type AnalysisResponse = AnalysisSuccessResponse | AnalysisErrorResponse;
+export type AnalysisResponse = AnalysisQueuedResponse | AnalysisSuccessResponse | AnalysisErrorResponse;
 
 // ===================== API МЕТОДЫ =====================
 // Все методы используют конфигурацию из config/api.ts
 
 export const datasetsApi = {
-    // 1. Получить список всех датасетов
-    getAll: (): Promise<AxiosResponse<Dataset[]>> =>
-        api.get(getEndpoint('DATASETS')),
+    // 1. Получить страницу списка датасетов (компактно, сначала новые).
+    // pageUrl - ссылка next из предыдущей страницы
+    getAll: (pageUrl?: string): Promise<AxiosResponse<PaginatedResponse<DatasetListItem>>> =>
+        api.get(pageUrl || getEndpoint('DATASETS')),
 
     // 2. Получить конкретный датасет по ID
     getById: (id: number): Promise<AxiosResponse<Dataset>> =>
@@ -107,9 +266,34 @@ export const datasetsApi = {
         });
     },
 
-    // 4. Запустить анализ датасета
-    analyzeDataset: (id: number): Promise<AxiosResponse<AnalysisResponse>> =>
-        api.post(getEndpoint('ANALYZE_DATASET', id)),
+    // 4. Запустить анализ датасета (ставится в фоновую очередь, ответ 202).
+    // mode='quick' - сразу вернуть оценку по выборке, полный анализ её потом заменит
+    analyzeDataset: (id: number, mode?: AnalysisMode): Promise<AxiosResponse<AnalysisResponse>> =>
+        api.post(getEndpoint('ANALYZE_DATASET', id), null, { params: mode ? { mode } : undefined }),
+
+    // 4.1. Статус задачи анализа из очереди
+    getAnalysisJob: (jobId: number): Promise<AxiosResponse<AnalysisJob>> =>
+        api.get(getEndpoint('ANALYSIS_JOB_BY_ID', jobId)),
+
+    // 4.2. Прогресс анализа (long-poll): с etag из прошлого ответа сервер держит
+    // запрос, пока прогресс не изменится, и отвечает 304, если изменений не было
+    getProgress: (id: number, etag?: string | null): Promise<AxiosResponse<DatasetProgress>> =>
+        api.get(getEndpoint('DATASET_PROGRESS', id), {
+            headers: etag ? { 'If-None-Match': etag } : {},
+            // Запрос висит до 25 секунд на сервере - таймаут должен быть больше
+            timeout: API_CONFIG.REQUEST_CONFIG.LONG_POLL_TIMEOUT,
+            validateStatus: (status) => status === 200 || status === 304,
+        }),
+
+    // 4.3. Страница строк файла (409 - индекс строк ещё не построен, нужен анализ)
+    getRows: (id: number, query: DatasetRowsQuery = {}): Promise<AxiosResponse<DatasetRows>> =>
+        api.get(getEndpoint('DATASET_ROWS', id), {
+            params: { ...query, columns: query.columns?.join(',') },
+        }),
+
+    // 4.4. Замеры последних анализов: время, процессор и память по фазам
+    getProfile: (id: number, limit?: number): Promise<AxiosResponse<DatasetProfile>> =>
+        api.get(getEndpoint('DATASET_PROFILE', id), { params: limit ? { limit } : undefined }),
 
     // 5. Удалить датасет
     deleteDataset: (id: number): Promise<AxiosResponse<void>> =>